@@ -0,0 +1,253 @@
+#!/usr/bin/env node
+/**
+ * Executor Worker - long-lived Li.Fi / Solana executor for Python integration
+ *
+ * Replaces one `node` process per swap / derivation: Node startup, module
+ * loading, SDK init and RPC connections are paid once per worker.
+ *
+ * Protocol: line-delimited JSON-RPC over stdio.
+ *   stdin:  {"id": 1, "method": "lifi.execute", "params": {...}}
+ *   stdout: {"id": 1, "result": {...}}  or  {"id": 1, "error": "message"}
+ * Requests are handled concurrently; responses carry the request id and may
+ * arrive out of order. All logging goes to stderr (stdout is protocol only).
+ *
+ * Methods:
+ *   ping                    -> {"ok": true, "pid": ...}
+ *   lifi.execute            -> lifi_executor.mjs result (same input/output as the CLI)
+ *   solana.deriveAddress    {privateKey} -> {"address": "..."}
+ *   solana.tokenDecimals    {rpcUrl, mint} -> JSSolanaClient.get_token_decimals result
+ *   solana.jupiterSwap      {rpcUrl, privateKey, inputMint, outputMint, amount, slippageBps}
+ *                           -> JSSolanaClient.execute_jupiter_swap result
+ *   solana.transfer         {rpcUrl, privateKey, toPubkey, lamports}
+ *                           -> JSSolanaClient.execute_transfer result
+ *
+ * Supervised by src/trading/executor_worker.py.
+ */
+
+import { createInterface } from 'node:readline'
+
+// stdout carries protocol lines only (dotenv / [LiFi] diagnostics go to stderr)
+console.log = (...args) => console.error(...args)
+console.info = (...args) => console.error(...args)
+
+const send = (message) => {
+  process.stdout.write(JSON.stringify(message) + '\n')
+}
+
+// Modules are loaded on first use so `ping` works before any SDK init
+let lifiModule = null
+const lifi = async () => {
+  if (!lifiModule) lifiModule = await import('./lifi_executor.mjs')
+  return lifiModule
+}
+
+let web3Module = null
+const web3 = async () => {
+  if (!web3Module) web3Module = await import('@solana/web3.js')
+  return web3Module
+}
+
+let bs58Module = null
+const bs58 = async () => {
+  if (!bs58Module) bs58Module = (await import('bs58')).default
+  return bs58Module
+}
+
+// RPC connections and keypairs are reused across requests
+const connections = new Map()
+const getConnection = async (rpcUrl) => {
+  if (!connections.has(rpcUrl)) {
+    const { Connection } = await web3()
+    connections.set(rpcUrl, new Connection(rpcUrl))
+  }
+  return connections.get(rpcUrl)
+}
+
+const keypairs = new Map()
+const getKeypair = async (privateKey) => {
+  if (!keypairs.has(privateKey)) {
+    const { Keypair } = await web3()
+    keypairs.set(privateKey, Keypair.fromSecretKey((await bs58()).decode(privateKey)))
+  }
+  return keypairs.get(privateKey)
+}
+
+const lifiExecute = async (input) => {
+  const { executeSwap, executeBridge } = await lifi()
+  return input.action === 'bridge' ? executeBridge(input) : executeSwap(input)
+}
+
+const deriveAddress = async ({ privateKey }) => {
+  const wallet = await getKeypair(privateKey)
+  return { address: wallet.publicKey.toString() }
+}
+
+const tokenDecimals = async ({ rpcUrl, mint }) => {
+  const { PublicKey } = await web3()
+  try {
+    const connection = await getConnection(rpcUrl)
+    // SPL and Token-2022 mints both store decimals at offset 44
+    const accountInfo = await connection.getAccountInfo(new PublicKey(mint))
+    if (accountInfo && accountInfo.data.length >= 45) {
+      return {
+        success: true,
+        decimals: accountInfo.data.readUInt8(44),
+        mint,
+        isToken2022: !accountInfo.owner.equals(new PublicKey('TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA')),
+      }
+    }
+    throw new Error('Account not found or invalid')
+  } catch (error) {
+    // Only default to 9 if we truly can't determine decimals
+    if (error.message.includes('could not find account') ||
+        error.message.includes('Account does not exist') ||
+        error.message === '' ||
+        error.message.includes('Account not found')) {
+      return {
+        success: true,
+        decimals: 9,
+        mint,
+        isToken2022: false,
+        warning: 'Defaulted to 9 decimals - could not determine actual decimals',
+      }
+    }
+    return { success: false, error: error.message }
+  }
+}
+
+const jupiterSwap = async ({ rpcUrl, privateKey, inputMint, outputMint, amount, slippageBps = 50 }) => {
+  try {
+    const { VersionedTransaction } = await web3()
+    const wallet = await getKeypair(privateKey)
+    const connection = await getConnection(rpcUrl)
+
+    const quoteParams = new URLSearchParams({
+      inputMint,
+      outputMint,
+      amount: String(amount),
+      slippageBps: String(slippageBps),
+      onlyDirectRoutes: 'false',
+      asLegacyTransaction: 'false',
+    })
+    const quoteResponse = await fetch(`https://lite-api.jup.ag/swap/v1/quote?${quoteParams}`)
+    const quote = await quoteResponse.json()
+    if (!quoteResponse.ok || !quote || quote.error) {
+      throw new Error(quote?.error || 'Invalid quote response')
+    }
+
+    const swapResponse = await fetch('https://lite-api.jup.ag/swap/v1/swap', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        quoteResponse: quote,
+        userPublicKey: wallet.publicKey.toString(),
+        wrapAndUnwrapSol: true,
+        useSharedAccounts: false,
+        prioritizationFeeLamports: 'auto',
+        asLegacyTransaction: false,
+      }),
+    })
+    const swap = await swapResponse.json()
+    if (!swapResponse.ok || !swap || swap.error) {
+      throw new Error(swap?.error || 'Invalid swap response')
+    }
+
+    const transaction = VersionedTransaction.deserialize(Buffer.from(swap.swapTransaction, 'base64'))
+    transaction.sign([wallet])
+    const signature = await connection.sendTransaction(transaction, {
+      skipPreflight: false,
+      preflightCommitment: 'processed',
+    })
+    const confirmation = await connection.confirmTransaction(signature, 'confirmed')
+    if (confirmation.value.err) {
+      throw new Error(`Transaction failed: ${confirmation.value.err}`)
+    }
+
+    return {
+      success: true,
+      signature,
+      inputAmount: quote.inAmount,
+      outputAmount: quote.outAmount,
+      priceImpact: quote.priceImpactPct,
+    }
+  } catch (error) {
+    return { success: false, error: error.message }
+  }
+}
+
+const transfer = async ({ rpcUrl, privateKey, toPubkey, lamports }) => {
+  try {
+    const { PublicKey, SystemProgram, TransactionMessage, VersionedTransaction } = await web3()
+    const wallet = await getKeypair(privateKey)
+    const connection = await getConnection(rpcUrl)
+
+    const { blockhash } = await connection.getLatestBlockhash()
+    const instruction = SystemProgram.transfer({
+      fromPubkey: wallet.publicKey,
+      toPubkey: new PublicKey(toPubkey),
+      lamports: BigInt(lamports),
+    })
+    const transaction = new VersionedTransaction(
+      new TransactionMessage({
+        payerKey: wallet.publicKey,
+        recentBlockhash: blockhash,
+        instructions: [instruction],
+      }).compileToV0Message()
+    )
+    transaction.sign([wallet])
+    const signature = await connection.sendTransaction(transaction, {
+      skipPreflight: false,
+      preflightCommitment: 'processed',
+    })
+    const confirmation = await connection.confirmTransaction(signature, 'confirmed')
+    if (confirmation.value.err) {
+      throw new Error(`Transaction failed: ${confirmation.value.err}`)
+    }
+
+    return { success: true, signature }
+  } catch (error) {
+    return { success: false, error: error.message }
+  }
+}
+
+const METHODS = {
+  ping: async () => ({ ok: true, pid: process.pid }),
+  'lifi.execute': lifiExecute,
+  'solana.deriveAddress': deriveAddress,
+  'solana.tokenDecimals': tokenDecimals,
+  'solana.jupiterSwap': jupiterSwap,
+  'solana.transfer': transfer,
+}
+
+const handle = async (line) => {
+  let request
+  try {
+    request = JSON.parse(line)
+  } catch (error) {
+    console.error(`[worker] invalid request line: ${line.slice(0, 200)}`)
+    return
+  }
+  const { id, method, params } = request
+  const fn = METHODS[method]
+  if (!fn) {
+    send({ id, error: `Unknown method: ${method}` })
+    return
+  }
+  try {
+    send({ id, result: await fn(params || {}) })
+  } catch (error) {
+    send({ id, error: error?.message || String(error) })
+  }
+}
+
+const rl = createInterface({ input: process.stdin, crlfDelay: Infinity })
+rl.on('line', (line) => {
+  if (line.trim()) handle(line)
+})
+// Parent closed stdin: finish in-flight requests, then exit
+rl.on('close', () => {
+  process.exitCode = 0
+})
+process.on('unhandledRejection', (error) => {
+  console.error('[worker] unhandled rejection', error)
+})
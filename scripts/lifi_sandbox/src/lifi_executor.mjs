@@ -2,7 +2,8 @@
 /**
  * Li.Fi SDK Executor - Wrapper for Python integration
  * 
- * Accepts JSON input via stdin or command-line args:
+ * Accepts JSON input via stdin or command-line args
+ * (or is imported by executor_worker.mjs, the long-lived JSON-RPC worker):
  * {
  *   "action": "swap" | "bridge",
  *   "chain": "solana" | "ethereum" | "base" | "bsc",
@@ -1093,5 +1094,10 @@ const main = async () => {
   }
 }
 
-main()
+// One-shot CLI unless imported by executor_worker.mjs
+if (process.argv[1] && resolve(process.argv[1]) === __filename) {
+  main()
+}
+
+export { executeSwap, executeBridge }
 
@@ -0,0 +1,261 @@
+"""
+Notification Outbox
+
+Non-blocking delivery of Telegram notifications from the trading path.
+
+PMCoreTick used to start a thread + event loop per notification and wait up to
+10s for it, reconnecting Telethon for every message. Notifications are now
+enqueued (O(1)) and delivered by one long-lived worker per notifier session:
+
+- bounded in-memory queue; when it is full, entries spill to a local JSONL file
+  that is replayed once the queue has room again (also after a restart)
+- the worker owns one event loop and keeps one persistent Telegram client
+- bursts are drained together and identical notifications coalesced
+- failed sends are retried with exponential backoff on a fresh client
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_MAXSIZE = int(os.getenv("NOTIFICATION_OUTBOX_MAXSIZE", "500"))
+OUTBOX_SPILL_DIR = os.getenv("NOTIFICATION_OUTBOX_SPILL_DIR", "logs")
+BURST_SIZE = 50  # entries drained per worker wake-up
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 60.0
+POLL_INTERVAL_S = 1.0
+
+
+class NotificationOutbox:
+    """Bounded queue of notifier calls drained by one long-lived async worker."""
+
+    def __init__(
+        self,
+        notifier: Any,
+        maxsize: int = OUTBOX_MAXSIZE,
+        spill_path: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            notifier: TelegramSignalNotifier (switched to a persistent client)
+            maxsize: In-memory queue bound; overflow spills to spill_path
+            spill_path: JSONL overflow file (default logs/notification_outbox_<session>.jsonl)
+        """
+        self.notifier = notifier
+        if hasattr(notifier, "persistent"):
+            notifier.persistent = True
+        session = os.path.basename(getattr(notifier, "session_file", "") or "default").split(".")[0]
+        self.spill_path = spill_path or os.path.join(OUTBOX_SPILL_DIR, f"notification_outbox_{session}.jsonl")
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Producer side (trading path)
+    # ------------------------------------------------------------------
+
+    def enqueue(self, method: str, description: str = "notification", **kwargs: Any) -> bool:
+        """
+        Queue notifier.<method>(**kwargs) for delivery; never blocks.
+
+        Returns:
+            True if the notification was queued or spilled to disk
+        """
+        entry = {"method": method, "kwargs": kwargs, "description": description, "attempts": 0}
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(entry)
+            logger.info(f"NOTIFICATION QUEUED: {description}")
+            return True
+        except queue.Full:
+            return self._spill([entry])
+
+    def pending(self) -> int:
+        """Entries waiting in memory (spilled entries not included)."""
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the worker; whatever is still queued is spilled for the next start."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        leftover: List[Dict[str, Any]] = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._spill(leftover)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Spill file
+    # ------------------------------------------------------------------
+
+    def _spill(self, entries: List[Dict[str, Any]]) -> bool:
+        try:
+            with self._spill_lock:
+                os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry, default=str) + "\n")
+            logger.warning(f"NOTIFICATION SPILLED: {len(entries)} entries to {self.spill_path}")
+            return True
+        except Exception as e:
+            logger.error(f"NOTIFICATION DROPPED: {len(entries)} entries, spill failed: {e}")
+            return False
+
+    def _replay_spill(self) -> None:
+        """Move spilled entries back into the queue while it has room."""
+        if not os.path.exists(self.spill_path):
+            return
+        with self._spill_lock:
+            try:
+                with open(self.spill_path, "r", encoding="utf-8") as f:
+                    lines = [line for line in f if line.strip()]
+            except Exception as e:
+                logger.error(f"Failed to read notification spill file {self.spill_path}: {e}")
+                return
+            replayed = 0
+            for line in lines:
+                try:
+                    self._queue.put_nowait(json.loads(line))
+                except queue.Full:
+                    break
+                except ValueError:
+                    logger.warning(f"Skipping corrupt notification spill line: {line[:200]}")
+                replayed += 1
+            remaining = lines[replayed:]
+            if remaining:
+                with open(self.spill_path, "w", encoding="utf-8") as f:
+                    f.writelines(remaining)
+            else:
+                os.remove(self.spill_path)
+        if replayed:
+            logger.info(f"Replayed {replayed} spilled notifications ({len(remaining)} left)")
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _take_burst(self) -> List[Dict[str, Any]]:
+        """Wait for the next entry, then drain the burst queued behind it."""
+        self._replay_spill()
+        try:
+            burst = [self._queue.get(timeout=POLL_INTERVAL_S)]
+        except queue.Empty:
+            return []
+        while len(burst) < BURST_SIZE:
+            try:
+                burst.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return coalesce(burst)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._worker())
+        except Exception as e:
+            logger.error(f"Notification outbox worker crashed: {e}", exc_info=True)
+        finally:
+            try:
+                loop.run_until_complete(self.notifier.close())
+            except Exception:
+                pass
+            loop.close()
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            burst = await loop.run_in_executor(None, self._take_burst)
+            for i, entry in enumerate(burst):
+                if self._stop.is_set():
+                    self._spill(burst[i:])
+                    return
+                await self._deliver(entry)
+
+    async def _deliver(self, entry: Dict[str, Any]) -> bool:
+        description = entry.get("description", "notification")
+        while True:
+            ok = False
+            try:
+                ok = bool(await getattr(self.notifier, entry["method"])(**entry["kwargs"]))
+            except Exception as e:
+                logger.error(f"NOTIFICATION ERROR: {description} - {e}", exc_info=True)
+            if ok:
+                logger.info(f"NOTIFICATION SUCCESS: {description}")
+                return True
+            entry["attempts"] = int(entry.get("attempts", 0)) + 1
+            if entry["attempts"] >= MAX_ATTEMPTS:
+                logger.error(f"NOTIFICATION FAILED: {description} (gave up after {entry['attempts']} attempts)")
+                return False
+            # Reconnect on the next attempt
+            try:
+                await self.notifier.close()
+            except Exception:
+                pass
+            delay = min(BACKOFF_BASE_S * 2 ** (entry["attempts"] - 1), BACKOFF_MAX_S)
+            logger.warning(f"NOTIFICATION RETRY: {description} in {delay:.0f}s (attempt {entry['attempts']})")
+            await asyncio.sleep(delay)
+            if self._stop.is_set():
+                self._spill([entry])
+                return False
+
+
+def coalesce(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop repeated identical notifications (same method + arguments), keeping order."""
+    seen = set()
+    out: List[Dict[str, Any]] = []
+    for entry in entries:
+        key = json.dumps([entry.get("method"), entry.get("kwargs")], sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            out.append(entry)
+    return out
+
+
+_OUTBOXES: Dict[str, NotificationOutbox] = {}
+_outboxes_lock = threading.Lock()
+
+
+def get_notification_outbox(notifier: Any) -> NotificationOutbox:
+    """
+    Process-wide outbox per notifier session.
+
+    PMCoreTick is re-created every tick; the first notifier of a session is kept
+    (with its persistent client) and later instances share its outbox.
+    """
+    key = getattr(notifier, "session_file", None) or "default"
+    with _outboxes_lock:
+        outbox = _OUTBOXES.get(key)
+        if outbox is None:
+            outbox = _OUTBOXES[key] = NotificationOutbox(notifier)
+            if os.path.exists(outbox.spill_path):
+                outbox._ensure_worker()  # deliver what a previous run spilled
+        return outbox
+
+
+@atexit.register
+def _stop_all() -> None:
+    for outbox in list(_OUTBOXES.values()):
+        outbox.stop(timeout=5.0)
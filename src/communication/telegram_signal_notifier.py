@@ -31,7 +31,7 @@ class TelegramSignalNotifier:
         }
         return mapping.get(str(stage), str(stage))
     
-    def __init__(self, bot_token: str, channel_id: str, api_id: int, api_hash: str, session_file: str = None, session_id: str = None):
+    def __init__(self, bot_token: str, channel_id: str, api_id: int, api_hash: str, session_file: str = None, session_id: str = None, persistent: bool = False):
         """
         Initialize Telegram Signal Notifier
         
@@ -42,6 +42,8 @@ class TelegramSignalNotifier:
             api_hash: Telegram API Hash (reuse existing)
             session_file: Path to existing session file (deprecated - use session_id instead)
             session_id: Unique session identifier (e.g., timeframe) to avoid database locks
+            persistent: Keep one connected client across messages (only when every send
+                runs on the same event loop, e.g. the notification outbox worker)
         """
         self.bot_token = bot_token
         self.channel_id = channel_id
@@ -54,6 +56,7 @@ class TelegramSignalNotifier:
         else:
             self.session_file = session_file or "src/config/telegram_session.txt"
         self.client = None
+        self.persistent = persistent
         self.supabase_manager = SupabaseManager()
         
         logger.info(f"Telegram Signal Notifier initialized for channel: {channel_id} (session: {self.session_file})")
@@ -153,10 +156,14 @@ class TelegramSignalNotifier:
         Uses bot token to avoid conflicts with TelegramScanner which uses user session.
         This allows both to run simultaneously without session ID conflicts.
         
-        Creates a fresh client for each call to avoid event loop conflicts.
+        Creates a fresh client for each call to avoid event loop conflicts,
+        unless the notifier is persistent (single long-lived event loop).
         """
-        # Always create fresh client to avoid event loop conflicts
-        # Telethon clients are tied to specific event loops, so we create new ones
+        if self.persistent and self.client is not None and self.client.is_connected():
+            return self.client
+        
+        # Telethon clients are tied to specific event loops, so non-persistent
+        # notifiers create a new one per call
         import os
         session_name = os.path.basename(self.session_file).replace('.session', '')
         client = TelegramClient(session_name, self.api_id, self.api_hash)
@@ -165,6 +172,8 @@ class TelegramSignalNotifier:
             if not client.is_connected():
                 await client.start(bot_token=self.bot_token)
             logger.debug("Telegram signal notifier connected using bot token")
+            if self.persistent:
+                self.client = client
             return client
         except Exception as e:
             logger.error(f"Failed to connect Telegram client: {e}")
@@ -916,8 +925,8 @@ class TelegramSignalNotifier:
             logger.error(f"Failed to send Telegram message: {e}")
             return False
         finally:
-            # Always disconnect client to free resources and avoid database locks
-            if client:
+            # Disconnect per-message clients to free resources and avoid database locks
+            if client and not self.persistent:
                 try:
                     await client.disconnect()
                 except Exception as e:
@@ -939,8 +948,9 @@ class TelegramSignalNotifier:
     
     async def close(self):
         """Close Telegram client connection"""
-        if self.client and self.client.is_connected():
-            await self.client.disconnect()
+        client, self.client = self.client, None
+        if client and client.is_connected():
+            await client.disconnect()
             logger.info("Telegram Signal Notifier connection closed")
 
 
@@ -0,0 +1,35 @@
+-- Migration: Add adjust_wallet_balance() for atomic wallet balance changes
+-- Date: 2026-10-16
+-- Purpose: PM executions run concurrently (pm/execution_scheduler.py). The executor
+-- used to read wallet_balances, add the trade's delta and write the row back, so
+-- two concurrent trades could overwrite each other's update. This applies the
+-- delta in one statement. See PMExecutor._update_balance_after_trade.
+-- Safe to drop: the executor falls back to a locked read-modify-write when the function is missing.
+--
+-- p_token: 'USDC' (usdc_balance) or 'native' (balance); balances never go below 0.
+
+CREATE OR REPLACE FUNCTION adjust_wallet_balance(p_chain TEXT, p_token TEXT, p_delta DOUBLE PRECISION)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO wallet_balances (chain, balance, usdc_balance, last_updated)
+    VALUES (
+        lower(p_chain),
+        CASE WHEN lower(p_token) = 'native' THEN GREATEST(0.0, p_delta) ELSE 0.0 END,
+        CASE WHEN upper(p_token) = 'USDC' THEN GREATEST(0.0, p_delta) ELSE 0.0 END,
+        NOW()
+    )
+    ON CONFLICT (chain) DO UPDATE SET
+        usdc_balance = CASE
+            WHEN upper(p_token) = 'USDC' THEN GREATEST(0.0, COALESCE(wallet_balances.usdc_balance, 0.0) + p_delta)
+            ELSE wallet_balances.usdc_balance
+        END,
+        balance = CASE
+            WHEN lower(p_token) = 'native' THEN GREATEST(0.0, wallet_balances.balance + p_delta)
+            ELSE wallet_balances.balance
+        END,
+        last_updated = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION adjust_wallet_balance(TEXT, TEXT, DOUBLE PRECISION) IS
+    'Atomic wallet_balances delta (USDC or native) after a trade. Used by PMExecutor.';
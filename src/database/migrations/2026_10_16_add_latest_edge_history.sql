@@ -0,0 +1,42 @@
+-- Migration: Add latest_edge_history() for the half-life estimator
+-- Date: 2026-10-16
+-- Purpose: Return only the newest p_per_key edge snapshots per
+-- (pattern_key, action_category, scope_signature) for many patterns, so the
+-- weekly half-life run reads a bounded number of rows instead of every
+-- snapshot ever taken. See jobs/half_life_estimator.py.
+-- Safe to drop: the estimator falls back to a time-bounded paged read when the function is missing.
+--
+-- Paged with p_offset / p_limit (PostgREST caps rows per response); the
+-- ORDER BY is total, so pages are stable.
+
+CREATE OR REPLACE FUNCTION latest_edge_history(
+    p_pattern_keys TEXT[],
+    p_per_key INTEGER,
+    p_offset INTEGER DEFAULT 0,
+    p_limit INTEGER DEFAULT 1000
+)
+RETURNS TABLE (
+    pattern_key TEXT,
+    action_category TEXT,
+    scope_signature TEXT,
+    edge_raw DOUBLE PRECISION,
+    ts TIMESTAMPTZ
+) AS $$
+    SELECT h.pattern_key, h.action_category, h.scope_signature, h.edge_raw, h.ts
+    FROM (
+        SELECT e.id, e.pattern_key, e.action_category, e.scope_signature, e.edge_raw, e.ts,
+               row_number() OVER (
+                   PARTITION BY e.pattern_key, e.action_category, e.scope_signature
+                   ORDER BY e.ts DESC, e.id DESC
+               ) AS rn
+        FROM learning_edge_history e
+        WHERE e.pattern_key = ANY(p_pattern_keys)
+    ) h
+    WHERE h.rn <= p_per_key
+    ORDER BY h.pattern_key, h.action_category, h.scope_signature, h.ts DESC, h.id DESC
+    OFFSET p_offset
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION latest_edge_history(TEXT[], INTEGER, INTEGER, INTEGER) IS
+    'Newest p_per_key learning_edge_history rows per pattern/category/scope (paged). Used by half_life_estimator.';
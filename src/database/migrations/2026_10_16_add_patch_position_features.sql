@@ -0,0 +1,54 @@
+-- Migration: Add patch_position_features() for key-level features writes
+-- Date: 2026-10-16
+-- Purpose: Let jobs write only the top-level features keys they own (ta,
+-- uptrend_engine_v4, geometry, ...) for many positions in one call, merged
+-- server-side. Replaces select-features/update-features round trips and the
+-- lost updates between concurrent jobs. See data/features_writer.py.
+-- Safe to drop: FeaturesWriter falls back to read-merge-write when the function is missing.
+--
+-- patches: [{"id": uuid,
+--            "unset": [key, ...],          -- removed first
+--            "set":   {key: value, ...},   -- then replaced
+--            "merge": {key: {...}, ...},   -- then shallow-merged into existing objects
+--            "state": "S3"}]               -- optional state column
+
+CREATE OR REPLACE FUNCTION patch_position_features(patches JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    n INTEGER;
+BEGIN
+    WITH p AS (
+        SELECT
+            (x->>'id')::uuid AS id,
+            COALESCE(x->'set', '{}'::jsonb) AS set_keys,
+            COALESCE(x->'merge', '{}'::jsonb) AS merge_keys,
+            ARRAY(SELECT jsonb_array_elements_text(COALESCE(x->'unset', '[]'::jsonb))) AS unset_keys,
+            NULLIF(x->>'state', '') AS state
+        FROM jsonb_array_elements(patches) AS x
+    )
+    UPDATE lowcap_positions lp
+    SET features = (
+            (COALESCE(lp.features, '{}'::jsonb) - p.unset_keys) || p.set_keys
+        ) || (
+            SELECT COALESCE(jsonb_object_agg(
+                m.key,
+                CASE
+                    WHEN jsonb_typeof(((COALESCE(lp.features, '{}'::jsonb) - p.unset_keys) || p.set_keys) -> m.key) = 'object'
+                         AND jsonb_typeof(m.value) = 'object'
+                    THEN (((COALESCE(lp.features, '{}'::jsonb) - p.unset_keys) || p.set_keys) -> m.key) || m.value
+                    ELSE m.value
+                END
+            ), '{}'::jsonb)
+            FROM jsonb_each(p.merge_keys) AS m
+        ),
+        state = COALESCE(p.state, lp.state)
+    FROM p
+    WHERE lp.id = p.id;
+
+    GET DIAGNOSTICS n = ROW_COUNT;
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION patch_position_features(JSONB) IS
+    'Batched key-level patch of lowcap_positions.features (unset, set, shallow merge) plus optional state. Used by FeaturesWriter.';
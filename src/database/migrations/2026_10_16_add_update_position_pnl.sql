@@ -0,0 +1,43 @@
+-- Migration: Add update_position_pnl() for batched P&L writes
+-- Date: 2026-10-16
+-- Purpose: Write the per-minute P&L recompute (quantity reconciliation, value,
+-- total / realized P&L) for many positions in one call instead of one UPDATE
+-- per position. See pm/portfolio_valuation.py.
+-- Safe to drop: portfolio_valuation falls back to per-row updates when the function is missing.
+--
+-- updates: [{"id": uuid, "total_quantity": n, "current_usd_value": n,
+--            "total_pnl_usd": n, "total_pnl_pct": n, "rpnl_usd": n, "rpnl_pct": n,
+--            "pnl_last_calculated_at": timestamptz}]
+
+CREATE OR REPLACE FUNCTION update_position_pnl(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    n INTEGER;
+BEGIN
+    UPDATE lowcap_positions lp
+    SET total_quantity = u.total_quantity,
+        current_usd_value = u.current_usd_value,
+        total_pnl_usd = u.total_pnl_usd,
+        total_pnl_pct = u.total_pnl_pct,
+        rpnl_usd = u.rpnl_usd,
+        rpnl_pct = u.rpnl_pct,
+        pnl_last_calculated_at = u.pnl_last_calculated_at
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID,
+        total_quantity DOUBLE PRECISION,
+        current_usd_value DOUBLE PRECISION,
+        total_pnl_usd DOUBLE PRECISION,
+        total_pnl_pct DOUBLE PRECISION,
+        rpnl_usd DOUBLE PRECISION,
+        rpnl_pct DOUBLE PRECISION,
+        pnl_last_calculated_at TIMESTAMPTZ
+    )
+    WHERE lp.id = u.id;
+
+    GET DIAGNOSTICS n = ROW_COUNT;
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION update_position_pnl(JSONB) IS
+    'Batched P&L write for lowcap_positions (quantity, value, total/realized P&L). Used by portfolio_valuation.';
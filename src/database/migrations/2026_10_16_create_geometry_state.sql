@@ -0,0 +1,31 @@
+-- Migration: Create geometry_state table for incremental geometry builds
+-- Date: 2026-10-16
+-- Purpose: Persist per-position, per-timeframe geometry state (swing list, S/R
+-- cluster centers and counts, ATH/ATL, last bars) so GeometryBuilder folds only
+-- new bars instead of re-deriving levels from the full bar history every run.
+-- See jobs/geometry_build_daily.py.
+-- Safe to drop: GeometryBuilder falls back to full rebuilds when the table is missing.
+
+CREATE TABLE IF NOT EXISTS geometry_state (
+    position_id UUID NOT NULL REFERENCES lowcap_positions(id) ON DELETE CASCADE,
+    timeframe TEXT NOT NULL,
+
+    -- Serialized state (versioned; unknown versions are ignored and rebuilt)
+    state JSONB NOT NULL,
+
+    -- Timestamp of the last bar folded into state
+    watermark_ts TIMESTAMPTZ NOT NULL,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (position_id, timeframe)
+);
+
+-- GeometryBuilder loads all states for one timeframe per run
+CREATE INDEX IF NOT EXISTS idx_geometry_state_timeframe
+    ON geometry_state(timeframe, position_id);
+
+COMMENT ON TABLE geometry_state IS
+    'Incremental geometry state per position/timeframe. Written by GeometryBuilder; rebuilt automatically on restatements, window roll-off of ATH/ATL, version changes and every GEOM_FULL_REBUILD_HOURS.';
+COMMENT ON COLUMN geometry_state.watermark_ts IS
+    'Timestamp of the last OHLC bar folded into state.';
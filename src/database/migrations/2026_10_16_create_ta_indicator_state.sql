@@ -0,0 +1,30 @@
+-- Migration: Create ta_indicator_state table for incremental TA tracking
+-- Date: 2026-10-16
+-- Purpose: Persist per-position, per-timeframe indicator state (EMA values, Wilder
+-- accumulators, VO_z EWMA moments, bar watermark) so TATracker folds only new bars
+-- instead of recomputing 1000 bars every tick. See jobs/ta_state.py.
+-- Safe to drop: TATracker falls back to full recompute when the table is missing.
+
+CREATE TABLE IF NOT EXISTS ta_indicator_state (
+    position_id UUID NOT NULL REFERENCES lowcap_positions(id) ON DELETE CASCADE,
+    timeframe TEXT NOT NULL,
+
+    -- Serialized TAState (versioned; unknown versions are ignored and rebuilt)
+    state JSONB NOT NULL,
+
+    -- Timestamp of the last bar folded into state
+    watermark_ts TIMESTAMPTZ NOT NULL,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (position_id, timeframe)
+);
+
+-- TATracker loads all states for one timeframe per run
+CREATE INDEX IF NOT EXISTS idx_ta_indicator_state_timeframe
+    ON ta_indicator_state(timeframe, position_id);
+
+COMMENT ON TABLE ta_indicator_state IS
+    'Incremental TA state per position/timeframe. Written by TATracker; rebuilt automatically on gaps, restatements or version changes.';
+COMMENT ON COLUMN ta_indicator_state.watermark_ts IS
+    'Timestamp of the last OHLC bar folded into state. New bars are fetched with timestamp >= watermark_ts.';
@@ -15,6 +15,7 @@ from datetime import datetime, timezone
 from intelligence.universal_learning.coefficient_reader import CoefficientReader
 from intelligence.universal_learning.bucket_vocabulary import BucketVocabulary
 from src.intelligence.lowcap_portfolio_manager.regime.bucket_context import fetch_bucket_phase_snapshot
+from src.intelligence.lowcap_portfolio_manager.regime.regime_snapshot import get_regime_snapshot
 from src.intelligence.lowcap_portfolio_manager.jobs.regime_ae_calculator import BUCKET_DRIVERS
 
 logger = logging.getLogger(__name__)
@@ -86,29 +87,8 @@ class DecisionMakerLowcapSimple:
         default_state = {"macro": "S4", "meso": "S4", "micro": "S4"}
         if not driver:
             return default_state
-        tf_mapping = {"macro": "1d", "meso": "1h", "micro": "1m"}
         try:
-            states: Dict[str, str] = {}
-            for horizon, pos_tf in tf_mapping.items():
-                result = (
-                    self.supabase_manager.client.table("lowcap_positions")
-                    .select("state, features")
-                    .eq("status", "regime_driver")
-                    .eq("token_ticker", driver)
-                    .eq("timeframe", pos_tf)
-                    .order("updated_at", desc=True)
-                    .limit(1)
-                    .execute()
-                )
-                if result.data:
-                    row = result.data[0]
-                    features = row.get("features") or {}
-                    uptrend = features.get("uptrend_engine_v4") or {}
-                    state = uptrend.get("state") or row.get("state", "S4")
-                    states[horizon] = str(state)
-                else:
-                    states[horizon] = "S4"
-            return states
+            return get_regime_snapshot(self.supabase_manager.client).horizon_states(driver)
         except Exception as e:
             self.logger.warning(f"Error fetching regime states for driver {driver}: {e}")
             return default_state
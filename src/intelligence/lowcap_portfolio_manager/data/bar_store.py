@@ -0,0 +1,382 @@
+"""
+BarStore - local columnar cache of closed OHLC bars.
+
+Closed bars never change, so PriceDataReader keeps a copy on disk and only
+asks the database for the tail past the cache watermark.
+
+Layout (one directory per venue table / timeframe / token, one file per UTC day):
+
+    {root}/{table}/{timeframe}/{chain}/{contract}/2025-01-31.npy
+    {root}/{table}/{timeframe}/{chain}/{contract}/_meta.json
+
+Each partition is a float64 array of shape (6, n) - one contiguous column per
+field (ts epoch seconds, open, high, low, close, volume) - opened with
+np.load(mmap_mode="r"). Partitions are replaced atomically (write a uniquely
+named temp file, os.replace), so readers never see a half-written file.
+
+Writers of the same token (threads or processes sharing BAR_STORE_DIR) are
+serialized by a per-token lock file under {root}/.locks; readers take no lock.
+If a partition can't be read, the token's coverage is dropped and read()
+raises BarStoreCorrupt, so callers fall back to the database instead of
+serving a short series.
+
+_meta.json records the contiguous range the cache is known to hold:
+    first      - oldest cached bar (epoch seconds)
+    watermark  - newest cached bar (epoch seconds)
+    complete   - True if nothing older than `first` exists in the database
+
+Only settled bars (older than SETTLE_BARS bar lengths) are cached, so a bar
+that is still being rolled up is always read from the database.
+
+Enabled by setting BAR_STORE_DIR. Backfills that rewrite history must call
+invalidate_bar_store() for the affected token.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: in-process locking only
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Column order inside a partition
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = 0, 1, 2, 3, 4, 5
+N_COLS = 6
+
+# Bars this close to "now" may still be restated by rollups - never cache them
+SETTLE_BARS = 2
+
+META_FILE = "_meta.json"
+LOCK_DIR = ".locks"
+
+# token dir -> in-process lock (the lock file covers other processes)
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+class BarStoreCorrupt(RuntimeError):
+    """A cached partition could not be read; the token's coverage was dropped."""
+
+
+def _safe(name: str) -> str:
+    return quote(str(name), safe="")
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def rows_to_columns(rows: List[Dict[str, Any]]) -> np.ndarray:
+    """Normalized OHLC rows (PriceDataReader format) -> (6, n) column block."""
+    cols = np.empty((N_COLS, len(rows)), dtype=np.float64)
+    for i, r in enumerate(rows):
+        ts = datetime.fromisoformat(str(r["timestamp"]).replace("Z", "+00:00"))
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        cols[:, i] = (
+            ts.timestamp(),
+            float(r.get("open_usd") or 0.0),
+            float(r.get("high_usd") or 0.0),
+            float(r.get("low_usd") or 0.0),
+            float(r.get("close_usd") or 0.0),
+            float(r.get("volume") or 0.0),
+        )
+    return cols
+
+
+def _atomic_write(path: Path, write: Callable[[Any], None], mode: str = "wb") -> None:
+    """Write via a uniquely named temp file in the same directory, then os.replace."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def columns_to_rows(cols: np.ndarray, contract: str, chain: str) -> List[Dict[str, Any]]:
+    """(6, n) column block -> normalized OHLC rows (PriceDataReader format)."""
+    out: List[Dict[str, Any]] = []
+    for ts, o, h, l, c, v in zip(*(cols[k].tolist() for k in range(N_COLS))):
+        out.append({
+            "token_contract": contract,
+            "chain": chain,
+            "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+            "open_usd": o,
+            "high_usd": h,
+            "low_usd": l,
+            "close_usd": c,
+            "volume": v,
+        })
+    return out
+
+
+class BarStore:
+    """Append-only, memory-mapped columnar bar cache partitioned by token and day."""
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    @classmethod
+    def from_env(cls) -> Optional["BarStore"]:
+        """Store rooted at BAR_STORE_DIR, or None when the cache is disabled."""
+        root = os.getenv("BAR_STORE_DIR", "")
+        return cls(root) if root else None
+
+    # ------------------------------------------------------------------
+    # Paths / meta
+    # ------------------------------------------------------------------
+    def _token_dir(self, table: str, timeframe: str, chain: str, contract: str) -> Path:
+        return self.root / _safe(table) / _safe(timeframe) / _safe(chain.lower()) / _safe(contract)
+
+    def meta(self, table: str, timeframe: str, chain: str, contract: str) -> Optional[Dict[str, Any]]:
+        """Coverage metadata for a token, or None if nothing is cached."""
+        path = self._token_dir(table, timeframe, chain, contract) / META_FILE
+        try:
+            with open(path, "r") as f:
+                meta = json.load(f)
+            if meta.get("watermark") is None or meta.get("first") is None:
+                return None
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, token_dir: Path, meta: Dict[str, Any]) -> None:
+        _atomic_write(token_dir / META_FILE, lambda f: json.dump(meta, f), mode="w")
+
+    @contextmanager
+    def _token_lock(self, token_dir: Path) -> Iterator[None]:
+        """Exclusive lock on one token's cache (threads in-process, flock across processes)."""
+        key = str(token_dir)
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(key, threading.Lock())
+        lock_path = self.root / LOCK_DIR / token_dir.relative_to(self.root)
+        with lock:
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(lock_path.with_name(lock_path.name + ".lock"), "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                yield
+
+    def _drop_coverage(self, token_dir: Path) -> None:
+        """Forget what the cache holds for a token (meta first, so no reader trusts the partitions)."""
+        try:
+            (token_dir / META_FILE).unlink()
+        except OSError:
+            pass
+        self._clear_partitions(token_dir)
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+    def read(
+        self,
+        table: str,
+        timeframe: str,
+        chain: str,
+        contract: str,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Cached bars with start_ts <= ts <= end_ts (either bound optional).
+
+        Returns:
+            (6, n) float64 column block, chronological
+
+        Raises:
+            BarStoreCorrupt: A partition in the range could not be read (the
+                token's coverage is dropped; read the database instead)
+        """
+        token_dir = self._token_dir(table, timeframe, chain, contract)
+        if not token_dir.is_dir():
+            return np.empty((N_COLS, 0), dtype=np.float64)
+        lo_day = _day(start_ts) if start_ts is not None else None
+        hi_day = _day(end_ts) if end_ts is not None else None
+        parts: List[np.ndarray] = []
+        for path in sorted(token_dir.glob("*.npy")):
+            day = path.stem
+            if (lo_day and day < lo_day) or (hi_day and day > hi_day):
+                continue
+            try:
+                block = np.load(path, mmap_mode="r")
+            except FileNotFoundError:
+                # Replaced or cleared by a concurrent writer
+                raise BarStoreCorrupt(f"{path} disappeared during read")
+            except (OSError, ValueError) as e:
+                logger.warning("Bar store partition %s unreadable, dropping coverage: %s", path, e)
+                with self._token_lock(token_dir):
+                    self._drop_coverage(token_dir)
+                raise BarStoreCorrupt(str(path)) from e
+            ts = block[TS]
+            mask = np.ones(ts.shape[0], dtype=bool)
+            if start_ts is not None:
+                mask &= ts >= start_ts
+            if end_ts is not None:
+                mask &= ts <= end_ts
+            parts.append(np.asarray(block[:, mask]))
+        if not parts:
+            return np.empty((N_COLS, 0), dtype=np.float64)
+        return np.concatenate(parts, axis=1)
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+    def write(
+        self,
+        table: str,
+        timeframe: str,
+        chain: str,
+        contract: str,
+        cols: np.ndarray,
+        covered_from: Optional[float],
+        complete: bool = False,
+    ) -> None:
+        """
+        Merge bars into the cache.
+
+        Args:
+            cols: (6, n) column block, chronological, settled bars only
+            covered_from: The database holds no bars in [covered_from, cols[-1].ts]
+                other than those in cols (i.e. the query range was complete)
+            complete: cols start at the token's first bar in the database
+        """
+        if cols.shape[1] == 0:
+            return
+        token_dir = self._token_dir(table, timeframe, chain, contract)
+        token_dir.mkdir(parents=True, exist_ok=True)
+        with self._token_lock(token_dir):
+            self._write_locked(token_dir, table, timeframe, chain, contract, cols, covered_from, complete)
+
+    def _write_locked(
+        self,
+        token_dir: Path,
+        table: str,
+        timeframe: str,
+        chain: str,
+        contract: str,
+        cols: np.ndarray,
+        covered_from: Optional[float],
+        complete: bool,
+    ) -> None:
+        new_first = float(cols[TS, 0]) if covered_from is None else min(float(covered_from), float(cols[TS, 0]))
+        new_last = float(cols[TS, -1])
+        meta = self.meta(table, timeframe, chain, contract)
+        if meta and new_last < float(meta["first"]):
+            # Older than what we hold and not adjacent - keep the newer coverage
+            return
+        if meta and new_first <= float(meta["watermark"]):
+            first = min(float(meta["first"]), float(cols[TS, 0]))
+            watermark = max(float(meta["watermark"]), new_last)
+            complete = complete or (bool(meta.get("complete")) and first == float(meta["first"]))
+        else:
+            # Newer than what we hold with a hole in between - start over
+            if meta:
+                self._drop_coverage(token_dir)
+            first = float(cols[TS, 0])
+            watermark = new_last
+
+        days = [_day(t) for t in cols[TS].tolist()]
+        try:
+            for day in sorted(set(days)):
+                idx = [i for i, d in enumerate(days) if d == day]
+                self._merge_partition(token_dir / f"{day}.npy", cols[:, idx])
+        except BarStoreCorrupt as e:
+            logger.warning("Bar store partition unreadable, dropping coverage for %s: %s", contract, e)
+            self._drop_coverage(token_dir)
+            return
+
+        self._write_meta(token_dir, {"first": first, "watermark": watermark, "complete": complete})
+
+    def _merge_partition(self, path: Path, cols: np.ndarray) -> None:
+        if path.exists():
+            try:
+                existing = np.load(path)
+            except (OSError, ValueError) as e:
+                # Rewriting it with only the new bars would silently lose the rest
+                raise BarStoreCorrupt(str(path)) from e
+            keep = ~np.isin(existing[TS], cols[TS])
+            cols = np.concatenate([existing[:, keep], cols], axis=1)
+        order = np.argsort(cols[TS], kind="stable")
+        cols = np.ascontiguousarray(cols[:, order])
+        _atomic_write(path, lambda f: np.save(f, cols))
+
+    def _clear_partitions(self, token_dir: Path) -> None:
+        for path in token_dir.glob("*.npy"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+    def invalidate(
+        self,
+        table: str,
+        timeframe: Optional[str] = None,
+        chain: Optional[str] = None,
+        contract: Optional[str] = None,
+    ) -> None:
+        """
+        Drop cached bars after the database history was rewritten (e.g. backfill).
+
+        Omitted arguments widen the scope (all timeframes / chains / tokens).
+        A single token is dropped under its lock; wider scopes are removed
+        without locking (run them while the cache is not being written).
+        """
+        base = self.root / _safe(table)
+        tf_dirs = [base / _safe(timeframe)] if timeframe else [p for p in base.glob("*") if p.is_dir()]
+        for tf_dir in tf_dirs:
+            targets: List[Path]
+            if chain and contract:
+                targets = [tf_dir / _safe(chain.lower()) / _safe(contract)]
+            elif chain:
+                targets = [tf_dir / _safe(chain.lower())]
+            elif contract:
+                targets = list(tf_dir.glob(f"*/{_safe(contract)}"))
+            else:
+                targets = [tf_dir]
+            for target in targets:
+                if chain and contract:
+                    with self._token_lock(target):
+                        shutil.rmtree(target, ignore_errors=True)
+                else:
+                    shutil.rmtree(target, ignore_errors=True)
+
+
+def invalidate_bar_store(
+    table: str,
+    timeframe: Optional[str] = None,
+    chain: Optional[str] = None,
+    contract: Optional[str] = None,
+) -> None:
+    """Invalidation hook for backfills; no-op when the cache is disabled."""
+    store = BarStore.from_env()
+    if store is None:
+        return
+    try:
+        store.invalidate(table, timeframe=timeframe, chain=chain, contract=contract)
+    except Exception as e:
+        logger.warning("Bar store invalidation failed for %s/%s/%s: %s", table, timeframe, contract, e)
@@ -0,0 +1,195 @@
+"""
+FeaturesWriter - batched, key-level writes to lowcap_positions.features.
+
+Jobs used to persist features by reading the whole JSONB document, changing one
+top-level key (ta, uptrend_engine_v4, geometry, ...) and writing the whole
+document back. That costs a read per write, ships the full blob both ways and
+loses concurrent writes to other keys (e.g. hourly geometry vs. the 1m TA tick).
+
+FeaturesWriter accumulates per-position patches instead:
+- set(pid, key, value)     features[key] = value
+- merge(pid, key, value)   features[key] = features[key] || value (shallow object merge)
+- unset(pid, key)          remove features[key]
+- set_state(pid, state)    lowcap_positions.state column
+
+flush() applies them in batches through the patch_position_features() RPC
+(see migrations/2026_10_16_add_patch_position_features.sql), which merges
+server-side - only the changed subtrees cross the wire and there is no read.
+If the RPC is not available it falls back to one bulk read per batch plus a
+per-row update with the same patch semantics.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.intelligence.lowcap_portfolio_manager.data.rpc_errors import is_missing_function
+
+logger = logging.getLogger(__name__)
+
+POSITIONS_TABLE = "lowcap_positions"
+PATCH_RPC = "patch_position_features"
+BATCH_SIZE = 200  # positions per RPC call / per fallback read
+
+# Set once the RPC turned out to be missing in this process (migration not applied yet)
+_rpc_unavailable = False
+
+
+def apply_patch(features: Optional[Dict[str, Any]], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a patch to a features document (same semantics as the SQL function).
+
+    Order: unset, then set, then merge.
+
+    Args:
+        features: Current features (None = {})
+        patch: {"unset": [key], "set": {key: value}, "merge": {key: {...}}}
+
+    Returns:
+        New features dict (the input is not modified)
+    """
+    out = dict(features or {})
+    for key in patch.get("unset") or ():
+        out.pop(key, None)
+    out.update(patch.get("set") or {})
+    for key, value in (patch.get("merge") or {}).items():
+        cur = out.get(key)
+        if isinstance(cur, dict) and isinstance(value, dict):
+            out[key] = {**cur, **value}
+        else:
+            out[key] = value
+    return out
+
+
+class FeaturesWriter:
+    """Accumulates key-level feature patches for many positions and flushes them in bulk."""
+
+    def __init__(self, sb: Any, batch_size: int = BATCH_SIZE, use_rpc: Optional[bool] = None) -> None:
+        self.sb = sb
+        self.batch_size = batch_size
+        if use_rpc is None:
+            use_rpc = os.getenv("FEATURES_PATCH_RPC_ENABLED", "1") == "1"
+        self.use_rpc = use_rpc
+        # pid -> {"set": {}, "merge": {}, "unset": [], "state": str}
+        self._patches: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._patches)
+
+    def __contains__(self, pid: Any) -> bool:
+        """True while a patch for pid is pending."""
+        return str(pid) in self._patches
+
+    def _patch(self, pid: Any) -> Dict[str, Any]:
+        return self._patches.setdefault(str(pid), {"id": pid})
+
+    def set(self, pid: Any, key: str, value: Any) -> None:
+        """Replace features[key]."""
+        patch = self._patch(pid)
+        patch.setdefault("set", {})[key] = value
+        (patch.get("merge") or {}).pop(key, None)
+        if key in (patch.get("unset") or []):
+            patch["unset"].remove(key)
+
+    def merge(self, pid: Any, key: str, value: Dict[str, Any]) -> None:
+        """Shallow-merge value into features[key] (keeps its other sub-keys)."""
+        patch = self._patch(pid)
+        if key in (patch.get("set") or {}) and isinstance(patch["set"][key], dict):
+            patch["set"][key] = {**patch["set"][key], **value}
+            return
+        merged = patch.setdefault("merge", {})
+        merged[key] = {**(merged.get(key) or {}), **value}
+
+    def unset(self, pid: Any, key: str) -> None:
+        """Remove features[key]."""
+        patch = self._patch(pid)
+        (patch.get("set") or {}).pop(key, None)
+        (patch.get("merge") or {}).pop(key, None)
+        unset = patch.setdefault("unset", [])
+        if key not in unset:
+            unset.append(key)
+
+    def set_state(self, pid: Any, state: Optional[str]) -> None:
+        """Write the state column with the next flush (ignored when empty)."""
+        if state:
+            self._patch(pid)["state"] = state
+
+    def discard(self, pids: Iterable[Any]) -> None:
+        """Drop pending patches (e.g. after the row was rewritten directly)."""
+        for pid in pids:
+            self._patches.pop(str(pid), None)
+
+    def flush(self, pids: Optional[Iterable[Any]] = None) -> int:
+        """
+        Persist pending patches (all, or only `pids`).
+
+        Patches whose write fails stay pending for the next flush.
+
+        Returns:
+            Number of positions written
+        """
+        keys = [str(p) for p in pids] if pids is not None else list(self._patches)
+        patches = [self._patches[k] for k in keys if k in self._patches]
+        written = 0
+        for i in range(0, len(patches), self.batch_size):
+            batch = patches[i:i + self.batch_size]
+            ok = self._flush_rpc(batch) if self.use_rpc and not _rpc_unavailable else None
+            if ok is None:
+                ok = self._flush_fallback(batch)
+            for patch in batch:
+                if str(patch["id"]) in ok:
+                    self._patches.pop(str(patch["id"]), None)
+                    written += 1
+        return written
+
+    def _flush_rpc(self, batch: List[Dict[str, Any]]) -> Optional[set]:
+        """One server-side merge for the batch; None = RPC unavailable (use the fallback)."""
+        global _rpc_unavailable
+        try:
+            self.sb.rpc(PATCH_RPC, {"patches": batch}).execute()
+            return {str(p["id"]) for p in batch}
+        except Exception as e:
+            if is_missing_function(e):
+                _rpc_unavailable = True
+                logger.warning("%s RPC missing, using read-merge-write from now on: %s", PATCH_RPC, e)
+            else:
+                logger.warning("%s RPC failed, read-merge-write for this batch: %s", PATCH_RPC, e)
+            return None
+
+    def _flush_fallback(self, batch: List[Dict[str, Any]]) -> set:
+        """Bulk read of the batch's features, patch in Python, one update per row."""
+        ok: set = set()
+        needs_features = [p["id"] for p in batch if p.get("set") or p.get("merge") or p.get("unset")]
+        current: Dict[str, Dict[str, Any]] = {}
+        if needs_features:
+            try:
+                rows = (
+                    self.sb.table(POSITIONS_TABLE)
+                    .select("id,features")
+                    .in_("id", needs_features)
+                    .execute()
+                    .data or []
+                )
+            except Exception as e:
+                logger.error("Features read failed for %d positions: %s", len(needs_features), e)
+                return ok
+            current = {str(r.get("id")): r.get("features") or {} for r in rows}
+
+        for patch in batch:
+            pid = str(patch["id"])
+            update: Dict[str, Any] = {}
+            if pid in current:
+                update["features"] = apply_patch(current[pid], patch)
+            if patch.get("state"):
+                update["state"] = patch["state"]
+            if not update:
+                ok.add(pid)  # row no longer exists
+                continue
+            try:
+                self.sb.table(POSITIONS_TABLE).update(update).eq("id", patch["id"]).execute()
+                ok.add(pid)
+            except Exception as e:
+                logger.error("Features write failed for position %s: %s", pid, e)
+        return ok
@@ -8,18 +8,50 @@ Routes queries to the correct table based on (chain, book_id):
 Handles schema differences:
 - Hyperliquid: token, ts, open, high, low, close, volume
 - Lowcap: token_contract, chain, timestamp, open_usd, high_usd, low_usd, close_usd, volume
+
+When a BarStore is configured (BAR_STORE_DIR), settled bars are served from the
+local cache and only the tail past the cache watermark is read from the
+database. With sb_client=None the reader runs offline from the cache alone.
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+import logging
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from supabase import Client
 
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import (
+    SETTLE_BARS,
+    TS,
+    BarStore,
+    BarStoreCorrupt,
+    columns_to_rows,
+    rows_to_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+# (contract, chain) - key for bulk results
+TokenKey = Tuple[str, str]
+
+# Bar length per timeframe (for bulk time-window queries)
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+
+# PostgREST max rows per request
+PAGE_SIZE = 1000
+# Tokens per bulk query (keeps the in.(...) filter URL short)
+BULK_TOKEN_CHUNK = 50
+# Bulk window = limit bars * slack (absorbs missing bars); never narrower than MIN_WINDOW_BARS
+BULK_WINDOW_SLACK = 1.5
+MIN_WINDOW_BARS = 5
+
 
 class PriceDataReader:
     """Universal interface for reading OHLC data from any venue."""
     
-    def __init__(self, sb_client: Client):
+    def __init__(self, sb_client: Optional[Client], bar_store: Optional[BarStore] = None):
         self.sb = sb_client
+        # Local cache of settled bars; None = always read the database
+        self.bar_store = bar_store if bar_store is not None else BarStore.from_env()
     
     def get_table_name(self, chain: str, book_id: Optional[str] = None) -> str:
         """
@@ -84,7 +116,160 @@ class PriceDataReader:
                     'volume': float(row.get('volume', 0)),
                 })
             return normalized
-    
+
+    # ------------------------------------------------------------------
+    # Local bar store
+    # ------------------------------------------------------------------
+    def _iso(self, ts: float) -> str:
+        return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+    def _query_rows(
+        self,
+        contract: str,
+        chain: str,
+        timeframe: str,
+        after_ts: Optional[float] = None,
+        until_iso: Optional[str] = None,
+        desc: bool = False,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """Single-token DB read of bars with ts > after_ts (and <= until), chronological."""
+        if self.sb is None:
+            return []
+        table = self.get_table_name(chain)
+        is_hl = chain.lower() == 'hyperliquid'
+        ts_col = "ts" if is_hl else "timestamp"
+        if is_hl:
+            query = (
+                self.sb.table(table)
+                .select("token, ts, open, high, low, close, volume")
+                .eq("token", contract)
+                .eq("timeframe", timeframe)
+            )
+        else:
+            query = (
+                self.sb.table(table)
+                .select("token_contract, chain, timestamp, open_usd, high_usd, low_usd, close_usd, volume")
+                .eq("token_contract", contract)
+                .eq("chain", chain)
+                .eq("timeframe", timeframe)
+            )
+        if after_ts is not None:
+            query = query.gt(ts_col, self._iso(after_ts))
+        if until_iso:
+            query = query.lte(ts_col, until_iso)
+        rows = query.order(ts_col, desc=desc).limit(limit).execute().data or []
+        if desc:
+            rows = list(reversed(rows))
+        return self._normalize_rows(rows, chain)
+
+    def _page_full(self, rows: List[Any], limit: int) -> bool:
+        """True if a desc/limit query may have cut off older bars (limit or row cap hit)."""
+        return len(rows) >= min(limit, PAGE_SIZE)
+
+    def _store_meta(self, contract: str, chain: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        if self.bar_store is None or timeframe not in TIMEFRAME_SECONDS:
+            return None
+        return self.bar_store.meta(self.get_table_name(chain), timeframe, chain, contract)
+
+    def _store_read(
+        self,
+        contract: str,
+        chain: str,
+        timeframe: str,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+    ):
+        """Cached bars, or None if the cache turned out unreadable (its coverage is dropped - use the DB)."""
+        try:
+            return self.bar_store.read(self.get_table_name(chain), timeframe, chain, contract, start_ts, end_ts)
+        except BarStoreCorrupt as e:
+            logger.warning("Bar store read failed for %s/%s %s, reading the database: %s", chain, contract, timeframe, e)
+            return None
+
+    def _store_ingest(
+        self,
+        contract: str,
+        chain: str,
+        timeframe: str,
+        rows: List[Dict[str, Any]],
+        covered_from: Optional[float] = None,
+        complete: bool = False,
+    ) -> None:
+        """
+        Cache the settled part of a DB result.
+
+        Args:
+            rows: Every DB bar between covered_from (or rows[0]) and rows[-1]
+            covered_from: Start of the range the query was known to cover
+            complete: rows start at the token's first bar
+        """
+        step = TIMEFRAME_SECONDS.get(timeframe)
+        if self.bar_store is None or not rows or not step:
+            return
+        try:
+            cols = rows_to_columns(rows)
+            cutoff = datetime.now(timezone.utc).timestamp() - SETTLE_BARS * step
+            cols = cols[:, cols[TS] <= cutoff]
+            self.bar_store.write(
+                self.get_table_name(chain), timeframe, chain, contract, cols,
+                covered_from=covered_from, complete=complete,
+            )
+        except Exception as e:
+            logger.warning("Bar store write failed for %s/%s %s: %s", chain, contract, timeframe, e)
+
+    def _recent_from_store(
+        self,
+        contract: str,
+        chain: str,
+        timeframe: str,
+        limit: int,
+        until_iso: Optional[str],
+        meta: Dict[str, Any],
+        tail: Optional[List[Dict[str, Any]]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Last `limit` bars = cached bars up to the watermark + DB tail past it.
+
+        Args:
+            tail: DB bars past the watermark if the caller already fetched them
+                  (bulk path); fetched here otherwise
+
+        Returns:
+            Normalized rows, or None if the cache can't cover the request
+        """
+        watermark = float(meta["watermark"])
+        until_ts = self._parse_ts(until_iso).timestamp() if until_iso else None
+
+        if tail is None:
+            tail = []
+            if until_ts is None or until_ts > watermark:
+                tail = self._query_rows(contract, chain, timeframe, after_ts=watermark,
+                                        until_iso=until_iso, desc=True, limit=limit)
+                if self._page_full(tail, limit):
+                    # Older tail bars may be cut off - the cache can't be joined to this page
+                    self._store_ingest(contract, chain, timeframe, tail)
+                    return tail
+                self._store_ingest(contract, chain, timeframe, tail, covered_from=watermark)
+        else:
+            self._store_ingest(contract, chain, timeframe, tail, covered_from=watermark)
+        tail = tail[-limit:]
+
+        need = limit - len(tail)
+        if need <= 0:
+            return tail
+        end_ts = watermark if until_ts is None else min(until_ts, watermark)
+        step = TIMEFRAME_SECONDS[timeframe]
+        cached = self._store_read(contract, chain, timeframe,
+                                  start_ts=end_ts - step * need * BULK_WINDOW_SLACK, end_ts=end_ts)
+        if cached is not None and cached.shape[1] < need:
+            cached = self._store_read(contract, chain, timeframe, end_ts=end_ts)
+        if cached is None:
+            return None
+        if cached.shape[1] < need and not meta.get("complete") and self.sb is not None:
+            return None
+        return columns_to_rows(cached[:, -need:], contract, chain) + tail
+
     def fetch_recent_ohlc(
         self, 
         contract: str, 
@@ -106,6 +291,14 @@ class PriceDataReader:
         Returns:
             List of normalized OHLC rows with fields: timestamp, open_usd, high_usd, low_usd, close_usd, volume
         """
+        meta = self._store_meta(contract, chain, timeframe)
+        if meta:
+            rows = self._recent_from_store(contract, chain, timeframe, limit, until_iso, meta)
+            if rows is not None:
+                return rows
+        if self.sb is None:
+            return []
+
         table = self.get_table_name(chain)
         chain_lower = chain.lower()
         
@@ -144,8 +337,283 @@ class PriceDataReader:
         # Reverse to chronological order (oldest first) for consistency
         rows = list(reversed(rows))
         
-        return self._normalize_rows(rows, chain)
+        normalized = self._normalize_rows(rows, chain)
+        self._store_ingest(contract, chain, timeframe, normalized, complete=not self._page_full(rows, limit))
+        return normalized
     
+    def _parse_ts(self, ts: Any) -> datetime:
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+    def _group_by_venue(self, tokens: Iterable[TokenKey]) -> Dict[str, List[str]]:
+        """Group (contract, chain) pairs by chain, de-duplicated, order preserved."""
+        groups: Dict[str, List[str]] = {}
+        for contract, chain in tokens:
+            if not contract or not chain:
+                continue
+            bucket = groups.setdefault(chain, [])
+            if contract not in bucket:
+                bucket.append(contract)
+        return groups
+
+    def _fetch_window_paged(
+        self,
+        chain: str,
+        contracts: List[str],
+        timeframe: str,
+        since_iso: Optional[str],
+        until_iso: Optional[str],
+    ) -> Dict[TokenKey, List[Dict[str, Any]]]:
+        """
+        Fetch all bars in [since, until] for many contracts of one venue.
+
+        Pages transparently past the PostgREST row cap.
+
+        Returns:
+            {(contract, chain): normalized rows, chronological}
+        """
+        table = self.get_table_name(chain)
+        is_hl = chain.lower() == 'hyperliquid'
+        token_col = "token" if is_hl else "token_contract"
+        ts_col = "ts" if is_hl else "timestamp"
+        select = (
+            "token, ts, open, high, low, close, volume" if is_hl
+            else "token_contract, chain, timestamp, open_usd, high_usd, low_usd, close_usd, volume"
+        )
+
+        out: Dict[TokenKey, List[Dict[str, Any]]] = {(c, chain): [] for c in contracts}
+        for i in range(0, len(contracts), BULK_TOKEN_CHUNK):
+            chunk = contracts[i:i + BULK_TOKEN_CHUNK]
+            offset = 0
+            while True:
+                query = (
+                    self.sb.table(table)
+                    .select(select)
+                    .in_(token_col, chunk)
+                    .eq("timeframe", timeframe)
+                )
+                if not is_hl:
+                    query = query.eq("chain", chain)
+                if since_iso:
+                    query = query.gte(ts_col, since_iso)
+                if until_iso:
+                    query = query.lte(ts_col, until_iso)
+                rows = (
+                    query.order(token_col).order(ts_col)
+                    .range(offset, offset + PAGE_SIZE - 1)
+                    .execute()
+                    .data or []
+                )
+                for row in self._normalize_rows(rows, chain):
+                    key = (row.get('token_contract'), chain)
+                    if key in out:
+                        out[key].append(row)
+                if len(rows) < PAGE_SIZE:
+                    break
+                offset += PAGE_SIZE
+        return out
+
+    def fetch_recent_ohlc_bulk(
+        self,
+        tokens: Iterable[TokenKey],
+        timeframe: str,
+        limit: int = 400,
+        until_iso: Optional[str] = None,
+    ) -> Dict[TokenKey, List[Dict[str, Any]]]:
+        """
+        Fetch the last `limit` bars for many tokens in a handful of requests.
+
+        Issues one time-window query per venue table (chunked by token and
+        paged past the row cap) instead of one query per token. Tokens whose
+        history is clipped by the window (gaps, stale feeds) fall back to
+        fetch_recent_ohlc, so results always match the per-token call.
+
+        Args:
+            tokens: (contract, chain) pairs
+            timeframe: Timeframe (1m, 15m, 1h, 4h, ...)
+            limit: Bars per token
+            until_iso: Optional ISO timestamp to fetch up to (for backtesting)
+
+        Returns:
+            {(contract, chain): normalized rows, chronological}
+        """
+        tokens = list(tokens)
+        step = TIMEFRAME_SECONDS.get(timeframe)
+        if not step or self.sb is None:
+            return {
+                (c, ch): self.fetch_recent_ohlc(c, ch, timeframe, limit=limit, until_iso=until_iso)
+                for c, ch in tokens
+            }
+
+        until = self._parse_ts(until_iso) if until_iso else datetime.now(timezone.utc)
+        window_bars = max(limit, MIN_WINDOW_BARS) * BULK_WINDOW_SLACK
+        since = until - timedelta(seconds=step * window_bars)
+
+        results: Dict[TokenKey, List[Dict[str, Any]]] = {}
+        for chain, contracts in self._group_by_venue(tokens).items():
+            # Tokens cached past the window start only need the tail after their watermark
+            metas = {c: self._store_meta(c, chain, timeframe) for c in contracts}
+            cached = [c for c in contracts if metas[c] and float(metas[c]["watermark"]) >= since.timestamp()]
+            if cached:
+                oldest_wm = min(float(metas[c]["watermark"]) for c in cached)
+                tails = self._fetch_window_paged(chain, cached, timeframe, self._iso(oldest_wm), until_iso)
+                for c in cached:
+                    wm = float(metas[c]["watermark"])
+                    tail = [r for r in tails[(c, chain)] if self._parse_ts(r['timestamp']).timestamp() > wm]
+                    rows = self._recent_from_store(c, chain, timeframe, limit, until_iso, metas[c], tail=tail)
+                    if rows is None:
+                        rows = self.fetch_recent_ohlc(c, chain, timeframe, limit=limit, until_iso=until_iso)
+                    results[(c, chain)] = rows
+                contracts = [c for c in contracts if c not in cached]
+            if not contracts:
+                continue
+
+            window = self._fetch_window_paged(chain, contracts, timeframe, since.isoformat(), until_iso)
+            for key, rows in window.items():
+                self._store_ingest(key[0], chain, timeframe, rows, covered_from=since.timestamp())
+                rows = rows[-limit:]
+                # Short of `limit`: older bars may sit before the window (a gap inside it
+                # looks the same as a young token), so read the token on its own. That read
+                # caches a young token as complete, and later ticks serve it from the cache
+                if len(rows) < limit:
+                    rows = self.fetch_recent_ohlc(key[0], chain, timeframe, limit=limit, until_iso=until_iso)
+                results[key] = rows
+        return results
+
+    def fetch_ohlc_since_bulk(
+        self,
+        since_by_token: Dict[TokenKey, str],
+        timeframe: str,
+        limit: int = 500,
+    ) -> Dict[TokenKey, List[Dict[str, Any]]]:
+        """
+        Fetch bars since a per-token timestamp for many tokens at once.
+
+        Tokens of a venue are grouped by watermark: a group spans at most the
+        bulk window (limit bars * slack) of start times, and is fetched from its
+        oldest start up to its newest start plus the window, so one stale
+        watermark never pulls the full history of every other token. Each token
+        is trimmed to its own start and `limit`; tokens whose bars may be clipped
+        by the window end (gaps) fall back to fetch_ohlc_since, so results
+        always match the per-token call.
+
+        Args:
+            since_by_token: {(contract, chain): since ISO timestamp}
+            timeframe: Timeframe
+            limit: Maximum bars per token
+
+        Returns:
+            {(contract, chain): normalized rows, chronological}
+        """
+        step = TIMEFRAME_SECONDS.get(timeframe)
+        if not step or self.sb is None:
+            return {
+                (c, ch): self.fetch_ohlc_since(c, ch, timeframe, since, limit=limit)
+                for (c, ch), since in since_by_token.items()
+                if c and ch
+            }
+
+        now = datetime.now(timezone.utc)
+        span = timedelta(seconds=step * max(limit, MIN_WINDOW_BARS) * BULK_WINDOW_SLACK)
+        results: Dict[TokenKey, List[Dict[str, Any]]] = {}
+        for chain, contracts in self._group_by_venue(since_by_token.keys()).items():
+            since_dt = {c: self._parse_ts(since_by_token[(c, chain)]) for c in contracts}
+            ordered = sorted(contracts, key=since_dt.__getitem__)
+            groups: List[List[str]] = []
+            for c in ordered:
+                if groups and since_dt[c] - since_dt[groups[-1][0]] <= span:
+                    groups[-1].append(c)
+                else:
+                    groups.append([c])
+
+            for group in groups:
+                oldest = since_dt[group[0]]
+                until = since_dt[group[-1]] + span
+                capped = until < now
+                window = self._fetch_window_paged(
+                    chain, group, timeframe, oldest.isoformat(), until.isoformat() if capped else None
+                )
+                for c in group:
+                    start = since_dt[c]
+                    rows = [r for r in window[(c, chain)] if self._parse_ts(r['timestamp']) >= start][:limit]
+                    if capped and len(rows) < limit:
+                        # More bars may exist past the window end
+                        rows = self.fetch_ohlc_since(c, chain, timeframe, since_by_token[(c, chain)], limit=limit)
+                    results[(c, chain)] = rows
+        return results
+
+    def fetch_ohlc_history(
+        self,
+        contract: str,
+        chain: str,
+        timeframe: str,
+        since_iso: Optional[str] = None,
+        until_iso: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch every bar in [since, until] (whole history if since is None).
+
+        Pages past the PostgREST row cap; served from the bar store where it
+        has coverage (for replays and backtests).
+
+        Args:
+            contract: Token contract/symbol
+            chain: Venue namespace
+            timeframe: Timeframe
+            since_iso: Optional ISO start timestamp
+            until_iso: Optional ISO end timestamp
+
+        Returns:
+            List of normalized OHLC rows, chronological
+        """
+        since_ts = self._parse_ts(since_iso).timestamp() if since_iso else None
+        until_ts = self._parse_ts(until_iso).timestamp() if until_iso else None
+        meta = self._store_meta(contract, chain, timeframe)
+        if meta:
+            watermark = float(meta["watermark"])
+            covered = meta.get("complete") if since_ts is None else (
+                (since_ts >= float(meta["first"]) or meta.get("complete")) and since_ts <= watermark
+            )
+            cached = None
+            if covered or self.sb is None:
+                end_ts = watermark if until_ts is None else min(until_ts, watermark)
+                cached = self._store_read(contract, chain, timeframe, start_ts=since_ts, end_ts=end_ts)
+            if cached is not None:
+                rows = columns_to_rows(cached, contract, chain)
+                if self.sb is not None and (until_ts is None or until_ts > watermark):
+                    tail = self._fetch_window_paged(chain, [contract], timeframe, self._iso(watermark), until_iso)
+                    tail = [r for r in tail[(contract, chain)] if self._parse_ts(r['timestamp']).timestamp() > watermark]
+                    self._store_ingest(contract, chain, timeframe, tail, covered_from=watermark)
+                    rows += tail
+                return rows
+        if self.sb is None:
+            return []
+
+        rows = self._fetch_window_paged(chain, [contract], timeframe, since_iso, until_iso)[(contract, chain)]
+        self._store_ingest(contract, chain, timeframe, rows, covered_from=since_ts, complete=since_iso is None)
+        return rows
+
+    def latest_close_bulk(
+        self,
+        tokens: Iterable[TokenKey],
+        timeframe: str,
+    ) -> Dict[TokenKey, Optional[Dict[str, Any]]]:
+        """
+        Latest close/low for many tokens (bulk variant of latest_close).
+
+        Returns:
+            {(contract, chain): {'ts', 'close', 'low'} or None}
+        """
+        out: Dict[TokenKey, Optional[Dict[str, Any]]] = {}
+        for key, rows in self.fetch_recent_ohlc_bulk(tokens, timeframe, limit=1).items():
+            row = rows[-1] if rows else None
+            out[key] = {
+                'ts': row.get('timestamp'),
+                'close': row.get('close_usd'),
+                'low': row.get('low_usd'),
+            } if row else None
+        return out
+
     def fetch_ohlc_since(
         self,
         contract: str,
@@ -167,6 +635,24 @@ class PriceDataReader:
         Returns:
             List of normalized OHLC rows
         """
+        since_ts = self._parse_ts(since_iso).timestamp()
+        meta = self._store_meta(contract, chain, timeframe)
+        if meta:
+            watermark = float(meta["watermark"])
+            cached = None
+            if since_ts <= watermark and (since_ts >= float(meta["first"]) or meta.get("complete")):
+                cached = self._store_read(contract, chain, timeframe, start_ts=since_ts, end_ts=watermark)
+            if cached is not None:
+                rows = columns_to_rows(cached[:, :limit], contract, chain)
+                if len(rows) < limit:
+                    tail = self._query_rows(contract, chain, timeframe, after_ts=watermark,
+                                            limit=limit - len(rows))
+                    self._store_ingest(contract, chain, timeframe, tail, covered_from=watermark)
+                    rows += tail
+                return rows
+        if self.sb is None:
+            return []
+
         table = self.get_table_name(chain)
         chain_lower = chain.lower()
         
@@ -193,7 +679,9 @@ class PriceDataReader:
             )
         
         rows = query.execute().data or []
-        return self._normalize_rows(rows, chain)
+        normalized = self._normalize_rows(rows, chain)
+        self._store_ingest(contract, chain, timeframe, normalized, covered_from=since_ts)
+        return normalized
     
     def fetch_bars_for_geometry(
         self,
@@ -216,6 +704,31 @@ class PriceDataReader:
         Returns:
             List of normalized OHLC rows
         """
+        start_ts = (end - timedelta(minutes=lookback_minutes)).timestamp() if lookback_minutes else None
+        meta = self._store_meta(contract, chain, timeframe)
+        if meta:
+            watermark = float(meta["watermark"])
+            covered = meta.get("complete") if start_ts is None else (
+                (start_ts >= float(meta["first"]) or meta.get("complete")) and start_ts <= watermark
+            )
+            cached = None
+            if covered:
+                cached = self._store_read(contract, chain, timeframe, start_ts=start_ts,
+                                          end_ts=min(end.timestamp(), watermark))
+            if cached is not None:
+                rows = columns_to_rows(cached, contract, chain)
+                if end.timestamp() > watermark:
+                    tail = self._query_rows(contract, chain, timeframe, after_ts=watermark,
+                                            until_iso=end.isoformat(), desc=True, limit=9999)
+                    if self._page_full(tail, 9999):
+                        self._store_ingest(contract, chain, timeframe, tail)
+                        return tail
+                    self._store_ingest(contract, chain, timeframe, tail, covered_from=watermark)
+                    rows += tail
+                return rows[-9999:]
+        if self.sb is None:
+            return []
+
         table = self.get_table_name(chain)
         chain_lower = chain.lower()
         end_iso = end.isoformat()
@@ -230,7 +743,6 @@ class PriceDataReader:
                 .order("ts", desc=True)
             )
             if lookback_minutes:
-                from datetime import timedelta
                 start = end - timedelta(minutes=lookback_minutes)
                 query = query.gte("ts", start.isoformat())
         else:
@@ -244,14 +756,17 @@ class PriceDataReader:
                 .order("timestamp", desc=True)
             )
             if lookback_minutes:
-                from datetime import timedelta
                 start = end - timedelta(minutes=lookback_minutes)
                 query = query.gte("timestamp", start.isoformat())
         
         rows = query.limit(9999).execute().data or []
         # Reverse to chronological order for geometry
         rows = list(reversed(rows))
-        return self._normalize_rows(rows, chain)
+        normalized = self._normalize_rows(rows, chain)
+        if not self._page_full(rows, 9999):
+            self._store_ingest(contract, chain, timeframe, normalized,
+                               covered_from=start_ts, complete=start_ts is None)
+        return normalized
     
     def latest_close(
         self,
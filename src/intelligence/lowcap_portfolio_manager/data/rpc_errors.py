@@ -0,0 +1,27 @@
+"""
+Classification of Supabase RPC errors.
+
+Writers with an RPC fast path (features_writer, portfolio_valuation, the
+executor's wallet balance adjustment) fall back to plain table writes when the
+RPC fails. Only a missing function (migration not applied) justifies skipping
+the RPC for the rest of the process; timeouts and 5xx responses are transient
+and only the failing call falls back.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+# PostgREST: function not found in the schema cache; Postgres: undefined_function
+MISSING_FUNCTION_CODES = ("PGRST202", "42883")
+
+
+def is_missing_function(error: BaseException) -> bool:
+    """True if error says the called database function does not exist."""
+    code: Any = getattr(error, "code", None)
+    if code is None and error.args and isinstance(error.args[0], dict):
+        code = error.args[0].get("code")
+    if code is not None:
+        return str(code) in MISSING_FUNCTION_CODES
+    text = str(error)
+    return any(c in text for c in MISSING_FUNCTION_CODES)
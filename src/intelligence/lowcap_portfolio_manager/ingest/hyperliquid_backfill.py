@@ -26,6 +26,8 @@ from typing import Any, Dict, List, Optional
 import requests
 from supabase import create_client, Client
 
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import invalidate_bar_store
+
 logger = logging.getLogger(__name__)
 
 # Hyperliquid API endpoint
@@ -201,6 +203,10 @@ def backfill_from_hyperliquid(
     else:
         logger.info("Wrote %d candles for %s %s", total_written, coin, interval)
     
+    if total_written:
+        # History was (re)written - drop any locally cached bars for this coin
+        invalidate_bar_store("hyperliquid_price_data_ohlc", timeframe=interval, chain="hyperliquid", contract=coin)
+    
     return total_written
 
 
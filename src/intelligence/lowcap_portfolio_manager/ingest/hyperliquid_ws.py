@@ -6,9 +6,13 @@ Responsibilities
 - Enforce UTC minute alignment and late-trade window (tick buffer)
 - Deduplicate on (token, ts, trade_id)
 - Upsert ticks into public.majors_trades_ticks
+- Optionally (HL_WS_BARS_ENABLED=1) aggregate 1m bars in memory and upsert them
+  into public.majors_price_data_ohlc seconds after each minute closes, with
+  late-trade correction within TICK_BUFFER_SEC (see minute_bars.py); raw tick
+  persistence then becomes optional / sampled (HL_TICK_PERSIST_RATE)
 
 This module intentionally avoids side effects elsewhere in the system.
-The 1m rollup is implemented separately in rollup.py.
+Without WS bars the 1m rollup is implemented separately in rollup.py.
 
 Env/config (provide via os.environ or a small config loader):
 - HYPERLIQUID_WS_URL: optional explicit WS URL (e.g., wss://api.hyperliquid.xyz/ws)
@@ -20,6 +24,10 @@ Env/config (provide via os.environ or a small config loader):
 - BACKOFF_BASE_MS: int, default 500
 - MAX_RETRIES: int, default 0 (= infinite retries)
 - HL_STALE_WARN_MINUTES: minutes without ticks before warning (default 2)
+- HL_WS_BARS_ENABLED: "1" to write 1m bars from the WS stream (default "0")
+- HL_WS_BARS_FLUSH_SEC: seconds between bar flushes (default 2)
+- HL_TICK_PERSIST_RATE: fraction of ticks written to majors_trades_ticks when
+  WS bars are enabled (default 1.0 = all, 0 = none)
 
 This implementation follows the repo's HL patterns; adjust `_subscribe`/`_parse_tick`
 if Hyperliquid changes payload shapes.
@@ -41,10 +49,17 @@ from typing import Any, Dict, List, Optional, Tuple
 import websockets  # type: ignore
 from supabase import create_client, Client  # type: ignore
 
+from .minute_bars import MinuteBarAggregator
+
 
 logger = logging.getLogger(__name__)
 
 
+def ws_bars_enabled() -> bool:
+    """True when the WS ingester writes majors 1m bars itself (OneMinuteRollup is then skipped)."""
+    return os.getenv("HL_WS_BARS_ENABLED", "0") == "1"
+
+
 @dataclass(frozen=True)
 class Tick:
     token: str
@@ -86,6 +101,14 @@ class HyperliquidWSIngester:
         self._last_tick_ts: Optional[float] = None
         self._stale_warn_minutes: float = float(os.getenv("HL_STALE_WARN_MINUTES", "2"))
 
+        # Optional in-memory 1m bars (written directly to majors_price_data_ohlc)
+        self._bars: Optional[MinuteBarAggregator] = None
+        self._tick_persist_rate: float = 1.0
+        if ws_bars_enabled():
+            self._bars = MinuteBarAggregator(grace_s=float(os.getenv("TICK_BUFFER_SEC", "75")))
+            self._tick_persist_rate = min(1.0, max(0.0, float(os.getenv("HL_TICK_PERSIST_RATE", "1.0"))))
+        self._bar_flush_sec: float = float(os.getenv("HL_WS_BARS_FLUSH_SEC", "2"))
+
     async def run(self) -> None:
         """Main loop: connect → subscribe → read → write ticks to DB."""
         retries = 0
@@ -141,14 +164,57 @@ class HyperliquidWSIngester:
         ) as ws:  # type: ignore[arg-type]
             logger.info("HL WS: Connected to %s", self.ws_url)
             await self._subscribe(ws, self.symbols)
-            async for raw in ws:
-                await self._handle_message(raw)
+            bar_task = asyncio.create_task(self._bar_flush_loop()) if self._bars is not None else None
+            try:
+                async for raw in ws:
+                    await self._handle_message(raw)
+            finally:
+                if bar_task:
+                    bar_task.cancel()
     
     async def flush_on_shutdown(self) -> None:
-        """Flush any remaining ticks in buffer before shutdown."""
+        """Flush any remaining ticks in buffer (and bars, including the open minute) before shutdown."""
         if self._tick_buffer:
             await self._write_ticks(self._tick_buffer)
             self._tick_buffer.clear()
+        if self._bars is not None:
+            await self._write_bars(self._bars.collect(include_open=True))
+
+    async def _bar_flush_loop(self) -> None:
+        """Write closed (and late-corrected) 1m bars every few seconds."""
+        while True:
+            await asyncio.sleep(self._bar_flush_sec)
+            await self._write_bars(self._bars.collect())
+
+    async def _write_bars(self, bars: List[Any]) -> None:
+        if not bars:
+            return
+        try:
+            self.sb.table("majors_price_data_ohlc").upsert(
+                [b.to_row() for b in bars],
+                on_conflict="token_contract,chain,timeframe,timestamp",
+            ).execute()
+            if self._debug:
+                logger.info("Upserted %d WS 1m bars (late trades dropped: %d)", len(bars), self._bars.dropped_late)
+        except Exception as exc:  # noqa: BLE001
+            # Retry with the next flush
+            for b in bars:
+                b.dirty = True
+            logger.error("Failed upsert %d 1m bars: %s", len(bars), exc)
+
+    async def _add_tick(self, tick: Tick) -> None:
+        """Aggregate into the 1m bar (if enabled) and buffer for tick persistence."""
+        self._token_counts[tick.token] = self._token_counts.get(tick.token, 0) + 1
+        if self._bars is not None:
+            self._bars.add(tick.token, tick.ts, tick.price, tick.size, tick.trade_id)
+            if self._tick_persist_rate < 1.0 and random.random() >= self._tick_persist_rate:
+                return
+        self._tick_buffer.append(tick)
+
+        # Flush buffer when it reaches size limit
+        if len(self._tick_buffer) >= self._buffer_size:
+            await self._write_ticks(self._tick_buffer)
+            self._tick_buffer.clear()
 
     async def _subscribe(self, ws: Any, symbols: List[str]) -> None:
         """Subscribe to market data. Using repo's existing style as reference.
@@ -193,14 +259,8 @@ class HyperliquidWSIngester:
                 tick = self._parse_tick(rec)
                 if tick is None:
                     continue
-                self._tick_buffer.append(tick)
+                await self._add_tick(tick)
                 wrote += 1
-                self._token_counts[tick.token] = self._token_counts.get(tick.token, 0) + 1
-                
-                # Flush buffer when it reaches size limit
-                if len(self._tick_buffer) >= self._buffer_size:
-                    await self._write_ticks(self._tick_buffer)
-                    self._tick_buffer.clear()
             
             if wrote > 0:
                 if self._debug and self._debug_seen < self._debug_limit:
@@ -213,13 +273,7 @@ class HyperliquidWSIngester:
         tick = self._parse_tick(data)
         if tick is None:
             return
-        self._tick_buffer.append(tick)
-        self._token_counts[tick.token] = self._token_counts.get(tick.token, 0) + 1
-        
-        # Flush buffer when it reaches size limit
-        if len(self._tick_buffer) >= self._buffer_size:
-            await self._write_ticks(self._tick_buffer)
-            self._tick_buffer.clear()
+        await self._add_tick(tick)
 
     def _parse_tick(self, payload: Dict[str, Any]) -> Optional[Tick]:
         """Translate HL message → Tick. Replace with real parsing.
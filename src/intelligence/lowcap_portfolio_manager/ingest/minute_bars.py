@@ -0,0 +1,138 @@
+"""
+In-memory 1m OHLCV bars from live trades (majors).
+
+Used by HyperliquidWSIngester to write 1m bars straight to
+public.majors_price_data_ohlc instead of persisting every tick and rolling the
+tick table up a minute later (rollup.py):
+
+- add() folds a trade into its (token, minute) bar; trades may arrive out of
+  order (open/close follow trade time, not arrival order) and are deduplicated
+  by trade_id
+- collect(now) returns bars that changed since they were last collected and
+  whose minute has closed, so a bar is emitted right after its minute ends
+- late trades within `grace_s` after the minute end update the bar, which is
+  emitted again (the upsert corrects it); older trades are dropped and counted
+- bars are evicted once their grace window has passed
+
+Same bar rules as rollup.py: open/close = first/last trade, high/low = extrema,
+volume = Σ(price×size), no synthetic candles for empty minutes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+@dataclass
+class MinuteBar:
+    token: str
+    minute: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    first_ts: datetime
+    last_ts: datetime
+    trades: int = 1
+    trade_ids: Set[str] = field(default_factory=set, repr=False)
+    dirty: bool = True
+
+    def to_row(self) -> Dict[str, Any]:
+        """majors_price_data_ohlc row (USD prices only, native prices 0.0 like rollup.py)."""
+        return {
+            "token_contract": self.token,
+            "chain": "hyperliquid",
+            "timeframe": "1m",
+            "timestamp": self.minute.isoformat(),
+            "open_native": 0.0,
+            "high_native": 0.0,
+            "low_native": 0.0,
+            "close_native": 0.0,
+            "open_usd": self.open,
+            "high_usd": self.high,
+            "low_usd": self.low,
+            "close_usd": self.close,
+            "volume": self.volume,
+            "source": "hyperliquid",
+        }
+
+
+class MinuteBarAggregator:
+    """Per-symbol OHLCV for open minutes, with a late-trade grace window."""
+
+    def __init__(self, grace_s: float = 75.0) -> None:
+        self.grace = timedelta(seconds=grace_s)
+        self._bars: Dict[Tuple[str, datetime], MinuteBar] = {}
+        self.dropped_late = 0
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    def add(
+        self,
+        token: str,
+        ts: datetime,
+        price: float,
+        size: float,
+        trade_id: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> bool:
+        """
+        Fold one trade into its minute bar.
+
+        Returns:
+            False if the trade was a duplicate or arrived after the grace window
+        """
+        now = now or datetime.now(tz=timezone.utc)
+        minute = ts.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        if now - (minute + timedelta(minutes=1)) > self.grace:
+            self.dropped_late += 1
+            return False
+
+        key = (token, minute)
+        bar = self._bars.get(key)
+        if bar is None:
+            self._bars[key] = MinuteBar(
+                token=token, minute=minute,
+                open=price, high=price, low=price, close=price,
+                volume=price * size, first_ts=ts, last_ts=ts,
+                trade_ids={trade_id} if trade_id else set(),
+            )
+            return True
+
+        if trade_id:
+            if trade_id in bar.trade_ids:
+                return False
+            bar.trade_ids.add(trade_id)
+        if ts < bar.first_ts:
+            bar.first_ts, bar.open = ts, price
+        if ts >= bar.last_ts:
+            bar.last_ts, bar.close = ts, price
+        bar.high = max(bar.high, price)
+        bar.low = min(bar.low, price)
+        bar.volume += price * size
+        bar.trades += 1
+        bar.dirty = True
+        return True
+
+    def collect(self, now: Optional[datetime] = None, include_open: bool = False) -> List[MinuteBar]:
+        """
+        Bars to write: changed since the last collect and closed by `now`
+        (or still open, with include_open, e.g. on shutdown).
+
+        Bars whose grace window has passed are evicted.
+        """
+        now = now or datetime.now(tz=timezone.utc)
+        out: List[MinuteBar] = []
+        for key, bar in list(self._bars.items()):
+            minute_end = bar.minute + timedelta(minutes=1)
+            if bar.dirty and (minute_end <= now or include_open):
+                bar.dirty = False
+                out.append(bar)
+            if now - minute_end > self.grace:
+                del self._bars[key]
+        out.sort(key=lambda b: (b.minute, b.token))
+        return out
@@ -11,6 +11,11 @@ Rules
 - Upsert by (token, ts)
 - Skip empty minutes (no synthetic candles)
 
+Set-based: the window's ticks are read once ordered by (token, ts) and all
+tokens' bars are built in one streaming pass (no per-token queries or sorts),
+then written with one upsert. roll_minutes() rolls several minutes per call and
+roll_since_last() catches up on minutes missed since the last written bar.
+
 Schedule: run every minute offset by +5s to catch late trades; or triggered by ingest heartbeat.
 """
 
@@ -20,13 +25,17 @@ import logging
 import os
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from supabase import create_client, Client  # type: ignore
 
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 1000  # ticks per read page
+UPSERT_CHUNK = 500  # bars per upsert
+MAX_CATCHUP_MINUTES = 60  # roll_since_last() never looks further back
+
 
 @dataclass
 class Bar:
@@ -55,53 +64,37 @@ class OneMinuteRollup:
     def _to_utc(self, dt: datetime) -> datetime:
         return dt.astimezone(timezone.utc)
 
-    def _compute_bar(self, token: str, ticks: List[dict]) -> Optional[Bar]:
-        if not ticks:
-            return None
-        prices = [float(t["price"]) for t in ticks]
-        sizes = [float(t.get("size", 0.0)) for t in ticks]
-        # first and last are by ts ascending
-        ticks_sorted = sorted(ticks, key=lambda t: t["ts"])  # ts already ISO8601
-        open_price = float(ticks_sorted[0]["price"])
-        close_price = float(ticks_sorted[-1]["price"])
-        high_price = max(prices)
-        low_price = min(prices)
-        # quote volume
-        quote_volume = sum(float(t["price"]) * float(t.get("size", 0.0)) for t in ticks)
-        ts = datetime.fromisoformat(ticks_sorted[0]["ts"]).astimezone(timezone.utc)
-        ts_minute = ts.replace(second=0, microsecond=0)
-        return Bar(token=token, ts=ts_minute, open=open_price, high=high_price, low=low_price, close=close_price, volume=quote_volume)
-
-    def roll_minute(self, when: Optional[datetime] = None, symbols: Optional[List[str]] = None) -> int:
-        """Roll up a single minute for optional symbols; returns bars written.
-        
-        If when is None, rolls up the most recent complete minute (2 minutes ago to avoid race conditions).
-        """
-        if when is None:
-            # Look back 2 minutes to ensure we're rolling up a complete minute
-            # This avoids race conditions where ticks are still coming in
-            when = datetime.now(tz=timezone.utc) - timedelta(minutes=2)
-        when = self._to_utc(when)
-        start, end = self._minute_bounds(when)
-
-        bars: List[Bar] = []
-        # fetch distinct tokens to process
-        if symbols is None:
-            # Get distinct tokens from ticks in window using direct query
-            # Query all ticks and extract unique tokens (simpler than exec_sql)
-            res = self.sb.table("majors_trades_ticks").select("token").gte("ts", start.isoformat()).lt("ts", end.isoformat()).execute()
-            tokens = list(set(r["token"] for r in (res.data or [])))
-        else:
-            tokens = symbols
-
-        for token in tokens:
-            # Fetch ticks for window
-            res = self.sb.table("majors_trades_ticks").select("token,ts,price,size").gte("ts", start.isoformat()).lt("ts", end.isoformat()).eq("token", token).execute()
-            ticks: List[dict] = res.data or []
-            bar = self._compute_bar(token, ticks)
-            if bar:
-                bars.append(bar)
+    def _iter_ticks(self, start: datetime, end: datetime, symbols: Optional[List[str]]) -> Iterator[dict]:
+        """Ticks in [start, end) ordered by (token, ts), paged."""
+        offset = 0
+        while True:
+            q = (
+                self.sb.table("majors_trades_ticks")
+                .select("token,ts,price,size")
+                .gte("ts", start.isoformat())
+                .lt("ts", end.isoformat())
+            )
+            if symbols is not None:
+                q = q.in_("token", symbols)
+            rows = (
+                q.order("token").order("ts").order("trade_id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+                .data or []
+            )
+            yield from rows
+            if len(rows) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    def roll_minutes(self, start: datetime, end: datetime, symbols: Optional[List[str]] = None) -> int:
+        """Roll up every minute in [start, end) (minute-aligned); returns bars written."""
+        start, _ = self._minute_bounds(self._to_utc(start))
+        end, _ = self._minute_bounds(self._to_utc(end))
+        if end <= start or (symbols is not None and not symbols):
+            return 0
 
+        bars = aggregate_bars(self._iter_ticks(start, end, symbols))
         if not bars:
             return 0
 
@@ -125,18 +118,88 @@ class OneMinuteRollup:
                 "volume": b.volume,
                 "source": "hyperliquid"
             })
-        
-        self.sb.table("majors_price_data_ohlc").upsert(
-            ohlc_rows, 
-            on_conflict="token_contract,chain,timeframe,timestamp"
-        ).execute()
+
+        for i in range(0, len(ohlc_rows), UPSERT_CHUNK):
+            self.sb.table("majors_price_data_ohlc").upsert(
+                ohlc_rows[i:i + UPSERT_CHUNK],
+                on_conflict="token_contract,chain,timeframe,timestamp"
+            ).execute()
         return len(bars)
 
+    def roll_minute(self, when: Optional[datetime] = None, symbols: Optional[List[str]] = None) -> int:
+        """Roll up a single minute for optional symbols; returns bars written.
+        
+        If when is None, rolls up the most recent complete minute (2 minutes ago to avoid race conditions).
+        """
+        if when is None:
+            # Look back 2 minutes to ensure we're rolling up a complete minute
+            # This avoids race conditions where ticks are still coming in
+            when = datetime.now(tz=timezone.utc) - timedelta(minutes=2)
+        start, end = self._minute_bounds(self._to_utc(when))
+        return self.roll_minutes(start, end, symbols)
+
+    def roll_since_last(self, max_minutes: int = MAX_CATCHUP_MINUTES) -> int:
+        """Roll up from the last written 1m bar's minute through the most recent complete minute.
+
+        Re-rolls the last bar's minute (late trades) and fills minutes missed by
+        skipped runs, at most max_minutes back; returns bars written.
+        """
+        _, end = self._minute_bounds(datetime.now(tz=timezone.utc) - timedelta(minutes=2))
+        start = end - timedelta(minutes=1)
+        try:
+            res = (
+                self.sb.table("majors_price_data_ohlc")
+                .select("timestamp")
+                .eq("chain", "hyperliquid")
+                .eq("timeframe", "1m")
+                .order("timestamp", desc=True)
+                .limit(1)
+                .execute()
+            )
+            if res.data:
+                last = datetime.fromisoformat(str(res.data[0]["timestamp"]).replace("Z", "+00:00"))
+                start = min(start, max(self._to_utc(last), end - timedelta(minutes=max_minutes)))
+        except Exception as e:
+            logger.warning("Could not read last majors 1m bar, rolling one minute: %s", e)
+        return self.roll_minutes(start, end)
+
+
+def aggregate_bars(ticks: Iterable[dict]) -> List[Bar]:
+    """
+    1m bars from ticks ordered by (token, ts), in one streaming pass.
+
+    open/close: first/last tick of the minute, high/low: extrema,
+    volume: Σ(price×size).
+    """
+    bars: List[Bar] = []
+    key = None
+    o = h = l = c = v = 0.0
+    token = ""
+    minute: Optional[datetime] = None
+    for t in ticks:
+        price = float(t["price"])
+        ts = datetime.fromisoformat(str(t["ts"]).replace("Z", "+00:00")).astimezone(timezone.utc)
+        t_minute = ts.replace(second=0, microsecond=0)
+        if (t["token"], t_minute) != key:
+            if key is not None:
+                bars.append(Bar(token=token, ts=minute, open=o, high=h, low=l, close=c, volume=v))
+            key = (t["token"], t_minute)
+            token, minute = t["token"], t_minute
+            o = h = l = price
+            v = 0.0
+        h = max(h, price)
+        l = min(l, price)
+        c = price
+        v += price * float(t.get("size") or 0.0)
+    if key is not None:
+        bars.append(Bar(token=token, ts=minute, open=o, high=h, low=l, close=c, volume=v))
+    return bars
+
 
 def main() -> None:
     logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
     job = OneMinuteRollup()
-    written = job.roll_minute()
+    written = job.roll_since_last()
     logger.info("1m rollup wrote %d bars", written)
 
 
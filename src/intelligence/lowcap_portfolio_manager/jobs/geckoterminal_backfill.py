@@ -20,6 +20,7 @@ from typing import Dict, Any, List, Optional, Tuple
 import requests
 
 from src.utils.supabase_manager import SupabaseManager
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import invalidate_bar_store
 
 
 logger = logging.getLogger(__name__)
@@ -796,6 +797,9 @@ def backfill_token_timeframe(
             logger.error(f"Insert chunk failed: {e}")
     
     logger.info(f"{timeframe} backfill complete: {inserted} rows upserted")
+    if inserted:
+        # History was (re)written - drop any locally cached bars for this token
+        invalidate_bar_store('lowcap_price_data_ohlc', timeframe=timeframe, chain=chain, contract=token_contract)
     
     _update_bars_count_after_backfill(supabase, token_contract, chain, timeframe, inserted)
 
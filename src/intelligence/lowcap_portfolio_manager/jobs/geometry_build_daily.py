@@ -7,12 +7,28 @@ Algorithm (v1):
 - Cluster swing prices into S/R levels; score strength/confidence
 - Fit robust diagonals (Theil–Sen) through highs (downtrend) and lows (uptrend)
 - Store levels and diagonals with metadata; no runtime flags here (tracker will update hourly)
+
+Swings, level clustering, Theil–Sen and swing clustering run on NumPy arrays
+(geometry_kernel.py, same results as the original loops); positions are
+processed by a worker pool (GEOM_WORKERS, default 8).
+
+Incremental mode (GEOM_INCREMENTAL, on unless "0"): per position/timeframe the
+swing list, S/R cluster centers/counts, ATH/ATL and the last EDGE_BARS bars are
+persisted in geometry_state (migrations/2026_10_16_create_geometry_state.sql).
+A run fetches only bars from the stored tail onwards, evaluates the 5-bar swing
+pattern on tail + new bars (only the last two bars of the previous run were
+undecided), drops swings that left the MAX_BARS window and re-sweeps the
+clusters from the lowest changed price. Levels are identical to a full rebuild.
+Positions without new bars are skipped. A full rebuild happens when the stored
+tail no longer matches (restated bars), ATH/ATL leaves the window, the state
+version changes, or the state is older than GEOM_FULL_REBUILD_HOURS (24).
 """
 
 from __future__ import annotations
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Tuple, Optional
 import json
@@ -24,23 +40,34 @@ import matplotlib.pyplot as plt  # type: ignore
 import matplotlib.dates as mdates  # type: ignore
 
 from supabase import create_client, Client  # type: ignore
-from statistics import median
 
+from src.intelligence.lowcap_portfolio_manager.jobs import geometry_kernel
 from src.intelligence.lowcap_portfolio_manager.spiral.persist import SpiralPersist
 from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
 
 
 logger = logging.getLogger(__name__)
 
+MAX_BARS = 9999  # most recent bars considered per position
+MIN_BARS = 50
+SWING_PROMINENCE = 0.5
+LEVEL_TOLERANCE = 0.06  # 6% tolerance for native prices
+EDGE_BARS = 4  # bars kept in state: the 5-bar swing pattern needs 2 bars on either side
+GEOMETRY_STATE_TABLE = "geometry_state"
+GEOMETRY_STATE_VERSION = 1
+STATE_CHUNK_SIZE = 500
+
 
 class GeometryBuilder:
-    def __init__(self, timeframe: str = "1h", generate_charts: bool = True) -> None:
+    def __init__(self, timeframe: str = "1h", generate_charts: bool = True, incremental: Optional[bool] = None) -> None:
         """
         Initialize Geometry Builder.
         
         Args:
             timeframe: Timeframe to process ("1m", "15m", "1h", "4h")
             generate_charts: Whether to generate chart images
+            incremental: Fold only new bars into persisted geometry state
+                (default: GEOM_INCREMENTAL env, on unless set to "0")
         """
         supabase_url = os.getenv("SUPABASE_URL", "")
         supabase_key = os.getenv("SUPABASE_KEY", "")
@@ -49,6 +76,11 @@ class GeometryBuilder:
         self.sb: Client = create_client(supabase_url, supabase_key)
         self.persist = SpiralPersist()
         self.lookback_days = int(os.getenv("GEOM_LOOKBACK_DAYS", "14"))
+        self.workers = max(1, int(os.getenv("GEOM_WORKERS", "8")))
+        if incremental is None:
+            incremental = os.getenv("GEOM_INCREMENTAL", "1") != "0"
+        self.incremental = incremental
+        self.full_rebuild_hours = float(os.getenv("GEOM_FULL_REBUILD_HOURS", "24"))
         self.generate_charts = generate_charts
         self.timeframe = timeframe
         # PriceDataReader for universal data access
@@ -113,33 +145,7 @@ class GeometryBuilder:
 
     def _swings_percentage_based(self, closes: List[float], prominence_threshold: float = 0.5) -> Tuple[List[int], List[int]]:
         """Find swing highs and lows using percentage-based prominence (more adaptive than ATR)"""
-        highs: List[int] = []
-        lows: List[int] = []
-        
-        for i in range(2, len(closes) - 2):
-            c = closes[i]
-            
-            # Check for swing high (5-bar pattern)
-            if c > closes[i - 1] and c > closes[i - 2] and c > closes[i + 1] and c > closes[i + 2]:
-                # Calculate percentage prominence
-                window = closes[i - 2:i + 3]
-                min_in_window = min(window)
-                if c > 0:  # Avoid division by zero
-                    percentage_prominence = (c - min_in_window) / c * 100
-                    if percentage_prominence >= prominence_threshold:
-                        highs.append(i)
-            
-            # Check for swing low (5-bar pattern)
-            if c < closes[i - 1] and c < closes[i - 2] and c < closes[i + 1] and c < closes[i + 2]:
-                # Calculate percentage prominence
-                window = closes[i - 2:i + 3]
-                max_in_window = max(window)
-                if c > 0:  # Avoid division by zero
-                    percentage_prominence = (max_in_window - c) / c * 100
-                    if percentage_prominence >= prominence_threshold:
-                        lows.append(i)
-        
-        return highs, lows
+        return geometry_kernel.swings_percentage_based(closes, prominence_threshold)
 
     def _find_ath_atl_pivots(self, timestamps: List[datetime], closes: List[float], highs: List[float], lows: List[float]) -> List[Dict[str, Any]]:
         """Find ATH and ATL pivots to define sustained trend segments using OHLC extremes"""
@@ -566,33 +572,7 @@ class GeometryBuilder:
 
     def _cluster_levels(self, closes: List[float], idxs: List[int], tol_percent: float) -> List[Dict[str, Any]]:
         """Cluster levels using percentage-based tolerance - sort by price first"""
-        # Get all swing prices and sort by price (not time)
-        swing_prices = [closes[i] for i in idxs]
-        swing_prices.sort()  # Sort by price, not time
-        
-        centers: List[float] = []
-        counts: List[int] = []
-        
-        for price in swing_prices:
-            assigned = False
-            for k, c in enumerate(centers):
-                # Calculate percentage difference
-                percent_diff = abs(price - c) / c
-                if percent_diff <= tol_percent:
-                    centers[k] = (centers[k] * counts[k] + price) / (counts[k] + 1)
-                    counts[k] += 1
-                    assigned = True
-                    break
-            if not assigned:
-                centers.append(price)
-                counts.append(1)
-        
-        scored = [
-            {"price": centers[k], "strength": counts[k], "confidence": min(1.0, counts[k] / 10.0), "type": "line"} for k in range(len(centers))
-        ]
-        # Keep top 9 (balanced limit to capture important levels)
-        scored.sort(key=lambda x: (x["strength"], -abs(x["price"])), reverse=True)
-        return scored[:9]
+        return geometry_kernel.cluster_levels([closes[i] for i in idxs], tol_percent)
     
     def _calculate_fibonacci_levels(self, ath_price: float, atl_price: float, current_price: float, existing_sr_levels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Calculate Fibonacci levels with S/R correlation bonuses"""
@@ -778,62 +758,17 @@ class GeometryBuilder:
         return zones
 
     def _fit_theil_sen(self, xs: List[float], ys: List[float]) -> Tuple[float, float]:
-        # Minimal Theil–Sen: median of pairwise slopes
-        if len(xs) < 3:
-            return (0.0, ys[-1] if ys else 0.0)
-        slopes = []
-        for i in range(len(xs)):
-            for j in range(i + 1, len(xs)):
-                dx = xs[j] - xs[i]
-                if dx == 0:
-                    continue
-                slopes.append((ys[j] - ys[i]) / dx)
-        m = median(slopes) if slopes else 0.0
-        # Intercept via median of (y - m x)
-        intercepts = [ys[i] - m * xs[i] for i in range(len(xs))]
-        b = median(intercepts) if intercepts else (ys[-1] if ys else 0.0)
-        return m, b
+        # Theil–Sen: median of pairwise slopes (sub-sampled for long series)
+        return geometry_kernel.fit_theil_sen(xs, ys)
 
     def _cluster_swing_points(self, timestamps: List[datetime], closes: List[float], 
                              swing_indices: List[int], cluster_window_hours: int = 24, 
                              price_threshold_pct: float = 10.0) -> List[List[int]]:
         """Cluster swing points by both time and price proximity"""
-        if len(swing_indices) < 2:
-            return [swing_indices] if swing_indices else []
-        
-        # Sort swing points by timestamp
-        sorted_swings = sorted(swing_indices, key=lambda i: timestamps[i])
-        
-        clusters = []
-        current_cluster = [sorted_swings[0]]
-        
-        for i in range(1, len(sorted_swings)):
-            current_idx = sorted_swings[i]
-            prev_idx = sorted_swings[i-1]
-            
-            # Calculate time difference in hours
-            time_diff_hours = (timestamps[current_idx] - timestamps[prev_idx]).total_seconds() / 3600
-            
-            # Calculate price difference as percentage
-            current_price = closes[current_idx]
-            prev_price = closes[prev_idx]
-            price_diff_pct = abs(current_price - prev_price) / prev_price * 100 if prev_price > 0 else 0
-            
-            # Check both time AND price proximity
-            if time_diff_hours <= cluster_window_hours and price_diff_pct <= price_threshold_pct:
-                # Add to current cluster (close in both time and price)
-                current_cluster.append(current_idx)
-            else:
-                # Start new cluster
-                if len(current_cluster) >= 3:  # Only keep clusters with 3+ points
-                    clusters.append(current_cluster)
-                current_cluster = [current_idx]
-        
-        # Add the last cluster
-        if len(current_cluster) >= 3:
-            clusters.append(current_cluster)
-        
-        return clusters
+        return geometry_kernel.cluster_swing_points(
+            [t.timestamp() for t in timestamps], closes, swing_indices,
+            cluster_window_hours=cluster_window_hours, price_threshold_pct=price_threshold_pct,
+        )
 
     def _calculate_ema(self, prices: List[float], period: int) -> List[float]:
         """Calculate Exponential Moving Average"""
@@ -995,126 +930,327 @@ class GeometryBuilder:
 
     def build(self) -> int:
         now = datetime.now(timezone.utc)
-        minutes = self.lookback_days * 24 * 60
         positions = self._active_positions()
+        states = self._load_geometry_states() if self.incremental else {}
+        changed_states: Dict[str, Dict[str, Any]] = {}
         updated = 0
         
-        for p in positions:
-            pid = p["id"]
-            contract = p["token_contract"]
-            chain = p["token_chain"]
-            bars = self._fetch_bars(contract, chain, now, None)  # Fetch available data
-            
-            # Limit to 9999 bars max to prevent processing excessive historical data
-            if len(bars) > 9999:
-                bars = bars[-9999:]  # Keep most recent 9999 bars
-            
-            if len(bars) < 50:  # Need sufficient data for analysis
-                continue
-                
-            closes = [float(b["close_usd"]) for b in bars]
-            highs = [float(b.get("high_usd", b["close_usd"])) for b in bars]
-            lows = [float(b.get("low_usd", b["close_usd"])) for b in bars]
-            timestamps = [datetime.fromisoformat(b["timestamp"].replace('Z', '+00:00')) for b in bars]
-            
-            # Use improved percentage-based swing detection
-            swing_highs, swing_lows = self._swings_percentage_based(closes, prominence_threshold=0.5)
-            
-            if len(swing_highs) < 3 and len(swing_lows) < 3:
-                continue  # Need sufficient swing points
-            
-            # Generate horizontal S/R levels (combine all swing points)
-            all_swing_points = swing_highs + swing_lows
-            sr_levels = self._cluster_levels(closes, all_swing_points, tol_percent=0.06)  # Use 6% tolerance for native prices
-            
-            # Add ATH and ATL as important S/R levels
-            if len(closes) > 0:
-                ath_price = max(closes)
-                atl_price = min(closes)
-                current_price = closes[-1]
-                
-                # Add ATH level
-                sr_levels.append({
-                    "price": ath_price,
-                    "strength": 10,  # High strength for ATH
-                    "confidence": 1.0,
-                    "type": "line",
-                    "touches": 1,
-                    "source": "ATH"
-                })
-                
-                # Add ATL level  
-                sr_levels.append({
-                    "price": atl_price,
-                    "strength": 10,  # High strength for ATL
-                    "confidence": 1.0,
-                    "type": "line", 
-                    "touches": 1,
-                    "source": "ATL"
-                })
-                
-                # Add Fibonacci levels with S/R correlation bonuses
-                fib_levels = self._calculate_fibonacci_levels(ath_price, atl_price, current_price, sr_levels)
-                sr_levels.extend(fib_levels)
-                
-                # Sort by strength and keep top levels
-                sr_levels.sort(key=lambda x: (x["strength"], -abs(x["price"])), reverse=True)
-                sr_levels = sr_levels[:12]  # Keep top 12 levels (increased for Fib levels)
-            
-            # Chart generation removed - diagonals no longer computed
-            # (Chart generation code removed as it depended on diagonal calculations)
+        # Fetch + compute in parallel; writes stay on this thread (FeaturesWriter is not thread-safe)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="geometry") as pool:
+            results = pool.map(
+                lambda p: self._build_position_geometry(p, now, states.get(str(p["id"]))), positions
+            )
+            for p, (geometry, state) in zip(positions, results):
+                if state is not None:
+                    changed_states[str(p["id"])] = state
+                if geometry is None:
+                    continue
+                self.persist.write_features_token_geometry(p["id"], geometry)
+                updated += 1
 
-            # --- Normalize SR levels for SM consumption ---
-            def _round_native(px: float) -> Tuple[float, int]:
-                """Return (rounded_price, decimals_used) for stable IDs and comparisons."""
-                if px >= 1.0:
-                    n = 6
-                elif px >= 0.01:
-                    n = 8
-                else:
-                    n = 10
-                return (round(px, n), n)
+        self.persist.flush_features()
+        if self.incremental and changed_states:
+            self._save_geometry_states(changed_states, now)
+        logger.info(
+            "Geometry built for %d positions (%d states advanced, %d unchanged)",
+            updated, len(changed_states), len(positions) - len(changed_states),
+        )
+        return updated
+
+    def _build_position_geometry(
+        self, p: Dict[str, Any], now: datetime, prev_state: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """(geometry, new state) for one position, (None, None) = nothing to write; runs on a pool worker."""
+        try:
+            return self._compute_position_geometry(p, now, prev_state)
+        except Exception as e:
+            logger.error("Geometry build failed for position %s: %s", p.get("id"), e)
+            return None, None
+
+    def _compute_position_geometry(
+        self, p: Dict[str, Any], now: datetime, prev_state: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        contract = p["token_contract"]
+        chain = p["token_chain"]
+
+        state = None
+        if prev_state is not None and self._state_usable(prev_state, now):
+            state = self._advance_state(contract, chain, prev_state, now)
+            if state is prev_state:
+                return None, None  # No new bars: stored geometry is current
+        if state is None:
+            state = self._full_state(contract, chain, now)
+            if state is None:
+                return None, None  # Need sufficient data for analysis
+        return self._geometry_from_state(chain, contract, state, now), state
+
+    # --- Geometry state (swings, clusters, ATH/ATL) ---
+
+    @staticmethod
+    def _bar_ts(bar: Dict[str, Any]) -> float:
+        return datetime.fromisoformat(str(bar["timestamp"]).replace('Z', '+00:00')).timestamp()
+
+    def _state_usable(self, state: Dict[str, Any], now: datetime) -> bool:
+        """Known version and younger than GEOM_FULL_REBUILD_HOURS (periodic full rebuild as a safety net)."""
+        if state.get("v") != GEOMETRY_STATE_VERSION or not state.get("tail"):
+            return False
+        try:
+            built_at = datetime.fromisoformat(str(state["built_at"]).replace('Z', '+00:00'))
+        except Exception:
+            return False
+        return now - built_at < timedelta(hours=self.full_rebuild_hours)
+
+    def _full_state(self, contract: str, chain: str, now: datetime) -> Optional[Dict[str, Any]]:
+        """Geometry state from the full bar history (last MAX_BARS bars); None with fewer than MIN_BARS."""
+        bars = self._fetch_bars(contract, chain, now, None)  # Fetch available data
+        
+        # Limit to MAX_BARS to prevent processing excessive historical data
+        bars = bars[-MAX_BARS:]
+        if len(bars) < MIN_BARS:
+            return None
+
+        closes = [float(b["close_usd"]) for b in bars]
+        swing_highs, swing_lows = self._swings_percentage_based(closes, prominence_threshold=SWING_PROMINENCE)
+        swings = sorted(
+            [[i, closes[i], "h"] for i in swing_highs] + [[i, closes[i], "l"] for i in swing_lows],
+            key=lambda s: s[0],
+        )
+        n = len(closes)
+        # Latest index of the extreme, so it stays in the window as long as possible
+        ath_idx = max(range(n), key=lambda i: (closes[i], i))
+        atl_idx = max(range(n), key=lambda i: (-closes[i], i))
+        return {
+            "v": GEOMETRY_STATE_VERSION,
+            "n": n,
+            "tail": [[self._bar_ts(b), float(b["close_usd"])] for b in bars[-EDGE_BARS:]],
+            "swings": swings,
+            "clusters": geometry_kernel.sweep_clusters(sorted(s[1] for s in swings), LEVEL_TOLERANCE),
+            "ath": [closes[ath_idx], ath_idx],
+            "atl": [closes[atl_idx], atl_idx],
+            "last_price": closes[-1],
+            "built_at": now.isoformat(),
+        }
+
+    def _advance_state(
+        self, contract: str, chain: str, prev: Dict[str, Any], now: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fold bars after the stored tail into prev.
+
+        Bar indices are global (bar count since the last full rebuild); the window
+        is the last MAX_BARS of them, like a full rebuild.
+
+        Returns:
+            prev itself when there are no new bars, None when a full rebuild is needed
+        """
+        tail = prev["tail"]
+        since = tail[0][0]
+        minutes = int((now.timestamp() - since) // 60) + 2
+        bars = [b for b in self._fetch_bars(contract, chain, now, minutes) if self._bar_ts(b) >= since]
+        if len(bars) < len(tail):
+            return None
+        for b, (ts, close) in zip(bars, tail):
+            if self._bar_ts(b) != ts or float(b["close_usd"]) != close:
+                return None  # Tail bars restated or missing
+        new_bars = bars[len(tail):]
+        if not new_bars:
+            return prev
+
+        n_prev = int(prev["n"])
+        n = n_prev + len(new_bars)
+        start = max(0, n - MAX_BARS)
+
+        # Swings near the edge: the previous last two bars are decidable now
+        closes = [c for _, c in tail] + [float(b["close_usd"]) for b in new_bars]
+        offset = n_prev - len(tail)
+        edge_highs, edge_lows = self._swings_percentage_based(closes, prominence_threshold=SWING_PROMINENCE)
+        added = sorted(
+            [[offset + i, closes[i], "h"] for i in edge_highs] + [[offset + i, closes[i], "l"] for i in edge_lows],
+            key=lambda s: s[0],
+        )
 
-            def _stable_level_id(chain: str, contract: str, source: str, price_rounded: float, decimals: int) -> str:
-                base = f"{chain}:{contract}:{source}:{price_rounded:.{decimals}f}"
-                # Simple, deterministic short hash for ID stability
-                import hashlib
-                return hashlib.sha256(base.encode("utf-8")).hexdigest()[:16]
+        ath, atl = list(prev["ath"]), list(prev["atl"])
+        for j, close in enumerate(closes[len(tail):]):
+            if close >= ath[0]:
+                ath = [close, n_prev + j]
+            if close <= atl[0]:
+                atl = [close, n_prev + j]
+        if ath[1] < start or atl[1] < start:
+            return None  # Extreme rolled out of the window: recompute from the bars
 
-            # Ensure levels list exists
-            sr_levels = sr_levels or []
+        # A swing needs 2 bars before it inside the window
+        kept = [s for s in prev["swings"] if s[0] >= start + 2]
+        removed = [s[1] for s in prev["swings"] if s[0] < start + 2]
+        swings = kept + added
+        changed = [s[1] for s in added] + removed
+        clusters = prev["clusters"]
+        if changed:
+            clusters = geometry_kernel.sweep_clusters(
+                sorted(s[1] for s in swings), LEVEL_TOLERANCE, clusters=clusters, from_price=min(changed)
+            )
+
+        return {
+            "v": GEOMETRY_STATE_VERSION,
+            "n": n,
+            "tail": (tail + [[self._bar_ts(b), float(b["close_usd"])] for b in new_bars])[-EDGE_BARS:],
+            "swings": swings,
+            "clusters": clusters,
+            "ath": ath,
+            "atl": atl,
+            "last_price": closes[-1],
+            "built_at": prev["built_at"],
+        }
 
-            # Sort by price descending for engine consumption
-            sr_levels.sort(key=lambda x: float(x.get("price", 0.0)), reverse=True)
+    def _load_geometry_states(self) -> Dict[str, Dict[str, Any]]:
+        """Load persisted geometry state for this timeframe (one paged read).
 
-            # Enrich each level with id, native rounding, explicit order
-            for idx, lvl in enumerate(sr_levels):
-                try:
-                    price_native = float(lvl.get("price", 0.0))
-                except Exception:
-                    price_native = 0.0
-                price_rounded, decs = _round_native(price_native)
-                source = str(lvl.get("source") or lvl.get("type") or "clustered")
-                lvl["price_native_raw"] = price_native
-                lvl["price_rounded_native"] = price_rounded
-                lvl["order_desc"] = idx  # 0 = highest price
-                lvl["id"] = _stable_level_id(chain, contract, source, price_rounded, decs)
+        Any failure (e.g. table not migrated yet) disables incremental mode for
+        this run - every position then takes the full-rebuild path.
+        """
+        states: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        try:
+            while True:
+                rows = (
+                    self.sb.table(GEOMETRY_STATE_TABLE)
+                    .select("position_id,state")
+                    .eq("timeframe", self.timeframe)
+                    .order("position_id")
+                    .range(offset, offset + 999)
+                    .execute()
+                    .data or []
+                )
+                for r in rows:
+                    if isinstance(r.get("state"), dict):
+                        states[str(r.get("position_id"))] = r["state"]
+                if len(rows) < 1000:
+                    break
+                offset += 1000
+        except Exception as e:
+            logger.warning("Geometry state load failed (timeframe=%s), using full rebuild: %s", self.timeframe, e)
+            self.incremental = False
+            return {}
+        return states
 
-            geometry = {
-                "levels": {"sr_levels": sr_levels},
-                "swing_points": {
-                    "highs": len(swing_highs),
-                    "lows": len(swing_lows)
-                    # Coordinates removed - not used after computation
-                },
+    def _save_geometry_states(self, states: Dict[str, Dict[str, Any]], now: datetime) -> None:
+        """Persist changed geometry states in chunked bulk upserts."""
+        rows = [
+            {
+                "position_id": pid,
+                "timeframe": self.timeframe,
+                "state": st,
+                "watermark_ts": datetime.fromtimestamp(st["tail"][-1][0], tz=timezone.utc).isoformat(),
                 "updated_at": now.isoformat(),
             }
-            
-            self.persist.write_features_token_geometry(pid, geometry)
-            updated += 1
-            
-        logger.info("Geometry built for %d positions", updated)
-        return updated
+            for pid, st in states.items()
+        ]
+        for i in range(0, len(rows), STATE_CHUNK_SIZE):
+            try:
+                (
+                    self.sb.table(GEOMETRY_STATE_TABLE)
+                    .upsert(rows[i:i + STATE_CHUNK_SIZE], on_conflict="position_id,timeframe")
+                    .execute()
+                )
+            except Exception as e:
+                # Non-fatal: next run simply rebuilds these positions in full
+                logger.warning("Geometry state save failed (timeframe=%s): %s", self.timeframe, e)
+                return
+
+    def _geometry_from_state(
+        self, chain: str, contract: str, state: Dict[str, Any], now: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """S/R levels (clusters + ATH/ATL + Fibonacci) from geometry state; None without enough swings."""
+        n_highs = sum(1 for s in state["swings"] if s[2] == "h")
+        n_lows = len(state["swings"]) - n_highs
+        if n_highs < 3 and n_lows < 3:
+            return None  # Need sufficient swing points
+
+        # Horizontal S/R levels from the clustered swing prices
+        sr_levels = geometry_kernel.score_clusters(state["clusters"])
+        
+        # Add ATH and ATL as important S/R levels
+        ath_price = float(state["ath"][0])
+        atl_price = float(state["atl"][0])
+        current_price = float(state["last_price"])
+        
+        # Add ATH level
+        sr_levels.append({
+            "price": ath_price,
+            "strength": 10,  # High strength for ATH
+            "confidence": 1.0,
+            "type": "line",
+            "touches": 1,
+            "source": "ATH"
+        })
+        
+        # Add ATL level  
+        sr_levels.append({
+            "price": atl_price,
+            "strength": 10,  # High strength for ATL
+            "confidence": 1.0,
+            "type": "line", 
+            "touches": 1,
+            "source": "ATL"
+        })
+        
+        # Add Fibonacci levels with S/R correlation bonuses
+        # (prices follow ATH/ATL; strengths are re-scored against the current levels)
+        fib_levels = self._calculate_fibonacci_levels(ath_price, atl_price, current_price, sr_levels)
+        sr_levels.extend(fib_levels)
+        
+        # Sort by strength and keep top levels
+        sr_levels.sort(key=lambda x: (x["strength"], -abs(x["price"])), reverse=True)
+        sr_levels = sr_levels[:12]  # Keep top 12 levels (increased for Fib levels)
+        
+        # Chart generation removed - diagonals no longer computed
+        # (Chart generation code removed as it depended on diagonal calculations)
+
+        # --- Normalize SR levels for SM consumption ---
+        def _round_native(px: float) -> Tuple[float, int]:
+            """Return (rounded_price, decimals_used) for stable IDs and comparisons."""
+            if px >= 1.0:
+                n = 6
+            elif px >= 0.01:
+                n = 8
+            else:
+                n = 10
+            return (round(px, n), n)
+
+        def _stable_level_id(chain: str, contract: str, source: str, price_rounded: float, decimals: int) -> str:
+            base = f"{chain}:{contract}:{source}:{price_rounded:.{decimals}f}"
+            # Simple, deterministic short hash for ID stability
+            import hashlib
+            return hashlib.sha256(base.encode("utf-8")).hexdigest()[:16]
+
+        # Ensure levels list exists
+        sr_levels = sr_levels or []
+
+        # Sort by price descending for engine consumption
+        sr_levels.sort(key=lambda x: float(x.get("price", 0.0)), reverse=True)
+
+        # Enrich each level with id, native rounding, explicit order
+        for idx, lvl in enumerate(sr_levels):
+            try:
+                price_native = float(lvl.get("price", 0.0))
+            except Exception:
+                price_native = 0.0
+            price_rounded, decs = _round_native(price_native)
+            source = str(lvl.get("source") or lvl.get("type") or "clustered")
+            lvl["price_native_raw"] = price_native
+            lvl["price_rounded_native"] = price_rounded
+            lvl["order_desc"] = idx  # 0 = highest price
+            lvl["id"] = _stable_level_id(chain, contract, source, price_rounded, decs)
+
+        geometry = {
+            "levels": {"sr_levels": sr_levels},
+            "swing_points": {
+                "highs": n_highs,
+                "lows": n_lows
+                # Coordinates removed - not used after computation
+            },
+            "updated_at": now.isoformat(),
+        }
+        return geometry
 
 
 def main(timeframe: str = "1h") -> None:
@@ -0,0 +1,192 @@
+"""
+Array-based geometry kernel (swings, S/R level clustering, Theil–Sen, swing clusters).
+
+Used by GeometryBuilder (geometry_build_daily.py). Results match the original
+loop implementations exactly - same swing indices, same level centers (same
+floats, hence the same level IDs), same clusters:
+
+- swings: the 5-bar swing pattern and percentage prominence are evaluated on
+  shifted NumPy views instead of a per-bar loop
+- level clustering: prices are swept once in ascending order. The original
+  first-fit scan over all centers can only ever match the newest center (a new
+  center is only opened more than tol above every older one, and older centers
+  never change afterwards), so comparing against the last center is equivalent
+  and O(n log n) overall; the running-mean update keeps the original operation
+  order. sweep_clusters() can resume from persisted clusters: clusters that lie
+  entirely below the lowest added/removed price (except the last of them) are
+  unaffected, so incremental updates only re-sweep from there
+- Theil–Sen: pairwise slopes are built as arrays; above THEIL_SEN_EXACT_MAX
+  points the median is taken over a fixed-seed random sample of pairs
+- swing-point clusters: break points between consecutive swings are computed
+  as one mask and the runs are split at them
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+THEIL_SEN_EXACT_MAX = 1500  # points; ~1.1M pairwise slopes
+THEIL_SEN_SAMPLE_PAIRS = 200_000
+THEIL_SEN_SEED = 0
+MAX_CLUSTERED_LEVELS = 9
+
+
+def swings_percentage_based(closes: Sequence[float], prominence_threshold: float = 0.5) -> Tuple[List[int], List[int]]:
+    """
+    Swing highs/lows: strict 5-bar extremum with percentage prominence >= threshold.
+
+    Returns:
+        (high indices, low indices), ascending
+    """
+    c = np.asarray(closes, dtype=float)
+    n = len(c)
+    if n < 5:
+        return [], []
+    mid = c[2:n - 2]
+    neighbours = (c[0:n - 4], c[1:n - 3], c[3:n - 1], c[4:n])
+
+    is_high = np.logical_and.reduce([mid > x for x in neighbours])
+    is_low = np.logical_and.reduce([mid < x for x in neighbours])
+    positive = mid > 0
+    safe = np.where(positive, mid, 1.0)
+
+    # Window extremes: for a strict high the window min is the min of the neighbours (and vice versa)
+    window_min = np.minimum.reduce(neighbours)
+    window_max = np.maximum.reduce(neighbours)
+    high_prom = (mid - window_min) / safe * 100
+    low_prom = (window_max - mid) / safe * 100
+
+    highs = np.flatnonzero(is_high & positive & (high_prom >= prominence_threshold)) + 2
+    lows = np.flatnonzero(is_low & positive & (low_prom >= prominence_threshold)) + 2
+    return highs.tolist(), lows.tolist()
+
+
+def sweep_clusters(
+    sorted_prices: Sequence[float],
+    tol_percent: float,
+    clusters: Optional[List[List[float]]] = None,
+    from_price: Optional[float] = None,
+) -> List[List[float]]:
+    """
+    Cluster ascending prices: join the newest center while within tol, else open a new one.
+
+    Args:
+        sorted_prices: All swing prices, ascending
+        tol_percent: Tolerance as a fraction (0.06 = 6%)
+        clusters: Previous result ([center, count, lo, hi] per cluster) to resume from
+        from_price: Lowest price added or removed since `clusters` was computed
+
+    Returns:
+        [center, count, lo, hi] per cluster, ascending (same as a full sweep)
+    """
+    kept: List[List[float]] = []
+    start = 0
+    if clusters and from_price is not None:
+        # Clusters entirely below the change are unaffected; the last of them is
+        # re-swept as well since a new price right above it could join it
+        n_kept = bisect_left([c[3] for c in clusters], from_price) - 1
+        if n_kept > 0:
+            kept = [list(c) for c in clusters[:n_kept]]
+            start = bisect_left(sorted_prices, clusters[n_kept][2])
+
+    out = kept
+    for price in sorted_prices[start:]:
+        price = float(price)
+        if out:
+            last = out[-1]
+            c = last[0]
+            if abs(price - c) / c <= tol_percent:
+                last[0] = (c * last[1] + price) / (last[1] + 1)
+                last[1] += 1
+                last[3] = price
+                continue
+        out.append([price, 1, price, price])
+    return out
+
+
+def score_clusters(clusters: Sequence[Sequence[float]], top_n: int = MAX_CLUSTERED_LEVELS) -> List[Dict[str, Any]]:
+    """S/R levels from swept clusters, strongest first (top_n kept)."""
+    scored = [
+        {"price": c[0], "strength": int(c[1]), "confidence": min(1.0, int(c[1]) / 10.0), "type": "line"}
+        for c in clusters
+    ]
+    # Keep top N (balanced limit to capture important levels)
+    scored.sort(key=lambda x: (x["strength"], -abs(x["price"])), reverse=True)
+    return scored[:top_n]
+
+
+def cluster_levels(prices: Sequence[float], tol_percent: float, top_n: int = MAX_CLUSTERED_LEVELS) -> List[Dict[str, Any]]:
+    """
+    Cluster swing prices into S/R levels (percentage tolerance), strongest first.
+
+    Args:
+        prices: Swing prices (any order)
+        tol_percent: Tolerance as a fraction (0.06 = 6%)
+        top_n: Levels to keep
+    """
+    return score_clusters(sweep_clusters(sorted(float(p) for p in prices), tol_percent), top_n)
+
+
+def fit_theil_sen(xs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float]:
+    """
+    Theil–Sen line fit: slope = median of pairwise slopes, intercept = median(y - m x).
+
+    Exact up to THEIL_SEN_EXACT_MAX points; beyond that the slope median is
+    taken over THEIL_SEN_SAMPLE_PAIRS random pairs (fixed seed, deterministic).
+    """
+    if len(xs) < 3:
+        return (0.0, float(ys[-1]) if len(ys) else 0.0)
+    x = np.asarray(xs, dtype=float)
+    y = np.asarray(ys, dtype=float)
+    n = len(x)
+
+    if n <= THEIL_SEN_EXACT_MAX:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        rng = np.random.default_rng(THEIL_SEN_SEED)
+        i = rng.integers(0, n, THEIL_SEN_SAMPLE_PAIRS)
+        j = rng.integers(0, n, THEIL_SEN_SAMPLE_PAIRS)
+    dx = x[j] - x[i]
+    valid = (dx != 0) & (i != j)
+    slopes = (y[j][valid] - y[i][valid]) / dx[valid]
+    m = float(np.median(slopes)) if slopes.size else 0.0
+    b = float(np.median(y - m * x))
+    return m, b
+
+
+def cluster_swing_points(
+    times_s: Sequence[float],
+    prices: Sequence[float],
+    swing_indices: Sequence[int],
+    cluster_window_hours: float = 24,
+    price_threshold_pct: float = 10.0,
+    min_size: int = 3,
+) -> List[List[int]]:
+    """
+    Group swings that are consecutive in time and close in both time and price.
+
+    Args:
+        times_s: Bar timestamps as epoch seconds
+        prices: Bar prices
+        swing_indices: Swing bar indices
+    Returns:
+        Clusters (lists of bar indices, time order) with at least min_size points
+    """
+    if len(swing_indices) < 2:
+        return [list(swing_indices)] if len(swing_indices) else []
+
+    t = np.asarray(times_s, dtype=float)
+    p = np.asarray(prices, dtype=float)
+    idx = np.asarray(swing_indices, dtype=np.int64)
+    idx = idx[np.argsort(t[idx], kind="stable")]
+
+    prev_p = p[idx[:-1]]
+    time_diff_hours = (t[idx[1:]] - t[idx[:-1]]) / 3600
+    price_diff_pct = np.where(prev_p > 0, np.abs(p[idx[1:]] - prev_p) / np.where(prev_p > 0, prev_p, 1.0) * 100, 0.0)
+    joined = (time_diff_hours <= cluster_window_hours) & (price_diff_pct <= price_threshold_pct)
+
+    runs = np.split(idx, np.flatnonzero(~joined) + 1)
+    return [run.tolist() for run in runs if len(run) >= min_size]
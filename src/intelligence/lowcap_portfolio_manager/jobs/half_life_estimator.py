@@ -6,6 +6,7 @@ Runs weekly to fit exponential decay curves.
 """
 
 import logging
+import math
 import os
 import json
 from typing import Dict, List, Any, Optional, Tuple
@@ -13,10 +14,125 @@ from datetime import datetime, timezone, timedelta
 
 from supabase import create_client, Client
 
-from src.intelligence.lowcap_portfolio_manager.jobs.lesson_builder_v5 import estimate_half_life
+from src.intelligence.lowcap_portfolio_manager.data.rpc_errors import is_missing_function
 
 logger = logging.getLogger(__name__)
 
+EDGE_HISTORY_RPC = "latest_edge_history"
+EDGE_HISTORY_PER_KEY = 30  # newest points used per pattern+category+scope
+EDGE_HISTORY_KEY_CHUNK = 100  # pattern_keys per in_() filter / RPC call
+EDGE_HISTORY_PAGE_SIZE = 1000
+# Fallback read bound: per_key daily snapshots (see snapshot_pattern_scope_stats), with slack for missed days
+EDGE_HISTORY_LOOKBACK_DAYS = 2 * EDGE_HISTORY_PER_KEY
+HALF_LIFE_UPDATE_CHUNK = 500  # lesson ids per in_() filter
+
+# Set once the RPC turned out to be missing in this process (migration not applied yet)
+_rpc_unavailable = False
+
+
+def _linear_regression(times: List[float], values: List[float]) -> float:
+    if len(times) < 2:
+        return 0.0
+    n = len(times)
+    sum_t = sum(times)
+    sum_v = sum(values)
+    sum_t2 = sum(t * t for t in times)
+    sum_tv = sum(t * v for t, v in zip(times, values))
+    denom = n * sum_t2 - sum_t * sum_t
+    if abs(denom) < 1e-9:
+        return 0.0
+    return (n * sum_tv - sum_t * sum_v) / denom
+
+
+def estimate_half_life(edge_history: List[Tuple[float, datetime]]) -> Optional[float]:
+    """
+    Estimate exponential decay half-life from edge history.
+    
+    Fits exponential decay toward zero: |y(t)| = |y_0| * exp(-lambda * t)
+    Works for both positive and negative values by using absolute values for fitting.
+    Model: y(t) = sign(y_0) * |y_0| * exp(-lambda * t) (decays toward zero)
+    
+    Args:
+        edge_history: List of (edge_value, timestamp) tuples, sorted by time
+        
+    Returns:
+        Half-life in hours, or None if insufficient data or fit fails
+    """
+    if len(edge_history) < 5:
+        return None
+    
+    # Sort by timestamp (should already be sorted, but be safe)
+    sorted_history = sorted(edge_history, key=lambda x: x[1])
+    
+    # Extract times and values
+    t0 = sorted_history[0][1]
+    times = []
+    values = []
+    
+    for edge_val, ts in sorted_history:
+        hours = (ts - t0).total_seconds() / 3600.0
+        times.append(hours)
+        values.append(edge_val)
+    
+    # Check if values cross zero (change sign)
+    signs = [1 if v > 0 else (-1 if v < 0 else 0) for v in values]
+    has_positive = any(s > 0 for s in signs)
+    has_negative = any(s < 0 for s in signs)
+    crosses_zero = has_positive and has_negative
+    
+    if crosses_zero:
+        # If values cross zero, use the more recent segment (after zero-crossing)
+        # Find the zero-crossing point
+        zero_cross_idx = None
+        for i in range(1, len(values)):
+            if (values[i-1] > 0 and values[i] <= 0) or (values[i-1] < 0 and values[i] >= 0):
+                zero_cross_idx = i
+                break
+        
+        if zero_cross_idx is not None and len(values) - zero_cross_idx >= 5:
+            # Use segment after zero-crossing
+            times = times[zero_cross_idx:]
+            values = values[zero_cross_idx:]
+        elif zero_cross_idx is not None and zero_cross_idx >= 5:
+            # Use segment before zero-crossing
+            times = times[:zero_cross_idx]
+            values = values[:zero_cross_idx]
+        else:
+            # Not enough data on either side, can't fit reliably
+            return None
+    
+    # Use absolute values for fitting (exponential decay toward zero)
+    # Filter out zero values (can't take log)
+    abs_pairs = [(t, abs(v)) for t, v in zip(times, values) if abs(v) > 1e-9]
+    if len(abs_pairs) < 5:
+        return None
+    
+    abs_times = [t for t, _ in abs_pairs]
+    abs_values = [v for _, v in abs_pairs]
+    
+    # Fit exponential decay: |y| = |y_0| * exp(-lambda * t)
+    # Take log: ln(|y|) = ln(|y_0|) - lambda * t
+    log_values = [math.log(v) for v in abs_values]
+    
+    # Linear regression: ln(|y|) = a + b*t, where b = -lambda
+    slope = _linear_regression(abs_times, log_values)
+    
+    # If slope is positive or near zero, pattern is improving or stable (no decay)
+    if slope >= -1e-6:
+        return None  # No decay to measure (pattern is improving or stable)
+    
+    # lambda = -slope
+    lambda_val = -slope
+    
+    # Half-life: t_half = ln(2) / lambda
+    if lambda_val > 0:
+        half_life_hours = math.log(2) / lambda_val
+        # Clamp to reasonable range (1 hour to 1 year)
+        half_life_hours = max(1.0, min(8760.0, half_life_hours))
+        return half_life_hours
+    
+    return None
+
 
 async def update_edge_history(
     sb_client: Client,
@@ -50,6 +166,99 @@ async def update_edge_history(
         logger.warning(f"Error updating edge history: {e}")
 
 
+def scope_signature_of(scope_values: Dict[str, Any]) -> str:
+    """Scope signature used to key learning_edge_history rows."""
+    return json.dumps(sorted(scope_values.items()), sort_keys=True)
+
+
+def fetch_edge_histories(
+    sb_client: Client,
+    pattern_keys: List[str],
+    per_key: int = EDGE_HISTORY_PER_KEY,
+) -> Dict[Tuple[str, str, str], List[Tuple[float, datetime]]]:
+    """
+    Latest edge history for many patterns in one grouped read.
+
+    Reads the newest per_key points per (pattern_key, action_category,
+    scope_signature) for EDGE_HISTORY_KEY_CHUNK pattern_keys at a time through
+    the latest_edge_history() RPC. Without the RPC it pages learning_edge_history
+    newest first, bounded to the last EDGE_HISTORY_LOOKBACK_DAYS.
+
+    Returns:
+        {(pattern_key, action_category, scope_signature): [(edge_raw, ts), ...] newest first}
+    """
+    histories: Dict[Tuple[str, str, str], List[Tuple[float, datetime]]] = {}
+    keys = sorted(set(pattern_keys))
+    since = (datetime.now(timezone.utc) - timedelta(days=EDGE_HISTORY_LOOKBACK_DAYS)).isoformat()
+    for i in range(0, len(keys), EDGE_HISTORY_KEY_CHUNK):
+        chunk = keys[i:i + EDGE_HISTORY_KEY_CHUNK]
+        rows = _fetch_latest_rpc(sb_client, chunk, per_key)
+        if rows is None:
+            rows = _fetch_recent_paged(sb_client, chunk, since)
+        for hist_row in rows:
+            key = (hist_row.get('pattern_key'), hist_row.get('action_category'), hist_row.get('scope_signature'))
+            points = histories.setdefault(key, [])
+            ts_str = hist_row.get('ts')
+            if len(points) >= per_key or not ts_str:
+                continue
+            try:
+                ts = datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
+            except Exception:
+                continue
+            points.append((hist_row.get('edge_raw', 0.0), ts))
+    return histories
+
+
+def _fetch_latest_rpc(sb_client: Client, chunk: List[str], per_key: int) -> Optional[List[Dict[str, Any]]]:
+    """Newest per_key rows per pattern/category/scope via the RPC, or None to use the table read."""
+    global _rpc_unavailable
+    if _rpc_unavailable:
+        return None
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    try:
+        while True:
+            page = sb_client.rpc(EDGE_HISTORY_RPC, {
+                'p_pattern_keys': chunk,
+                'p_per_key': per_key,
+                'p_offset': offset,
+                'p_limit': EDGE_HISTORY_PAGE_SIZE,
+            }).execute().data or []
+            rows.extend(page)
+            if len(page) < EDGE_HISTORY_PAGE_SIZE:
+                return rows
+            offset += EDGE_HISTORY_PAGE_SIZE
+    except Exception as e:
+        if is_missing_function(e):
+            _rpc_unavailable = True
+            logger.warning(f"{EDGE_HISTORY_RPC} RPC missing, using bounded table reads from now on: {e}")
+        else:
+            logger.warning(f"{EDGE_HISTORY_RPC} RPC failed, bounded table read for this chunk: {e}")
+        return None
+
+
+def _fetch_recent_paged(sb_client: Client, chunk: List[str], since: str) -> List[Dict[str, Any]]:
+    """Edge history of the chunk's patterns since `since`, newest first (id breaks ts ties so pages are stable)."""
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = (
+            sb_client.table('learning_edge_history')
+            .select('pattern_key,action_category,scope_signature,edge_raw,ts')
+            .in_('pattern_key', chunk)
+            .gte('ts', since)
+            .order('ts', desc=True)
+            .order('id', desc=True)
+            .range(offset, offset + EDGE_HISTORY_PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        rows.extend(page)
+        if len(page) < EDGE_HISTORY_PAGE_SIZE:
+            return rows
+        offset += EDGE_HISTORY_PAGE_SIZE
+
+
 async def run_half_life_estimator(
     sb_client: Optional[Client] = None,
     limit: int = 500
@@ -58,93 +267,87 @@ async def run_half_life_estimator(
     Run half-life estimation job.
     
     For each active lesson, estimate half-life from edge history and update.
+    Edge history for all lessons is prefetched in one grouped read, and only
+    lessons whose half-life changed are written: decay_halflife_hours and
+    last_validated only, one update per distinct half-life value.
     
     Args:
         sb_client: Supabase client (creates if None)
         limit: Max lessons to process
     
     Returns:
-        Dict with counts: {'processed': N, 'half_lives_updated': M}
+        Dict with counts: {'processed': N, 'half_lives_updated': M, 'unchanged': K}
     """
     if sb_client is None:
         supabase_url = os.getenv("SUPABASE_URL")
         supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         if not supabase_url or not supabase_key:
             logger.error("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY")
-            return {'processed': 0, 'half_lives_updated': 0}
+            return {'processed': 0, 'half_lives_updated': 0, 'unchanged': 0}
         sb_client = create_client(supabase_url, supabase_key)
     
     try:
         # Query active lessons
         result = (
             sb_client.table('learning_lessons')
-            .select('*')
+            .select('id,pattern_key,action_category,scope_values,decay_halflife_hours')
             .eq('status', 'active')
             .limit(limit)
             .execute()
         )
         
-        lessons = result.data or []
-        half_lives_updated = 0
+        lessons = [
+            lesson for lesson in (result.data or [])
+            if lesson.get('pattern_key') and lesson.get('action_category') and lesson.get('scope_values')
+        ]
+        histories = fetch_edge_histories(sb_client, [lesson['pattern_key'] for lesson in lessons])
         
+        # Lesson ids per new half-life: one update per distinct value
+        ids_by_half_life: Dict[int, List[Any]] = {}
+        unchanged = 0
         for lesson in lessons:
-            pattern_key = lesson.get('pattern_key')
-            action_category = lesson.get('action_category')
-            scope_values = lesson.get('scope_values', {})
-            
-            if not pattern_key or not action_category or not scope_values:
+            key = (lesson['pattern_key'], lesson['action_category'], scope_signature_of(lesson['scope_values']))
+            edge_history = histories.get(key, [])
+            if len(edge_history) < 5:
                 continue
             
-            # Build scope signature
-            scope_signature = json.dumps(sorted(scope_values.items()), sort_keys=True)
-            
-            # Query edge history
             try:
-                history_result = (
-                    sb_client.table('learning_edge_history')
-                    .select('edge_raw,ts')
-                    .eq('pattern_key', pattern_key)
-                    .eq('action_category', action_category)
-                    .eq('scope_signature', scope_signature)
-                    .order('ts', desc=True)
-                    .limit(30)
-                    .execute()
-                )
-                
-                edge_history = []
-                for hist_row in (history_result.data or []):
-                    edge_val = hist_row.get('edge_raw', 0.0)
-                    ts_str = hist_row.get('ts')
-                    if ts_str:
-                        try:
-                            ts = datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-                            edge_history.append((edge_val, ts))
-                        except Exception:
-                            pass
-                
-                if len(edge_history) >= 5:
-                    half_life_hours = estimate_half_life(edge_history)
-                    
-                    if half_life_hours:
-                        # Update lesson
-                        sb_client.table('learning_lessons').update({
-                            'decay_halflife_hours': int(half_life_hours),
-                            'last_validated': datetime.now(timezone.utc).isoformat()
-                        }).eq('id', lesson['id']).execute()
-                        
-                        half_lives_updated += 1
+                half_life_hours = estimate_half_life(edge_history)
             except Exception as e:
                 logger.warning(f"Error estimating half-life for lesson {lesson.get('id')}: {e}")
                 continue
+            if not half_life_hours:
+                continue
+            
+            new_half_life = int(half_life_hours)
+            current = lesson.get('decay_halflife_hours')
+            if current is not None and float(current) == new_half_life:
+                unchanged += 1
+                continue
+            ids_by_half_life.setdefault(new_half_life, []).append(lesson['id'])
         
-        logger.info(f"Processed {len(lessons)} lessons, updated {half_lives_updated} half-lives")
-        return {'processed': len(lessons), 'half_lives_updated': half_lives_updated}
+        now = datetime.now(timezone.utc).isoformat()
+        for half_life, ids in ids_by_half_life.items():
+            for i in range(0, len(ids), HALF_LIFE_UPDATE_CHUNK):
+                (
+                    sb_client.table('learning_lessons')
+                    .update({'decay_halflife_hours': half_life, 'last_validated': now})
+                    .in_('id', ids[i:i + HALF_LIFE_UPDATE_CHUNK])
+                    .execute()
+                )
+        updated = sum(len(ids) for ids in ids_by_half_life.values())
+        
+        logger.info(
+            f"Processed {len(result.data or [])} lessons, updated {updated} half-lives "
+            f"({unchanged} unchanged)"
+        )
+        return {'processed': len(result.data or []), 'half_lives_updated': updated, 'unchanged': unchanged}
         
     except Exception as e:
         logger.error(f"Error running half-life estimator: {e}")
         import traceback
         logger.error(traceback.format_exc())
-        return {'processed': 0, 'half_lives_updated': 0}
+        return {'processed': 0, 'half_lives_updated': 0, 'unchanged': 0}
 
 
 async def snapshot_pattern_scope_stats(
@@ -182,7 +385,7 @@ async def snapshot_pattern_scope_stats(
             if not pattern_key or not action_category:
                 continue
             
-            scope_signature = json.dumps(sorted(scope_values.items()), sort_keys=True)
+            scope_signature = scope_signature_of(scope_values)
             edge_raw = stats.get('edge_raw', 0.0)
             
             try:
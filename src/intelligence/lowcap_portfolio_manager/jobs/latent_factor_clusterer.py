@@ -3,6 +3,9 @@ Latent Factor Clusterer (v5.3)
 
 Detects overlapping patterns and clusters them into latent factors.
 Runs weekly to prevent double-counting in lessons/overrides.
+
+Match sets are built from the full position_closed history (paged); overlaps
+are computed on a packed bit matrix (overlap_kernel.py).
 """
 
 import logging
@@ -13,8 +16,12 @@ from collections import defaultdict
 
 from supabase import create_client, Client
 
+from src.intelligence.lowcap_portfolio_manager.jobs.overlap_kernel import MatchMatrix
+
 logger = logging.getLogger(__name__)
 
+STRAND_PAGE_SIZE = 1000
+
 
 def compute_pattern_overlap(
     pattern1_trades: Set[str],
@@ -51,7 +58,8 @@ async def extract_pattern_match_sets(
     """
     Extract match sets for patterns from position_closed strands.
     
-    For each pattern, find which trades (position IDs) matched it.
+    For each pattern, find which trades (position IDs) matched it. Strands are
+    streamed page by page, so the full history is used.
     
     Args:
         sb_client: Supabase client
@@ -61,41 +69,49 @@ async def extract_pattern_match_sets(
         Dict mapping pattern_key -> set of position IDs
     """
     match_sets: Dict[str, Set[str]] = defaultdict(set)
+    wanted = set(pattern_keys)
+    offset = 0
     
     try:
-        # Query recent position_closed strands
-        result = (
-            sb_client.table('ad_strands')
-            .select('id,content')
-            .eq('kind', 'position_closed')
-            .eq('module', 'pm')
-            .order('created_at', desc=True)
-            .limit(1000)
-            .execute()
-        )
-        
-        strands = result.data or []
-        
-        for strand in strands:
-            content = strand.get('content', {})
-            completed_trades = content.get('completed_trades', [])
-            position_id = content.get('position_id') or strand.get('id', '')
+        # Stream position_closed strands page by page (newest first, full history)
+        while True:
+            result = (
+                sb_client.table('ad_strands')
+                .select('id,content')
+                .eq('kind', 'position_closed')
+                .eq('module', 'pm')
+                .order('created_at', desc=True)
+                .order('id')
+                .range(offset, offset + STRAND_PAGE_SIZE - 1)
+                .execute()
+            )
             
-            if not completed_trades or not position_id:
-                continue
+            strands = result.data or []
             
-            # Check each action in completed_trades
-            for trade_entry in completed_trades:
-                if not isinstance(trade_entry, dict):
-                    continue
+            for strand in strands:
+                content = strand.get('content') or {}
+                completed_trades = content.get('completed_trades', [])
+                position_id = content.get('position_id') or strand.get('id', '')
                 
-                # Skip trade summary
-                if 'outcome_class' in trade_entry:
+                if not completed_trades or not position_id:
                     continue
                 
-                pattern_key = trade_entry.get('pattern_key')
-                if pattern_key and pattern_key in pattern_keys:
-                    match_sets[pattern_key].add(str(position_id))
+                # Check each action in completed_trades
+                for trade_entry in completed_trades:
+                    if not isinstance(trade_entry, dict):
+                        continue
+                    
+                    # Skip trade summary
+                    if 'outcome_class' in trade_entry:
+                        continue
+                    
+                    pattern_key = trade_entry.get('pattern_key')
+                    if pattern_key and pattern_key in wanted:
+                        match_sets[pattern_key].add(str(position_id))
+            
+            if len(strands) < STRAND_PAGE_SIZE:
+                break
+            offset += STRAND_PAGE_SIZE
         
         return dict(match_sets)
         
@@ -109,7 +125,10 @@ def cluster_patterns(
     overlap_threshold: float = 0.7
 ) -> Dict[str, List[str]]:
     """
-    Cluster patterns by overlap using hierarchical clustering.
+    Cluster patterns by overlap (greedy first-fit over a bitset match matrix).
+    
+    In key order, each unassigned pattern seeds a cluster that takes every
+    unassigned pattern whose overlap with the seed reaches overlap_threshold.
     
     Args:
         match_sets: Dict mapping pattern_key -> set of trade IDs
@@ -121,43 +140,38 @@ def cluster_patterns(
     if not match_sets:
         return {}
     
-    pattern_keys = list(match_sets.keys())
+    matrix = MatchMatrix(match_sets)
     clusters: Dict[str, List[str]] = {}
-    assigned: Set[str] = set()
     factor_counter = 1
     
-    for pattern_key in pattern_keys:
-        if pattern_key in assigned:
-            continue
-        
-        # Start new cluster
-        cluster = [pattern_key]
-        assigned.add(pattern_key)
-        
-        # Find all patterns that overlap significantly
-        pattern_trades = match_sets[pattern_key]
-        
-        for other_key in pattern_keys:
-            if other_key in assigned or other_key == pattern_key:
-                continue
-            
-            other_trades = match_sets[other_key]
-            overlap = compute_pattern_overlap(pattern_trades, other_trades)
-            
-            if overlap >= overlap_threshold:
-                cluster.append(other_key)
-                assigned.add(other_key)
-        
-        # Create factor
-        if len(cluster) > 1:  # Only create factor if multiple patterns
+    for rows in matrix.greedy_clusters(overlap_threshold):
+        # Create factor only if multiple patterns (a single pattern is unique - no factor)
+        if len(rows) > 1:
             factor_id = f"factor_{factor_counter:03d}"
-            clusters[factor_id] = cluster
+            clusters[factor_id] = [matrix.keys[i] for i in rows]
             factor_counter += 1
-        # If single pattern, it's unique (no factor)
     
     return clusters
 
 
+def cluster_correlation_matrix(
+    match_sets: Dict[str, Set[str]],
+    pattern_keys: List[str]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Pairwise overlap between the patterns of one cluster.
+    
+    Returns:
+        {p1: {p2: overlap}} for p1 != p2
+    """
+    matrix = MatchMatrix({p: match_sets.get(p, set()) for p in pattern_keys})
+    overlaps = matrix.pairwise(range(len(matrix)))
+    return {
+        p1: {p2: float(overlaps[i, j]) for j, p2 in enumerate(matrix.keys) if i != j}
+        for i, p1 in enumerate(matrix.keys)
+    }
+
+
 async def run_latent_factor_clusterer(
     sb_client: Optional[Client] = None,
     overlap_threshold: float = 0.7
@@ -215,17 +229,7 @@ async def run_latent_factor_clusterer(
             representative = pattern_keys_in_cluster[0]
             
             # Build correlation matrix
-            correlation_matrix = {}
-            for i, p1 in enumerate(pattern_keys_in_cluster):
-                correlations = {}
-                for j, p2 in enumerate(pattern_keys_in_cluster):
-                    if i != j:
-                        overlap = compute_pattern_overlap(
-                            match_sets.get(p1, set()),
-                            match_sets.get(p2, set())
-                        )
-                        correlations[p2] = overlap
-                correlation_matrix[p1] = correlations
+            correlation_matrix = cluster_correlation_matrix(match_sets, pattern_keys_in_cluster)
             
             try:
                 # Check if factor exists
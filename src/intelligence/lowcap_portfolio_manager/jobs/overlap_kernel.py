@@ -0,0 +1,95 @@
+"""
+Bitset pattern-overlap kernel for the latent factor clusterer.
+
+Used by latent_factor_clusterer.py. cluster_patterns() used to compare every
+pattern's match set against every other with Python set Jaccard. Here:
+
+- MatchMatrix encodes each pattern's match set as one row of a packed bit
+  matrix (uint64 words over a shared trade index)
+- Jaccard of one pattern against many is an AND of its row with theirs plus a
+  row-wise popcount: |A ∩ B| / (|A| + |B| - |A ∩ B|)
+- candidates are pruned by set size first (Jaccard <= min/max size), so only
+  patterns of comparable support are ever intersected
+- greedy_clusters() reproduces the original first-fit clustering exactly: in
+  key order, each unassigned pattern seeds a cluster and takes every later
+  unassigned pattern whose overlap with the seed reaches the threshold
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Hashable, Iterable, List, Sequence
+
+import numpy as np
+
+if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+    def _popcount_rows(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount_rows(words: np.ndarray) -> np.ndarray:
+        as_bytes = words.view(np.uint8).reshape(*words.shape[:-1], -1)
+        return _POP8[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+# Size pruning slack so float rounding never drops a pair the exact ratio would keep
+_PRUNE_EPS = 1e-9
+
+
+class MatchMatrix:
+    """Pattern match sets as rows of a packed bit matrix."""
+
+    def __init__(self, match_sets: Dict[str, Iterable[Hashable]]) -> None:
+        self.keys: List[str] = list(match_sets.keys())
+        trade_index: Dict[Hashable, int] = {}
+        rows: List[List[int]] = []
+        for key in self.keys:
+            rows.append([trade_index.setdefault(t, len(trade_index)) for t in set(match_sets[key])])
+
+        n_words = max(1, (len(trade_index) + 63) // 64)
+        self.words = np.zeros((len(self.keys), n_words), dtype=np.uint64)
+        row_of = np.repeat(np.arange(len(rows), dtype=np.int64), [len(cols) for cols in rows])
+        col = np.fromiter((c for cols in rows for c in cols), dtype=np.int64, count=len(row_of))
+        np.bitwise_or.at(self.words, (row_of, col >> 6), np.left_shift(np.uint64(1), (col & 63).astype(np.uint64)))
+        self.sizes = np.array([len(cols) for cols in rows], dtype=np.int64)
+        self.n_trades = len(trade_index)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def jaccard(self, i: int, others: np.ndarray) -> np.ndarray:
+        """Jaccard of row i with each row in others (0.0 where both sets are empty)."""
+        inter = _popcount_rows(self.words[others] & self.words[i])
+        union = self.sizes[i] + self.sizes[others] - inter
+        return np.divide(inter, union, out=np.zeros(len(others)), where=union > 0)
+
+    def pairwise(self, rows: Sequence[int]) -> np.ndarray:
+        """Jaccard matrix of rows (len(rows) x len(rows); the diagonal is 1.0 for non-empty sets)."""
+        idx = np.asarray(rows, dtype=np.int64)
+        if not len(idx):
+            return np.zeros((0, 0))
+        return np.vstack([self.jaccard(i, idx) for i in idx])
+
+    def greedy_clusters(self, threshold: float) -> List[List[int]]:
+        """
+        First-fit clusters over rows in key order (singletons included).
+
+        Returns:
+            Row indices per cluster, seed first, members in key order
+        """
+        unassigned = np.ones(len(self.keys), dtype=bool)
+        clusters: List[List[int]] = []
+        for i in range(len(self.keys)):
+            if not unassigned[i]:
+                continue
+            unassigned[i] = False
+            cand = np.flatnonzero(unassigned)
+            if threshold > 0 and len(cand):
+                s = self.sizes[i]
+                lo = np.minimum(self.sizes[cand], s)
+                hi = np.maximum(self.sizes[cand], s)
+                cand = cand[lo >= (threshold - _PRUNE_EPS) * hi]
+            members = cand[self.jaccard(i, cand) >= threshold] if len(cand) else cand
+            unassigned[members] = False
+            clusters.append([i] + members.tolist())
+        return clusters
@@ -5,6 +5,7 @@ import os
 import logging
 import uuid
 import statistics
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 
@@ -17,6 +18,7 @@ from src.intelligence.lowcap_portfolio_manager.pm.actions import (
     _on_dx_buy,
 )
 from src.intelligence.lowcap_portfolio_manager.pm.levers import compute_levers
+from src.intelligence.lowcap_portfolio_manager.pm.overrides import clear_override_cache
 from src.intelligence.lowcap_portfolio_manager.pm.ae_calculator_v2 import (
     compute_ae_v2,
     apply_strength_to_ae,
@@ -24,9 +26,12 @@ from src.intelligence.lowcap_portfolio_manager.pm.ae_calculator_v2 import (
     AEConfig,
 )
 from src.intelligence.lowcap_portfolio_manager.pm.executor import PMExecutor
+from src.intelligence.lowcap_portfolio_manager.pm.execution_scheduler import ExecutionJob, ExecutionScheduler
 from src.intelligence.lowcap_portfolio_manager.pm.config import load_pm_config, fetch_and_merge_db_config
 from src.intelligence.lowcap_portfolio_manager.pm.exposure import ExposureLookup, ExposureConfig
+from src.intelligence.lowcap_portfolio_manager.pm.portfolio_valuation import compute_pnl
 from src.intelligence.lowcap_portfolio_manager.regime.bucket_context import fetch_bucket_phase_snapshot
+from src.intelligence.lowcap_portfolio_manager.regime.regime_snapshot import RegimeSnapshot, get_regime_snapshot
 from src.intelligence.lowcap_portfolio_manager.pm.pattern_keys_v5 import (
     generate_canonical_pattern_key,
     build_unified_scope,
@@ -34,6 +39,8 @@ from src.intelligence.lowcap_portfolio_manager.pm.pattern_keys_v5 import (
     extract_controls_from_action
 )
 from src.intelligence.lowcap_portfolio_manager.jobs.uptrend_engine_v4 import Constants
+from src.intelligence.lowcap_portfolio_manager.jobs.position_snapshot import PositionSnapshot
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import FeaturesWriter
 from src.intelligence.lowcap_portfolio_manager.pm.bucketing_helpers import (
     bucket_a_e, bucket_score, bucket_ema_slopes, bucket_size, bucket_bars_since_entry,
     classify_outcome, classify_hold_time
@@ -62,6 +69,25 @@ def bucket_cf_improvement(missed_rr: Optional[float]) -> str:
 # Removed: _map_meso_to_policy() - no longer used (replaced by regime engine)
 
 
+@dataclass
+class PositionPlan:
+    """A position's planned actions plus what is needed to record them as strands."""
+    position: Dict[str, Any]
+    token: str
+    now: datetime
+    a_final: float
+    e_final: float
+    regime_state_str: str
+    actions: List[Dict[str, Any]]
+    regime_context: Dict[str, Any]
+    token_bucket: Optional[str]
+    db_direct: bool  # executions write the row directly (flushed before, refreshed after)
+
+    @property
+    def has_executions(self) -> bool:
+        return any((a.get("decision_type") or "").lower() not in ("", "hold") for a in self.actions)
+
+
 class PMCoreTick:
     def __init__(self, timeframe: str = "1h", learning_system=None) -> None:
         """
@@ -83,9 +109,16 @@ class PMCoreTick:
         self.executor = PMExecutor(trader=None, sb_client=self.sb)
         self._exposure_lookup: Optional["ExposureLookup"] = None
         self._regime_state_cache: Dict[str, Dict[str, str]] = {}
+        # Regime driver states for this tick (one query, see regime/regime_snapshot.py)
+        self._regime_snapshot: Optional[RegimeSnapshot] = None
+        # Shared PositionSnapshot when running inside a fused tick (tick_pipeline.py)
+        self._snapshot: Optional[PositionSnapshot] = None
+        # Key-level features patches (no read before write)
+        self.features_writer = FeaturesWriter(self.sb)
         
         # Initialize Telegram Signal Notifier (if enabled)
         self.telegram_notifier = None
+        self.notification_outbox = None
         if os.getenv("TELEGRAM_NOTIFICATIONS_ENABLED", "0") == "1":
             try:
                 bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -102,57 +135,23 @@ class PMCoreTick:
                         api_hash=api_hash,
                         session_id=self.timeframe  # Unique session per timeframe to avoid database locks
                     )
+                    from src.communication.notification_outbox import get_notification_outbox
+                    self.notification_outbox = get_notification_outbox(self.telegram_notifier)
                     logger.info("Telegram notifications enabled")
                 else:
                     logger.warning("TELEGRAM_NOTIFICATIONS_ENABLED=1 but TELEGRAM_BOT_TOKEN or TELEGRAM_CHANNEL_ID not set")
             except Exception as e:
                 logger.warning(f"Failed to initialize Telegram notifier: {e}")
 
-    def _fire_and_forget(self, coro, description: str = "notification") -> bool:
-        """Run async notification without blocking the trading path.
+    def _enqueue_notification(self, method: str, description: str = "notification", **kwargs: Any) -> bool:
+        """Queue telegram_notifier.<method>(**kwargs) without blocking the trading path.
         
-        Uses threading to avoid event loop conflicts with Telethon client.
-        Similar pattern to executor's event loop fix.
+        Delivery (persistent client, retries, spill-to-disk) happens on the
+        notification outbox worker - see src/communication/notification_outbox.py.
         """
-        import threading
-        
-        logger.info(f"NOTIFICATION SCHEDULING: {description}")
-        
-        # Use thread with new event loop to avoid conflicts
-        result_container = {"result": False, "exception": None}
-        
-        def _run_in_thread():
-            """Run coroutine in new thread with fresh event loop."""
-            try:
-                # Create new event loop for this thread
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-                try:
-                    result = new_loop.run_until_complete(coro)
-                    result_container["result"] = result
-                finally:
-                    new_loop.close()
-            except Exception as e:
-                result_container["exception"] = e
-        
-        thread = threading.Thread(target=_run_in_thread, daemon=True)
-        thread.start()
-        thread.join(timeout=10)  # 10 second timeout for notifications
-        
-        if thread.is_alive():
-            logger.error(f"NOTIFICATION TIMEOUT: {description} (took >10s)")
-            return False
-        
-        if result_container["exception"]:
-            logger.error(f"NOTIFICATION ERROR: {description} - {result_container['exception']}", exc_info=True)
+        if self.notification_outbox is None:
             return False
-        
-        result = result_container["result"]
-        if result:
-            logger.info(f"NOTIFICATION SUCCESS: {description}")
-        else:
-            logger.warning(f"NOTIFICATION FAILED: {description} (returned False)")
-        return result
+        return self.notification_outbox.enqueue(method, description, **kwargs)
 
     def _get_regime_driver_states(self, driver: str | None) -> Dict[str, str]:
         """
@@ -170,28 +169,10 @@ class PMCoreTick:
         if driver in self._regime_state_cache:
             return self._regime_state_cache[driver]
         
-        tf_mapping = {"macro": "1d", "meso": "1h", "micro": "1m"}
         try:
-            states: Dict[str, str] = {}
-            for horizon, pos_tf in tf_mapping.items():
-                result = (
-                    self.sb.table("lowcap_positions")
-                    .select("state, features")
-                    .eq("status", "regime_driver")
-                    .eq("token_ticker", driver)
-                    .eq("timeframe", pos_tf)
-                    .order("updated_at", desc=True)
-                    .limit(1)
-                    .execute()
-                )
-                if result.data:
-                    row = result.data[0]
-                    features = row.get("features") or {}
-                    uptrend = features.get("uptrend_engine_v4") or {}
-                    state = uptrend.get("state") or row.get("state", "S4")
-                    states[horizon] = str(state)
-                else:
-                    states[horizon] = "S4"
+            if self._regime_snapshot is None:
+                self._regime_snapshot = get_regime_snapshot(self.sb)
+            states = self._regime_snapshot.horizon_states(driver)
             self._regime_state_cache[driver] = states
             return states
         except Exception as e:
@@ -523,12 +504,20 @@ class PMCoreTick:
         try:
             res = (
                 self.sb.table("lowcap_positions")
-                .select("token_contract,token_chain,timeframe,status,current_usd_value,book_id,state,entry_context,features")
+                .select("id,token_contract,token_chain,timeframe,status,current_usd_value,book_id,state,entry_context,features")
                 .gt("current_usd_value", 0.0)  # Only positions with actual holdings
                 .limit(2000)
                 .execute()
             )
-            return res.data or []
+            rows = res.data or []
+            # In a fused tick this timeframe's TA/engine output is not flushed yet - use the snapshot's copy
+            if self._snapshot is not None:
+                for row in rows:
+                    snap = self._snapshot.get(row.get("id"))
+                    if snap is not None:
+                        row["features"] = snap.get("features")
+                        row["state"] = snap.get("state")
+            return rows
         except Exception as exc:
             logger.warning(f"Exposure lookup positions failed: {exc}")
             return []
@@ -559,6 +548,8 @@ class PMCoreTick:
         Returns:
             List of positions matching the timeframe and status
         """
+        if self._snapshot is not None:
+            return self._snapshot.positions
         res = (
             self.sb.table("lowcap_positions")
             .select("id,token_contract,token_chain,token_ticker,timeframe,status,features,avg_entry_price,avg_exit_price,total_allocation_usd,total_extracted_usd,total_quantity,total_tokens_bought,total_tokens_sold,total_allocation_pct,entry_context,current_trade_id,book_id")
@@ -569,6 +560,39 @@ class PMCoreTick:
         )
         return res.data or []
 
+    def _persist_features(self, position_id: Any, features: Dict[str, Any], keys: Optional[tuple] = None) -> None:
+        """
+        Write a position's features (deferred to the snapshot flush in a fused tick).
+
+        Args:
+            position_id: Position id
+            features: Full features dict
+            keys: Top-level keys that changed (sent as a key-level patch); None = whole document
+        """
+        if self._snapshot is not None and position_id in self._snapshot:
+            held = self._snapshot.get(position_id).get("features")
+            if keys is not None and isinstance(held, dict) and held is not features:
+                # features came from a fresh read: patch only the changed keys into
+                # the snapshot's copy so its unflushed changes to other keys survive
+                for key in keys:
+                    if key in features:
+                        held[key] = features[key]
+                    else:
+                        held.pop(key, None)
+                features = held
+            self._snapshot.set_features(position_id, features, keys=keys)
+            return
+        if keys is None:
+            self.sb.table("lowcap_positions").update({"features": features}).eq("id", position_id).execute()
+            return
+        for key in keys:
+            if key in features:
+                self.features_writer.set(position_id, key, features[key])
+            else:
+                self.features_writer.unset(position_id, key)
+        # Written now: execution paths later in this tick re-read the row
+        self.features_writer.flush([position_id])
+
     def _fetch_token_buckets(self, keys: List[tuple[str, str | None]]) -> Dict[tuple[str, str | None], str]:
         contracts = sorted({k[0] for k in keys if k and k[0]})
         if not contracts:
@@ -2261,14 +2285,19 @@ class PMCoreTick:
                     position_id, pool_to_save
                 )
             
-            # Save to database
-            update_result = self.sb.table("lowcap_positions").update({"features": features}).eq("id", position_id).execute()
+            # Save to database: only pm_execution_history changed. Written straight to
+            # the row with a writer of our own - this runs on execution-scheduler
+            # threads (no PositionSnapshot access); _finish_plan reloads the row
+            writer = FeaturesWriter(self.sb)
+            writer.set(position_id, "pm_execution_history", execution_history)
+            if not writer.flush([position_id]):
+                raise RuntimeError("pm_execution_history write failed")
             
             # Diagnostic logging: Verify save succeeded
             if pool_to_save:
                 logger.info(
-                    "POOL_DIAG: Pool save completed | position=%s | update_success=%s",
-                    position_id, len(update_result.data) > 0 if update_result.data else False
+                    "POOL_DIAG: Pool save completed | position=%s",
+                    position_id
                 )
             
         except Exception as e:
@@ -2314,27 +2343,11 @@ class PMCoreTick:
         except Exception:
             market_price = 0.0
         
-        # Calculate current_usd_value (total_quantity * market_price)
-        current_usd_value = total_quantity * market_price if market_price > 0 else 0.0
-        updates["current_usd_value"] = current_usd_value
-        
-        # === "God View" PnL Calculation ===
-        # 1. Total PnL first (bulletproof anchor of truth)
-        # Total PnL = (qty × price) + extracted - allocated
-        total_pnl_usd = current_usd_value + total_extracted_usd - total_allocation_usd
-        total_pnl_pct = (total_pnl_usd / total_allocation_usd * 100.0) if total_allocation_usd > 0 else 0.0
-        updates["total_pnl_usd"] = total_pnl_usd
-        updates["total_pnl_pct"] = total_pnl_pct
-        
-        # 2. Unrealized PnL (is my current bag green or red?)
-        # Unrealized = (current_price - avg_entry) × quantity
-        unrealized_pnl = (market_price - avg_entry_price) * total_quantity if avg_entry_price > 0 else 0.0
-        
-        # 3. Realized PnL (derived from total - unrealized)
-        rpnl_usd = total_pnl_usd - unrealized_pnl
-        rpnl_pct = (rpnl_usd / total_allocation_usd * 100.0) if total_allocation_usd > 0 else 0.0
-        updates["rpnl_usd"] = rpnl_usd
-        updates["rpnl_pct"] = rpnl_pct
+        # === "God View" PnL Calculation (shared with the portfolio-wide revaluation) ===
+        # Total PnL = (qty × price) + extracted - allocated; realized = total - unrealized
+        pnl = compute_pnl(total_quantity, market_price, total_allocation_usd, total_extracted_usd, avg_entry_price)
+        for field in ("current_usd_value", "total_pnl_usd", "total_pnl_pct", "rpnl_usd", "rpnl_pct"):
+            updates[field] = float(pnl[field])
         
         # Calculate usd_alloc_remaining
         # Formula: (total_allocation_pct * wallet_balance) - (total_allocation_usd - total_extracted_usd)
@@ -2436,8 +2449,6 @@ class PMCoreTick:
             return
         
         try:
-            import asyncio
-            
             tx_hash = exec_result.get("tx_hash", "")
             source_tweet_url = position.get("source_tweet_url")
             
@@ -2489,50 +2500,48 @@ class PMCoreTick:
                 
                 if is_entry:
                     # Entry notification
-                    self._fire_and_forget(
-                        self.telegram_notifier.send_entry_notification(
-                            token_ticker=token_ticker,
-                            token_contract=token_contract,
-                            chain=chain,
-                            timeframe=timeframe,
-                            amount_usd=amount_usd,
-                            entry_price_usd=entry_price_usd,
-                            tx_hash=tx_hash,
-                            state=state,
-                            signal=signal,
-                            a_score=a_final,
-                            e_score=e_final,
-                            allocation_pct=None,
-                            source_tweet_url=source_tweet_url
-                        ),
-                        description="telegram entry notification"
+                    self._enqueue_notification(
+                        "send_entry_notification",
+                        description="telegram entry notification",
+                        token_ticker=token_ticker,
+                        token_contract=token_contract,
+                        chain=chain,
+                        timeframe=timeframe,
+                        amount_usd=amount_usd,
+                        entry_price_usd=entry_price_usd,
+                        tx_hash=tx_hash,
+                        state=state,
+                        signal=signal,
+                        a_score=a_final,
+                        e_score=e_final,
+                        allocation_pct=None,
+                        source_tweet_url=source_tweet_url
                     )
                 else:
                     # Add notification
-                    self._fire_and_forget(
-                        self.telegram_notifier.send_add_notification(
-                            token_ticker=token_ticker,
-                            token_contract=token_contract,
-                            chain=chain,
-                            timeframe=timeframe,
-                            amount_usd=amount_usd,
-                            entry_price_usd=entry_price_usd,
-                            tx_hash=tx_hash,
-                            state=state,
-                            signal=signal,
-                            a_score=a_final,
-                            e_score=e_final,
-                            size_frac=size_frac,
-                            position_size=total_quantity,
-                            position_value_usd=position_value_usd,
-                            avg_entry_price_usd=avg_entry_price_usd,
-                            total_pnl_usd=total_pnl_usd,
-                            total_pnl_pct=total_pnl_pct,
-                            rpnl_usd=rpnl_usd,
-                            rpnl_pct=rpnl_pct,
-                            source_tweet_url=source_tweet_url
-                        ),
-                        description="telegram add notification"
+                    self._enqueue_notification(
+                        "send_add_notification",
+                        description="telegram add notification",
+                        token_ticker=token_ticker,
+                        token_contract=token_contract,
+                        chain=chain,
+                        timeframe=timeframe,
+                        amount_usd=amount_usd,
+                        entry_price_usd=entry_price_usd,
+                        tx_hash=tx_hash,
+                        state=state,
+                        signal=signal,
+                        a_score=a_final,
+                        e_score=e_final,
+                        size_frac=size_frac,
+                        position_size=total_quantity,
+                        position_value_usd=position_value_usd,
+                        avg_entry_price_usd=avg_entry_price_usd,
+                        total_pnl_usd=total_pnl_usd,
+                        total_pnl_pct=total_pnl_pct,
+                        rpnl_usd=rpnl_usd,
+                        rpnl_pct=rpnl_pct,
+                        source_tweet_url=source_tweet_url
                     )
             elif decision_type == "trim":
                 # Trim notification
@@ -2548,29 +2557,28 @@ class PMCoreTick:
                     f"tx_hash={tx_hash[:8] if tx_hash else 'None'} state={state} signal={signal}"
                 )
                 
-                self._fire_and_forget(
-                    self.telegram_notifier.send_trim_notification(
-                        token_ticker=token_ticker,
-                        token_contract=token_contract,
-                        chain=chain,
-                        timeframe=timeframe,
-                        tokens_sold=tokens_sold,
-                        sell_price_usd=sell_price_usd,
-                        value_extracted_usd=value_extracted_usd,
-                        size_frac=size_frac,
-                        tx_hash=tx_hash,
-                        state=state,
-                        signal=signal,
-                        e_score=e_final,
-                        remaining_tokens=remaining_tokens,
-                        position_value_usd=position_value_usd,
-                        total_pnl_usd=total_pnl_usd,
-                        total_pnl_pct=total_pnl_pct,
-                        rpnl_usd=rpnl_usd,
-                        rpnl_pct=rpnl_pct,
-                        source_tweet_url=source_tweet_url
-                    ),
-                    description=f"telegram trim notification {token_ticker}/{chain}"
+                self._enqueue_notification(
+                    "send_trim_notification",
+                    description=f"telegram trim notification {token_ticker}/{chain}",
+                    token_ticker=token_ticker,
+                    token_contract=token_contract,
+                    chain=chain,
+                    timeframe=timeframe,
+                    tokens_sold=tokens_sold,
+                    sell_price_usd=sell_price_usd,
+                    value_extracted_usd=value_extracted_usd,
+                    size_frac=size_frac,
+                    tx_hash=tx_hash,
+                    state=state,
+                    signal=signal,
+                    e_score=e_final,
+                    remaining_tokens=remaining_tokens,
+                    position_value_usd=position_value_usd,
+                    total_pnl_usd=total_pnl_usd,
+                    total_pnl_pct=total_pnl_pct,
+                    rpnl_usd=rpnl_usd,
+                    rpnl_pct=rpnl_pct,
+                    source_tweet_url=source_tweet_url
                 )
             elif decision_type == "emergency_exit":
                 # Emergency exit notification
@@ -2585,26 +2593,25 @@ class PMCoreTick:
                     f"tx_hash={tx_hash[:8] if tx_hash else 'None'} state={state} reason={exit_reason}"
                 )
                 
-                self._fire_and_forget(
-                    self.telegram_notifier.send_emergency_exit_notification(
-                        token_ticker=token_ticker,
-                        token_contract=token_contract,
-                        chain=chain,
-                        timeframe=timeframe,
-                        tokens_sold=tokens_sold,
-                        sell_price_usd=sell_price_usd,
-                        value_extracted_usd=value_extracted_usd,
-                        tx_hash=tx_hash,
-                        state=state,
-                        reason=exit_reason,
-                        e_score=e_final,
-                        total_pnl_usd=total_pnl_usd,
-                        total_pnl_pct=total_pnl_pct,
-                        rpnl_usd=rpnl_usd,
-                        rpnl_pct=rpnl_pct,
-                        source_tweet_url=source_tweet_url
-                    ),
-                    description=f"telegram emergency exit notification {token_ticker}/{chain}"
+                self._enqueue_notification(
+                    "send_emergency_exit_notification",
+                    description=f"telegram emergency exit notification {token_ticker}/{chain}",
+                    token_ticker=token_ticker,
+                    token_contract=token_contract,
+                    chain=chain,
+                    timeframe=timeframe,
+                    tokens_sold=tokens_sold,
+                    sell_price_usd=sell_price_usd,
+                    value_extracted_usd=value_extracted_usd,
+                    tx_hash=tx_hash,
+                    state=state,
+                    reason=exit_reason,
+                    e_score=e_final,
+                    total_pnl_usd=total_pnl_usd,
+                    total_pnl_pct=total_pnl_pct,
+                    rpnl_usd=rpnl_usd,
+                    rpnl_pct=rpnl_pct,
+                    source_tweet_url=source_tweet_url
                 )
         except Exception as e:
             logger.error(
@@ -2637,8 +2644,6 @@ class PMCoreTick:
             return
         
         try:
-            import asyncio
-            
             source_tweet_url = position.get("source_tweet_url")
             
             # Get final exit info
@@ -2721,31 +2726,30 @@ class PMCoreTick:
                     "error": buyback_result.get("error", "Unknown error")
                 }
             
-            self._fire_and_forget(
-                self.telegram_notifier.send_position_summary_notification(
-                    token_ticker=token_ticker,
-                    token_contract=token_contract,
-                    chain=chain,
-                    timeframe=timeframe,
-                    final_exit_type=final_exit_type,
-                    exit_reason=exit_reason,
-                    total_allocation_usd=total_allocation_usd,
-                    total_extracted_usd=total_extracted_usd,
-                    rpnl_usd=rpnl_usd,
-                    rpnl_pct=rpnl_pct,
-                    total_pnl_usd=total_pnl_usd,
-                    total_pnl_pct=total_pnl_pct,
-                    hold_time_days=hold_time_days,
-                    rr=None,
-                    return_mult=None,
-                    max_drawdown_pct=None,
-                    max_gain_mult=None,
-                    completed_trades=completed_trades_count,
-                    entry_context=entry_context,
-                    lotus_buyback=lotus_buyback,
-                    source_tweet_url=source_tweet_url
-                ),
-                description="telegram position summary notification"
+            self._enqueue_notification(
+                "send_position_summary_notification",
+                description="telegram position summary notification",
+                token_ticker=token_ticker,
+                token_contract=token_contract,
+                chain=chain,
+                timeframe=timeframe,
+                final_exit_type=final_exit_type,
+                exit_reason=exit_reason,
+                total_allocation_usd=total_allocation_usd,
+                total_extracted_usd=total_extracted_usd,
+                rpnl_usd=rpnl_usd,
+                rpnl_pct=rpnl_pct,
+                total_pnl_usd=total_pnl_usd,
+                total_pnl_pct=total_pnl_pct,
+                hold_time_days=hold_time_days,
+                rr=None,
+                return_mult=None,
+                max_drawdown_pct=None,
+                max_gain_mult=None,
+                completed_trades=completed_trades_count,
+                entry_context=entry_context,
+                lotus_buyback=lotus_buyback,
+                source_tweet_url=source_tweet_url
             )
         except Exception as e:
             logger.error(
@@ -3776,11 +3780,14 @@ class PMCoreTick:
         # Persist logging throttle metadata and trim signal history even if no strands were written this tick
         if logging_meta_updated or exec_history_updated:
             try:
+                changed_keys = []
                 if logging_meta_updated:
                     features["pm_logging_meta"] = logging_meta
+                    changed_keys.append("pm_logging_meta")
                 if exec_history_updated:
                     features["pm_execution_history"] = exec_history
-                self.sb.table("lowcap_positions").update({"features": features}).eq("id", position_id).execute()
+                    changed_keys.append("pm_execution_history")
+                self._persist_features(position_id, features, keys=tuple(changed_keys))
             except Exception as e:
                 logger.warning(f"Error updating features for position %s: %s", position_id, e)
         if not rows:
@@ -3810,6 +3817,9 @@ class PMCoreTick:
         """
         Process a single position (extracted from run() for testing).
         
+        Plans, executes and writes strands in one go; run() does the same in
+        three passes so executions of different positions can overlap.
+        
         Args:
             position: Position dict from database
             regime_context: Optional pre-computed regime context (if None, will compute)
@@ -3820,6 +3830,18 @@ class PMCoreTick:
         Returns:
             Number of strands written
         """
+        plan = self._plan_position(position, regime_context, pm_cfg, exposure_lookup, bucket_map)
+        return self._finish_plan(plan, self._execute_plan(plan))
+    
+    def _plan_position(self, position: Dict[str, Any], regime_context: Optional[Dict[str, Any]] = None, pm_cfg: Optional[Dict[str, Any]] = None, exposure_lookup: Optional["ExposureLookup"] = None, bucket_map: Optional[Dict[tuple, str]] = None) -> "PositionPlan":
+        """
+        Compute A/E, log episodes, refresh P&L and plan actions for one position.
+        
+        Args: see process_position()
+        
+        Returns:
+            PositionPlan to execute (_execute_plan) and record (_finish_plan)
+        """
         now = datetime.now(timezone.utc)
         
         # Compute dependencies if not provided
@@ -3909,7 +3931,7 @@ class PMCoreTick:
 
         if meta_changed:
             try:
-                self.sb.table("lowcap_positions").update({"features": p.get("features")}).eq("id", p.get("id")).execute()
+                self._persist_features(p.get("id"), p.get("features"), keys=("uptrend_episode_meta",))
             except Exception as update_err:
                 logger.warning(f"Failed to persist episode meta for position {p.get('id')}: {update_err}")
         if episode_strands:
@@ -4005,7 +4027,41 @@ class PMCoreTick:
         except Exception:
             pass
         
-        # Execute actions and collect results
+        # Executions and trade closure read-modify-write the row themselves: in a fused tick,
+        # flush this position's pending snapshot writes first and reload it afterwards
+        state_now = ((p.get("features") or {}).get("uptrend_engine_v4") or {}).get("state")
+        db_direct = self._snapshot is not None and (
+            state_now == "S0"
+            or any((a.get("decision_type") or "").lower() not in ("", "hold") for a in actions)
+        )
+        if db_direct:
+            self._snapshot.flush([p.get("id")])
+        
+        return PositionPlan(
+            position=p,
+            token=str(token),
+            now=now,
+            a_final=a_final,
+            e_final=e_final,
+            regime_state_str=regime_state_str,
+            actions=actions,
+            regime_context=regime_context,
+            token_bucket=token_bucket,
+            db_direct=db_direct,
+        )
+    
+    def _execute_plan(self, plan: "PositionPlan") -> Dict[str, Dict[str, Any]]:
+        """
+        Execute a position's planned actions and run the closure check.
+        
+        Runs on an execution-scheduler thread in run(): touches only this
+        position's row (no PositionSnapshot access).
+        
+        Returns:
+            Execution results keyed "<position_id>:<decision_type>"
+        """
+        p = plan.position
+        actions = plan.actions
         execution_results: Dict[str, Dict[str, Any]] = {}
         
         for act in actions:
@@ -4071,15 +4127,32 @@ class PMCoreTick:
         # Check for position closure after all actions (state-based, not action-based)
         # This handles S0 transitions regardless of which action triggered it
         self._check_position_closure(p, "", {}, {})
+        return execution_results
+    
+    def _finish_plan(self, plan: "PositionPlan", execution_results: Dict[str, Dict[str, Any]]) -> int:
+        """Reload the executed row into the snapshot and write the position's strands."""
+        p = plan.position
+        if plan.db_direct:
+            self._snapshot.refresh(p.get("id"))
             
         # Write strands with execution results
-        self._write_strands(p, str(token), now, a_final, e_final, regime_state_str, actions, execution_results, regime_context, token_bucket)
-        return len(actions)
+        self._write_strands(p, plan.token, plan.now, plan.a_final, plan.e_final, plan.regime_state_str, plan.actions, execution_results, plan.regime_context, plan.token_bucket)
+        return len(plan.actions)
     
-    def run(self) -> int:
+    def run(self, snapshot: Optional[PositionSnapshot] = None) -> int:
+        """
+        Process every watchlist/active position of this timeframe.
+
+        Args:
+            snapshot: Shared positions of a fused tick (None = read/write lowcap_positions directly)
+        """
+        self._snapshot = snapshot
         now = datetime.now(timezone.utc)
         # Reset regime cache for this run
         self._regime_state_cache = {}
+        self._regime_snapshot = None
+        # Reload the pm_overrides index once per tick
+        clear_override_cache()
         
         # Get regime context (bucket summaries) for all PM strands
         regime_context = self._get_regime_context()
@@ -4093,8 +4166,48 @@ class PMCoreTick:
         bucket_map = self._fetch_token_buckets(token_keys)
         written = 0
         
+        if os.getenv("PM_CONCURRENT_EXECUTION_ENABLED", "1") != "1":
+            for p in positions:
+                written += self.process_position(p, regime_context, pm_cfg, exposure_lookup, bucket_map)
+            logger.info("pm_core_tick (%s) wrote %d strands for %d positions", self.timeframe, written, len(positions))
+            return written
+        
+        # 1. Plan every position (decisions no longer wait on earlier swaps)
+        plans: List[PositionPlan] = []
         for p in positions:
-            written += self.process_position(p, regime_context, pm_cfg, exposure_lookup, bucket_map)
+            try:
+                plans.append(self._plan_position(p, regime_context, pm_cfg, exposure_lookup, bucket_map))
+            except Exception as e:
+                logger.error(f"Planning failed for position {p.get('id')}: {e}", exc_info=True)
+        
+        # 2. Dispatch executions concurrently (per-chain lanes, one token at a time);
+        #    hold-only positions just run the closure check
+        results: List[Any] = [None] * len(plans)
+        jobs: List[ExecutionJob] = []
+        job_plans: List[int] = []
+        for i, plan in enumerate(plans):
+            if plan.has_executions:
+                jobs.append(ExecutionJob(
+                    chain=(plan.position.get("token_chain") or "").lower(),
+                    conflict_key=plan.position.get("token_contract"),
+                    run=lambda plan=plan: self._execute_plan(plan),
+                ))
+                job_plans.append(i)
+        for job_result, i in zip(ExecutionScheduler().run(jobs), job_plans):
+            results[i] = job_result
+        for i, plan in enumerate(plans):
+            if not plan.has_executions:
+                try:
+                    results[i] = self._execute_plan(plan)
+                except Exception as e:
+                    results[i] = e
+        
+        # 3. Join: strands are written once every execution is back
+        for plan, result in zip(plans, results):
+            if isinstance(result, Exception):
+                logger.error(f"Execution failed for position {plan.position.get('id')}: {result}")
+                result = {}
+            written += self._finish_plan(plan, result or {})
         
         logger.info("pm_core_tick (%s) wrote %d strands for %d positions", self.timeframe, written, len(positions))
         return written
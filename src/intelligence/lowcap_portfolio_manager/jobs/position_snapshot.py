@@ -0,0 +1,204 @@
+"""
+PositionSnapshot - one in-memory copy of a timeframe's positions for a fused tick.
+
+TA Tracker, Uptrend Engine and PM Core Tick each read lowcap_positions (with
+the large features JSONB) and write features back per position. In a fused
+tick (see tick_pipeline.py) they share this snapshot instead:
+
+- positions are loaded once (paged)
+- stages mutate the in-memory features dict and mark which top-level keys they
+  changed (or the whole document)
+- flush() persists every changed position once: changed keys go out as
+  key-level patches (FeaturesWriter, batched server-side merge), so keys
+  written concurrently by other jobs (e.g. geometry) are not clobbered
+
+Code paths that read-modify-write the row themselves (PM executions, trade
+closure) call flush([pid]) first and refresh(pid) afterwards.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from supabase import Client  # type: ignore
+
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import FeaturesWriter
+
+logger = logging.getLogger(__name__)
+
+POSITIONS_TABLE = "lowcap_positions"
+
+# Superset of the columns the three stages select
+SNAPSHOT_COLUMNS = (
+    "id,token_contract,token_chain,token_ticker,timeframe,status,state,features,"
+    "avg_entry_price,avg_exit_price,total_allocation_usd,total_extracted_usd,total_quantity,"
+    "total_tokens_bought,total_tokens_sold,total_allocation_pct,entry_context,current_trade_id,book_id"
+)
+SNAPSHOT_STATUSES = ("watchlist", "active")
+
+PAGE_SIZE = 500
+MAX_POSITIONS = 2000  # Same cap as the per-stage reads
+
+# Sentinel for "whole features document changed"
+WHOLE = "*"
+
+
+class PositionSnapshot:
+    """Positions of one timeframe shared by TA → Uptrend → PM within a tick."""
+
+    def __init__(self, sb: Client, timeframe: str, positions: List[Dict[str, Any]]) -> None:
+        self.sb = sb
+        self.timeframe = timeframe
+        self.positions = positions
+        self._by_id: Dict[str, Dict[str, Any]] = {str(p.get("id")): p for p in positions}
+        # pid -> changed top-level feature keys (WHOLE = write the full document)
+        self._dirty: Dict[str, Set[str]] = {}
+        # pids whose state column changed
+        self._state_dirty: Set[str] = set()
+
+    @classmethod
+    def load(
+        cls,
+        sb: Client,
+        timeframe: str,
+        statuses: Iterable[str] = SNAPSHOT_STATUSES,
+    ) -> "PositionSnapshot":
+        """Load positions for a timeframe (one paged read, features included)."""
+        positions: List[Dict[str, Any]] = []
+        offset = 0
+        while len(positions) < MAX_POSITIONS:
+            rows = (
+                sb.table(POSITIONS_TABLE)
+                .select(SNAPSHOT_COLUMNS)
+                .eq("timeframe", timeframe)
+                .in_("status", list(statuses))
+                .order("id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+                .data or []
+            )
+            positions.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        if len(positions) >= MAX_POSITIONS:
+            logger.warning("Position snapshot (%s) hit the %d position cap", timeframe, MAX_POSITIONS)
+        return cls(sb, timeframe, positions[:MAX_POSITIONS])
+
+    # ------------------------------------------------------------------
+    # Access / mutation
+    # ------------------------------------------------------------------
+    def get(self, pid: Any) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(str(pid))
+
+    def __contains__(self, pid: Any) -> bool:
+        return str(pid) in self._by_id
+
+    def set_features(
+        self,
+        pid: Any,
+        features: Dict[str, Any],
+        keys: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Record a features write for a position (persisted by flush()).
+
+        Args:
+            pid: Position id
+            features: The position's (mutated) features dict
+            keys: Top-level keys that changed; None = the whole document
+        """
+        p = self._by_id.get(str(pid))
+        if p is None:
+            return
+        p["features"] = features
+        dirty = self._dirty.setdefault(str(pid), set())
+        dirty.update(keys if keys is not None else (WHOLE,))
+
+    def set_state(self, pid: Any, state: Optional[str]) -> None:
+        """Record a state column change (persisted with the features by flush())."""
+        p = self._by_id.get(str(pid))
+        if p is None or not state or p.get("state") == state:
+            return
+        p["state"] = state
+        self._state_dirty.add(str(pid))
+        self._dirty.setdefault(str(pid), set())
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def flush(self, pids: Optional[Iterable[Any]] = None) -> int:
+        """
+        Persist changed positions (all, or only `pids`).
+
+        Key-level changes are batched through FeaturesWriter; positions marked
+        WHOLE are written as full documents, one update each.
+
+        Returns:
+            Number of positions written
+        """
+        targets = [str(p) for p in pids] if pids is not None else list(self._dirty)
+        targets = [pid for pid in targets if pid in self._dirty]
+        if not targets:
+            return 0
+
+        writer = FeaturesWriter(self.sb)
+        written = 0
+        for pid in targets:
+            p = self._by_id[pid]
+            keys = self._dirty[pid]
+            features = p.get("features") or {}
+            if WHOLE in keys:
+                update: Dict[str, Any] = {"features": features}
+                if pid in self._state_dirty:
+                    update["state"] = p.get("state")
+                try:
+                    self.sb.table(POSITIONS_TABLE).update(update).eq("id", p.get("id")).execute()
+                    written += 1
+                    self._dirty.pop(pid, None)
+                    self._state_dirty.discard(pid)
+                except Exception as e:
+                    logger.error("Position snapshot (%s) write failed for %s: %s", self.timeframe, pid, e)
+                continue
+            for key in keys:
+                if key in features:
+                    writer.set(p.get("id"), key, features[key])
+                else:
+                    writer.unset(p.get("id"), key)
+            if pid in self._state_dirty:
+                writer.set_state(p.get("id"), p.get("state"))
+            if not keys and pid not in self._state_dirty:
+                self._dirty.pop(pid, None)
+
+        if len(writer):
+            pending = [pid for pid in targets if pid in self._dirty]
+            written += writer.flush()
+            for pid in pending:
+                if pid not in writer:
+                    self._dirty.pop(pid, None)
+                    self._state_dirty.discard(pid)
+        return written
+
+    def refresh(self, pid: Any) -> None:
+        """Reload a position's features/state from the database (after code that wrote the row directly)."""
+        p = self._by_id.get(str(pid))
+        if p is None:
+            return
+        try:
+            rows = (
+                self.sb.table(POSITIONS_TABLE)
+                .select("features,state,status,total_quantity,current_trade_id")
+                .eq("id", p.get("id"))
+                .limit(1)
+                .execute()
+                .data or []
+            )
+        except Exception as e:
+            logger.warning("Position snapshot (%s) refresh failed for %s: %s", self.timeframe, pid, e)
+            return
+        if rows:
+            p.update(rows[0])
+            p["features"] = p.get("features") or {}
+        self._dirty.pop(str(pid), None)
+        self._state_dirty.discard(str(pid))
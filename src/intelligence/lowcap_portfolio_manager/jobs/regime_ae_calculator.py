@@ -28,6 +28,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from supabase import Client, create_client  # type: ignore
 
+from src.intelligence.lowcap_portfolio_manager.regime.regime_snapshot import get_regime_snapshot
+
 logger = logging.getLogger(__name__)
 
 
@@ -318,29 +320,19 @@ class RegimeAECalculator:
         """Refresh cached regime driver states from database."""
         self._regime_cache = {}
         
-        # Fetch all regime_driver positions
-        result = (
-            self.sb.table("lowcap_positions")
-            .select("token_ticker, timeframe, state, features")
-            .eq("status", "regime_driver")
-            .eq("book_id", self.book_id)
-            .execute()
-        )
+        # All regime_driver positions come from the shared regime snapshot
+        # (one projected query, reloaded when the regime pipeline writes)
+        snapshot = get_regime_snapshot(self.sb)
         
-        for row in result.data or []:
-            driver = row.get("token_ticker", "")
+        for ds in snapshot.book_rows(self.book_id):
             # Map position timeframe back to regime timeframe
-            pos_tf = row.get("timeframe", "1h")
-            regime_tf = self._position_tf_to_regime_tf(pos_tf)
-            
-            key = f"{driver}_{regime_tf}"
+            regime_tf = self._position_tf_to_regime_tf(ds.timeframe or "1h")
             
-            # Extract uptrend state and flags from features
-            features = row.get("features") or {}
-            uptrend = features.get("uptrend_engine_v4") or {}
+            key = f"{ds.ticker}_{regime_tf}"
+            uptrend = ds.uptrend
             
             self._regime_cache[key] = {
-                "state": uptrend.get("state", row.get("state", "S0")),
+                "state": uptrend.get("state", ds.row_state or "S0"),
                 "buy_signal": uptrend.get("buy_signal", False),
                 "buy_flag": uptrend.get("buy_flag", False),
                 "trim_flag": uptrend.get("trim_flag", False),
@@ -18,10 +18,11 @@ import os
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+import numpy as np
 from supabase import Client, create_client  # type: ignore
 
 logger = logging.getLogger(__name__)
@@ -50,6 +51,8 @@ BUCKET_THRESHOLDS = {
     "mid": (50_000_000, 200_000_000),  # $50M - $200M
     "big": (200_000_000, float("inf")), # > $200M
 }
+BUCKET_MAX_MEMBERS = 64  # Members per bucket composite
+BUCKET_READ_CHUNK = 100  # Contracts per bulk read of member bars
 
 # Timeframe configurations
 REGIME_TIMEFRAMES = ["1m", "1h", "1d"]
@@ -807,19 +810,17 @@ class RegimePriceCollector:
         
         # Get tokens by bucket from token_cap_bucket
         bucket_tokens = self._get_tokens_by_bucket()
-        
         for bucket_name, tokens in bucket_tokens.items():
-            try:
-                # Skip empty buckets early to save computation
-                if not tokens:
-                    logger.debug(f"Skipping {bucket_name} bucket: no tokens")
-                    continue
-                
-                bar = self._compute_bucket_bar(bucket_name, tokens, timeframe, bucket_start)
-                if bar:
-                    self._write_bucket_bar(bucket_name, timeframe, bar, len(tokens))
-            except Exception as e:
-                logger.warning(f"Failed to compute {bucket_name} bucket: {e}")
+            # Empty buckets produce no composite bar
+            if not tokens:
+                logger.debug(f"Skipping {bucket_name} bucket: no tokens")
+        
+        try:
+            bars = self._compute_bucket_bars(bucket_tokens, timeframe, bucket_start)
+            if bars:
+                self._write_bucket_bars(timeframe, bars)
+        except Exception as e:
+            logger.warning(f"Failed to compute bucket composites for {timeframe}: {e}")
     
     def _get_tokens_by_bucket(self) -> Dict[str, List[Dict]]:
         """Get tokens grouped by market cap bucket"""
@@ -849,103 +850,174 @@ class RegimePriceCollector:
         
         return buckets
     
-    def _compute_bucket_bar(
+    def _compute_bucket_bars(
         self,
-        bucket: str,
-        tokens: List[Dict],
+        bucket_tokens: Dict[str, List[Dict]],
         timeframe: str,
         bucket_start: datetime
-    ) -> Optional[OHLCBar]:
-        """Compute composite OHLC for a bucket"""
-        if not tokens:
-            return None
-            
-        opens, highs, lows, closes, volumes = [], [], [], [], []
-        
-        for token in tokens[:64]:  # Limit to top 64 by mcap
-            bar = self._get_token_bar(
-                token["token_contract"],
-                token["chain"],
-                timeframe,
-                bucket_start
-            )
-            if bar:
-                opens.append(bar["open_usd"])
-                highs.append(bar["high_usd"])
-                lows.append(bar["low_usd"])
-                closes.append(bar["close_usd"])
-                volumes.append(bar.get("volume", 0))
-        
-        if len(opens) < 1:
-            return None
-        
-        return OHLCBar(
-            timestamp=bucket_start,
-            open=sum(opens) / len(opens),
-            high=max(highs),
-            low=min(lows),
-            close=sum(closes) / len(closes),
-            volume=sum(volumes),
+    ) -> Dict[str, Tuple[OHLCBar, int]]:
+        """
+        Compute composite OHLC for all buckets from one bulk read of member bars.
+        
+        Composite: mean open/close, max high, min low, summed volume over the
+        members (top 64 per bucket) that have a recent bar. A bucket with a
+        member whose bars could not be read is skipped (logged) rather than
+        written from a partial member set; the other buckets are unaffected.
+        
+        Returns:
+            bucket -> (bar, component_count)
+        """
+        members = {
+            bucket: tokens[:BUCKET_MAX_MEMBERS]  # Limit to top 64 by mcap
+            for bucket, tokens in bucket_tokens.items()
+            if tokens
+        }
+        failed: Set[Tuple[str, str]] = set()
+        latest = self._get_latest_token_bars(
+            [t for tokens in members.values() for t in tokens], timeframe, bucket_start, failed=failed
         )
+        
+        names = []
+        for bucket, tokens in members.items():
+            if any((t["token_contract"], t["chain"]) in failed for t in tokens):
+                logger.warning(f"Failed to compute {bucket} bucket: member bars could not be read")
+            else:
+                names.append(bucket)
+        index: List[int] = []
+        rows: List[Tuple[float, float, float, float, float]] = []
+        for i, bucket in enumerate(names):
+            for token in members[bucket]:
+                bar = latest.get((token["token_contract"], token["chain"]))
+                if bar:
+                    index.append(i)
+                    rows.append(bar)
+        if not rows:
+            return {}
+        
+        idx = np.asarray(index)
+        ohlcv = np.asarray(rows, dtype=float)
+        n = len(names)
+        counts = np.bincount(idx, minlength=n)
+        opens = np.bincount(idx, weights=ohlcv[:, 0], minlength=n)
+        closes = np.bincount(idx, weights=ohlcv[:, 3], minlength=n)
+        volumes = np.bincount(idx, weights=ohlcv[:, 4], minlength=n)
+        highs = np.full(n, -np.inf)
+        lows = np.full(n, np.inf)
+        np.maximum.at(highs, idx, ohlcv[:, 1])
+        np.minimum.at(lows, idx, ohlcv[:, 2])
+        
+        return {
+            bucket: (
+                OHLCBar(
+                    timestamp=bucket_start,
+                    open=float(opens[i] / counts[i]),
+                    high=float(highs[i]),
+                    low=float(lows[i]),
+                    close=float(closes[i] / counts[i]),
+                    volume=float(volumes[i]),
+                ),
+                len(bucket_tokens[bucket]),
+            )
+            for i, bucket in enumerate(names)
+            if counts[i]
+        }
     
-    def _get_token_bar(
+    def _get_latest_token_bars(
         self,
-        token_contract: str,
-        chain: str,
+        tokens: List[Dict],
         timeframe: str,
-        bucket_start: datetime
-    ) -> Optional[Dict]:
-        """Get OHLC bar for a token"""
+        bucket_start: datetime,
+        failed: Optional[Set[Tuple[str, str]]] = None,
+    ) -> Dict[Tuple[str, str], Tuple[float, float, float, float, float]]:
+        """
+        Latest OHLCV per (token_contract, chain) since bucket_start - 5m, read in bulk.
+        
+        A failed chunk read or a malformed row does not abort the others: the
+        affected tokens are added to `failed` (if given) and left out.
+        """
         # Add 5-minute lookback to account for data latency (1-2 min behind)
         lookback_start = bucket_start - timedelta(minutes=5)
-        result = (
-            self.sb.table("lowcap_price_data_ohlc")
-            .select("*")
-            .eq("token_contract", token_contract)
-            .eq("chain", chain)
-            .eq("timeframe", timeframe)
-            .gte("timestamp", lookback_start.isoformat())
-            .order("timestamp", desc=True)
-            .limit(1)
-            .execute()
-        )
+        wanted = {(t["token_contract"], t["chain"]) for t in tokens}
+        contracts = sorted({contract for contract, _ in wanted})
         
-        if result.data:
-            row = result.data[0]
-            return {
-                "open_usd": float(row["open_usd"]),
-                "high_usd": float(row["high_usd"]),
-                "low_usd": float(row["low_usd"]),
-                "close_usd": float(row["close_usd"]),
-                "volume": float(row.get("volume", 0)),
-            }
-        return None
+        failed = failed if failed is not None else set()
+        latest: Dict[Tuple[str, str], Tuple[float, float, float, float, float]] = {}
+        for i in range(0, len(contracts), BUCKET_READ_CHUNK):
+            chunk = contracts[i:i + BUCKET_READ_CHUNK]
+            try:
+                result = (
+                    self.sb.table("lowcap_price_data_ohlc")
+                    .select("token_contract,chain,timestamp,open_usd,high_usd,low_usd,close_usd,volume")
+                    .in_("token_contract", chunk)
+                    .eq("timeframe", timeframe)
+                    .gte("timestamp", lookback_start.isoformat())
+                    .order("timestamp", desc=True)
+                    .execute()
+                )
+            except Exception as e:
+                logger.warning(f"Failed to read bars for {len(chunk)} bucket members: {e}")
+                in_chunk = set(chunk)
+                failed.update(key for key in wanted if key[0] in in_chunk)
+                continue
+            # Newest first: keep the first row per token
+            for row in result.data or []:
+                key = (row.get("token_contract"), row.get("chain"))
+                if key not in wanted or key in latest or key in failed:
+                    continue
+                try:
+                    latest[key] = (
+                        float(row["open_usd"]),
+                        float(row["high_usd"]),
+                        float(row["low_usd"]),
+                        float(row["close_usd"]),
+                        float(row.get("volume") or 0),
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.debug(f"Malformed bar for {key[0]} ({key[1]}): {e}")
+                    failed.add(key)
+        return latest
     
-    def _write_bucket_bar(
+    def _write_bucket_bars(
         self,
-        bucket: str,
         timeframe: str,
-        bar: OHLCBar,
-        component_count: int
+        bars: Dict[str, Tuple[OHLCBar, int]],
     ) -> None:
-        """Write bucket composite bar"""
-        row = {
-            "driver": bucket,
-            "timeframe": timeframe,
-            "book_id": self.book_id,
-            "timestamp": bar.timestamp.isoformat(),
-            "open_usd": bar.open,
-            "high_usd": bar.high,
-            "low_usd": bar.low,
-            "close_usd": bar.close,
-            "volume": bar.volume,
-            "source": "composite",
-            "component_count": component_count,
-        }
-        self.sb.table("regime_price_data_ohlc").upsert(
-            [row],
-            on_conflict="driver,book_id,timeframe,timestamp"
-        ).execute()
+        """
+        Write all bucket composite bars in one upsert.
+        
+        If the batch fails, each bucket is retried on its own so one bad bar
+        does not drop the others.
+        """
+        rows = [
+            {
+                "driver": bucket,
+                "timeframe": timeframe,
+                "book_id": self.book_id,
+                **bar.to_dict(),
+                "source": "composite",
+                "component_count": component_count,
+            }
+            for bucket, (bar, component_count) in bars.items()
+        ]
+        try:
+            self.sb.table("regime_price_data_ohlc").upsert(
+                rows,
+                on_conflict="driver,book_id,timeframe,timestamp"
+            ).execute()
+            return
+        except Exception as e:
+            if len(rows) == 1:
+                logger.warning(f"Failed to write {rows[0]['driver']} bucket: {e}")
+                return
+            logger.warning(f"Bucket composite batch write failed, writing buckets one by one: {e}")
+        for row in rows:
+            try:
+                self.sb.table("regime_price_data_ohlc").upsert(
+                    [row],
+                    on_conflict="driver,book_id,timeframe,timestamp"
+                ).execute()
+            except Exception as e:
+                logger.warning(f"Failed to write {row['driver']} bucket: {e}")
     
     # =========================================================================
     # Private: Dominance
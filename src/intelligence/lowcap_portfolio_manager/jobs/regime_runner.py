@@ -107,6 +107,10 @@ def run_regime_pipeline(
         except Exception as e:
             logger.error(f"Uptrend engine failed: {e}")
             results["steps"]["uptrend_engine"] = {"success": False, "error": str(e)}
+        # Driver states may have changed (also after a partial run):
+        # the next regime snapshot read reloads them
+        from src.intelligence.lowcap_portfolio_manager.regime.regime_snapshot import mark_regime_updated
+        mark_regime_updated()
     
     results["completed_at"] = datetime.now(timezone.utc).isoformat()
     return results
@@ -0,0 +1,415 @@
+"""
+Array-based TA indicator kernel.
+
+Computes every indicator series the TA stage needs (all EMA spans, EMA slopes,
+Wilder ATR/ADX, RSI, AVWAP) from a single float64 OHLCV block in one pass.
+
+Bit-compatible with ta_utils.py: every value produced here is the same float
+that the corresponding ta_utils function returns for the same prefix of bars.
+Element-wise work (true range, directional movement, RSI gains/losses, windowed
+sums) is vectorized with NumPy; the inherently sequential Wilder/EMA recursions
+run over plain float lists using the exact same operation order as ta_utils.
+Windowed sums are accumulated offset-by-offset (never via ndarray.sum, whose
+pairwise summation would round differently from Python's sum()).
+
+Block layout: shape (n_bars, 5) with columns O, H, L, C, V (oldest first).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Column indices into an OHLCV block
+O, H, L, C, V = 0, 1, 2, 3, 4
+
+# EMA spans used by ta_tracker / uptrend engine
+DEFAULT_EMA_SPANS = (20, 30, 50, 60, 144, 250, 333)
+
+# Bar dict key fallbacks (ta_tracker bars use o/h/l/c/v, raw rows use *_usd / *_native)
+_BAR_KEYS = {
+    O: ("o", "open_usd", "open_native", "open"),
+    H: ("h", "high_usd", "high_native", "high"),
+    L: ("l", "low_usd", "low_native", "low"),
+    C: ("c", "close_usd", "close_native", "close"),
+    V: ("v", "volume"),
+}
+
+
+def _bar_value(bar: Dict[str, Any], col: int) -> float:
+    for key in _BAR_KEYS[col]:
+        val = bar.get(key)
+        if val is not None:
+            return float(val)
+    return 0.0
+
+
+def bars_to_block(bars: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Convert bar dicts to a float64 OHLCV block.
+
+    Accepts ta_tracker bars (o/h/l/c/v) as well as normalized OHLC rows
+    (open_usd/high_usd/low_usd/close_usd/volume).
+
+    Args:
+        bars: Bars in chronological order
+
+    Returns:
+        ndarray of shape (len(bars), 5)
+    """
+    block = np.zeros((len(bars), 5), dtype=np.float64)
+    for i, b in enumerate(bars):
+        block[i] = [_bar_value(b, O), _bar_value(b, H), _bar_value(b, L), _bar_value(b, C), _bar_value(b, V)]
+    return block
+
+
+def ema_block(closes: np.ndarray, spans: Sequence[int] = DEFAULT_EMA_SPANS) -> np.ndarray:
+    """
+    Compute EMA series for several spans at once.
+
+    Matches ta_utils.ema_series (seeded with the first value, not SMA).
+
+    Args:
+        closes: 1-D array of closes
+        spans: EMA periods
+
+    Returns:
+        ndarray of shape (len(spans), len(closes))
+    """
+    n = len(closes)
+    out = np.empty((len(spans), n), dtype=np.float64)
+    if n == 0:
+        return out
+    vals = closes.tolist()
+    first = vals[0]
+    rest = vals[1:]
+    for row, span in enumerate(spans):
+        alpha = 2.0 / (span + 1)
+        beta = 1 - alpha
+        y = first
+        series = [y]
+        append = series.append
+        for v in rest:
+            y = alpha * v + beta * y
+            append(y)
+        out[row] = series
+    return out
+
+
+def _window_sums(vals: np.ndarray, ends: np.ndarray, win: int) -> np.ndarray:
+    """Sequential (left-to-right) sums of vals[end-win+1 : end+1] for each end."""
+    acc = np.zeros(len(ends), dtype=np.float64)
+    start = ends - (win - 1)
+    for j in range(win):
+        acc = acc + vals[start + j]
+    return acc
+
+
+def lin_slope_series(vals: np.ndarray, win: int) -> np.ndarray:
+    """
+    Rolling least-squares slope, matching ta_utils.lin_slope on every prefix.
+
+    out[i] == lin_slope(vals[: i + 1], win)
+
+    Args:
+        vals: 1-D array
+        win: Regression window
+
+    Returns:
+        ndarray same length as vals (0.0 where fewer than 3 points exist)
+    """
+    n_total = len(vals)
+    out = np.zeros(n_total, dtype=np.float64)
+    # Prefixes shorter than win use a shorter regression window
+    for n in range(3, min(win, n_total + 1)):
+        if n - 1 < n_total:
+            out[n - 1] = _lin_slope_at(vals, np.array([n - 1]), n)[0]
+    if n_total >= win and win >= 3:
+        ends = np.arange(win - 1, n_total)
+        out[win - 1:] = _lin_slope_at(vals, ends, win)
+    return out
+
+
+def _lin_slope_at(vals: np.ndarray, ends: np.ndarray, n: int) -> np.ndarray:
+    xs = list(range(n))
+    xbar = sum(xs) / n
+    den = sum((x - xbar) ** 2 for x in xs) or 1.0
+    ybar = _window_sums(vals, ends, n) / n
+    num = np.zeros(len(ends), dtype=np.float64)
+    start = ends - (n - 1)
+    for j, x in enumerate(xs):
+        num = num + (x - xbar) * (vals[start + j] - ybar)
+    return num / den
+
+
+def ema_slope_series(ema: np.ndarray, window: int = 10) -> np.ndarray:
+    """
+    Normalized EMA slope (%/bar) per bar, matching ta_utils.ema_slope_normalized.
+
+    Args:
+        ema: 1-D EMA series
+        window: Regression window
+
+    Returns:
+        ndarray same length as ema
+    """
+    raw = lin_slope_series(ema, window)
+    out = raw / np.maximum(ema, 1e-9)
+    idx = np.arange(len(ema))
+    valid = (idx + 1 >= max(window, 3)) & (ema > 0.0)
+    return np.where(valid, out, 0.0)
+
+
+def ema_slope_delta_series(ema: np.ndarray, window: int = 10, lag: int = 10) -> np.ndarray:
+    """
+    Slope acceleration per bar, matching ta_utils.ema_slope_delta.
+
+    Args:
+        ema: 1-D EMA series
+        window: Regression window
+        lag: Bars between recent and past slope
+
+    Returns:
+        ndarray same length as ema
+    """
+    n = len(ema)
+    out = np.zeros(n, dtype=np.float64)
+    if n < window + lag:
+        return out
+    raw = lin_slope_series(ema, window)
+    norm = raw / np.maximum(ema, 1e-9)
+    delta = norm[lag:] - norm[:-lag]
+    out[lag:] = delta
+    idx = np.arange(n)
+    valid = (idx + 1 >= window + lag) & (ema > 0.0)
+    return np.where(valid, out, 0.0)
+
+
+def true_range(block: np.ndarray) -> np.ndarray:
+    """True range for bars 1..n-1 (length n-1)."""
+    h = block[1:, H]
+    l = block[1:, L]
+    prev_c = block[:-1, C]
+    return np.maximum(np.maximum(h - l, np.abs(h - prev_c)), np.abs(prev_c - l))
+
+
+def atr_wilder_series(block: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    ATR series using Wilder smoothing, matching ta_utils.atr_series_wilder.
+
+    Args:
+        block: OHLCV block
+        period: ATR period
+
+    Returns:
+        ndarray same length as block (empty if fewer than 2 bars)
+    """
+    if len(block) < 2:
+        return np.empty(0, dtype=np.float64)
+    trs = true_range(block).tolist()
+    atr = sum(trs[:period]) / max(1, min(period, len(trs)))
+    atrs = [atr]
+    for tr in trs[period:]:
+        atr = ((period - 1) * atr + tr) / period
+        atrs.append(atr)
+    pad = len(block) - 1 - len(atrs)
+    if pad > 0:
+        atrs = [atrs[0]] * pad + atrs
+    return np.array([atrs[0]] + atrs, dtype=np.float64)
+
+
+def adx_wilder_series(block: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    ADX series using Wilder smoothing, matching ta_utils.adx_series_wilder.
+
+    Args:
+        block: OHLCV block
+        period: ADX period
+
+    Returns:
+        ndarray same length as block (empty if fewer than period + 2 bars)
+    """
+    return adx_wilder_with_state(block, period)[0]
+
+
+def adx_wilder_with_state(
+    block: np.ndarray, period: int = 14
+) -> Tuple[np.ndarray, Optional[Tuple[float, float, float]]]:
+    """
+    ADX series plus the final Wilder accumulators (atr, +DM, -DM).
+
+    The accumulators let callers continue the recursion bar-by-bar
+    (see ta_state.py) without replaying the whole history.
+
+    Args:
+        block: OHLCV block
+        period: ADX period
+
+    Returns:
+        (adx series, (atr, pdm, mdm)) - state is None if fewer than period + 2 bars
+    """
+    n = len(block)
+    if n < period + 2:
+        return np.empty(0, dtype=np.float64), None
+    up = block[1:, H] - block[:-1, H]
+    down = block[:-1, L] - block[1:, L]
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0).tolist()
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0).tolist()
+    trs = true_range(block).tolist()
+
+    atr = sum(trs[:period]) / period
+    pdm = sum(plus_dm[:period]) / period
+    mdm = sum(minus_dm[:period]) / period
+    pdi = 100.0 * (pdm / max(atr, 1e-9))
+    mdi = 100.0 * (mdm / max(atr, 1e-9))
+    adx = 100.0 * (abs(pdi - mdi) / max(pdi + mdi, 1e-9))
+    adx_vals = [adx]
+    p1 = period - 1
+    for i in range(period, len(trs)):
+        atr = (p1 * atr + trs[i]) / period
+        pdm = (p1 * pdm + plus_dm[i]) / period
+        mdm = (p1 * mdm + minus_dm[i]) / period
+        pdi = 100.0 * (pdm / max(atr, 1e-9))
+        mdi = 100.0 * (mdm / max(atr, 1e-9))
+        dx = 100.0 * (abs(pdi - mdi) / max(pdi + mdi, 1e-9))
+        adx = (p1 * adx + dx) / period
+        adx_vals.append(adx)
+
+    pad = n - len(adx_vals)
+    if pad > 0:
+        adx_vals = [adx_vals[0]] * pad + adx_vals
+    return np.array(adx_vals, dtype=np.float64), (atr, pdm, mdm)
+
+
+def rsi_series(closes: np.ndarray, period: int = 14, start: int = 0) -> np.ndarray:
+    """
+    RSI for every prefix from `start`, matching ta_utils.rsi.
+
+    out[j] == rsi(closes[: start + j + 1], period)
+
+    Args:
+        closes: 1-D array of closes
+        period: RSI period
+        start: First bar index to evaluate
+
+    Returns:
+        ndarray of length len(closes) - start
+    """
+    n = len(closes)
+    start = max(0, start)
+    if start >= n:
+        return np.empty(0, dtype=np.float64)
+    out = np.full(n - start, 50.0, dtype=np.float64)
+    first = max(start, period)  # rsi() returns 50.0 while len(values) <= period
+    if first >= n:
+        return out
+    ch = np.empty(n, dtype=np.float64)
+    ch[0] = 0.0
+    ch[1:] = closes[1:] - closes[:-1]
+    gains = np.maximum(ch, 0.0)
+    losses = np.maximum(-ch, 0.0)
+    ends = np.arange(first, n)
+    avg_gain = _window_sums(gains, ends, period) / period
+    avg_loss = _window_sums(losses, ends, period) / period
+    avg_loss = np.where(avg_loss == 0.0, 1e-9, avg_loss)
+    rs = avg_gain / avg_loss
+    out[first - start:] = 100.0 - (100.0 / (1.0 + rs))
+    return out
+
+
+def avwap_block(prices: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+    """
+    Cumulative AVWAP series, matching ta_utils.avwap_series.
+
+    Args:
+        prices: 1-D array of prices
+        volumes: 1-D array of volumes (same length)
+
+    Returns:
+        ndarray same length as prices
+    """
+    n = len(prices)
+    if n == 0 or len(volumes) == 0:
+        return np.empty(0, dtype=np.float64)
+    if n != len(volumes):
+        raise ValueError("prices and volumes must have same length")
+    vol = np.maximum(volumes, 0.0)
+    has_vol = vol > 0
+    # Zero-volume bars contribute nothing to the running sums
+    cum_pv = np.cumsum(np.where(has_vol, prices * vol, 0.0))
+    cum_v = np.cumsum(np.where(has_vol, vol, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.where(has_vol, cum_pv / np.where(cum_v > 0, cum_v, 1.0), 0.0)
+    # Zero-volume bars carry the previous AVWAP (or the first price if nothing yet)
+    src = np.where(has_vol, np.arange(n), -1)
+    src = np.maximum.accumulate(src)
+    out = np.where(src >= 0, vwap[np.maximum(src, 0)], prices[0])
+    return out
+
+
+@dataclass
+class IndicatorBlock:
+    """All TA series for one token/timeframe, aligned to the input bars."""
+
+    closes: np.ndarray
+    ema: Dict[int, np.ndarray]
+    atr: np.ndarray
+    adx: np.ndarray
+    rsi: np.ndarray
+    rsi_start: int
+    adx_state: Optional[Tuple[float, float, float]] = None
+    ema_slope: Dict[int, np.ndarray] = field(default_factory=dict)
+    d_ema_slope: Dict[int, np.ndarray] = field(default_factory=dict)
+
+    def ema_list(self, span: int) -> List[float]:
+        return self.ema[span].tolist()
+
+
+def compute_indicator_block(
+    block: np.ndarray,
+    spans: Sequence[int] = DEFAULT_EMA_SPANS,
+    atr_period: int = 14,
+    adx_period: int = 14,
+    rsi_period: int = 14,
+    rsi_start: Optional[int] = None,
+    slope_window: int = 10,
+    slope_lag: int = 10,
+    slope_spans: Sequence[int] = (20, 30, 60, 144, 250, 333),
+    delta_spans: Sequence[int] = (60, 144, 250, 333),
+) -> IndicatorBlock:
+    """
+    Compute every TA series for an OHLCV block in one pass.
+
+    Args:
+        block: OHLCV block (n_bars, 5)
+        spans: EMA spans to compute
+        atr_period: Wilder ATR period
+        adx_period: Wilder ADX period
+        rsi_period: RSI period
+        rsi_start: First bar index to evaluate RSI for (default: all bars)
+        slope_window: Regression window for EMA slopes
+        slope_lag: Lag for slope deltas
+        slope_spans: Spans to compute normalized slope series for
+        delta_spans: Spans to compute slope-delta series for
+
+    Returns:
+        IndicatorBlock with every series aligned to the input bars
+    """
+    closes = np.ascontiguousarray(block[:, C], dtype=np.float64)
+    emas = ema_block(closes, spans)
+    ema = {span: emas[row] for row, span in enumerate(spans)}
+    start = 0 if rsi_start is None else rsi_start
+    adx, adx_state = adx_wilder_with_state(block, adx_period)
+    return IndicatorBlock(
+        closes=closes,
+        ema=ema,
+        atr=atr_wilder_series(block, atr_period),
+        adx=adx,
+        rsi=rsi_series(closes, rsi_period, start),
+        rsi_start=start,
+        adx_state=adx_state,
+        ema_slope={s: ema_slope_series(ema[s], slope_window) for s in slope_spans if s in ema},
+        d_ema_slope={s: ema_slope_delta_series(ema[s], slope_window, slope_lag) for s in delta_spans if s in ema},
+    )
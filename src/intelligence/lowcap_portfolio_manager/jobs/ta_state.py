@@ -0,0 +1,421 @@
+"""
+Incremental (streaming) TA state for TATracker.
+
+Holds everything needed to advance the TA indicators by one bar without
+replaying history: last EMA values (plus the short tails the slope/separation
+features need), Wilder ATR/ADX accumulators, RSI close window, the VO_z
+log-volume EWMA moments and the bar watermark.
+
+TATracker seeds a state from a full recompute (TAState.from_full), then on
+later ticks folds only the bars past the watermark (TAState.fold_rows). Any
+gap, restatement of the watermark bar, or too-long absence falls back to a
+full recompute.
+
+Note: the full recompute seeds EMA/Wilder recursions at the start of its
+1000-bar window, while folded values keep the longer history. The two agree
+to within the decayed seed weight; states are re-baselined every
+REBASELINE_BARS bars so winsorization bounds and seeds stay fresh.
+"""
+
+from __future__ import annotations
+
+import math
+import statistics
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_kernel import (
+    C,
+    H,
+    L,
+    V,
+    IndicatorBlock,
+    bars_to_block,
+    compute_indicator_block,
+)
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_utils import (
+    ema_slope_delta,
+    ema_slope_normalized,
+    lin_slope,
+    rsi,
+)
+
+STATE_VERSION = 1
+
+TIMEFRAME_SECONDS = {"1m": 60, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+
+# Tail lengths: the TA payload only ever looks this far back
+EMA_TAIL = 20     # slope window (10) + slope-delta lag (10)
+ATR_TAIL = 20     # atr_mean_20 / atr_peak_10
+ADX_TAIL = 10     # adx_slope_10
+RSI_TAIL = 10     # rsi_slope_10
+CLOSE_TAIL = 15   # RSI period + 1
+VO_TAIL = 30      # vo_z cluster window
+
+PERIOD = 14
+VO_EWMA_N = 64
+
+# Re-seed from a full recompute after this many folded bars
+REBASELINE_BARS = 240
+# More new bars than this means we were away too long - recompute instead
+MAX_INCREMENTAL_BARS = 120
+
+# Bars TATracker needs before it writes TA (~3 days, 1m matches the backfill minimum)
+MIN_BARS = {"1m": 333, "15m": 288, "1h": 72, "4h": 18}
+# Window of a full recompute (Supabase caps reads at 1000 rows anyway)
+FULL_WINDOW_BARS = 1000
+
+
+def _parse_ts(ts: Any) -> datetime:
+    dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _row_bar(row: Dict[str, Any]) -> List[float]:
+    return [
+        float(row.get("open_usd") or 0.0),
+        float(row.get("high_usd") or 0.0),
+        float(row.get("low_usd") or 0.0),
+        float(row.get("close_usd") or 0.0),
+        float(row.get("volume") or 0.0),
+    ]
+
+
+def _winsorize_bounds(arr: List[float]) -> Optional[List[float]]:
+    """2/98 winsorization bounds (matches ta_tracker); None for short windows."""
+    if len(arr) < 10:
+        return None
+    s = sorted(arr)
+    lo_idx = max(0, int(0.02 * len(s)) - 1)
+    hi_idx = min(len(s) - 1, int(0.98 * len(s)))
+    return [s[lo_idx], s[hi_idx]]
+
+
+@dataclass
+class TAState:
+    """Per-position, per-timeframe indicator state."""
+
+    watermark_ts: str
+    last_bar: List[float]
+    n_bars: int
+    ema: Dict[str, List[float]]
+    atr: List[float]
+    adx: List[float]
+    adx_acc: List[float]
+    rsi: List[float]
+    closes: List[float]
+    vo: Dict[str, Any]
+    bars_since_full: int = 0
+    version: int = STATE_VERSION
+    folded_last_run: int = field(default=0, compare=False)
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d.pop("folded_last_run", None)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Optional[Dict[str, Any]]) -> Optional["TAState"]:
+        if not d or int(d.get("version") or 0) != STATE_VERSION:
+            return None
+        try:
+            return cls(
+                watermark_ts=str(d["watermark_ts"]),
+                last_bar=[float(x) for x in d["last_bar"]],
+                n_bars=int(d["n_bars"]),
+                ema={str(k): [float(x) for x in v] for k, v in (d.get("ema") or {}).items()},
+                atr=[float(x) for x in d.get("atr") or []],
+                adx=[float(x) for x in d.get("adx") or []],
+                adx_acc=[float(x) for x in d.get("adx_acc") or []],
+                rsi=[float(x) for x in d.get("rsi") or []],
+                closes=[float(x) for x in d.get("closes") or []],
+                vo=dict(d.get("vo") or {}),
+                bars_since_full=int(d.get("bars_since_full") or 0),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Full recompute -> state
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_full(cls, rows: List[Dict[str, Any]], block: np.ndarray, ind: IndicatorBlock) -> "TAState":
+        """
+        Seed a state from a full recompute.
+
+        Args:
+            rows: Normalized OHLC rows (chronological) the block was built from
+            block: OHLCV block
+            ind: Indicators computed over block
+
+        Returns:
+            TAState positioned at the last row
+        """
+        log_v = [math.log(1.0 + max(0.0, v)) for v in block[:, V].tolist()]
+        bounds = _winsorize_bounds(log_v)
+        if bounds:
+            lo, hi = bounds
+            log_v = [min(max(x, lo), hi) for x in log_v]
+        alpha = 2.0 / (VO_EWMA_N + 1)
+        mu = log_v[0] if log_v else 0.0
+        var = 0.0
+        for x in log_v[1:]:
+            prev_mu = mu
+            mu = alpha * x + (1 - alpha) * mu
+            var = (1 - alpha) * (var + alpha * (x - prev_mu) * (x - mu))
+
+        closes = ind.closes.tolist()
+        return cls(
+            watermark_ts=str(rows[-1]["timestamp"]),
+            last_bar=block[-1].tolist(),
+            n_bars=len(block),
+            ema={str(span): series[-EMA_TAIL:].tolist() for span, series in ind.ema.items()},
+            atr=ind.atr[-ATR_TAIL:].tolist(),
+            adx=ind.adx[-ADX_TAIL:].tolist(),
+            adx_acc=list(ind.adx_state) if ind.adx_state else [],
+            rsi=ind.rsi[-RSI_TAIL:].tolist(),
+            closes=closes[-CLOSE_TAIL:],
+            vo={"mu": mu, "var": var, "bounds": bounds, "tail": log_v[-VO_TAIL:]},
+        )
+
+    # ------------------------------------------------------------------
+    # Incremental update
+    # ------------------------------------------------------------------
+    def too_stale(self, now: datetime, timeframe: str) -> bool:
+        """True if more bars than fold_rows accepts have closed since the watermark."""
+        step = TIMEFRAME_SECONDS.get(timeframe)
+        if not step or not self.watermark_ts:
+            return True
+        return (now - _parse_ts(self.watermark_ts)).total_seconds() > step * (MAX_INCREMENTAL_BARS + 1)
+
+    def fold_rows(self, rows: List[Dict[str, Any]], timeframe: str) -> bool:
+        """
+        Fold bars past the watermark into the state.
+
+        Args:
+            rows: Normalized OHLC rows with timestamp >= watermark (chronological),
+                  i.e. the watermark bar itself followed by any new bars
+            timeframe: Bar timeframe (for gap detection)
+
+        Returns:
+            True if the state is now current; False if the caller must do a
+            full recompute (gap, restatement, missing accumulators, too stale).
+            On False the state may be partially advanced and must be discarded.
+        """
+        step = TIMEFRAME_SECONDS.get(timeframe)
+        if not step or not rows or not self.adx_acc or len(self.closes) < CLOSE_TAIL:
+            return False
+        if self.bars_since_full + len(rows) - 1 > REBASELINE_BARS:
+            return False
+        if len(rows) - 1 > MAX_INCREMENTAL_BARS:
+            return False
+        # First row must be the watermark bar, unchanged (no restatement)
+        prev_ts = _parse_ts(self.watermark_ts)
+        if _parse_ts(rows[0]["timestamp"]) != prev_ts or _row_bar(rows[0]) != self.last_bar:
+            return False
+
+        folded = 0
+        for row in rows[1:]:
+            ts = _parse_ts(row["timestamp"])
+            if (ts - prev_ts).total_seconds() != step:
+                return False  # gap (or duplicate) - let the full path decide
+            self._fold_bar(_row_bar(row))
+            self.watermark_ts = str(row["timestamp"])
+            prev_ts = ts
+            folded += 1
+        self.folded_last_run = folded
+        return True
+
+    def _fold_bar(self, bar: List[float]) -> None:
+        h, l, c, v = bar[H], bar[L], bar[C], bar[V]
+        prev_h, prev_l, prev_c = self.last_bar[H], self.last_bar[L], self.last_bar[C]
+
+        for span_key, tail in self.ema.items():
+            alpha = 2.0 / (int(span_key) + 1)
+            tail.append(alpha * c + (1 - alpha) * tail[-1])
+            del tail[:-EMA_TAIL]
+
+        tr = max(h - l, abs(h - prev_c), abs(prev_c - l))
+        p = PERIOD
+        self.atr.append(((p - 1) * self.atr[-1] + tr) / p)
+        del self.atr[:-ATR_TAIL]
+
+        up_move = h - prev_h
+        down_move = prev_l - l
+        plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        atr, pdm, mdm = self.adx_acc
+        atr = ((p - 1) * atr + tr) / p
+        pdm = ((p - 1) * pdm + plus_dm) / p
+        mdm = ((p - 1) * mdm + minus_dm) / p
+        pdi = 100.0 * (pdm / max(atr, 1e-9))
+        mdi = 100.0 * (mdm / max(atr, 1e-9))
+        dx = 100.0 * (abs(pdi - mdi) / max(pdi + mdi, 1e-9))
+        self.adx_acc = [atr, pdm, mdm]
+        self.adx.append(((p - 1) * self.adx[-1] + dx) / p)
+        del self.adx[:-ADX_TAIL]
+
+        self.closes.append(c)
+        del self.closes[:-CLOSE_TAIL]
+        self.rsi.append(rsi(self.closes, PERIOD))
+        del self.rsi[:-RSI_TAIL]
+
+        x = math.log(1.0 + max(0.0, v))
+        bounds = self.vo.get("bounds")
+        if bounds:
+            x = min(max(x, bounds[0]), bounds[1])
+        alpha = 2.0 / (VO_EWMA_N + 1)
+        prev_mu = float(self.vo["mu"])
+        mu = alpha * x + (1 - alpha) * prev_mu
+        self.vo["var"] = (1 - alpha) * (float(self.vo["var"]) + alpha * (x - prev_mu) * (x - mu))
+        self.vo["mu"] = mu
+        tail = list(self.vo.get("tail") or [])
+        tail.append(x)
+        self.vo["tail"] = tail[-VO_TAIL:]
+
+        self.last_bar = list(bar)
+        self.n_bars += 1
+        self.bars_since_full += 1
+
+    # ------------------------------------------------------------------
+    # State -> features.ta payload
+    # ------------------------------------------------------------------
+    def to_ta(self, timeframe: str, now: datetime) -> Dict[str, Any]:
+        """
+        Build the features.ta payload (same shape and math as the full path).
+
+        Args:
+            timeframe: Timeframe suffix source ("1m", "15m", "1h", "4h")
+            now: Timestamp for meta.updated_at
+
+        Returns:
+            TA dict with timeframe-suffixed keys
+        """
+        sfx = f"_{timeframe}"
+        close = self.last_bar[C]
+        ema = {int(k): v for k, v in self.ema.items()}
+        e20 = ema.get(20) or []
+        e60 = ema.get(60) or []
+        e144 = ema.get(144) or []
+
+        def last(span: int, default: float) -> float:
+            series = ema.get(span)
+            return series[-1] if series else default
+
+        ema20_val = last(20, close)
+        ema30_val = last(30, close)
+        ema50_val = last(50, close)
+
+        sep_fast = ((e20[-1] if e20 else 0.0) - (e60[-1] if e60 else 1e-9)) / max(e60[-1] if e60 else 1e-9, 1e-9)
+        sep_mid = ((e60[-1] if e60 else 0.0) - (e144[-1] if e144 else 1e-9)) / max(e144[-1] if e144 else 1e-9, 1e-9)
+        if len(e60) >= 6 and len(e144) >= 6 and len(e20) >= 6:
+            sep_fast_prev = (e20[-6] - e60[-6]) / max(e60[-6], 1e-9)
+            sep_mid_prev = (e60[-6] - e144[-6]) / max(e144[-6], 1e-9)
+        else:
+            sep_fast_prev = sep_fast
+            sep_mid_prev = sep_mid
+
+        atr_val = self.atr[-1] if self.atr else 0.0
+        atr_mean_20 = (statistics.fmean(self.atr[-20:]) if len(self.atr) >= 20 else atr_val) if self.atr else atr_val
+        atr_peak_10 = (max(self.atr[-10:]) if len(self.atr) >= 10 else atr_val) if self.atr else atr_val
+        adx_val = self.adx[-1] if self.adx else 0.0
+
+        mu = float(self.vo.get("mu") or 0.0)
+        sd = math.sqrt(max(float(self.vo.get("var") or 0.0), 1e-12))
+        sd = sd if sd > 0 else 1.0
+        vo_tail = self.vo.get("tail") or []
+        if vo_tail:
+            vo_z = max(-4.0, min(6.0, (vo_tail[-1] - mu) / sd))
+            zs = [(lv - mu) / sd for lv in vo_tail]
+            vo_z_cluster = (sum(1 for z in zs if z >= 2.0) >= 3) or (sum(max(0.0, z) for z in zs) >= 6.0)
+        else:
+            vo_z, vo_z_cluster = 0.0, False
+
+        return {
+            "ema": {
+                f"ema20{sfx}": ema20_val,
+                f"ema30{sfx}": ema30_val,
+                f"ema50{sfx}": ema50_val,
+                f"ema60{sfx}": last(60, ema20_val),
+                f"ema144{sfx}": last(144, ema20_val),
+                f"ema250{sfx}": last(250, ema20_val),
+                f"ema333{sfx}": last(333, ema20_val),
+            },
+            "ema_slopes": {
+                f"ema20_slope{sfx}": ema_slope_normalized(ema.get(20) or [], window=10),
+                f"ema60_slope{sfx}": ema_slope_normalized(ema.get(60) or [], window=10),
+                f"ema144_slope{sfx}": ema_slope_normalized(ema.get(144) or [], window=10),
+                f"ema250_slope{sfx}": ema_slope_normalized(ema.get(250) or [], window=10),
+                f"ema333_slope{sfx}": ema_slope_normalized(ema.get(333) or [], window=10),
+                f"d_ema60_slope{sfx}": ema_slope_delta(ema.get(60) or [], window=10, lag=10),
+                f"d_ema144_slope{sfx}": ema_slope_delta(ema.get(144) or [], window=10, lag=10),
+                f"d_ema250_slope{sfx}": ema_slope_delta(ema.get(250) or [], window=10, lag=10),
+                f"d_ema333_slope{sfx}": ema_slope_delta(ema.get(333) or [], window=10, lag=10),
+            },
+            "separations": {
+                f"sep_fast{sfx}": sep_fast,
+                f"sep_mid{sfx}": sep_mid,
+                f"dsep_fast_5{sfx}": sep_fast - sep_fast_prev,
+                f"dsep_mid_5{sfx}": sep_mid - sep_mid_prev,
+            },
+            "atr": {
+                f"atr{sfx}": atr_val,
+                f"atr_norm{sfx}": atr_val / max(ema50_val, 1e-9),
+                f"atr_mean_20{sfx}": atr_mean_20,
+                f"atr_peak_10{sfx}": atr_peak_10,
+            },
+            "momentum": {
+                f"rsi{sfx}": self.rsi[-1] if self.rsi else 50.0,
+                f"rsi_slope_10{sfx}": lin_slope(self.rsi, 10) if self.rsi else 0.0,
+                f"adx{sfx}": adx_val,
+                f"adx_slope_10{sfx}": lin_slope(self.adx, 10) if self.adx else 0.0,
+            },
+            "volume": {
+                f"vo_z{sfx}": vo_z,
+                f"vo_z_cluster{sfx}": vo_z_cluster,
+            },
+            "meta": {
+                f"source{sfx}": timeframe,
+                "updated_at": now.isoformat(),
+            },
+        }
+
+
+def full_state(rows: List[Dict[str, Any]]) -> TAState:
+    """Full recompute over rows (the TATracker full path)."""
+    block = bars_to_block(rows)
+    ind = compute_indicator_block(block, rsi_start=max(15, len(block) - 60))
+    return TAState.from_full(rows, block, ind)
+
+
+def replay_ta(rows: List[Dict[str, Any]], timeframe: str) -> List[Optional[Dict[str, Any]]]:
+    """
+    Per-bar features.ta payloads as TATracker would have written them, one tick per bar.
+
+    Follows the tracker lifecycle: nothing until MIN_BARS bars exist, then a full
+    recompute over the last FULL_WINDOW_BARS bars, then one O(1) fold per bar,
+    re-seeding whenever fold_rows refuses (re-baseline, gaps, restatements).
+
+    Args:
+        rows: Normalized OHLC rows, chronological (whole history)
+        timeframe: Bar timeframe
+
+    Returns:
+        List aligned with rows; None where the tracker would not have written TA
+    """
+    min_bars = MIN_BARS.get(timeframe, 72)
+    out: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    state: Optional[TAState] = None
+    for i in range(min_bars - 1, len(rows)):
+        if state is None or not state.fold_rows(rows[i - 1:i + 1], timeframe):
+            state = full_state(rows[max(0, i + 1 - FULL_WINDOW_BARS):i + 1])
+        out[i] = state.to_ta(timeframe, _parse_ts(rows[i]["timestamp"]))
+    return out
@@ -9,6 +9,7 @@ from typing import Any, Dict, Generator, List, Optional, Tuple
 
 from supabase import create_client, Client
 from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader  # type: ignore
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import FeaturesWriter
 
 from src.intelligence.lowcap_portfolio_manager.jobs.ta_utils import (
     ema_series,
@@ -21,6 +22,14 @@ from src.intelligence.lowcap_portfolio_manager.jobs.ta_utils import (
     zscore,
     wilder_ema,
 )
+from src.intelligence.lowcap_portfolio_manager.jobs.position_snapshot import PositionSnapshot
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_state import (
+    FULL_WINDOW_BARS,
+    MAX_INCREMENTAL_BARS,
+    MIN_BARS,
+    TAState,
+    full_state,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +38,12 @@ QUERY_WARN_SECONDS = 5.0
 QUERY_CRITICAL_SECONDS = 30.0
 DEFAULT_CHUNK_SIZE = 100
 
+# Positions per bulk OHLC prefetch
+PREFETCH_CHUNK_SIZE = 50
+
+# Persisted incremental indicator state (see ta_state.py)
+TA_STATE_TABLE = "ta_indicator_state"
+
 # Re-export for backwards compatibility (if anything imports these directly)
 _ema_series = ema_series
 _lin_slope = lin_slope
@@ -150,12 +165,14 @@ def _divergence(price_vals: List[float], rsi_vals: List[float]) -> str:
 
 
 class TATracker:
-    def __init__(self, timeframe: str = "1h") -> None:
+    def __init__(self, timeframe: str = "1h", incremental: Optional[bool] = None) -> None:
         """
         Initialize TA Tracker.
         
         Args:
             timeframe: Timeframe to process ("1m", "15m", "1h", "4h")
+            incremental: Fold only new bars into persisted indicator state
+                (default: TA_INCREMENTAL env, on unless set to "0")
         """
         url = os.getenv("SUPABASE_URL", "")
         key = os.getenv("SUPABASE_KEY", "")
@@ -167,13 +184,19 @@ class TATracker:
         self.ta_suffix = f"_{timeframe}"
         # PriceDataReader for universal data access
         self.data_reader = PriceDataReader(self.sb)
+        if incremental is None:
+            incremental = os.getenv("TA_INCREMENTAL", "1") != "0"
+        self.incremental = incremental
+        # Shared PositionSnapshot when running inside a fused tick (tick_pipeline.py)
+        self._snapshot: Optional[PositionSnapshot] = None
+        # Batched features.ta patches (flushed once per chunk)
+        self.features_writer = FeaturesWriter(self.sb)
 
     def _active_positions_chunked(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[Dict[str, Any], None, None]:
         """Yield positions in chunks to prevent timeout on large datasets.
         
-        IMPORTANT: Does NOT select 'features' - that's read per-position when writing.
-        This pattern prevents bulk-reading large JSONB columns that cause timeouts.
-        See: write_features_token_geometry() for the correct pattern.
+        IMPORTANT: Does NOT select 'features' - TA is written back as a key-level
+        patch (FeaturesWriter), so the large JSONB column is never read here.
         
         Optimizations:
         - For small datasets (< 200), fetch all at once to avoid chunking overhead
@@ -269,231 +292,220 @@ class TATracker:
             logger.debug("Fetched %d positions in %.2fs", total_fetched, total_time)
 
     def _write_features_ta(self, position_id: str, ta: Dict[str, Any]) -> None:
-        """Write TA to features using per-position read-modify-write pattern.
-        
-        This avoids bulk-reading features in _active_positions() which causes timeouts.
-        Pattern matches write_features_token_geometry() in spiral/persist.py.
+        """Queue features.ta for a position (flushed per chunk by run()).
+
+        Only the ta key is sent (FeaturesWriter patch), so nothing is read and
+        keys written concurrently by other jobs are kept. In a fused tick the
+        write goes to the shared snapshot instead.
         """
+        if self._snapshot is not None:
+            p = self._snapshot.get(position_id)
+            if p is not None:
+                features = p.get("features") or {}
+                features["ta"] = ta
+                self._snapshot.set_features(position_id, features, keys=("ta",))
+                return
+        self.features_writer.set(position_id, "ta", ta)
+
+    def _load_ta_states(self) -> Dict[str, TAState]:
+        """Load persisted incremental TA state for this timeframe (one paged read).
+
+        Any failure (e.g. table not migrated yet) disables incremental mode for
+        this run - every position then takes the full-recompute path.
+        """
+        states: Dict[str, TAState] = {}
+        offset = 0
         try:
-            row = (
-                self.sb.table("lowcap_positions")
-                .select("features")
-                .eq("id", position_id)
-                .limit(1)
-                .execute()
-                .data or []
+            while True:
+                rows = (
+                    self.sb.table(TA_STATE_TABLE)
+                    .select("position_id,state")
+                    .eq("timeframe", self.timeframe)
+                    .order("position_id")
+                    .range(offset, offset + 999)
+                    .execute()
+                    .data or []
+                )
+                for r in rows:
+                    st = TAState.from_dict(r.get("state"))
+                    if st is not None:
+                        states[str(r.get("position_id"))] = st
+                if len(rows) < 1000:
+                    break
+                offset += 1000
+        except Exception as e:
+            logger.warning("TA state load failed (timeframe=%s), using full recompute: %s", self.timeframe, e)
+            self.incremental = False
+            return {}
+        return states
+
+    def _save_ta_states(self, states: Dict[str, TAState], now: datetime) -> None:
+        """Persist changed TA states in chunked bulk upserts."""
+        rows = [
+            {
+                "position_id": pid,
+                "timeframe": self.timeframe,
+                "state": st.to_dict(),
+                "watermark_ts": st.watermark_ts,
+                "updated_at": now.isoformat(),
+            }
+            for pid, st in states.items()
+        ]
+        for i in range(0, len(rows), DEFAULT_CHUNK_SIZE):
+            try:
+                (
+                    self.sb.table(TA_STATE_TABLE)
+                    .upsert(rows[i:i + DEFAULT_CHUNK_SIZE], on_conflict="position_id,timeframe")
+                    .execute()
+                )
+            except Exception as e:
+                # Non-fatal: next run simply recomputes these positions in full
+                logger.warning("TA state save failed (timeframe=%s): %s", self.timeframe, e)
+                return
+
+    def _prefetch_new_bars(
+        self, chunk: List[Dict[str, Any]], states: Dict[str, TAState], now: datetime
+    ) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """
+        Bulk-fetch bars past each persisted watermark for a chunk of positions.
+
+        States too stale to fold are skipped (they take the full recompute path),
+        so the bulk window only spans the MAX_INCREMENTAL_BARS the fold needs.
+        """
+        since_by_token = {
+            (p.get("token_contract"), p.get("token_chain")): states[str(p.get("id"))].watermark_ts
+            for p in chunk
+            if str(p.get("id")) in states and not states[str(p.get("id"))].too_stale(now, self.timeframe)
+        }
+        if not since_by_token:
+            return {}
+        try:
+            return self.data_reader.fetch_ohlc_since_bulk(
+                since_by_token, self.timeframe, limit=MAX_INCREMENTAL_BARS + 2
+            )
+        except Exception as e:
+            logger.warning("Bulk incremental OHLC fetch failed (timeframe=%s): %s", self.timeframe, e)
+            return {}
+
+    def _prefetch_full_bars(
+        self, tokens: List[Tuple[str, str]], now: datetime
+    ) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Bulk-fetch the full recompute window; missing keys fall back to per-token reads."""
+        if not tokens:
+            return {}
+        try:
+            return self.data_reader.fetch_recent_ohlc_bulk(
+                tokens, self.timeframe, limit=FULL_WINDOW_BARS, until_iso=now.isoformat()
             )
-            features = (row[0].get("features") if row else {}) or {}
-            features["ta"] = ta
-            self.sb.table("lowcap_positions").update({"features": features}).eq("id", position_id).execute()
         except Exception as e:
-            logger.error("Failed to write TA for position %s: %s", position_id, e)
-            raise
+            logger.warning("Bulk OHLC fetch failed (timeframe=%s), using per-token reads: %s", self.timeframe, e)
+            return {}
+
+    def _chunks(self, size: int) -> Generator[List[Dict[str, Any]], None, None]:
+        chunk: List[Dict[str, Any]] = []
+        positions = self._snapshot.positions if self._snapshot is not None else self._active_positions_chunked()
+        for p in positions:
+            chunk.append(p)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def run(self, snapshot: Optional[PositionSnapshot] = None) -> int:
+        """
+        Compute TA for every watchlist/active position of this timeframe.
 
-    def run(self) -> int:
+        Args:
+            snapshot: Shared positions of a fused tick (None = read/write lowcap_positions directly)
+        """
+        self._snapshot = snapshot
         now = datetime.now(timezone.utc)
         updated = 0
         skipped = 0
         errors = 0
-        
-        for p in self._active_positions_chunked():
-            pid = p.get("id")
-            contract = p.get("token_contract")
-            chain = p.get("token_chain")
-            
-            try:
-                # Timeframe-specific OHLC via PriceDataReader (venue-agnostic)
-                # PriceDataReader handles table routing and schema normalization
-                rows_tf = self.data_reader.fetch_recent_ohlc(
-                    contract=contract,
-                    chain=chain,
-                    timeframe=self.timeframe,
-                    limit=1000,  # Supabase caps at 1000 anyway
-                    until_iso=now.isoformat()
-                )
-                # fetch_recent_ohlc already returns chronological order (oldest first)
-                # Minimum bars required varies by timeframe
-                # 1m: 333 bars minimum (matches backfill minimum, ~5.5 hours)
-                # 15m: 288 bars (~3 days)
-                # 1h: 72 bars (~3 days)
-                # 4h: 18 bars (~3 days)
-                min_bars_map = {"1m": 333, "15m": 288, "1h": 72, "4h": 18}
-                min_bars = min_bars_map.get(self.timeframe, 72)
-                if len(rows_tf) < min_bars:
-                    logger.debug(f"Skipping {self.timeframe} position {contract}: only {len(rows_tf)} bars, need {min_bars}")
-                    skipped += 1
-                    continue  # require at least min_bars for this timeframe
-                bars_tf = [
-                    {
-                        "t0": datetime.fromisoformat(str(r["timestamp"]).replace("Z", "+00:00")),
-                        "o": float(r.get("open_usd") or 0.0),
-                        "h": float(r.get("high_usd") or 0.0),
-                        "l": float(r.get("low_usd") or 0.0),
-                        "c": float(r.get("close_usd") or 0.0),
-                        "v": float(r.get("volume") or 0.0),
-                    }
-                    for r in rows_tf
-                ]
-                ema20_tf = ema_series([b["c"] for b in bars_tf], 20)
-                ema30_tf = ema_series([b["c"] for b in bars_tf], 30)
-                ema50_tf = ema_series([b["c"] for b in bars_tf], 50)
-                ema60_tf = ema_series([b["c"] for b in bars_tf], 60)
-                ema144_tf = ema_series([b["c"] for b in bars_tf], 144)
-                ema250_tf = ema_series([b["c"] for b in bars_tf], 250)
-                ema333_tf = ema_series([b["c"] for b in bars_tf], 333)
-
-                ema20_tf_val = ema20_tf[-1] if ema20_tf else (bars_tf[-1]["c"] if bars_tf else 0.0)
-                ema30_tf_val = ema30_tf[-1] if ema30_tf else (bars_tf[-1]["c"] if bars_tf else 0.0)
-                ema50_tf_val = ema50_tf[-1] if ema50_tf else (bars_tf[-1]["c"] if bars_tf else 0.0)
-                atr_series_tf = atr_series_wilder(bars_tf, 14)
-                atr_tf = atr_series_tf[-1] if atr_series_tf else 0.0
-                adx_series_tf = adx_series_wilder(bars_tf, 14)
-                adx_tf = adx_series_tf[-1] if adx_series_tf else 0.0
-
-                # VO_z(timeframe) using log-volume EWMA (N=64), winsorize and cap [-4,+6]
-                import math, statistics
-                v_tf = [max(0.0, float(b.get("v") or 0.0)) for b in bars_tf]
-                if v_tf:
-                    log_v = [math.log(1.0 + v) for v in v_tf]
-                    # Winsorize 2/98 over trailing window
-                    def winsorize(arr: List[float]) -> List[float]:
-                        if len(arr) < 10:
-                            return arr
-                        s = sorted(arr)
-                        lo_idx = max(0, int(0.02 * len(s)) - 1)
-                        hi_idx = min(len(s) - 1, int(0.98 * len(s)))
-                        lo, hi = s[lo_idx], s[hi_idx]
-                        return [min(max(x, lo), hi) for x in arr]
-                    log_v_win = winsorize(log_v)
-                    # EWMA mean/var
-                    N = 64
-                    alpha = 2.0 / (N + 1)
-                    mu = log_v_win[0]
-                    var = 0.0
-                    for x in log_v_win[1:]:
-                        prev_mu = mu
-                        mu = alpha * x + (1 - alpha) * mu
-                        var = (1 - alpha) * (var + alpha * (x - prev_mu) * (x - mu))
-                    sd = math.sqrt(max(var, 1e-12))
-                    vo_z_tf = (log_v_win[-1] - mu) / (sd if sd > 0 else 1.0)
-                    vo_z_tf = max(-4.0, min(6.0, vo_z_tf))
-                    # Cluster-30 helper for S1 diagnostics
-                    def cluster_true(zs: List[float]) -> bool:
-                        window = zs[-30:] if len(zs) >= 30 else zs
-                        return (sum(1 for z in window if z >= 2.0) >= 3) or (sum(max(0.0, z) for z in window) >= 6.0)
-                    vo_z_cluster_tf = cluster_true([ (lv - mu) / (sd if sd>0 else 1.0) for lv in log_v_win ])
-                else:
-                    vo_z_tf = 0.0
-                    vo_z_cluster_tf = False
-
-                # RSI(timeframe) series and slopes
-                closes_tf = [b["c"] for b in bars_tf]
-                rsi_series_tf: List[float] = []
-                for k in range(max(15, len(closes_tf) - 60), len(closes_tf)):
-                    rsi_series_tf.append(rsi(closes_tf[: k + 1], 14))
-                rsi_tf = rsi_series_tf[-1] if rsi_series_tf else 50.0
-                rsi_slope_10 = lin_slope(rsi_series_tf, 10) if rsi_series_tf else 0.0
-
-                # EMA slopes (%/bar) and accelerations - using shared utilities
-                ema20_slope = ema_slope_normalized(ema20_tf, window=10)
-                ema60_slope = ema_slope_normalized(ema60_tf, window=10)
-                ema144_slope = ema_slope_normalized(ema144_tf, window=10)
-                ema250_slope = ema_slope_normalized(ema250_tf, window=10)
-                ema333_slope = ema_slope_normalized(ema333_tf, window=10)
-
-                # Slope deltas (acceleration)
-                d_ema60_slope = ema_slope_delta(ema60_tf, window=10, lag=10)
-                d_ema144_slope = ema_slope_delta(ema144_tf, window=10, lag=10)
-                d_ema250_slope = ema_slope_delta(ema250_tf, window=10, lag=10)
-                d_ema333_slope = ema_slope_delta(ema333_tf, window=10, lag=10)
-
-                # Separations and dsep
-                sep_fast = ( (ema20_tf[-1] if ema20_tf else 0.0) - (ema60_tf[-1] if ema60_tf else 1e-9) ) / max(ema60_tf[-1] if ema60_tf else 1e-9, 1e-9)
-                sep_mid = ( (ema60_tf[-1] if ema60_tf else 0.0) - (ema144_tf[-1] if ema144_tf else 1e-9) ) / max(ema144_tf[-1] if ema144_tf else 1e-9, 1e-9)
-                if len(ema60_tf) >= 6 and len(ema144_tf) >= 6 and len(ema20_tf) >= 6:
-                    sep_fast_prev = ( (ema20_tf[-6]) - (ema60_tf[-6]) ) / max(ema60_tf[-6], 1e-9)
-                    sep_mid_prev = ( (ema60_tf[-6]) - (ema144_tf[-6]) ) / max(ema144_tf[-6], 1e-9)
-                else:
-                    sep_fast_prev = sep_fast
-                    sep_mid_prev = sep_mid
-                dsep_fast_5 = sep_fast - sep_fast_prev
-                dsep_mid_5 = sep_mid - sep_mid_prev
-
-                # ATR helpers
-                atr_norm_tf = atr_tf / max(ema50_tf_val, 1e-9)
-                import statistics as _stats
-                atr_mean_20 = (_stats.fmean(atr_series_tf[-20:]) if len(atr_series_tf) >= 20 else atr_tf) if atr_series_tf else atr_tf
-                atr_peak_10 = (max(atr_series_tf[-10:]) if len(atr_series_tf) >= 10 else atr_tf) if atr_series_tf else atr_tf
-
-                # ADX slope over last 10 bars
-                adx_slope_10 = lin_slope(adx_series_tf, 10) if adx_series_tf else 0.0
-
-                # Build TA dict with timeframe-specific keys
-                ta = {
-                    "ema": {
-                        f"ema20{self.ta_suffix}": ema20_tf_val,
-                        f"ema30{self.ta_suffix}": ema30_tf_val,
-                        f"ema50{self.ta_suffix}": ema50_tf_val,
-                        f"ema60{self.ta_suffix}": ema60_tf[-1] if ema60_tf else ema20_tf_val,
-                        f"ema144{self.ta_suffix}": ema144_tf[-1] if ema144_tf else ema20_tf_val,
-                        f"ema250{self.ta_suffix}": ema250_tf[-1] if ema250_tf else ema20_tf_val,
-                        f"ema333{self.ta_suffix}": ema333_tf[-1] if ema333_tf else ema20_tf_val,
-                    },
-                    "ema_slopes": {
-                        f"ema20_slope{self.ta_suffix}": ema20_slope,
-                        f"ema60_slope{self.ta_suffix}": ema60_slope,
-                        f"ema144_slope{self.ta_suffix}": ema144_slope,
-                        f"ema250_slope{self.ta_suffix}": ema250_slope,
-                        f"ema333_slope{self.ta_suffix}": ema333_slope,
-                        f"d_ema60_slope{self.ta_suffix}": d_ema60_slope,
-                        f"d_ema144_slope{self.ta_suffix}": d_ema144_slope,
-                        f"d_ema250_slope{self.ta_suffix}": d_ema250_slope,
-                        f"d_ema333_slope{self.ta_suffix}": d_ema333_slope,
-                    },
-                    "separations": {
-                        f"sep_fast{self.ta_suffix}": sep_fast,
-                        f"sep_mid{self.ta_suffix}": sep_mid,
-                        f"dsep_fast_5{self.ta_suffix}": dsep_fast_5,
-                        f"dsep_mid_5{self.ta_suffix}": dsep_mid_5,
-                    },
-                    "atr": {
-                        f"atr{self.ta_suffix}": atr_tf,
-                        f"atr_norm{self.ta_suffix}": atr_norm_tf,
-                        f"atr_mean_20{self.ta_suffix}": atr_mean_20,
-                        f"atr_peak_10{self.ta_suffix}": atr_peak_10,
-                    },
-                    "momentum": {
-                        f"rsi{self.ta_suffix}": rsi_tf,
-                        f"rsi_slope_10{self.ta_suffix}": rsi_slope_10,
-                        f"adx{self.ta_suffix}": adx_tf,
-                        f"adx_slope_10{self.ta_suffix}": adx_slope_10,
-                    },
-                    "volume": {
-                        f"vo_z{self.ta_suffix}": vo_z_tf,
-                        f"vo_z_cluster{self.ta_suffix}": vo_z_cluster_tf
-                    },
-                    "meta": {
-                        f"source{self.ta_suffix}": self.timeframe,
-                        "updated_at": now.isoformat()
-                    },
-                }
-
-                # Per-position write (reads features only for this position, not bulk)
-                self._write_features_ta(pid, ta)
-                updated += 1
-                
-            except Exception as e:
-                errors += 1
-                logger.error(
-                    "TA Tracker failed for %s/%s (timeframe=%s): %s",
-                    contract, chain, self.timeframe, e
-                )
-                # Continue to next position - one failure shouldn't stop the batch
-                continue
+        folded = 0
+
+        # Minimum bars required varies by timeframe (see ta_state.MIN_BARS)
+        min_bars = MIN_BARS.get(self.timeframe, 72)
+
+        states = self._load_ta_states() if self.incremental else {}
+        changed_states: Dict[str, TAState] = {}
+
+        for chunk in self._chunks(PREFETCH_CHUNK_SIZE):
+            # Prefetch OHLC for the whole chunk: new bars for positions with state,
+            # then the full window for everything that could not be folded
+            new_bars = self._prefetch_new_bars(chunk, states, now)
+            ready: Dict[str, TAState] = {}
+            for p in chunk:
+                pid = str(p.get("id"))
+                state = states.get(pid)
+                rows_new = new_bars.get((p.get("token_contract"), p.get("token_chain")))
+                if state is not None and rows_new and state.fold_rows(rows_new, self.timeframe):
+                    ready[pid] = state
+            full_tokens = [
+                (p.get("token_contract"), p.get("token_chain")) for p in chunk if str(p.get("id")) not in ready
+            ]
+            full_bars = self._prefetch_full_bars(full_tokens, now)
+
+            for p in chunk:
+                pid = p.get("id")
+                contract = p.get("token_contract")
+                chain = p.get("token_chain")
+
+                try:
+                    state = ready.get(str(pid))
+                    if state is not None:
+                        folded += 1
+                        state_changed = state.folded_last_run > 0
+                    else:
+                        # Full recompute: timeframe-specific OHLC via PriceDataReader (venue-agnostic)
+                        # PriceDataReader handles table routing and schema normalization
+                        rows_tf = full_bars.get((contract, chain))
+                        if rows_tf is None:
+                            rows_tf = self.data_reader.fetch_recent_ohlc(
+                                contract=contract,
+                                chain=chain,
+                                timeframe=self.timeframe,
+                                limit=FULL_WINDOW_BARS,
+                                until_iso=now.isoformat()
+                            )
+                        # PriceDataReader returns chronological order (oldest first)
+                        if len(rows_tf) < min_bars:
+                            logger.debug(f"Skipping {self.timeframe} position {contract}: only {len(rows_tf)} bars, need {min_bars}")
+                            skipped += 1
+                            continue  # require at least min_bars for this timeframe
+                        # One pass over a float64 OHLCV block (bit-compatible with ta_utils)
+                        state = full_state(rows_tf)
+                        state_changed = True
+
+                    # Build TA dict with timeframe-specific keys
+                    ta = state.to_ta(self.timeframe, now)
+
+                    self._write_features_ta(pid, ta)
+                    updated += 1
+                    if state_changed:
+                        changed_states[str(pid)] = state
+
+                except Exception as e:
+                    errors += 1
+                    logger.error(
+                        "TA Tracker failed for %s/%s (timeframe=%s): %s",
+                        contract, chain, self.timeframe, e
+                    )
+                    # Continue to next position - one failure shouldn't stop the batch
+                    continue
+
+            writer = getattr(self, "features_writer", None)
+            if writer is not None and len(writer):
+                writer.flush()
+
+        if self.incremental and changed_states:
+            self._save_ta_states(changed_states, now)
                 
         logger.info(
-            "TA Tracker (%s) complete: updated=%d, skipped=%d, errors=%d",
-            self.timeframe, updated, skipped, errors
+            "TA Tracker (%s) complete: updated=%d (incremental=%d), skipped=%d, errors=%d",
+            self.timeframe, updated, folded, skipped, errors
         )
         return updated
 
@@ -0,0 +1,99 @@
+"""
+Tick Pipeline - TA Tracker → Uptrend Engine → PM Core Tick in one pass.
+
+Run separately, each stage reads every position (features included) and writes
+features back per position, so a tick re-reads and re-writes the same rows
+three times. The fused tick loads the timeframe's positions once into a
+PositionSnapshot, runs the three stages over it in order (each sees the
+previous stage's output in memory) and flushes every changed position once at
+the end.
+
+The stages stay runnable on their own (ta_tracker.main, uptrend_engine_v4.main,
+pm_core_tick.main); without a snapshot they behave exactly as before.
+
+Usage:
+    python -m src.intelligence.lowcap_portfolio_manager.jobs.tick_pipeline --timeframe 1h
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+
+from supabase import create_client  # type: ignore
+
+from src.intelligence.lowcap_portfolio_manager.jobs.pm_core_tick import PMCoreTick
+from src.intelligence.lowcap_portfolio_manager.jobs.position_snapshot import PositionSnapshot
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_tracker import TATracker
+from src.intelligence.lowcap_portfolio_manager.jobs.uptrend_engine_v4 import UptrendEngineV4
+
+logger = logging.getLogger(__name__)
+
+
+def load_snapshot(timeframe: str) -> PositionSnapshot:
+    """Load the timeframe's watchlist/active positions (raises if the database is unreachable)."""
+    url = os.getenv("SUPABASE_URL", "")
+    key = os.getenv("SUPABASE_KEY", "")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL and SUPABASE_KEY are required")
+    return PositionSnapshot.load(create_client(url, key), timeframe)
+
+
+def run_tick_pipeline(timeframe: str = "1h", learning_system=None, snapshot: PositionSnapshot | None = None) -> int:
+    """
+    Run TA → Uptrend → PM for one timeframe over a shared position snapshot.
+
+    A failing stage is logged and the next stage still runs (same as the
+    sequential wrappers); pending writes are always flushed.
+
+    Args:
+        timeframe: Timeframe to process ("1m", "15m", "1h", "4h")
+        learning_system: Optional learning system instance (passed to PM Core Tick)
+        snapshot: Preloaded snapshot (default: load_snapshot(timeframe))
+
+    Returns:
+        Number of positions written by the final flush
+    """
+    if snapshot is None:
+        snapshot = load_snapshot(timeframe)
+    t0 = time.time()
+    try:
+        try:
+            TATracker(timeframe=timeframe).run(snapshot=snapshot)
+        except Exception as e:
+            logger.error("Tick pipeline (%s) TA Tracker error: %s", timeframe, e, exc_info=True)
+        try:
+            UptrendEngineV4(timeframe=timeframe).run(snapshot=snapshot)
+        except Exception as e:
+            logger.error("Tick pipeline (%s) Uptrend error: %s", timeframe, e, exc_info=True)
+        try:
+            PMCoreTick(timeframe=timeframe, learning_system=learning_system).run(snapshot=snapshot)
+        except Exception as e:
+            logger.error("Tick pipeline (%s) PM Core error: %s", timeframe, e, exc_info=True)
+    finally:
+        written = snapshot.flush()
+    logger.info(
+        "Tick pipeline (%s): %d positions, %d written in %.1fs",
+        timeframe, len(snapshot.positions), written, time.time() - t0,
+    )
+    return written
+
+
+def main(timeframe: str = "1h", learning_system=None) -> None:
+    """
+    Main entry point for the fused tick.
+
+    Args:
+        timeframe: Timeframe to process ("1m", "15m", "1h", "4h")
+        learning_system: Optional learning system instance
+    """
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    run_tick_pipeline(timeframe=timeframe, learning_system=learning_system)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fused TA → Uptrend → PM tick")
+    parser.add_argument("--timeframe", default="1h", choices=["1m", "15m", "1h", "4h"])
+    main(timeframe=parser.parse_args().timeframe)
@@ -680,6 +680,7 @@ def main() -> None:
                     "tracked_at": now.isoformat(),
                 }
                 sp.write_features_token_geometry(pid, updates)
+            sp.flush_features()
         except Exception as e:
             logging.getLogger(__name__).exception("geometry tracker failed: %s", e)
 
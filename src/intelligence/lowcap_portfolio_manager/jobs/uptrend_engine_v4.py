@@ -35,9 +35,14 @@ from src.intelligence.lowcap_portfolio_manager.jobs.ta_utils import (
     rsi,
 )
 from src.intelligence.lowcap_portfolio_manager.utils.zigzag import detect_swings
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import FeaturesWriter
+from src.intelligence.lowcap_portfolio_manager.jobs.position_snapshot import PositionSnapshot
 
 logger = logging.getLogger("uptrend_engine")
 
+# Feature blocks the engine owns (the only keys it writes back)
+ENGINE_FEATURE_KEYS = ("uptrend_engine_v4", "uptrend_engine_v4_meta", "uptrend_episode_meta")
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -69,6 +74,22 @@ class Constants:
     # DX buy threshold (S3) - base threshold before EDX suppression and price position adjustments
     DX_BUY_THRESHOLD = 0.60  # Lowered from 0.65 (was too strict, many near misses)
     
+    # DX suppression by EDX (S3): dx *= 1 - 0.5 * clamp(edx - START, 0, MAX)
+    DX_EDX_SUPPRESS_START = 0.6
+    DX_EDX_SUPPRESS_MAX = 0.4
+    
+    # First dip buy (S3): EMA20/30 or EMA60 touch within the first bars of S3
+    FIRST_DIP_TS_THRESHOLD = 0.50  # Lower than TS_THRESHOLD
+    FIRST_DIP_HALO_ATR_MULTIPLIER = 0.5
+    FIRST_DIP_FAST_MAX_BARS = 6  # EMA20/30 option
+    FIRST_DIP_EMA60_MAX_BARS = 12  # EMA60 option
+    
+    # EDX 3-window composite weights
+    EDX_W_SLOW = 0.30
+    EDX_W_STRUCT = 0.25
+    EDX_W_PART = 0.20
+    EDX_W_COMP = 0.10
+    
     # Emergency exit TI/TS thresholds for fakeout recovery
     EMERGENCY_EXIT_TI_MIN = 0.50
     EMERGENCY_EXIT_TS_MIN = 0.50
@@ -116,6 +137,10 @@ class UptrendEngineV4:
         self.timeframe = timeframe
         # Map timeframe to TA suffix (e.g., "1m" -> "_1m", "1h" -> "_1h")
         self.ta_suffix = f"_{timeframe}"
+        # Shared PositionSnapshot when running inside a fused tick (tick_pipeline.py)
+        self._snapshot: Optional[PositionSnapshot] = None
+        # Batched key-level features writes (flushed at the end of run())
+        self.features_writer = FeaturesWriter(self.sb)
 
     # --------------- Data access helpers ---------------
     
@@ -130,6 +155,10 @@ class UptrendEngineV4:
             include_regime_drivers: If True, also include regime_driver positions.
                                    Set to True when running for regime engine.
         """
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is not None and not include_regime_drivers:
+            return snapshot.positions
+
         statuses = ["watchlist", "active"]
         if include_regime_drivers:
             statuses.append("regime_driver")
@@ -145,12 +174,18 @@ class UptrendEngineV4:
         return res.data or []
 
     def _write_features(self, pid: Any, features: Dict[str, Any]) -> None:
-        update_payload: Dict[str, Any] = {"features": features}
-        uptrend_payload = (features or {}).get("uptrend_engine_v4") or {}
-        state_value = uptrend_payload.get("state")
-        if state_value:
-            update_payload["state"] = state_value
-        self.sb.table("lowcap_positions").update(update_payload).eq("id", pid).execute()
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is not None and pid in snapshot:
+            snapshot.set_features(pid, features, keys=ENGINE_FEATURE_KEYS)
+            snapshot.set_state(pid, ((features or {}).get("uptrend_engine_v4") or {}).get("state"))
+            return
+        # Only the engine's own keys are sent (flushed in bulk at the end of run())
+        for key in ENGINE_FEATURE_KEYS:
+            if key in (features or {}):
+                self.features_writer.set(pid, key, features[key])
+            else:
+                self.features_writer.unset(pid, key)
+        self.features_writer.set_state(pid, ((features or {}).get("uptrend_engine_v4") or {}).get("state"))
 
     def _emit_event(self, event: str, payload: Dict[str, Any]) -> None:
         """Emit state change event to database."""
@@ -229,8 +264,13 @@ class UptrendEngineV4:
              # Ideally should be in __init__, but for now let's use the one we can create
              from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
              self.data_reader = PriceDataReader(self.sb)
-             
-        latest = self.data_reader.latest_close(contract, chain, self.timeframe)
+
+        # Served from the per-run bulk prefetch when available (see _prefetch_latest_closes)
+        cache = getattr(self, "_latest_close_cache", None) or {}
+        if (contract, chain) in cache:
+            latest = cache[(contract, chain)]
+        else:
+            latest = self.data_reader.latest_close(contract, chain, self.timeframe)
         if latest:
              return {
                  "ts": str(latest.get("ts")),
@@ -239,6 +279,18 @@ class UptrendEngineV4:
              }
         return {"ts": None, "close": 0.0, "low": 0.0}
 
+    def _prefetch_latest_closes(self, positions: List[Dict[str, Any]]) -> None:
+        """Bulk-load latest closes for all positions of this run (one query per venue)."""
+        self._latest_close_cache = {}
+        if not hasattr(self, 'data_reader'):
+            from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+            self.data_reader = PriceDataReader(self.sb)
+        tokens = [(p.get("token_contract"), p.get("token_chain")) for p in positions]
+        try:
+            self._latest_close_cache = self.data_reader.latest_close_bulk(tokens, self.timeframe)
+        except Exception as e:
+            logger.warning("Bulk latest-close prefetch failed (timeframe=%s): %s", self.timeframe, e)
+
     def _get_atr(self, ta: Dict[str, Any]) -> float:
         """Get ATR from TA (timeframe-specific)."""
         atr_data = ta.get("atr") or {}
@@ -500,20 +552,20 @@ class UptrendEngineV4:
         # S/R boost anchored to EMA333 for consistency
         sr_boost = self._compute_sr_boost(price, ema333, atr_val, sr_levels)
         ts_with_boost = ts_score + sr_boost
-        ts_ok = ts_with_boost >= 0.50  # Lower threshold for first dip
+        ts_ok = ts_with_boost >= Constants.FIRST_DIP_TS_THRESHOLD  # Lower threshold for first dip
         
         # Check option 1: EMA20/30 within first 6 bars
-        halo_20_30 = 0.5 * atr_val
+        halo_20_30 = Constants.FIRST_DIP_HALO_ATR_MULTIPLIER * atr_val
         dist_20 = abs(price - ema20)
         dist_30 = abs(price - ema30)
         near_20_30 = (dist_20 <= halo_20_30) or (dist_30 <= halo_20_30)
-        option1_ok = (bars_since_entry <= 6) and near_20_30
+        option1_ok = (bars_since_entry <= Constants.FIRST_DIP_FAST_MAX_BARS) and near_20_30
         
         # Check option 2: EMA60 within first 12 bars
-        halo_60 = 0.5 * atr_val
+        halo_60 = Constants.FIRST_DIP_HALO_ATR_MULTIPLIER * atr_val
         dist_60 = abs(price - ema60)
         near_60 = dist_60 <= halo_60
-        option2_ok = (bars_since_entry <= 12) and near_60
+        option2_ok = (bars_since_entry <= Constants.FIRST_DIP_EMA60_MAX_BARS) and near_60
         
         # First dip buy if either option is met AND slope + TS OK
         first_dip_buy_flag = (option1_ok or option2_ok) and slope_ok and ts_ok
@@ -750,6 +802,38 @@ class UptrendEngineV4:
 
     # --------------- OX/DX/EDX Calculations ---------------
 
+    def _slow_field_series(
+        self, window_closes: List[float], window_bars: List[Dict[str, Any]]
+    ) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """
+        Series behind the EDX slow-field momentum score of one window.
+        
+        EMAs and ADX are seeded at the window start. The replay overrides this
+        to index precomputed history series instead of rebuilding them per tick.
+        
+        Returns:
+            (EMA250 tail, EMA333 tail, RSI of the last <= 10 prefixes, ADX tail),
+            EMA tails of the last min(20, len) bars, ADX tail of the last 10 bars
+            ([] if the window is too short for ADX)
+        """
+        slope_window = min(20, len(window_closes))
+        ema250_tail = ema_series(window_closes, 250)[-slope_window:]
+        ema333_tail = ema_series(window_closes, 333)[-slope_window:]
+        
+        # lin_slope only reads the last 10 RSI values
+        rsi_vals: List[float] = [
+            rsi(window_closes[:i+1], 14)
+            for i in range(max(14, len(window_closes) - 10), len(window_closes))
+        ]
+        
+        bars_dicts = [{"h": h, "l": l, "c": c} for h, l, c in 
+                     zip([float(b.get("high_usd") or 0.0) for b in window_bars],
+                         [float(b.get("low_usd") or 0.0) for b in window_bars],
+                         window_closes)]
+        adx_series_vals = adx_series_wilder(bars_dicts, period=14)
+        adx_tail = adx_series_vals[-10:] if len(adx_series_vals) >= 10 else []
+        return ema250_tail, ema333_tail, rsi_vals, adx_tail
+    
     def _compute_edx_3window(
         self,
         contract: str,
@@ -822,37 +906,28 @@ class UptrendEngineV4:
             if len(window_closes) < 10:
                 return 0.5  # Neutral
             
-            # EMA250/333 slopes
-            ema250_series = ema_series(window_closes, 250)
-            ema333_series = ema_series(window_closes, 333)
+            ema250_tail, ema333_tail, rsi_vals, adx_tail = self._slow_field_series(window_closes, window_bars)
             
-            # Use last 20 bars for slope calculation if available
-            slope_window = min(20, len(ema250_series))
-            ema250_slope = ema_slope_normalized(ema250_series[-slope_window:], window=min(10, slope_window))
-            ema333_slope = ema_slope_normalized(ema333_series[-slope_window:], window=min(10, slope_window))
+            # EMA250/333 slopes (tails hold the last 20 bars if available)
+            slope_window = len(ema250_tail)
+            ema250_slope = ema_slope_normalized(ema250_tail, window=min(10, slope_window))
+            ema333_slope = ema_slope_normalized(ema333_tail, window=min(10, slope_window))
             
             # Average of normalized slopes (positive = good, negative = decay)
             ema_slope_score = (ema250_slope + ema333_slope) / 2.0
             ema_score = sigmoid(ema_slope_score * 1000.0, 1.0)  # Normalize to 0-1
             
             # RSI trend (slope of RSI series)
-            rsi_vals: List[float] = []
-            for i in range(14, len(window_closes)):
-                rsi_vals.append(rsi(window_closes[:i+1], 14))
-            if len(rsi_vals) >= 10:
+            n_rsi = len(window_closes) - 14
+            if n_rsi >= 10:
                 rsi_slope = lin_slope(rsi_vals, 10)
                 rsi_score = sigmoid(rsi_slope / 5.0, 1.0)  # Normalize
             else:
                 rsi_score = 0.5
             
             # ADX trend (slope of ADX series)
-            bars_dicts = [{"h": h, "l": l, "c": c} for h, l, c in 
-                         zip([float(b.get("high_usd") or 0.0) for b in window_bars],
-                             [float(b.get("low_usd") or 0.0) for b in window_bars],
-                             window_closes)]
-            adx_series_vals = adx_series_wilder(bars_dicts, period=14)
-            if len(adx_series_vals) >= 10:
-                adx_slope = lin_slope(adx_series_vals, 10)
+            if len(adx_tail) >= 10:
+                adx_slope = lin_slope(adx_tail, 10)
                 adx_score = sigmoid(adx_slope / 2.0, 1.0)  # Normalize
             else:
                 adx_score = 0.5
@@ -1026,10 +1101,10 @@ class UptrendEngineV4:
         
         # Weighted composite (volatility disorder removed)
         edx_score = (
-            0.30 * slow_decay +
-            0.25 * struct_decay +
-            0.20 * part_decay +
-            0.10 * comp_decay
+            Constants.EDX_W_SLOW * slow_decay +
+            Constants.EDX_W_STRUCT * struct_decay +
+            Constants.EDX_W_PART * part_decay +
+            Constants.EDX_W_COMP * comp_decay
         )
         edx_score = max(0.0, min(1.0, edx_score))
         
@@ -1090,7 +1165,10 @@ class UptrendEngineV4:
         dsep_mid = float(sep.get("dsep_mid_5") or 0.0)
         geom_roll = 0.6 * sigmoid(-(dsep_mid) / Constants.S3_EXP_MID_K, 1.0) + 0.4 * sigmoid(-(dsep_fast) / Constants.S3_EXP_FAST_K, 1.0)
         
-        edx_score = 0.30 * slow_down + 0.25 * struct + 0.20 * part_decay + 0.10 * geom_roll
+        edx_score = (
+            Constants.EDX_W_SLOW * slow_down + Constants.EDX_W_STRUCT * struct +
+            Constants.EDX_W_PART * part_decay + Constants.EDX_W_COMP * geom_roll
+        )
         edx_score = max(0.0, min(1.0, edx_score))
         
         return (edx_score, {
@@ -1283,7 +1361,7 @@ class UptrendEngineV4:
         relief = 0.5 * atr_relief + 0.5 * mom_relief
         curl = 1.0 if d_ema144_slope > 0.0 else 0.0
         dx_base = 0.45 * dx_location + 0.25 * exhaustion + 0.25 * relief + 0.05 * curl
-        supp = max(0.0, min(0.4, edx - 0.6))
+        supp = max(0.0, min(Constants.DX_EDX_SUPPRESS_MAX, edx - Constants.DX_EDX_SUPPRESS_START))
         dx = max(0.0, min(1.0, dx_base * (1.0 - 0.5 * supp)))
         
         # Update diagnostics with EDX components (removed old edx_vol_dis)
@@ -1340,17 +1418,20 @@ class UptrendEngineV4:
         }
         return payload
 
-    def run(self, include_regime_drivers: bool = False) -> int:
+    def run(self, include_regime_drivers: bool = False, snapshot: Optional[PositionSnapshot] = None) -> int:
         """Main loop: process all active positions and emit state signals.
         
         Args:
             include_regime_drivers: If True, also process regime_driver positions.
                                    Set to True when running for regime engine.
+            snapshot: Shared positions of a fused tick (None = read/write lowcap_positions directly)
         """
+        self._snapshot = snapshot
         now = datetime.now(timezone.utc)
         updated = 0
         positions = self._active_positions(include_regime_drivers=include_regime_drivers)
         logger.debug("Uptrend Engine (%s) processing %d positions", self.timeframe, len(positions))
+        self._prefetch_latest_closes(positions)
         
         for p in positions:
             try:
@@ -2191,7 +2272,10 @@ class UptrendEngineV4:
                 logger.exception("uptrend_engine_v4 error on position %s (%s/%s, timeframe=%s): %s", 
                                 pid, contract, chain, self.timeframe, e)
                 continue
-        
+
+        writer = getattr(self, "features_writer", None)
+        if writer is not None and len(writer):
+            writer.flush()
         return updated
 
 
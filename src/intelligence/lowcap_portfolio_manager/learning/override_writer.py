@@ -0,0 +1,186 @@
+"""
+Bulk, change-detecting writer for pm_overrides.
+
+TrajectoryMiner used to upsert every mined lesson with its own request, so each
+run cost one round-trip per lesson and bumped last_updated_at on every row even
+when nothing had changed - and overrides that were no longer mined stayed in the
+table forever. write_overrides() instead:
+
+- reads the current overrides of the miner's action categories (paged)
+- diffs the new lessons against them on (pattern_key, action_category,
+  scope_subset), comparing values with jsonb equality (1 == 1.0)
+- upserts only new and changed rows, UPSERT_CHUNK rows per request
+- deletes overrides that were not mined this run, DELETE_CHUNK ids per request
+
+The lesson set passed in is authoritative for the given action categories; rows
+of other categories are never read or deleted.
+"""
+
+from __future__ import annotations
+
+import logging
+import numbers
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OVERRIDES_TABLE = "pm_overrides"
+OVERRIDE_CONFLICT = "pattern_key,action_category,scope_subset"
+PAGE_SIZE = 1000
+UPSERT_CHUNK = 500
+DELETE_CHUNK = 500  # ids per in_() filter (keeps the request URL bounded)
+
+# Lesson fields copied to pm_overrides and compared for change detection
+VALUE_FIELDS = ("dira", "dire", "confidence_score", "tuning_params", "n")
+
+
+@dataclass
+class OverrideWriteSummary:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written or self.deleted)
+
+
+def canonical(value: Any) -> Any:
+    """Hashable form of a JSON value with jsonb equality (1 == 1.0, True != 1, key order ignored)."""
+    if value is None:
+        return ("null",)
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, numbers.Real):  # includes numpy scalars from the miner's pandas paths
+        return ("num", float(value))
+    if isinstance(value, str):
+        return ("str", value)
+    if isinstance(value, dict):
+        return ("obj", tuple(sorted((k, canonical(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return ("arr", tuple(canonical(v) for v in value))
+    return ("str", str(value))
+
+
+def override_key(row: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    """Identity of an override (the pm_overrides unique constraint)."""
+    return (row.get("pattern_key"), row.get("action_category"), canonical(row.get("scope_subset") or {}))
+
+
+def lesson_to_override(lesson: Dict[str, Any]) -> Dict[str, Any]:
+    """pm_overrides columns of a mined lesson (without last_updated_at)."""
+    row = {
+        "pattern_key": lesson["pattern_key"],
+        "action_category": lesson["action_category"],
+        "scope_subset": lesson.get("scope_subset", {}),
+    }
+    for field in VALUE_FIELDS:
+        row[field] = lesson.get(field)
+    return row
+
+
+def diff_overrides(
+    new_rows: Iterable[Dict[str, Any]],
+    current_rows: Iterable[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int, List[Any]]:
+    """
+    Compare mined overrides with the stored ones.
+
+    Later rows with the same key replace earlier ones (as sequential upserts did).
+
+    Returns:
+        (inserts, updates, n_unchanged, stale ids)
+    """
+    current = {override_key(r): r for r in current_rows}
+    mined: Dict[Tuple[Any, Any, Any], Dict[str, Any]] = {}
+    for row in new_rows:
+        mined[override_key(row)] = row
+
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    unchanged = 0
+    for key, row in mined.items():
+        old = current.get(key)
+        if old is None:
+            inserts.append(row)
+        elif any(canonical(row.get(f)) != canonical(old.get(f)) for f in VALUE_FIELDS):
+            updates.append(row)
+        else:
+            unchanged += 1
+    stale = [r.get("id") for key, r in current.items() if key not in mined and r.get("id") is not None]
+    return inserts, updates, unchanged, stale
+
+
+def upsert_chunked(
+    sb: Any,
+    table: str,
+    rows: List[Dict[str, Any]],
+    on_conflict: str,
+    chunk_size: Optional[int] = None,
+) -> None:
+    """Upsert rows in chunks of chunk_size (default UPSERT_CHUNK; one request per chunk)."""
+    chunk_size = chunk_size or UPSERT_CHUNK
+    for i in range(0, len(rows), chunk_size):
+        sb.table(table).upsert(rows[i:i + chunk_size], on_conflict=on_conflict).execute()
+
+
+def fetch_overrides(sb: Any, action_categories: Iterable[str]) -> List[Dict[str, Any]]:
+    """Current pm_overrides rows of action_categories (key and value columns, paged by id)."""
+    cols = "id,pattern_key,action_category,scope_subset," + ",".join(VALUE_FIELDS)
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = (
+            sb.table(OVERRIDES_TABLE)
+            .select(cols)
+            .in_("action_category", sorted(set(action_categories)))
+            .order("id")
+            .range(offset, offset + PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return rows
+
+
+def write_overrides(
+    sb: Any,
+    lessons: List[Dict[str, Any]],
+    action_categories: Iterable[str],
+    now: Optional[datetime] = None,
+) -> OverrideWriteSummary:
+    """
+    Sync pm_overrides of action_categories to the mined lessons.
+
+    Args:
+        sb: Supabase client
+        lessons: Mined lessons (pattern_key, action_category, scope_subset, dira, ...)
+        action_categories: Categories the lessons are authoritative for
+        now: last_updated_at for written rows (default: now, UTC)
+
+    Returns:
+        OverrideWriteSummary (inserted / updated / unchanged / deleted)
+    """
+    categories = set(action_categories)
+    new_rows = [lesson_to_override(lesson) for lesson in lessons if lesson.get("action_category") in categories]
+    inserts, updates, unchanged, stale = diff_overrides(new_rows, fetch_overrides(sb, categories))
+
+    stamp = (now or datetime.now(timezone.utc)).isoformat()
+    changed = [{**row, "last_updated_at": stamp} for row in inserts + updates]
+    upsert_chunked(sb, OVERRIDES_TABLE, changed, OVERRIDE_CONFLICT)
+    for i in range(0, len(stale), DELETE_CHUNK):
+        sb.table(OVERRIDES_TABLE).delete().in_("id", stale[i:i + DELETE_CHUNK]).execute()
+
+    return OverrideWriteSummary(
+        inserted=len(inserts), updated=len(updates), unchanged=unchanged, deleted=len(stale)
+    )
@@ -0,0 +1,321 @@
+"""
+Columnar trajectory frame and bitset Apriori for TrajectoryMiner strength mining.
+
+The strength miner used to expand every scope key into a DataFrame column with
+a per-key `.apply`, then re-filter DataFrames with boolean masks at every node
+of the recursive Apriori search. Here instead:
+
+- TrajectoryFrame holds one NumPy column per field; pattern_key,
+  trajectory_type and every scope dimension are categorical codes (-1 =
+  missing), built in one pass over the rows
+- ScopeMiner sorts the rows by (pattern_key, scope dimensions) and keeps one
+  row bitset (Python int) per pattern_key and per (dimension, value): the
+  support of a node is an AND plus a popcount, no rows are copied
+- lesson statistics are sums of per-row values, read from prefix sums over
+  the sorted rows - one difference per run of consecutive rows in the
+  node's bitset (nodes along the sort order are a single run per pattern)
+
+Scope values are coded with jsonb equality (1 == 1.0, True != 1) since mined
+scope subsets are matched against scopes that way (pm/override_index.py).
+Missing/null/NaN values and nested (object/array) values are never branched on.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+TRAJECTORY_TYPES = ("immediate_failure", "trim_but_loss", "trimmed_winner", "clean_winner")
+
+# Per-row statistic columns summed by ScopeMiner (ROI terms are centered on the frame mean)
+_STATS = (
+    "n",
+    "roi",
+    "roi_sq",
+    "wins",
+    "immediate_failure",
+    "trim_but_loss",
+    "trimmed_winner",
+    "clean_winner",
+    "active_trimmed",
+    "active_clean",
+    "active_clean_roi",
+    "shadow_trimmed",
+    "shadow_clean",
+    "shadow_winners",
+)
+_COL = {name: i for i, name in enumerate(_STATS)}
+
+
+def _value_key(value: Any) -> Any:
+    """Hashable key with jsonb scalar equality; None for values that are not branched on."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return ("num", float(value))
+    if isinstance(value, str):
+        return ("str", value)
+    return None
+
+
+class _Coder:
+    """Categorical codes in first-seen order."""
+
+    def __init__(self) -> None:
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def code(self, key: Any, value: Any) -> int:
+        c = self.codes.get(key)
+        if c is None:
+            c = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return c
+
+
+@dataclass
+class TrajectoryFrame:
+    """position_trajectories rows as columns (categoricals as int codes, -1 = missing)."""
+
+    pattern_codes: np.ndarray
+    pattern_keys: List[str]
+    type_codes: np.ndarray
+    trajectory_types: List[str]
+    roi: np.ndarray
+    is_shadow: np.ndarray
+    scope_codes: Dict[str, np.ndarray]
+    scope_values: Dict[str, List[Any]]
+
+    def __len__(self) -> int:
+        return len(self.roi)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "TrajectoryFrame":
+        """Build from trajectory rows (pattern_key, trajectory_type, roi, is_shadow, scope)."""
+        patterns, types = _Coder(), _Coder()
+        scope_coders: Dict[str, _Coder] = {}
+        scope_rows: Dict[str, Tuple[List[int], List[int]]] = {}
+        pattern_codes: List[int] = []
+        type_codes: List[int] = []
+        roi: List[float] = []
+        is_shadow: List[bool] = []
+
+        for i, r in enumerate(records):
+            pk = r.get("pattern_key")
+            pattern_codes.append(patterns.code(pk, pk))
+            tt = r.get("trajectory_type")
+            type_codes.append(types.code(tt, tt))
+            roi.append(float(r.get("roi") or 0.0))
+            is_shadow.append(bool(r.get("is_shadow")))
+            scope = r.get("scope")
+            if not isinstance(scope, dict):
+                continue
+            for dim, value in scope.items():
+                key = _value_key(value)
+                if key is None:
+                    continue
+                coder = scope_coders.get(dim)
+                if coder is None:
+                    coder = scope_coders[dim] = _Coder()
+                    scope_rows[dim] = ([], [])
+                rows, codes = scope_rows[dim]
+                rows.append(i)
+                codes.append(coder.code(key, value))
+
+        n = len(roi)
+        scope_codes: Dict[str, np.ndarray] = {}
+        for dim, (rows, codes) in scope_rows.items():
+            col = np.full(n, -1, dtype=np.int32)
+            col[rows] = codes
+            scope_codes[dim] = col
+        return cls(
+            pattern_codes=np.array(pattern_codes, dtype=np.int32),
+            pattern_keys=patterns.values,
+            type_codes=np.array(type_codes, dtype=np.int32),
+            trajectory_types=types.values,
+            roi=np.array(roi, dtype=float),
+            is_shadow=np.array(is_shadow, dtype=bool),
+            scope_codes=scope_codes,
+            scope_values={dim: c.values for dim, c in scope_coders.items()},
+        )
+
+    def take(self, idx: np.ndarray) -> "TrajectoryFrame":
+        """Row subset (categories are kept; dimensions without values in the subset are dropped)."""
+        scope_codes = {dim: col[idx] for dim, col in self.scope_codes.items()}
+        scope_codes = {dim: col for dim, col in scope_codes.items() if (col >= 0).any()}
+        return TrajectoryFrame(
+            pattern_codes=self.pattern_codes[idx],
+            pattern_keys=self.pattern_keys,
+            type_codes=self.type_codes[idx],
+            trajectory_types=self.trajectory_types,
+            roi=self.roi[idx],
+            is_shadow=self.is_shadow[idx],
+            scope_codes=scope_codes,
+            scope_values={dim: self.scope_values[dim] for dim in scope_codes},
+        )
+
+    def strength_eligible(self) -> "TrajectoryFrame":
+        """All active trajectories plus shadow winners (blocked trades with ROI > 0)."""
+        return self.take(np.flatnonzero(~self.is_shadow | (self.roi > 0)))
+
+    def type_mask(self, trajectory_type: str) -> np.ndarray:
+        if trajectory_type not in self.trajectory_types:
+            return np.zeros(len(self), dtype=bool)
+        return self.type_codes == self.trajectory_types.index(trajectory_type)
+
+
+@dataclass
+class ScopeStats:
+    """Outcome statistics of one (scope subset, pattern_key) group."""
+
+    n: int
+    avg_roi: float
+    roi_variance: float  # sample variance (ddof=1), 0.0 for n == 1
+    win_rate: float
+    n_immediate_failure: int
+    n_trim_but_loss: int
+    n_trimmed_winner: int
+    n_clean_winner: int
+    n_active_trimmed: int
+    n_active_clean: int
+    active_clean_avg_roi: Optional[float]
+    n_shadow_trimmed: int
+    n_shadow_clean: int
+    n_shadow_winners: int
+
+
+def _to_bitset(mask: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+class ScopeMiner:
+    """
+    Apriori over scope subsets with row bitsets.
+
+    mine() walks the same lattice as the original recursive miner: a node is
+    a scope subset with at least min_support rows; it yields one group per
+    pattern_key with at least min_support rows, then branches on every later
+    dimension (sorted by name) and value with at least min_support rows.
+    """
+
+    def __init__(self, frame: TrajectoryFrame, min_support: int) -> None:
+        self.min_support = min_support
+        self.dims = sorted(frame.scope_codes)
+        n = len(frame)
+        self.n = n
+
+        # Sort rows so pattern groups, and nodes along the dimension order, are contiguous
+        keys = [frame.scope_codes[d] for d in reversed(self.dims)] + [frame.pattern_codes]
+        order = np.lexsort(keys) if n else np.arange(0)
+        pattern_codes = frame.pattern_codes[order]
+        roi = frame.roi[order]
+        is_shadow = frame.is_shadow[order]
+        active = ~is_shadow
+        types = {t: frame.type_mask(t)[order] for t in TRAJECTORY_TYPES}
+
+        # Prefix sums of the per-row statistics (ROI centered to keep the variance well conditioned)
+        self.roi_mean = float(roi.mean()) if n else 0.0
+        roi_c = roi - self.roi_mean
+        values = np.zeros((n, len(_STATS)), dtype=float)
+        values[:, _COL["n"]] = 1.0
+        values[:, _COL["roi"]] = roi_c
+        values[:, _COL["roi_sq"]] = roi_c * roi_c
+        values[:, _COL["wins"]] = roi > 0
+        for t in TRAJECTORY_TYPES:
+            values[:, _COL[t]] = types[t]
+        values[:, _COL["active_trimmed"]] = active & types["trimmed_winner"]
+        values[:, _COL["active_clean"]] = active & types["clean_winner"]
+        values[:, _COL["active_clean_roi"]] = np.where(active & types["clean_winner"], roi_c, 0.0)
+        values[:, _COL["shadow_trimmed"]] = is_shadow & types["trimmed_winner"]
+        values[:, _COL["shadow_clean"]] = is_shadow & types["clean_winner"]
+        values[:, _COL["shadow_winners"]] = is_shadow & (roi > 0)
+        self._prefix = np.vstack([np.zeros((1, len(_STATS))), np.cumsum(values, axis=0)])
+
+        self.pattern_keys = frame.pattern_keys
+        self._pattern_bits = [
+            (code, _to_bitset(pattern_codes == code))
+            for code in range(len(frame.pattern_keys))
+            if (pattern_codes == code).any()
+        ]
+        self._value_bits: Dict[str, List[Tuple[Any, int]]] = {}
+        for dim in self.dims:
+            col = frame.scope_codes[dim][order]
+            self._value_bits[dim] = [
+                (value, _to_bitset(col == code))
+                for code, value in enumerate(frame.scope_values[dim])
+                if (col == code).any()
+            ]
+        self._all = (1 << n) - 1
+
+    def stats(self, bits: int) -> ScopeStats:
+        """Statistics of the rows in bits, from prefix-sum differences over their runs."""
+        mask = np.unpackbits(
+            np.frombuffer(bits.to_bytes((self.n + 7) // 8, "little"), dtype=np.uint8), bitorder="little"
+        )[:self.n].astype(np.int8)
+        edges = np.diff(np.concatenate(([0], mask, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        s = (self._prefix[ends] - self._prefix[starts]).sum(axis=0)
+
+        n = int(round(s[_COL["n"]]))
+        sum_c = s[_COL["roi"]]
+        variance = max(0.0, (s[_COL["roi_sq"]] - sum_c * sum_c / n) / (n - 1)) if n > 1 else 0.0
+        n_active_clean = int(round(s[_COL["active_clean"]]))
+        return ScopeStats(
+            n=n,
+            avg_roi=float(self.roi_mean + sum_c / n),
+            roi_variance=float(variance),
+            win_rate=float(s[_COL["wins"]] / n),
+            n_immediate_failure=int(round(s[_COL["immediate_failure"]])),
+            n_trim_but_loss=int(round(s[_COL["trim_but_loss"]])),
+            n_trimmed_winner=int(round(s[_COL["trimmed_winner"]])),
+            n_clean_winner=int(round(s[_COL["clean_winner"]])),
+            n_active_trimmed=int(round(s[_COL["active_trimmed"]])),
+            n_active_clean=n_active_clean,
+            active_clean_avg_roi=(
+                float(self.roi_mean + s[_COL["active_clean_roi"]] / n_active_clean) if n_active_clean else None
+            ),
+            n_shadow_trimmed=int(round(s[_COL["shadow_trimmed"]])),
+            n_shadow_clean=int(round(s[_COL["shadow_clean"]])),
+            n_shadow_winners=int(round(s[_COL["shadow_winners"]])),
+        )
+
+    def mine(self) -> Iterator[Tuple[Dict[str, Any], str, int]]:
+        """
+        Depth-first over frequent scope subsets.
+
+        Yields:
+            (scope_subset, pattern_key, row bitset) per group with >= min_support rows
+        """
+        if self.n >= self.min_support:
+            yield from self._mine_node(self._all, {}, 0)
+
+    def _mine_node(self, bits: int, scope_subset: Dict[str, Any], start: int) -> Iterator[Tuple[Dict[str, Any], str, int]]:
+        for code, pattern_bits in self._pattern_bits:
+            group = bits & pattern_bits
+            if _popcount(group) >= self.min_support:
+                yield scope_subset, self.pattern_keys[code], group
+
+        for i in range(start, len(self.dims)):
+            dim = self.dims[i]
+            # Apriori pruning: only branch on values that are frequent within this node
+            children = []
+            for value, value_bits in self._value_bits[dim]:
+                child = bits & value_bits
+                support = _popcount(child)
+                if support >= self.min_support:
+                    children.append((support, value, child))
+            children.sort(key=lambda c: -c[0])
+            for _, value, child in children:
+                yield from self._mine_node(child, {**scope_subset, dim: value}, i + 1)
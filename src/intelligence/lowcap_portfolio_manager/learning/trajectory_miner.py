@@ -9,6 +9,9 @@ Key differences from legacy TuningMiner:
 - Uses continuous ROI instead of binary outcome
 - Separate strength vs tuning learning paths
 - Implements EV tradeoff for gate loosening decisions
+
+Trajectories are read page by page; strength mining runs on a columnar frame
+with bitset Apriori (trajectory_frame.py).
 """
 
 import os
@@ -20,9 +23,33 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
 from supabase import create_client, Client
 
+from src.intelligence.lowcap_portfolio_manager.learning.override_writer import write_overrides
+from src.intelligence.lowcap_portfolio_manager.learning.trajectory_frame import (
+    ScopeMiner,
+    ScopeStats,
+    TrajectoryFrame,
+)
+from src.intelligence.lowcap_portfolio_manager.pm.overrides import clear_override_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("learning_system")
 
+TRAJECTORY_PAGE_SIZE = 1000
+TRAJECTORY_COLUMNS = (
+    "id,pattern_key,scope,is_shadow,blocked_by,near_miss_gates,"
+    "trajectory_type,roi,did_trim,closed_at"
+)
+
+# pm_overrides categories owned by the miner: each run replaces them (stale rows are deleted)
+MINED_ACTION_CATEGORIES = (
+    "strength",
+    "tuning_dx",
+    "tuning_tighten",
+    "tuning_dip_buy",
+    "tuning_trim",
+    "tuning_gate",
+)
+
 
 class TrajectoryMiner:
     """
@@ -141,11 +168,9 @@ class TrajectoryMiner:
             logger.info(f"Generated {n_tuning} tuning lessons.")
             n_combos += n_tuning
             
-            # 4. Write to pm_overrides
+            # 4. Sync pm_overrides (an empty lesson set clears the stale overrides)
             all_lessons = strength_lessons + tuning_lessons
-            n_overrides = 0
-            if all_lessons:
-                n_overrides = self._write_overrides(all_lessons)
+            n_overrides = self._write_overrides(all_lessons)
             
             # Update run metrics
             self._update_run_metrics(
@@ -184,15 +209,24 @@ class TrajectoryMiner:
             logger.warning(f"Failed to update miner run metrics: {e}")
     
     def _fetch_trajectories(self) -> List[Dict[str, Any]]:
-        """Fetch trajectories from position_trajectories table."""
+        """Fetch trajectories from position_trajectories table (paged by id, mined columns only)."""
         cutoff = (datetime.now(timezone.utc) - timedelta(days=self.LOOKBACK_DAYS)).isoformat()
+        trajectories: List[Dict[str, Any]] = []
+        offset = 0
         
         try:
-            res = self.sb.table("position_trajectories")\
-                .select("*")\
-                .gte("closed_at", cutoff)\
-                .execute()
-            return res.data or []
+            while True:
+                page = self.sb.table("position_trajectories")\
+                    .select(TRAJECTORY_COLUMNS)\
+                    .gte("closed_at", cutoff)\
+                    .order("id")\
+                    .range(offset, offset + TRAJECTORY_PAGE_SIZE - 1)\
+                    .execute().data or []
+                trajectories.extend(page)
+                if len(page) < TRAJECTORY_PAGE_SIZE:
+                    break
+                offset += TRAJECTORY_PAGE_SIZE
+            return trajectories
         except Exception as e:
             logger.error(f"Failed to fetch trajectories: {e}")
             return []
@@ -210,81 +244,30 @@ class TrajectoryMiner:
         - Builds compound conditions like {timeframe: 1h, mcap_bucket: micro}
         - Prunes branches early when n < N_MIN (Apriori pruning)
         - Weighted specificity = sum of dimension weights
+        - Support is a bitset AND + popcount; group stats come from prefix sums
         """
         lessons = []
         
-        df = pd.DataFrame(trajectories)
-        if df.empty:
-            return lessons
-        
         # Filter for strength-eligible trajectories
         # Active: all trajectories
         # Shadow: only positive ROI (blocked winners = missed opportunity)
-        strength_eligible = df[
-            (~df['is_shadow']) |  # All active
-            ((df['is_shadow']) & (df['roi'] > 0))  # Shadow winners only
-        ].copy()
+        strength_eligible = TrajectoryFrame.from_records(trajectories).strength_eligible()
         
         if len(strength_eligible) < self.N_MIN:
             return lessons
         
-        # Flatten scope for grouping
-        self._expand_scope_columns(strength_eligible)
-        
-        # Get available scope columns and sort for consistent ordering
-        scope_cols = [c for c in strength_eligible.columns if c.startswith('scope_')]
-        sorted_dims = sorted([c.replace('scope_', '') for c in scope_cols])
-        
-        # Recursive Apriori mining function
-        def mine_recursive(df_slice: pd.DataFrame, current_mask: Dict[str, Any], start_dim_idx: int):
-            """
-            Recursive DFS with Apriori pruning.
-            
-            Builds multi-dimension scope subsets:
-            {} → {timeframe: 1h} → {timeframe: 1h, mcap_bucket: micro} → ...
-            """
-            # Base case: Prune if too small
-            if len(df_slice) < self.N_MIN:
-                return
+        # DFS from the empty scope: {} → {timeframe: 1h} → {timeframe: 1h, mcap_bucket: micro} → ...
+        # (dimensions sorted by name, branches pruned below N_MIN rows)
+        miner = ScopeMiner(strength_eligible, min_support=self.N_MIN)
+        for scope_subset, pattern_key, rows in miner.mine():
+            # Calculate spec_mass = sum of dimension weights
+            spec_mass = sum(self.STRENGTH_WEIGHTS.get(dim, 1.0) for dim in scope_subset.keys())
             
-            # Process current node: Create lessons for this slice (grouped by pattern_key)
-            for pattern_key in df_slice['pattern_key'].unique():
-                pattern_group = df_slice[df_slice['pattern_key'] == pattern_key]
-                if len(pattern_group) >= self.N_MIN:
-                    # Calculate spec_mass = sum of dimension weights
-                    spec_mass = sum(self.STRENGTH_WEIGHTS.get(dim, 1.0) for dim in current_mask.keys())
-                    
-                    lesson = self._compute_strength_lesson(
-                        pattern_group, pattern_key, current_mask, spec_mass=spec_mass
-                    )
-                    if lesson:
-                        lessons.append(lesson)
-            
-            # Recursive step: Try adding one more dimension
-            for i in range(start_dim_idx, len(sorted_dims)):
-                dim = sorted_dims[i]
-                col = f"scope_{dim}"
-                
-                if col not in df_slice.columns:
-                    continue
-                
-                # Apriori pruning: only branch on values that exist frequently in this slice
-                counts = df_slice[col].value_counts()
-                valid_values = counts[counts >= self.N_MIN].index.tolist()
-                
-                for val in valid_values:
-                    # Create new mask with additional dimension
-                    new_mask = current_mask.copy()
-                    new_mask[dim] = val
-                    
-                    # Filter to new slice
-                    new_slice = df_slice[df_slice[col] == val]
-                    
-                    # Recurse deeper (start from i+1 to avoid duplicates)
-                    mine_recursive(new_slice, new_mask, i + 1)
-        
-        # Start recursion with global slice and empty mask
-        mine_recursive(strength_eligible, {}, 0)
+            lesson = self._compute_strength_lesson(
+                miner.stats(rows), pattern_key, scope_subset, spec_mass=spec_mass
+            )
+            if lesson:
+                lessons.append(lesson)
         
         return lessons
 
@@ -374,7 +357,7 @@ class TrajectoryMiner:
     
     def _compute_strength_lesson(
         self, 
-        group: pd.DataFrame, 
+        group: ScopeStats, 
         pattern_key: str, 
         scope_subset: Dict[str, Any],
         spec_mass: float = 0.0
@@ -385,30 +368,27 @@ class TrajectoryMiner:
         - Trajectory-specific delta values per spec section 4
         - ROI magnitude scaling per spec section 6 rule 9
         """
-        n = len(group)
+        n = group.n
         if n < self.N_MIN:
             return None
         
         # Calculate aggregate stats
-        avg_roi = group['roi'].mean()
-        roi_variance = group['roi'].var() if n > 1 else 0.0
-        win_rate = (group['roi'] > 0).mean()
+        avg_roi = group.avg_roi
+        roi_variance = group.roi_variance
+        win_rate = group.win_rate
         
         # Trajectory-type breakdown for delta calculation (spec section 4)
-        n_immediate_failure = len(group[group['trajectory_type'] == 'immediate_failure'])
-        n_trim_but_loss = len(group[group['trajectory_type'] == 'trim_but_loss'])
-        n_trimmed_winner = len(group[group['trajectory_type'] == 'trimmed_winner'])
-        n_clean_winner = len(group[group['trajectory_type'] == 'clean_winner'])
-        n_shadow_winners = int((group['is_shadow'] & (group['roi'] > 0)).sum())
+        n_immediate_failure = group.n_immediate_failure
+        n_trim_but_loss = group.n_trim_but_loss
+        n_trimmed_winner = group.n_trimmed_winner
+        n_clean_winner = group.n_clean_winner
+        n_shadow_winners = group.n_shadow_winners
         
         # Calculate dirA using trajectory-specific deltas per spec:
         # Immediate Failure (Active): Mild A↓ 
         # Trimmed Winner (Active): A↑ +0.02
         # Clean Winner (Active): A↑↑ +0.10
         # Shadow Winner: A↑ +0.03 to +0.12
-        active_mask = ~group['is_shadow']
-        shadow_mask = group['is_shadow']
-        
         weighted_dir_a = 0.0
         total_weight = 0
         
@@ -423,22 +403,22 @@ class TrajectoryMiner:
             total_weight += n_trim_but_loss
         
         # Active trimmed winners: A↑ +0.02
-        active_trimmed = len(group[(active_mask) & (group['trajectory_type'] == 'trimmed_winner')])
+        active_trimmed = group.n_active_trimmed
         if active_trimmed > 0:
             weighted_dir_a += 0.02 * active_trimmed
             total_weight += active_trimmed
         
         # Active clean winners: A↑↑ +0.10, scaled by avg ROI magnitude
-        active_clean = len(group[(active_mask) & (group['trajectory_type'] == 'clean_winner')])
+        active_clean = group.n_active_clean
         if active_clean > 0:
-            clean_roi = group[(active_mask) & (group['trajectory_type'] == 'clean_winner')]['roi'].mean()
+            clean_roi = group.active_clean_avg_roi
             roi_scale = min(1.0, max(0.5, clean_roi / 20.0))  # Scale by ROI magnitude (20% = full)
             weighted_dir_a += 0.10 * roi_scale * active_clean
             total_weight += active_clean
         
         # Shadow winners: A↑ +0.03 to +0.12 (stronger for clean winners)
-        shadow_trimmed = len(group[(shadow_mask) & (group['trajectory_type'] == 'trimmed_winner')])
-        shadow_clean = len(group[(shadow_mask) & (group['trajectory_type'] == 'clean_winner')])
+        shadow_trimmed = group.n_shadow_trimmed
+        shadow_clean = group.n_shadow_clean
         if shadow_trimmed > 0:
             weighted_dir_a += 0.03 * shadow_trimmed
             total_weight += shadow_trimmed
@@ -877,50 +857,24 @@ class TrajectoryMiner:
         
         return lessons
     
-    def _expand_scope_columns(self, df: pd.DataFrame) -> None:
-        """Flatten scope JSONB into separate columns for grouping."""
-        scope_keys = set()
-        for scope in df['scope']:
-            if isinstance(scope, dict):
-                scope_keys.update(scope.keys())
-        
-        for key in sorted(scope_keys):
-            df[f"scope_{key}"] = df['scope'].apply(
-                lambda x: x.get(key) if isinstance(x, dict) else None
-            )
-    
     def _write_overrides(self, lessons: List[Dict[str, Any]]) -> int:
-        """Write lessons to pm_overrides table. Returns count written."""
-        written = 0
+        """Sync pm_overrides to the mined lessons (bulk, changed rows only). Returns count written."""
         try:
-            now = datetime.now(timezone.utc).isoformat()
-            
-            for lesson in lessons:
-                override = {
-                    "pattern_key": lesson["pattern_key"],
-                    "action_category": lesson["action_category"],
-                    "scope_subset": lesson.get("scope_subset", {}),
-                    "dira": lesson.get("dira"),
-                    "dire": lesson.get("dire"),
-                    "confidence_score": lesson.get("confidence_score"),
-                    "tuning_params": lesson.get("tuning_params"),
-                    "n": lesson.get("n"),
-                    "last_updated_at": now,
-                }
-                
-                # Upsert
-                self.sb.table("pm_overrides").upsert(
-                    override,
-                    on_conflict="pattern_key,action_category,scope_subset"
-                ).execute()
-                written += 1
-            
-            logger.info(f"Wrote {written} overrides to pm_overrides.")
-            return written
-            
+            summary = write_overrides(self.sb, lessons, MINED_ACTION_CATEGORIES)
         except Exception as e:
             logger.error(f"Failed to write overrides: {e}")
-            return written
+            # A partial write may have landed - drop the cached index either way
+            clear_override_cache()
+            return 0
+        
+        logger.info(
+            f"pm_overrides: {summary.inserted} inserted, {summary.updated} updated, "
+            f"{summary.unchanged} unchanged, {summary.deleted} stale deleted."
+        )
+        if summary.changed:
+            # PM matches overrides from an in-process index - pick up the new rows
+            clear_override_cache()
+        return summary.written
 
 
 if __name__ == "__main__":
@@ -16,6 +16,8 @@ import os
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 
+from src.intelligence.lowcap_portfolio_manager.regime.regime_snapshot import get_regime_snapshot
+
 logger = logging.getLogger(__name__)
 
 
@@ -249,31 +251,22 @@ def extract_regime_flags(
         "btc": "BTC",
     }
     
+    try:
+        snapshot = get_regime_snapshot(sb_client)
+    except Exception as e:
+        logger.warning(f"AE_V2: Failed to load regime snapshot: {e}")
+        snapshot = None
+    
     for key, ticker in drivers.items():
-        try:
-            result = (
-                sb_client.table("lowcap_positions")
-                .select("features")
-                .eq("token_ticker", ticker)
-                .eq("status", "regime_driver")
-                .eq("book_id", regime_book_id)  # Use mapped book_id
-                .limit(1)
-                .execute()
-            )
-            
-            if result.data:
-                features = result.data[0].get("features", {})
-                uptrend = features.get("uptrend_engine_v4", {})
-                
-                flags[key] = {
-                    "buy": uptrend.get("buy_signal", False) or uptrend.get("buy_flag", False),
-                    "trim": uptrend.get("trim_flag", False),
-                    "emergency": uptrend.get("emergency_exit", False),
-                }
-            else:
-                flags[key] = {"buy": False, "trim": False, "emergency": False}
-        except Exception as e:
-            logger.warning(f"AE_V2: Failed to get regime flags for {ticker}: {e}")
+        # Most recently updated driver row in the regime book (any timeframe)
+        ds = snapshot.latest(ticker, book_id=regime_book_id) if snapshot is not None else None
+        if ds is not None:
+            flags[key] = {
+                "buy": ds.flag("buy_signal") or ds.flag("buy_flag"),
+                "trim": ds.flag("trim_flag"),
+                "emergency": ds.flag("emergency_exit"),
+            }
+        else:
             flags[key] = {"buy": False, "trim": False, "emergency": False}
     
     return flags
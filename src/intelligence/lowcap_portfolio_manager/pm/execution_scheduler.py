@@ -0,0 +1,104 @@
+"""
+Execution scheduler - concurrent dispatch of planned PM actions.
+
+PMCoreTick used to plan and execute one position at a time, so one slow swap
+confirmation delayed every later position of the tick. PMCoreTick now plans all
+positions first and hands the executions to this scheduler:
+
+- one lane per chain (one trading wallet per chain), each a thread pool bounded
+  by that chain's concurrency limit; EVM chains default to 1 (nonce-sensitive)
+- jobs sharing a conflict key (same chain + token) run sequentially, in order,
+  so balance-sensitive operations on one token never overlap
+- buys across lanes all spend the home-chain USDC wallet: PMExecutor holds a
+  per-wallet lock (executor.wallet_lock) around balance check + swap + debit,
+  and balance changes are applied atomically (adjust_wallet_balance RPC)
+- results come back in job order; a job that raises returns its exception
+
+Limits come from PM_EXEC_CHAIN_CONCURRENCY, e.g. "solana=4,hyperliquid=2"
+(chains not listed: PM_EXEC_DEFAULT_CONCURRENCY, default 1).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHAIN_CONCURRENCY = {"solana": 4, "hyperliquid": 2}
+
+
+def parse_chain_limits(spec: Optional[str]) -> Dict[str, int]:
+    """'solana=4,base=1' -> {'solana': 4, 'base': 1} (invalid entries ignored)."""
+    limits: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        chain, sep, value = part.partition("=")
+        if not sep:
+            continue
+        try:
+            limits[chain.strip().lower()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid PM_EXEC_CHAIN_CONCURRENCY entry: {part!r}")
+    return limits
+
+
+@dataclass
+class ExecutionJob:
+    """One position's executions."""
+
+    chain: str
+    conflict_key: Hashable  # jobs with the same key run sequentially
+    run: Callable[[], Any]
+
+
+class ExecutionScheduler:
+    """Runs ExecutionJobs concurrently across chains / tokens, bounded per chain."""
+
+    def __init__(self, chain_limits: Optional[Dict[str, int]] = None, default_limit: Optional[int] = None) -> None:
+        if chain_limits is None:
+            chain_limits = {**DEFAULT_CHAIN_CONCURRENCY, **parse_chain_limits(os.getenv("PM_EXEC_CHAIN_CONCURRENCY"))}
+        if default_limit is None:
+            default_limit = int(os.getenv("PM_EXEC_DEFAULT_CONCURRENCY", "1"))
+        self.chain_limits = chain_limits
+        self.default_limit = max(1, default_limit)
+
+    def limit(self, chain: str) -> int:
+        return self.chain_limits.get((chain or "").lower(), self.default_limit)
+
+    def run(self, jobs: List[ExecutionJob]) -> List[Any]:
+        """
+        Execute all jobs and wait for them.
+
+        Returns:
+            Per job (same order): its return value, or the exception it raised
+        """
+        results: List[Any] = [None] * len(jobs)
+        # chain -> conflict key -> job indexes (in submission order)
+        lanes: Dict[str, Dict[Hashable, List[int]]] = {}
+        for i, job in enumerate(jobs):
+            chain = (job.chain or "").lower()
+            lanes.setdefault(chain, {}).setdefault((chain, job.conflict_key), []).append(i)
+
+        def _run_group(indexes: List[int]) -> None:
+            for i in indexes:
+                try:
+                    results[i] = jobs[i].run()
+                except Exception as e:
+                    logger.error(f"Execution job failed ({jobs[i].chain}/{jobs[i].conflict_key}): {e}", exc_info=True)
+                    results[i] = e
+
+        pools = [
+            (ThreadPoolExecutor(max_workers=min(self.limit(chain), len(groups)), thread_name_prefix=f"pm-exec-{chain or 'default'}"), groups)
+            for chain, groups in lanes.items()
+        ]
+        try:
+            futures = [pool.submit(_run_group, indexes) for pool, groups in pools for indexes in groups.values()]
+            for future in futures:
+                future.result()
+        finally:
+            for pool, _ in pools:
+                pool.shutdown(wait=True)
+        return results
@@ -6,6 +6,7 @@ import time
 import logging
 import asyncio
 import subprocess
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Set, Tuple
@@ -15,6 +16,7 @@ from supabase import Client  # type: ignore
 # Local event bus
 from src.intelligence.lowcap_portfolio_manager.events.bus import subscribe
 from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+from src.intelligence.lowcap_portfolio_manager.data.rpc_errors import is_missing_function
 from src.intelligence.lowcap_portfolio_manager.pm.hyperliquid_executor import HyperliquidExecutor
 
 logger = logging.getLogger(__name__)
@@ -28,9 +30,40 @@ except ImportError:
     logger.warning("web3 not available - cannot fetch token decimals from contract directly")
 
 
+LIFI_EXECUTOR_TIMEOUT_S = 300.0  # 5 minutes per Li.Fi request
+
 _idem_cache: Dict[str, float] = {}
 
 
+class LifiExecutionTimeout(RuntimeError):
+    """
+    A Li.Fi request on the executor worker timed out.
+    
+    The worker keeps executing it (it may still land on-chain), so it must not
+    be resent - unlike a timed-out one-shot subprocess, which is killed.
+    """
+
+# One lock per trading wallet (chain). PM executions run concurrently
+# (pm/execution_scheduler.py); every buy spends home-chain USDC, so the balance
+# check, the swap and the balance debit must not interleave with another buy.
+_wallet_locks: Dict[str, threading.RLock] = {}
+_wallet_locks_guard = threading.Lock()
+
+BALANCE_RPC = "adjust_wallet_balance"
+# Set once the RPC turned out to be missing in this process (migration not applied yet)
+_balance_rpc_unavailable = False
+
+
+def wallet_lock(chain: str) -> threading.RLock:
+    """Process-wide (re-entrant) lock for the wallet on chain."""
+    key = (chain or "").lower()
+    with _wallet_locks_guard:
+        lock = _wallet_locks.get(key)
+        if lock is None:
+            lock = _wallet_locks[key] = threading.RLock()
+        return lock
+
+
 def _idem_key(token: str, decision_type: str) -> str:
     from datetime import datetime, timezone
 
@@ -388,8 +421,19 @@ class PMExecutor:
                 logger.info(f"Wallet address from env: {wallet_from_env[:8]}...")
                 return
             
+            # Derive from private key via the executor worker (already running for swaps)
+            try:
+                from trading.executor_worker import get_executor_worker
+                worker = get_executor_worker()
+                if worker is not None:
+                    derived = worker.call("solana.deriveAddress", {"privateKey": private_key}, timeout=30)
+                    self.solana_wallet_address = derived["address"]
+                    logger.info(f"Derived wallet address: {self.solana_wallet_address[:8]}...")
+                    return
+            except Exception as e:
+                logger.warning(f"Executor worker wallet derivation failed, using node -e: {e}")
+            
             # Derive from private key using Node.js
-            import subprocess
             js_code = f"""
 const bs58 = require('bs58');
 const {{ Keypair }} = require('@solana/web3.js');
@@ -1420,7 +1464,34 @@ parseTransaction().then(result => {{
             chain: Chain name
             token: Token symbol ("USDC" or "native")
             amount_change: Amount change (positive for increase, negative for decrease)
+        
+        Applied atomically by the adjust_wallet_balance() RPC; if the function is
+        missing, a read-modify-write under the wallet lock. A transient RPC error
+        is not retried (it may have committed); the price collector re-syncs
+        wallet_balances from chain every cycle.
         """
+        global _balance_rpc_unavailable
+        if not _balance_rpc_unavailable:
+            try:
+                self.sb.rpc(BALANCE_RPC, {
+                    "p_chain": chain.lower(),
+                    "p_token": token,
+                    "p_delta": float(amount_change),
+                }).execute()
+                return
+            except Exception as e:
+                if is_missing_function(e):
+                    _balance_rpc_unavailable = True
+                    logger.warning(f"{BALANCE_RPC} RPC missing, using read-modify-write from now on: {e}")
+                else:
+                    logger.error(f"{BALANCE_RPC} RPC failed for {chain} {token} ({amount_change:+.2f}): {e}")
+                    return
+        
+        with wallet_lock(chain):
+            self._update_balance_read_modify_write(chain, token, amount_change)
+    
+    def _update_balance_read_modify_write(self, chain: str, token: str, amount_change: float) -> None:
+        """Fallback for _update_balance_after_trade (caller holds the wallet lock)."""
         try:
             # Get current balance
             result = self.sb.table("wallet_balances").select("*").eq("chain", chain.lower()).limit(1).execute()
@@ -1429,8 +1500,8 @@ parseTransaction().then(result => {{
                 # Create new entry
                 self.sb.table("wallet_balances").insert({
                     "chain": chain.lower(),
-                    "balance": amount_change if token.lower() == "native" else 0.0,
-                    "usdc_balance": amount_change if token.upper() == "USDC" else 0.0,
+                    "balance": max(0.0, amount_change) if token.lower() == "native" else 0.0,
+                    "usdc_balance": max(0.0, amount_change) if token.upper() == "USDC" else 0.0,
                     "last_updated": datetime.now(timezone.utc).isoformat()
                 }).execute()
             else:
@@ -1459,6 +1530,46 @@ parseTransaction().then(result => {{
         except Exception as e:
             logger.warning(f"Error updating wallet balance for {chain} {token}: {e}")
     
+    def _run_lifi_executor(self, input_data: Dict[str, Any], timeout: float) -> subprocess.CompletedProcess:
+        """
+        Run one Li.Fi executor request.
+        
+        Uses the long-lived executor worker (trading/executor_worker.py) when it is
+        enabled and falls back to one `node lifi_executor.mjs` subprocess otherwise.
+        Both return the CLI's (returncode, stdout JSON line, stderr) shape, so
+        _call_lifi_executor parses either the same way.
+        
+        Raises:
+            subprocess.TimeoutExpired: no result within timeout (subprocess killed; safe to retry)
+            LifiExecutionTimeout: no result within timeout on the worker (still running; never retry)
+        """
+        worker = None
+        try:
+            from trading.executor_worker import get_executor_worker
+            worker = get_executor_worker()
+        except ImportError as e:
+            logger.debug(f"Executor worker unavailable: {e}")
+        
+        if worker is not None:
+            from trading.executor_worker import ExecutorWorkerError, ExecutorWorkerTimeout
+            args = ["executor_worker", "lifi.execute"]
+            try:
+                output = worker.call("lifi.execute", input_data, timeout=timeout)
+                return subprocess.CompletedProcess(args, 0, stdout=json.dumps(output), stderr=worker.stderr_tail())
+            except ExecutorWorkerTimeout as e:
+                raise LifiExecutionTimeout(str(e))
+            except ExecutorWorkerError as e:
+                # Crash / transport error ("connection lost" is retried by the caller)
+                return subprocess.CompletedProcess(args, 1, stdout="", stderr=str(e))
+        
+        return subprocess.run(
+            ["node", str(self.lifi_executor_path), json.dumps(input_data)],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            cwd=str(self.lifi_executor_path.parent.parent)
+        )
+    
     def _call_lifi_executor(
         self, 
         action: str, 
@@ -1471,7 +1582,7 @@ parseTransaction().then(result => {{
         to_chain: str = None
     ) -> Dict[str, Any]:
         """
-        Call Li.Fi executor Node.js script via subprocess.
+        Call Li.Fi executor (persistent worker, or Node.js script via subprocess).
         
         Args:
             action: "swap" or "bridge"
@@ -1526,14 +1637,8 @@ parseTransaction().then(result => {{
         
         for attempt in range(max_retries + 1):
             try:
-                # Call Node.js script with JSON input
-                result = subprocess.run(
-                    ["node", str(self.lifi_executor_path), json.dumps(input_data)],
-                    capture_output=True,
-                    text=True,
-                    timeout=300,  # 5 minute timeout
-                    cwd=str(self.lifi_executor_path.parent.parent)
-                )
+                # Long-lived executor worker, or the Node.js script with JSON input
+                result = self._run_lifi_executor(input_data, timeout=LIFI_EXECUTOR_TIMEOUT_S)
                 
                 if result.returncode != 0:
                     error_msg = result.stderr or result.stdout or "Unknown error"
@@ -1608,6 +1713,13 @@ parseTransaction().then(result => {{
                         "error": f"Failed to parse executor output: {e}. stdout: {result.stdout[:200]}"
                     }
                 
+            except LifiExecutionTimeout as e:
+                # The swap may still complete in the worker - resending could execute it twice
+                logger.error(f"Li.Fi executor worker timed out, not retrying (swap may still land): {e}")
+                return {
+                    "success": False,
+                    "error": "Li.Fi executor timed out (not retried; the swap may still complete)"
+                }
             except subprocess.TimeoutExpired:
                 logger.warning(f"Li.Fi executor timed out (attempt {attempt + 1}/{max_retries + 1})")
                 if attempt < max_retries:
@@ -1802,7 +1914,9 @@ parseTransaction().then(result => {{
         
         # Execute based on decision type
         if decision_type in ["add", "entry"]:
-            result = self._execute_add(decision, position, chain, token_contract, price_usd, price_native, size_frac)
+            # Balance check + swap + debit of home-chain USDC, one buy at a time per wallet
+            with wallet_lock(self.home_chain):
+                result = self._execute_add(decision, position, chain, token_contract, price_usd, price_native, size_frac)
             status = result.get("status")
             if status == "success":
                 tokens_bought = result.get("tokens_bought", 0.0)
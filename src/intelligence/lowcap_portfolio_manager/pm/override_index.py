@@ -0,0 +1,181 @@
+"""
+In-process index of pm_overrides for scope-subset matching.
+
+overrides.py used to run one `scope_subset <@ scope` query per planned action.
+The index loads the whole table once (per PM tick, or when the trajectory miner
+writes new overrides - see overrides.clear_override_cache()) and answers the same
+question in memory:
+
+- rows are grouped by (pattern_key, action_category) and numbered
+- per group and scope dimension, a bitmask of the rows that constrain that
+  dimension, plus one bitmask per required value
+- a scope matches every row whose constrained dimensions all carry the
+  required value: start from all rows and, per constrained dimension, drop
+  the rows that require a different value (one dict lookup + AND per dimension)
+
+Values follow jsonb containment for scalars: numbers compare numerically,
+booleans and strings only match themselves. Rows with nested (object/array)
+values are checked with a full jsonb-containment fallback.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OVERRIDES_TABLE = "pm_overrides"
+PAGE_SIZE = 1000
+
+# Safety net for processes that never call overrides.clear_override_cache()
+INDEX_TTL_SECONDS = float(os.getenv("PM_OVERRIDE_INDEX_TTL_S", "300"))
+
+_COMPLEX = object()
+
+
+def _token(value: Any) -> Any:
+    """Hashable key with jsonb scalar equality (1 == 1.0, True != 1); _COMPLEX for objects/arrays."""
+    if value is None:
+        return ("null",)
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, (int, float)):
+        return ("num", float(value))
+    if isinstance(value, str):
+        return ("str", value)
+    return _COMPLEX
+
+
+def jsonb_contains(container: Any, contained: Any) -> bool:
+    """Python equivalent of Postgres `container @> contained`."""
+    if isinstance(contained, dict):
+        if not isinstance(container, dict):
+            return False
+        return all(k in container and jsonb_contains(container[k], v) for k, v in contained.items())
+    if isinstance(contained, list):
+        if not isinstance(container, list):
+            return False
+        return all(any(jsonb_contains(c, v) for c in container) for v in contained)
+    if isinstance(container, (dict, list)):
+        return False
+    return _token(container) == _token(contained)
+
+
+class _Group:
+    """Overrides sharing one (pattern_key, action_category)."""
+
+    __slots__ = ("rows", "all_mask", "constrained", "by_value", "complex_mask")
+
+    def __init__(self) -> None:
+        self.rows: List[Dict[str, Any]] = []
+        self.all_mask = 0
+        # dim -> rows with a scalar requirement on dim
+        self.constrained: Dict[str, int] = {}
+        # dim -> value token -> rows requiring exactly that value
+        self.by_value: Dict[str, Dict[Any, int]] = {}
+        # rows with nested requirements (checked with jsonb_contains)
+        self.complex_mask = 0
+
+    def add(self, row: Dict[str, Any]) -> None:
+        bit = 1 << len(self.rows)
+        self.rows.append(row)
+        self.all_mask |= bit
+        for dim, value in (row.get("scope_subset") or {}).items():
+            tok = _token(value)
+            if tok is _COMPLEX:
+                self.complex_mask |= bit
+                continue
+            self.constrained[dim] = self.constrained.get(dim, 0) | bit
+            values = self.by_value.setdefault(dim, {})
+            values[tok] = values.get(tok, 0) | bit
+
+    def match(self, scope: Dict[str, Any]) -> List[Dict[str, Any]]:
+        mask = self.all_mask
+        for dim, rows_on_dim in self.constrained.items():
+            if dim in scope:
+                tok = _token(scope[dim])
+                ok = self.by_value[dim].get(tok, 0) if tok is not _COMPLEX else 0
+            else:
+                ok = 0
+            mask &= ~rows_on_dim | ok
+            if not mask:
+                return []
+        out: List[Dict[str, Any]] = []
+        while mask:
+            low = mask & -mask
+            row = self.rows[low.bit_length() - 1]
+            if not (low & self.complex_mask) or jsonb_contains(scope, row.get("scope_subset") or {}):
+                out.append(row)
+            mask ^= low
+        return out
+
+
+class OverrideIndex:
+    """pm_overrides rows indexed by (pattern_key, action_category) for subset matching."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._groups: Dict[Tuple[Any, Any], _Group] = {}
+        self.size = 0
+        for row in rows:
+            key = (row.get("pattern_key"), row.get("action_category"))
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Group()
+            group.add(row)
+            self.size += 1
+        self.loaded_at = time.time()
+
+    @classmethod
+    def load(cls, sb: Any) -> "OverrideIndex":
+        """Read every pm_overrides row (paged, ordered by id)."""
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            page = (
+                sb.table(OVERRIDES_TABLE)
+                .select("*")
+                .order("id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+                .data or []
+            )
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        return cls(rows)
+
+    def match(
+        self,
+        pattern_key: str,
+        action_categories: Iterable[str],
+        scope: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """Overrides for pattern_key / any of action_categories whose scope_subset is contained in scope."""
+        out: List[Dict[str, Any]] = []
+        for category in action_categories:
+            group = self._groups.get((pattern_key, category))
+            if group is not None:
+                out.extend(group.match(scope or {}))
+        return out
+
+
+_INDEX: Optional[OverrideIndex] = None
+
+
+def get_override_index(sb: Any) -> OverrideIndex:
+    """Process-wide index, loaded on first use and after clear_override_index() / TTL expiry."""
+    global _INDEX
+    if _INDEX is None or time.time() - _INDEX.loaded_at > INDEX_TTL_SECONDS:
+        _INDEX = OverrideIndex.load(sb)
+        logger.debug("Loaded pm_overrides index: %d overrides", _INDEX.size)
+    return _INDEX
+
+
+def clear_override_index() -> None:
+    """Drop the cached index (next lookup reloads pm_overrides)."""
+    global _INDEX
+    _INDEX = None
@@ -2,7 +2,9 @@
 Pattern Override Runtime Functions
 
 Apply pattern-based overrides to PM actions at runtime.
-Refactored for V5: Queries pm_overrides table directly (using scope_subset <@ current_scope).
+Refactored for V5: matches pm_overrides rows whose scope_subset <@ current_scope.
+Matching runs against an in-process index (override_index.py) that is reloaded
+once per PM tick and whenever new overrides are written (clear_override_cache()).
 """
 
 import logging
@@ -15,6 +17,8 @@ from datetime import datetime, timezone
 
 from supabase import create_client, Client
 
+from src.intelligence.lowcap_portfolio_manager.pm.override_index import clear_override_index, get_override_index
+
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -30,6 +34,28 @@ def _clamp(value: float, min_val: float, max_val: float) -> float:
     """Clamp value to bounds."""
     return max(min_val, min(max_val, value))
 
+def _matching_overrides(
+    sb_client: Client,
+    pattern_key: str,
+    action_categories: List[str],
+    scope: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """pm_overrides rows for pattern_key/action_categories with scope_subset <@ scope.
+
+    Served from the override index; falls back to the containment query if the
+    index can't be loaded.
+    """
+    try:
+        return get_override_index(sb_client).match(pattern_key, action_categories, scope)
+    except Exception as e:
+        logger.warning(f"Override index unavailable, querying pm_overrides: {e}")
+    q = sb_client.table('pm_overrides').select('*').eq('pattern_key', pattern_key)
+    if len(action_categories) == 1:
+        q = q.eq('action_category', action_categories[0])
+    else:
+        q = q.in_('action_category', action_categories)
+    return q.filter('scope_subset', 'cd', json.dumps(scope)).execute().data or []
+
 def apply_pattern_strength_overrides(
     pattern_key: str,
     action_category: str,
@@ -65,17 +91,8 @@ def apply_pattern_strength_overrides(
         return base_levers, 1.0, []  # 1.0 = neutral (no scaling)
 
     try:
-        scope_json = json.dumps(scope)
-        # Fetch overrides with dirA/dirE
-        res = (
-            sb_client.table('pm_overrides')
-            .select('*')
-            .eq('pattern_key', pattern_key)
-            .eq('action_category', action_category)
-            .filter('scope_subset', 'cd', scope_json)
-            .execute()
-        )
-        matches = res.data or []
+        # Overrides with dirA/dirE
+        matches = _matching_overrides(sb_client, pattern_key, [action_category], scope)
         if not matches:
             return base_levers, 1.0, []  # 1.0 = neutral (no scaling)
 
@@ -185,18 +202,11 @@ def apply_pattern_execution_overrides(
         return plan_controls
 
     try:
-        scope_json = json.dumps(scope)
-        
-        # Query for V2 tuning overrides
+        # V2 tuning overrides
         # Categories: tuning_tighten (tighten), tuning_gate (loosen), tuning_dx (ladder)
-        res = sb_client.table('pm_overrides')\
-            .select('*')\
-            .eq('pattern_key', pattern_key)\
-            .in_('action_category', ['tuning_tighten', 'tuning_gate', 'tuning_dx'])\
-            .filter('scope_subset', 'cd', scope_json)\
-            .execute()
-            
-        matches = res.data or []
+        matches = _matching_overrides(
+            sb_client, pattern_key, ['tuning_tighten', 'tuning_gate', 'tuning_dx'], scope
+        )
         if not matches:
             return plan_controls
 
@@ -264,4 +274,5 @@ def apply_allocation_overrides(
     return base_allocation_pct
 
 def clear_override_cache():
-    pass
+    """Reload pm_overrides on the next lookup (call once per PM tick and after writing overrides)."""
+    clear_override_index()
@@ -0,0 +1,307 @@
+"""
+Portfolio valuation - portfolio-wide P&L recompute in a few bulk round trips.
+
+The price collector used to select all active positions, then per position
+re-select the row, query its latest price and issue its own update (3N+ round
+trips per minute). revalue_portfolio() instead:
+
+- loads the positions once and the latest prices for all their tokens in bulk
+  (lowcap_price_data_1m; hyperliquid_price_data_ohlc for Hyperliquid)
+- reconciles total_quantity = total_tokens_bought - total_tokens_sold and
+  computes value / P&L as arrays (same "God view" formulas as PMCoreTick)
+- writes the changed fields back through one update_position_pnl() RPC per
+  batch (see migrations/2026_10_16_add_update_position_pnl.sql), falling back
+  to per-row updates when the function is missing
+- returns a ValuationSummary (portfolio value / P&L totals, for logging)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.intelligence.lowcap_portfolio_manager.data.rpc_errors import is_missing_function
+
+logger = logging.getLogger(__name__)
+
+POSITIONS_TABLE = "lowcap_positions"
+PNL_RPC = "update_position_pnl"
+PRICE_LOOKBACK_MINUTES = 15  # bulk price read window; older prices are fetched per token
+PRICE_READ_CHUNK = 100  # tokens per in_() filter
+PAGE_SIZE = 1000
+BATCH_SIZE = 200  # positions per RPC call
+QUANTITY_TOLERANCE = 0.0001
+
+PNL_FIELDS = (
+    "total_quantity",
+    "current_usd_value",
+    "total_pnl_usd",
+    "total_pnl_pct",
+    "rpnl_usd",
+    "rpnl_pct",
+)
+
+# Set once the RPC turned out to be missing in this process (migration not applied yet)
+_rpc_unavailable = False
+
+
+@dataclass
+class ValuationSummary:
+    """Portfolio totals of one revaluation pass."""
+
+    positions: int = 0
+    priced: int = 0
+    written: int = 0
+    reconciled: int = 0
+    total_value_usd: float = 0.0
+    total_allocation_usd: float = 0.0
+    total_extracted_usd: float = 0.0
+    total_pnl_usd: float = 0.0
+
+    @property
+    def total_pnl_pct(self) -> float:
+        if self.total_allocation_usd <= 0:
+            return 0.0
+        return self.total_pnl_usd / self.total_allocation_usd * 100.0
+
+
+def _column(positions: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([float(p.get(key) or 0.0) for p in positions], dtype=float)
+
+
+def compute_pnl(
+    quantity: np.ndarray,
+    price: np.ndarray,
+    allocation_usd: np.ndarray,
+    extracted_usd: np.ndarray,
+    avg_entry_price: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    P&L fields for arrays of positions (scalars broadcast).
+
+    Total PnL = (qty x price) + extracted - allocated (anchor of truth)
+    Unrealized = (price - avg_entry) x qty (0 without an entry price)
+    Realized = total - unrealized
+
+    Returns:
+        {field: array} for current_usd_value, total_pnl_usd, total_pnl_pct, rpnl_usd, rpnl_pct
+    """
+    quantity, price, allocation_usd, extracted_usd, avg_entry_price = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (quantity, price, allocation_usd, extracted_usd, avg_entry_price))
+    )
+    has_alloc = allocation_usd > 0
+    safe_alloc = np.where(has_alloc, allocation_usd, 1.0)
+
+    current_usd_value = np.where(price > 0, quantity * price, 0.0)
+    total_pnl_usd = current_usd_value + extracted_usd - allocation_usd
+    unrealized = np.where(avg_entry_price > 0, (price - avg_entry_price) * quantity, 0.0)
+    rpnl_usd = total_pnl_usd - unrealized
+    return {
+        "current_usd_value": current_usd_value,
+        "total_pnl_usd": total_pnl_usd,
+        "total_pnl_pct": np.where(has_alloc, total_pnl_usd / safe_alloc * 100.0, 0.0),
+        "rpnl_usd": rpnl_usd,
+        "rpnl_pct": np.where(has_alloc, rpnl_usd / safe_alloc * 100.0, 0.0),
+    }
+
+
+def _position_key(position: Dict[str, Any]) -> Tuple[str, str]:
+    return (position.get("token_contract") or "", (position.get("token_chain") or "").lower())
+
+
+def fetch_latest_prices(sb: Any, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+    """
+    Latest USD price per (token_contract, chain).
+
+    One paginated read per source over the last PRICE_LOOKBACK_MINUTES (newest
+    first); tokens without a recent price fall back to a single latest-row lookup.
+    """
+    keys = {k for k in keys if k[0] and k[1]}
+    hl_tokens = sorted({t for t, c in keys if c == "hyperliquid"})
+    lowcap_tokens = sorted({t for t, c in keys if c != "hyperliquid"})
+    cutoff = (datetime.now(timezone.utc) - timedelta(minutes=PRICE_LOOKBACK_MINUTES)).isoformat()
+    prices: Dict[Tuple[str, str], float] = {}
+
+    def _bulk(table: str, token_col: str, time_col: str, select: str, tokens: List[str], extra=None):
+        for i in range(0, len(tokens), PRICE_READ_CHUNK):
+            chunk = tokens[i:i + PRICE_READ_CHUNK]
+            offset = 0
+            while True:
+                q = sb.table(table).select(select).in_(token_col, chunk).gte(time_col, cutoff)
+                if extra:
+                    q = extra(q)
+                rows = q.order(time_col, desc=True).range(offset, offset + PAGE_SIZE - 1).execute().data or []
+                yield from rows
+                if len(rows) < PAGE_SIZE:
+                    break
+                offset += PAGE_SIZE
+
+    try:
+        for row in _bulk("lowcap_price_data_1m", "token_contract", "timestamp", "token_contract,chain,price_usd", lowcap_tokens):
+            key = (row.get("token_contract"), (row.get("chain") or "").lower())
+            if key in keys and key not in prices and row.get("price_usd") is not None:
+                prices[key] = float(row["price_usd"])
+        for row in _bulk(
+            "hyperliquid_price_data_ohlc", "token", "ts", "token,close", hl_tokens,
+            extra=lambda q: q.eq("timeframe", "1m"),
+        ):
+            key = (row.get("token"), "hyperliquid")
+            if key not in prices and row.get("close") is not None:
+                prices[key] = float(row["close"])
+    except Exception as e:
+        logger.warning(f"Bulk price read failed, using per-token lookups: {e}")
+
+    for token, chain in keys - set(prices):
+        price = _fetch_latest_price(sb, token, chain)
+        if price is not None:
+            prices[(token, chain)] = price
+    return prices
+
+
+def _fetch_latest_price(sb: Any, token: str, chain: str) -> Optional[float]:
+    """Latest price regardless of age (tokens missing from the bulk window)."""
+    try:
+        if chain == "hyperliquid":
+            result = (
+                sb.table("hyperliquid_price_data_ohlc").select("close")
+                .eq("token", token).eq("timeframe", "1m")
+                .order("ts", desc=True).limit(1).execute()
+            )
+            return float(result.data[0]["close"]) if result.data else None
+        result = (
+            sb.table("lowcap_price_data_1m").select("price_usd")
+            .eq("token_contract", token).eq("chain", chain)
+            .order("timestamp", desc=True).limit(1).execute()
+        )
+        return float(result.data[0]["price_usd"]) if result.data else None
+    except Exception as e:
+        logger.error(f"Error getting current USD price for {token} ({chain}): {e}")
+        return None
+
+
+def revalue_positions(
+    positions: Sequence[Dict[str, Any]],
+    prices: Dict[Tuple[str, str], float],
+) -> Tuple[List[Dict[str, Any]], ValuationSummary]:
+    """
+    Recompute quantity / value / P&L for positions with a known price.
+
+    Returns:
+        (updates [{"id", **PNL_FIELDS, "pnl_last_calculated_at"}], summary)
+    """
+    summary = ValuationSummary(positions=len(positions))
+    priced = [p for p in positions if prices.get(_position_key(p)) is not None]
+    summary.priced = len(priced)
+    if not priced:
+        return [], summary
+
+    stored_qty = _column(priced, "total_quantity")
+    quantity = _column(priced, "total_tokens_bought") - _column(priced, "total_tokens_sold")
+    reconciled = np.abs(stored_qty - quantity) > QUANTITY_TOLERANCE
+    summary.reconciled = int(reconciled.sum())
+    for i in np.flatnonzero(reconciled):
+        logger.info(f"Reconciling {priced[i].get('id')} quantity: {stored_qty[i]:.8f} -> {quantity[i]:.8f}")
+    quantity = np.where(reconciled, quantity, stored_qty)
+
+    allocation = _column(priced, "total_allocation_usd")
+    extracted = _column(priced, "total_extracted_usd")
+    fields = compute_pnl(
+        quantity,
+        np.array([prices[_position_key(p)] for p in priced], dtype=float),
+        allocation,
+        extracted,
+        _column(priced, "avg_entry_price"),
+    )
+    fields["total_quantity"] = quantity
+
+    summary.total_value_usd = float(fields["current_usd_value"].sum())
+    summary.total_allocation_usd = float(allocation.sum())
+    summary.total_extracted_usd = float(extracted.sum())
+    summary.total_pnl_usd = float(fields["total_pnl_usd"].sum())
+
+    now = datetime.now(timezone.utc).isoformat()
+    updates = [
+        {"id": p["id"], **{f: float(fields[f][i]) for f in PNL_FIELDS}, "pnl_last_calculated_at": now}
+        for i, p in enumerate(priced)
+    ]
+    return updates, summary
+
+
+def write_pnl_updates(sb: Any, updates: List[Dict[str, Any]], batch_size: int = BATCH_SIZE) -> int:
+    """
+    Persist P&L updates: one update_position_pnl() RPC per batch, per-row updates without it.
+
+    Returns:
+        Number of positions written
+    """
+    global _rpc_unavailable
+    written = 0
+    for i in range(0, len(updates), batch_size):
+        batch = updates[i:i + batch_size]
+        if os.getenv("PNL_BATCH_RPC_ENABLED", "1") == "1" and not _rpc_unavailable:
+            try:
+                sb.rpc(PNL_RPC, {"updates": batch}).execute()
+                written += len(batch)
+                continue
+            except Exception as e:
+                if is_missing_function(e):
+                    _rpc_unavailable = True
+                    logger.warning(f"{PNL_RPC} RPC missing, using per-row updates from now on: {e}")
+                else:
+                    logger.warning(f"{PNL_RPC} RPC failed, per-row updates for this batch: {e}")
+        for update in batch:
+            try:
+                fields = {k: v for k, v in update.items() if k != "id"}
+                sb.table(POSITIONS_TABLE).update(fields).eq("id", update["id"]).execute()
+                written += 1
+            except Exception as e:
+                logger.error(f"Error updating P&L for position {update.get('id')}: {e}")
+    return written
+
+
+def revalue_portfolio(sb: Any, statuses: Sequence[str] = ("active",)) -> ValuationSummary:
+    """
+    Load positions and prices in bulk, recompute P&L and write it back.
+
+    Args:
+        sb: Supabase client
+        statuses: Position statuses to revalue
+
+    Returns:
+        ValuationSummary (portfolio value / P&L totals of the priced positions)
+    """
+    positions: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        rows = (
+            sb.table(POSITIONS_TABLE)
+            .select(
+                "id,token_contract,token_chain,total_quantity,total_tokens_bought,total_tokens_sold,"
+                "total_allocation_usd,total_extracted_usd,avg_entry_price"
+            )
+            .in_("status", list(statuses))
+            .range(offset, offset + PAGE_SIZE - 1)
+            .execute()
+            .data or []
+        )
+        positions.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+    if not positions:
+        return ValuationSummary()
+
+    prices = fetch_latest_prices(sb, (_position_key(p) for p in positions))
+    for p in positions:
+        if _position_key(p) not in prices:
+            logger.warning(f"Could not get current USD price for {p.get('token_contract')} on {p.get('token_chain')}")
+
+    updates, summary = revalue_positions(positions, prices)
+    summary.written = write_pnl_updates(sb, updates)
+    return summary
@@ -0,0 +1,162 @@
+"""
+Regime snapshot - uptrend state/flags of every regime driver, read once.
+
+PM Core Tick, RegimeAECalculator, extract_regime_flags (A/E v2) and the
+decision maker each used to query lowcap_positions (status='regime_driver')
+per driver and horizon, pulling the full features JSONB every time. They now
+share one RegimeSnapshot:
+
+- one query projects only the uptrend_engine_v4 fields they use for all
+  drivers × timeframes (8 drivers × 1d/1h/1m)
+- the result is immutable (frozen DriverState rows)
+- the cached snapshot is reused until the regime pipeline writes new states
+  (mark_regime_updated() bumps the version at the end of run_regime_pipeline),
+  with a TTL as a safety net for states written by other processes
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Horizon -> regime driver position timeframe
+HORIZON_TIMEFRAMES = {"macro": "1d", "meso": "1h", "micro": "1m"}
+
+# uptrend_engine_v4 fields projected server-side (features->uptrend_engine_v4->field)
+UPTREND_FIELDS = (
+    "state",
+    "prev_state",
+    "buy_signal",
+    "buy_flag",
+    "trim_flag",
+    "first_dip_buy_flag",
+    "emergency_exit",
+    "reclaimed_ema333",
+    "scores",
+)
+SNAPSHOT_SELECT = "token_ticker,timeframe,book_id,state,updated_at," + ",".join(
+    f"u_{f}:features->uptrend_engine_v4->{f}" for f in UPTREND_FIELDS
+)
+
+# Reload even without a version bump (states written by another process)
+SNAPSHOT_TTL_SECONDS = float(os.getenv("REGIME_SNAPSHOT_TTL_S", "120"))
+
+
+@dataclass(frozen=True)
+class DriverState:
+    """One regime driver position (driver × timeframe × book)."""
+
+    ticker: str
+    timeframe: str
+    book_id: Optional[str]
+    updated_at: str
+    row_state: Optional[str]  # lowcap_positions.state column
+    uptrend: Mapping[str, Any] = field(default_factory=dict)  # projected uptrend_engine_v4 fields
+
+    @property
+    def state(self) -> Optional[str]:
+        return self.uptrend.get("state")
+
+    def flag(self, name: str) -> bool:
+        return bool(self.uptrend.get(name, False))
+
+
+class RegimeSnapshot:
+    """Immutable view of all regime driver states at one point in time."""
+
+    def __init__(self, rows: List[Dict[str, Any]], version: int = 0) -> None:
+        self.version = version
+        self.loaded_at = time.time()
+        by_key: Dict[Tuple[str, str], List[DriverState]] = {}
+        for row in rows:
+            present = {f: row[f"u_{f}"] for f in UPTREND_FIELDS if row.get(f"u_{f}") is not None}
+            ds = DriverState(
+                ticker=str(row.get("token_ticker") or ""),
+                timeframe=str(row.get("timeframe") or ""),
+                book_id=row.get("book_id"),
+                updated_at=str(row.get("updated_at") or ""),
+                row_state=row.get("state"),
+                uptrend=present,
+            )
+            by_key.setdefault((ds.ticker, ds.timeframe), []).append(ds)
+        # Most recently updated first (same pick as the old order(updated_at desc).limit(1))
+        self._by_key = {k: tuple(sorted(v, key=lambda d: d.updated_at, reverse=True)) for k, v in by_key.items()}
+
+    @classmethod
+    def load(cls, sb: Any, version: int = 0) -> "RegimeSnapshot":
+        rows = (
+            sb.table("lowcap_positions")
+            .select(SNAPSHOT_SELECT)
+            .eq("status", "regime_driver")
+            .execute()
+            .data or []
+        )
+        return cls(rows, version)
+
+    def rows(self, ticker: str, timeframe: Optional[str] = None, book_id: Optional[str] = None) -> List[DriverState]:
+        """Driver rows (newest first), optionally for one timeframe / book."""
+        if timeframe is not None:
+            candidates = list(self._by_key.get((ticker, timeframe), ()))
+        else:
+            candidates = sorted(
+                (d for (t, _), ds in self._by_key.items() if t == ticker for d in ds),
+                key=lambda d: d.updated_at,
+                reverse=True,
+            )
+        if book_id is not None:
+            candidates = [d for d in candidates if d.book_id == book_id]
+        return candidates
+
+    def book_rows(self, book_id: Optional[str]) -> List[DriverState]:
+        """All driver rows of one book, oldest first (later rows win when keyed)."""
+        rows = [d for ds in self._by_key.values() for d in ds if d.book_id == book_id]
+        return sorted(rows, key=lambda d: d.updated_at)
+
+    def latest(self, ticker: str, timeframe: Optional[str] = None, book_id: Optional[str] = None) -> Optional[DriverState]:
+        rows = self.rows(ticker, timeframe, book_id)
+        return rows[0] if rows else None
+
+    def horizon_states(self, driver: Optional[str]) -> Dict[str, str]:
+        """S-state per horizon {macro, meso, micro} (S4 when unknown)."""
+        if not driver:
+            return {"macro": "S4", "meso": "S4", "micro": "S4"}
+        states: Dict[str, str] = {}
+        for horizon, tf in HORIZON_TIMEFRAMES.items():
+            ds = self.latest(driver, tf)
+            states[horizon] = str((ds.state or ds.row_state or "S4") if ds else "S4")
+        return states
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._by_key.values())
+
+
+_lock = threading.Lock()
+_version = 0
+_snapshot: Optional[RegimeSnapshot] = None
+
+
+def mark_regime_updated() -> None:
+    """Called when the regime pipeline has written new driver states."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def get_regime_snapshot(sb: Any) -> RegimeSnapshot:
+    """Shared snapshot; reloaded after mark_regime_updated() or TTL expiry."""
+    global _snapshot
+    snap = _snapshot
+    if snap is not None and snap.version == _version and time.time() - snap.loaded_at <= SNAPSHOT_TTL_SECONDS:
+        return snap
+    with _lock:
+        version = _version
+    snap = RegimeSnapshot.load(sb, version)
+    _snapshot = snap
+    logger.debug("Loaded regime snapshot v%d: %d driver rows", version, len(snap))
+    return snap
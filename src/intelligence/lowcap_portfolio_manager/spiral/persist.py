@@ -7,6 +7,8 @@ from typing import Any, Dict
 from supabase import create_client, Client  # type: ignore
 import json
 
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import BATCH_SIZE, FeaturesWriter
+
 
 class SpiralPersist:
     def __init__(self) -> None:
@@ -15,6 +17,8 @@ class SpiralPersist:
         if not supabase_url or not supabase_key:
             raise RuntimeError("SUPABASE_URL and SUPABASE_KEY are required")
         self.sb: Client = create_client(supabase_url, supabase_key)
+        # Key-level features patches (see flush_features())
+        self.features_writer = FeaturesWriter(self.sb)
 
     def write_phase_state(self, token: str, horizon: str, ts: datetime, payload: Dict[str, Any]) -> None:
         row = {
@@ -66,13 +70,11 @@ class SpiralPersist:
 
     def write_features_portfolio_context(self, features: Dict[str, Any]) -> None:
         """Attach shared portfolio-context features to all active positions.
-        Implementation: read active ids + existing features, merge in Python, update per row.
+        Implementation: read active ids, set features.portfolio_context as one batched patch.
         """
-        from copy import deepcopy
-
         rows = (
             self.sb.table("lowcap_positions")
-            .select("id,features")
+            .select("id")
             .eq("status", "active")
             .limit(1000)
             .execute()
@@ -80,20 +82,18 @@ class SpiralPersist:
             or []
         )
         for r in rows:
-            pid = r.get("id")
-            cur = r.get("features") or {}
-            newf = deepcopy(cur)
-            newf["portfolio_context"] = features
-            self.sb.table("lowcap_positions").update({"features": newf}).eq("id", pid).execute()
+            self.features_writer.set(r.get("id"), "portfolio_context", features)
+        self.flush_features()
 
     def write_features_token_geometry(self, position_id: str, geometry_updates: Dict[str, Any]) -> None:
-        row = (
-            self.sb.table("lowcap_positions").select("features").eq("id", position_id).limit(1).execute().data or []
-        )
-        cur = (row[0].get("features") if row else {}) or {}
-        geo = (cur.get("geometry") if isinstance(cur, dict) else {}) or {}
-        geo.update(geometry_updates)
-        cur["geometry"] = geo
-        self.sb.table("lowcap_positions").update({"features": cur}).eq("id", position_id).execute()
+        """Merge geometry_updates into features.geometry (queued; flushed every BATCH_SIZE
+        positions and by flush_features())."""
+        self.features_writer.merge(position_id, "geometry", geometry_updates)
+        if len(self.features_writer) >= BATCH_SIZE:
+            self.flush_features()
+
+    def flush_features(self) -> int:
+        """Persist queued features patches; returns the number of positions written."""
+        return self.features_writer.flush()
 
 
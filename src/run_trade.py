@@ -644,7 +644,27 @@ class TradingSystem:
             logger.error(f"TA→Uptrend ({timeframe}) error: {e}", exc_info=True)
     
     def _wrap_ta_then_uptrend_then_pm(self, timeframe):
-        """Run TA Tracker → Uptrend Engine → PM Core Tick sequentially."""
+        """Run TA Tracker → Uptrend Engine → PM Core Tick sequentially.
+
+        With FUSED_TICK_ENABLED (default on) the three stages share one position
+        snapshot (one read, one write per position); if the snapshot can't be
+        loaded the stages run standalone.
+        """
+        if os.getenv("FUSED_TICK_ENABLED", "1") == "1":
+            from intelligence.lowcap_portfolio_manager.jobs.tick_pipeline import load_snapshot, run_tick_pipeline
+            try:
+                snapshot = load_snapshot(timeframe)
+            except Exception as e:
+                logger.warning(f"Tick pipeline ({timeframe}) snapshot load failed, running stages separately: {e}")
+            else:
+                pm_logger = logging.getLogger('pm_core')
+                try:
+                    pm_logger.info(f"TA→Uptrend→PM ({timeframe}) fused tick starting")
+                    run_tick_pipeline(timeframe, learning_system=self.learning_system, snapshot=snapshot)
+                    pm_logger.info(f"TA→Uptrend→PM ({timeframe}) fused tick completed")
+                except Exception as e:
+                    logger.error(f"TA→Uptrend→PM ({timeframe}) error: {e}", exc_info=True)
+                return
         try:
             self._wrap_ta_tracker(timeframe)
             self._wrap_uptrend(timeframe)
@@ -790,9 +810,12 @@ class TradingSystem:
         # 1 Minute Jobs
         tasks.append(asyncio.create_task(self._schedule_at_interval(60, lambda: GenericOHLCRollup().rollup_timeframe(DataSource.LOWCAPS, Timeframe.M1), "OHLC 1m")))
         def majors_1m_rollup_job():
+            # The WS ingester writes majors 1m bars itself when HL_WS_BARS_ENABLED=1
+            if os.getenv("HL_INGEST_ENABLED", "0") == "1" and os.getenv("HL_WS_BARS_ENABLED", "0") == "1":
+                return
             try:
                 rollup = OneMinuteRollup()
-                rollup.roll_minute()
+                rollup.roll_since_last()
             except Exception as e:
                 logger.error(f"Majors 1m rollup error: {e}", exc_info=True)
         tasks.append(asyncio.create_task(self._schedule_at_interval(60, majors_1m_rollup_job, "Majors Rollup")))
@@ -816,9 +839,9 @@ class TradingSystem:
         tasks.append(asyncio.create_task(self._schedule_hourly(2, nav_main, "NAV")))
         # Dominance ingest removed in current pipeline (handled by regime engine); skip scheduling
         tasks.append(asyncio.create_task(self._schedule_hourly(4, lambda: self._wrap_rollup(Timeframe.H1, "Rollup 1h"), "Rollup 1h")))
-        # Geometry at :05 (before TA/PM at :06)
-        tasks.append(asyncio.create_task(self._schedule_hourly(5, lambda: self._wrap_geometry("1m"), "Geom 1m")))
-        tasks.append(asyncio.create_task(self._schedule_hourly(5, lambda: self._wrap_geometry("15m"), "Geom 15m")))
+        # Geometry at :05 (before TA/PM at :06); fast timeframes every 15m (incremental, only new bars)
+        tasks.append(asyncio.create_task(self._schedule_aligned(15, 5, lambda: self._wrap_geometry("1m"), "Geom 1m")))
+        tasks.append(asyncio.create_task(self._schedule_aligned(15, 5, lambda: self._wrap_geometry("15m"), "Geom 15m")))
         tasks.append(asyncio.create_task(self._schedule_hourly(5, lambda: self._wrap_geometry("1h"), "Geom 1h")))
         tasks.append(asyncio.create_task(self._schedule_hourly(5, lambda: self._wrap_geometry("4h"), "Geom 4h")))
         # Run TA → Uptrend → PM sequentially to ensure correct ordering
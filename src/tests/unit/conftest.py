@@ -0,0 +1,178 @@
+"""Shared fixtures: an in-memory stand-in for the Supabase (PostgREST) client."""
+
+import copy
+import threading
+
+import pytest
+
+
+class FakeQuery:
+    """One table request: filters, ordering and paging are applied to the in-memory rows on execute()."""
+
+    def __init__(self, client, table):
+        self.client, self.table = client, table
+        self.op, self.columns, self.payload, self.options = "select", None, None, {}
+        self.filters, self.orders, self.lo, self.hi, self.n = [], [], 0, None, None
+        self.matched = []
+
+    # -- operations ---------------------------------------------------------
+    def select(self, columns="*", **kwargs):
+        self.columns = columns
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.op, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False, **kwargs):
+        self.op, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.options = {"on_conflict": on_conflict, "ignore_duplicates": ignore_duplicates}
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    # -- filters ------------------------------------------------------------
+    def _filter(self, kind, col, value, test):
+        self.filters.append((kind, col, value, test))
+        return self
+
+    def eq(self, col, value):
+        return self._filter("eq", col, value, lambda v: v == value)
+
+    def neq(self, col, value):
+        return self._filter("neq", col, value, lambda v: v != value)
+
+    def in_(self, col, values):
+        values = list(values)
+        return self._filter("in", col, values, lambda v: v in values)
+
+    def gte(self, col, value):
+        return self._filter("gte", col, value, lambda v: v is not None and v >= value)
+
+    def gt(self, col, value):
+        return self._filter("gt", col, value, lambda v: v is not None and v > value)
+
+    def lte(self, col, value):
+        return self._filter("lte", col, value, lambda v: v is not None and v <= value)
+
+    def lt(self, col, value):
+        return self._filter("lt", col, value, lambda v: v is not None and v < value)
+
+    def order(self, col, desc=False, **kwargs):
+        self.orders.append((col, desc))
+        return self
+
+    def range(self, lo, hi):
+        self.lo, self.hi = lo, hi
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def arg(self, kind, col):
+        """Value of the first `kind` filter on `col` (None if the query has none)."""
+        return next((value for k, c, value, _ in self.filters if k == kind and c == col), None)
+
+    # -- execution ----------------------------------------------------------
+    def execute(self):
+        client = self.client
+        with client.lock:
+            client.calls.append(self)
+        client.before_execute(self)
+        with client.lock:
+            rows = client.tables.setdefault(self.table, [])
+            if self.op == "insert":
+                rows.extend(copy.deepcopy(self.payload))
+                return FakeResult(copy.deepcopy(self.payload))
+            if self.op == "upsert":
+                return FakeResult(self._upsert(rows))
+            self.matched = [r for r in rows if all(test(r.get(col)) for _, col, _, test in self.filters)]
+            if self.op == "update":
+                for r in self.matched:
+                    r.update(copy.deepcopy(self.payload))
+                return FakeResult(copy.deepcopy(self.matched))
+            if self.op == "delete":
+                client.tables[self.table] = [r for r in rows if not any(r is m for m in self.matched)]
+                return FakeResult(copy.deepcopy(self.matched))
+            out = list(self.matched)
+            for col, desc in reversed(self.orders):
+                out.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            out = out[self.lo:None if self.hi is None else self.hi + 1][:self.n]
+            return FakeResult(copy.deepcopy(out))
+
+    def _upsert(self, rows):
+        keys = [c.strip() for c in (self.options["on_conflict"] or "id").split(",")]
+        written = []
+        for new in copy.deepcopy(self.payload):
+            existing = next((r for r in rows if all(r.get(k) == new.get(k) for k in keys)), None)
+            if existing is None:
+                rows.append(new)
+            elif self.options["ignore_duplicates"]:
+                continue
+            else:
+                existing.update(new)
+            written.append(new)
+        return written
+
+
+class FakeRpc:
+    """One RPC call; handled by the client's registered function (returns None data if there is none)."""
+
+    table, op = None, "rpc"
+
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self):
+        client = self.client
+        with client.lock:
+            client.calls.append(self)
+        client.before_execute(self)
+        handler = client.rpcs.get(self.name)
+        return FakeResult(handler(copy.deepcopy(self.params)) if handler else None)
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase client.
+
+    tables maps table name -> list of row dicts. Every executed request is
+    recorded in `calls` (FakeQuery / FakeRpc, in order). `before_execute(call)`
+    runs first and may raise to simulate an API error or sleep to widen a race;
+    `rpcs` maps function name -> handler(params).
+    """
+
+    def __init__(self, before_execute=None, rpcs=None, **tables):
+        self.tables = tables
+        self.calls = []
+        self.rpcs = dict(rpcs or {})
+        self.before_execute = before_execute or (lambda call: None)
+        self.lock = threading.RLock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self, name, params)
+
+    def executed(self, table=None, op=None):
+        """Recorded requests, optionally limited to one table and/or operation."""
+        return [c for c in self.calls if (table is None or c.table == table) and (op is None or c.op == op)]
+
+
+@pytest.fixture
+def fake_supabase():
+    """Factory for in-memory Supabase clients: fake_supabase(table_name=[rows], ...)."""
+    return FakeSupabase
@@ -0,0 +1,60 @@
+"""
+Stub executor worker speaking the executor_worker.mjs protocol (for tests).
+
+Methods: ping, echo, sleep {seconds, value}, crash, lifi.execute (canned success,
+after STUB_LIFI_DELAY_S seconds), stats (number of lifi.execute requests received),
+solana.transfer (canned signature).
+Requests are handled on threads, so responses can arrive out of order.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+_write_lock = threading.Lock()
+_lifi_requests = 0
+
+
+def _send(message):
+    with _write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def _handle(request):
+    global _lifi_requests
+    rid, method, params = request.get("id"), request.get("method"), request.get("params") or {}
+    if method == "ping":
+        _send({"id": rid, "result": {"ok": True, "pid": os.getpid()}})
+    elif method == "echo":
+        _send({"id": rid, "result": params})
+    elif method == "sleep":
+        time.sleep(float(params.get("seconds", 0)))
+        _send({"id": rid, "result": params.get("value")})
+    elif method == "crash":
+        sys.stderr.write("stub worker crashing\n")
+        sys.stderr.flush()
+        os._exit(1)
+    elif method == "stats":
+        _send({"id": rid, "result": {"lifi_requests": _lifi_requests}})
+    elif method == "lifi.execute":
+        with _write_lock:
+            _lifi_requests += 1
+        time.sleep(float(os.getenv("STUB_LIFI_DELAY_S", "0")))
+        _send({"id": rid, "result": {"success": True, "tx_hash": "stub-tx", "tokens_received": params.get("amount")}})
+    elif method == "solana.transfer":
+        _send({"id": rid, "result": {"success": True, "signature": f"stub-sig-{params.get('lamports')}"}})
+    else:
+        _send({"id": rid, "error": f"Unknown method: {method}"})
+
+
+def main():
+    for line in sys.stdin:
+        if line.strip():
+            threading.Thread(target=_handle, args=(json.loads(line),), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Local bar store: partitioned writes, coverage metadata, invalidation, locking and corrupt partitions."""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import (
+    TS,
+    BarStore,
+    BarStoreCorrupt,
+    columns_to_rows,
+    rows_to_columns,
+)
+from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+
+TABLE = "lowcap_price_data_ohlc"
+
+
+def _rows(start: int, n: int):
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "token_contract": "mint",
+            "chain": "solana",
+            "timestamp": (t0 + timedelta(hours=start + i)).isoformat(),
+            "open_usd": 1.0 + i,
+            "high_usd": 2.0 + i,
+            "low_usd": 0.5 + i,
+            "close_usd": 1.5 + i * 0.1,
+            "volume": 10.0 * i,
+        }
+        for i in range(n)
+    ]
+
+
+def _write(store, rows, covered_from=None, complete=False):
+    store.write(TABLE, "1h", "solana", "mint", rows_to_columns(rows), covered_from=covered_from, complete=complete)
+
+
+def test_roundtrip_across_day_partitions(tmp_path):
+    store = BarStore(str(tmp_path))
+    rows = _rows(0, 60)
+    _write(store, rows, complete=True)
+
+    assert len(list((tmp_path / TABLE / "1h" / "solana" / "mint").glob("*.npy"))) == 3
+    cols = store.read(TABLE, "1h", "solana", "mint")
+    assert columns_to_rows(cols, "mint", "solana") == rows
+    meta = store.meta(TABLE, "1h", "solana", "mint")
+    assert meta["complete"] and meta["watermark"] == cols[TS, -1]
+
+    window = store.read(TABLE, "1h", "solana", "mint", start_ts=cols[TS, 10], end_ts=cols[TS, 29])
+    assert window.shape[1] == 20
+
+
+def test_adjacent_tail_extends_and_restatement_overwrites(tmp_path):
+    store = BarStore(str(tmp_path))
+    first = _rows(0, 30)
+    _write(store, first)
+    watermark = store.meta(TABLE, "1h", "solana", "mint")["watermark"]
+
+    tail = _rows(29, 10)
+    tail[0]["close_usd"] = 99.0
+    _write(store, tail[1:], covered_from=watermark)
+    _write(store, tail[:1], covered_from=watermark)
+
+    cols = store.read(TABLE, "1h", "solana", "mint")
+    assert cols.shape[1] == 39
+    assert cols[4, 29] == 99.0
+    assert not store.meta(TABLE, "1h", "solana", "mint")["complete"]
+
+
+def test_disjoint_writes_never_leave_holes(tmp_path):
+    store = BarStore(str(tmp_path))
+    _write(store, _rows(100, 20))
+
+    # Older, non-adjacent range is ignored
+    _write(store, _rows(0, 10))
+    assert store.read(TABLE, "1h", "solana", "mint").shape[1] == 20
+
+    # Newer range with a gap replaces the coverage
+    _write(store, _rows(200, 5))
+    cols = store.read(TABLE, "1h", "solana", "mint")
+    assert cols.shape[1] == 5
+    assert store.meta(TABLE, "1h", "solana", "mint")["first"] == cols[TS, 0]
+
+
+def test_invalidate_token(tmp_path):
+    store = BarStore(str(tmp_path))
+    _write(store, _rows(0, 5))
+    store.invalidate(TABLE, "1h", "solana", "mint")
+    assert store.meta(TABLE, "1h", "solana", "mint") is None
+    assert store.read(TABLE, "1h", "solana", "mint").shape[1] == 0
+
+
+def test_concurrent_writers_serialize_and_leave_no_temp_files(tmp_path):
+    store = BarStore(str(tmp_path))
+    rows = _rows(0, 60)
+    errors = []
+
+    def writer():
+        try:
+            for _ in range(10):
+                _write(store, rows, complete=True)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    token_dir = tmp_path / TABLE / "1h" / "solana" / "mint"
+    assert not list(token_dir.glob("*.tmp"))
+    assert columns_to_rows(store.read(TABLE, "1h", "solana", "mint"), "mint", "solana") == rows
+    assert (tmp_path / ".locks" / TABLE / "1h" / "solana" / "mint.lock").exists()
+
+
+def test_unreadable_partition_drops_coverage(tmp_path):
+    store = BarStore(str(tmp_path))
+    _write(store, _rows(0, 60), complete=True)
+    token_dir = tmp_path / TABLE / "1h" / "solana" / "mint"
+    sorted(token_dir.glob("*.npy"))[1].write_bytes(b"not a partition")
+
+    with pytest.raises(BarStoreCorrupt):
+        store.read(TABLE, "1h", "solana", "mint")
+    assert store.meta(TABLE, "1h", "solana", "mint") is None
+    assert store.read(TABLE, "1h", "solana", "mint").shape[1] == 0
+
+    # A write merging into an unreadable partition drops coverage instead of keeping a hole
+    _write(store, _rows(0, 30))
+    sorted(token_dir.glob("*.npy"))[0].write_bytes(b"not a partition")
+    _write(store, _rows(20, 10), covered_from=store.meta(TABLE, "1h", "solana", "mint")["first"])
+    assert store.meta(TABLE, "1h", "solana", "mint") is None and not list(token_dir.glob("*.npy"))
+
+
+def test_reader_falls_back_to_database_on_unreadable_cache(tmp_path, fake_supabase):
+    rows = _rows(0, 60)
+    db = [dict(r, timeframe="1h") for r in rows]
+    store = BarStore(str(tmp_path))
+    _write(store, rows, complete=True)
+    sorted((tmp_path / TABLE / "1h" / "solana" / "mint").glob("*.npy"))[1].write_bytes(b"not a partition")
+
+    reader = PriceDataReader(fake_supabase(lowcap_price_data_ohlc=db), bar_store=store)
+    got = reader.fetch_ohlc_since("mint", "solana", "1h", rows[0]["timestamp"], limit=100)
+
+    assert [r["timestamp"] for r in got] == [r["timestamp"] for r in rows]
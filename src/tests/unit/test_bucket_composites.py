@@ -0,0 +1,60 @@
+"""Bucket composites: batched reads/writes, but one bucket's failure never drops the others."""
+
+from datetime import datetime, timezone
+
+from src.intelligence.lowcap_portfolio_manager.jobs import regime_price_collector as rpc
+from src.intelligence.lowcap_portfolio_manager.jobs.regime_price_collector import RegimePriceCollector
+
+START = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def _client(fake_supabase, bars, unreadable=(), bad_drivers=()):
+    def before_execute(q):
+        if q.op == "upsert" and any(r["driver"] in bad_drivers for r in q.payload):
+            raise RuntimeError("bad row")
+        if q.op == "select" and set(q.arg("in", "token_contract") or ()) & set(unreadable):
+            raise TimeoutError("read timed out")
+
+    return fake_supabase(before_execute, lowcap_price_data_ohlc=bars)
+
+
+def _bar(contract, close):
+    return {"token_contract": contract, "chain": "solana", "timeframe": "1m", "timestamp": START.isoformat(),
+            "open_usd": close, "high_usd": close, "low_usd": close, "close_usd": close, "volume": 1.0}
+
+
+def _collector(sb):
+    c = RegimePriceCollector.__new__(RegimePriceCollector)
+    c.sb, c.book_id = sb, "onchain_crypto"
+    return c
+
+
+BUCKETS = {
+    "nano": [{"token_contract": "n1", "chain": "solana"}, {"token_contract": "n2", "chain": "solana"}],
+    "small": [{"token_contract": "s1", "chain": "solana"}],
+    "mid": [{"token_contract": "m1", "chain": "solana"}],
+}
+
+
+def test_failed_member_read_skips_only_its_bucket(monkeypatch, fake_supabase):
+    monkeypatch.setattr(rpc, "BUCKET_READ_CHUNK", 1)
+    bars = [_bar("n1", 1.0), _bar("n2", 3.0), _bar("s1", 5.0), dict(_bar("m1", 7.0), close_usd=None)]
+    sb = _client(fake_supabase, bars, unreadable={"s1"})
+
+    out = _collector(sb)._compute_bucket_bars(BUCKETS, "1m", START)
+
+    # small: its member read failed; mid: its member's bar is malformed
+    assert set(out) == {"nano"}
+    bar, count = out["nano"]
+    assert (bar.close, count) == (2.0, 2)
+
+
+def test_failed_batch_write_falls_back_per_bucket(fake_supabase):
+    sb = _client(fake_supabase, [_bar("n1", 1.0), _bar("s1", 5.0), _bar("m1", 7.0)], bad_drivers={"small"})
+    collector = _collector(sb)
+
+    collector._write_bucket_bars("1m", collector._compute_bucket_bars(BUCKETS, "1m", START))
+
+    upserts = [[r["driver"] for r in q.payload] for q in sb.executed(op="upsert")]
+    assert upserts == [["nano", "small", "mid"], ["nano"], ["small"], ["mid"]]
+    assert [r["driver"] for r in sb.tables["regime_price_data_ohlc"]] == ["nano", "mid"]
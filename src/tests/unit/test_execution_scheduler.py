@@ -0,0 +1,57 @@
+"""PM execution scheduler: per-chain concurrency limits, per-token serialization, ordered results."""
+
+import threading
+import time
+
+from src.intelligence.lowcap_portfolio_manager.pm.execution_scheduler import (
+    ExecutionJob,
+    ExecutionScheduler,
+    parse_chain_limits,
+)
+
+
+class _Probe:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+        self.order = []
+
+    def job(self, chain, token, value, seconds=0.05):
+        def run():
+            with self.lock:
+                self.active[chain] = self.active.get(chain, 0) + 1
+                self.peak[chain] = max(self.peak.get(chain, 0), self.active[chain])
+            time.sleep(seconds)
+            with self.lock:
+                self.active[chain] -= 1
+                self.order.append((token, value))
+            return value
+        return ExecutionJob(chain=chain, conflict_key=token, run=run)
+
+
+def test_limits_and_ordering():
+    probe = _Probe()
+    jobs = [probe.job("solana", f"T{i}", i) for i in range(8)]
+    jobs += [probe.job("base", f"B{i}", 10 + i) for i in range(3)]
+    start = time.time()
+    results = ExecutionScheduler({"solana": 4}, default_limit=1).run(jobs)
+    elapsed = time.time() - start
+    assert results == list(range(8)) + [10, 11, 12]
+    assert probe.peak == {"solana": 4, "base": 1}
+    assert elapsed < 0.3  # 2 solana waves overlap the 3 serialized base jobs
+
+
+def test_same_token_runs_sequentially_and_errors_are_returned():
+    probe = _Probe()
+    boom = ExecutionJob(chain="solana", conflict_key="T", run=lambda: 1 / 0)
+    jobs = [probe.job("solana", "T", 1), boom, probe.job("solana", "T", 2)]
+    results = ExecutionScheduler({"solana": 4}).run(jobs)
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], ZeroDivisionError)
+    assert probe.peak["solana"] == 1
+    assert [v for t, v in probe.order] == [1, 2]
+
+
+def test_parse_chain_limits():
+    assert parse_chain_limits("Solana=4, base=0,bad,x=y") == {"solana": 4, "base": 1}
@@ -0,0 +1,121 @@
+"""Executor worker supervisor: pipelining, timeouts, restart after a crash, calls routed to it."""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.trading import executor_worker
+from src.trading.executor_worker import ExecutorWorker, ExecutorWorkerError, ExecutorWorkerTimeout
+
+STUB = str(Path(__file__).with_name("stub_executor_worker.py"))
+
+
+@pytest.fixture
+def worker():
+    w = ExecutorWorker([sys.executable, STUB], name="stub-worker")
+    yield w
+    w.close()
+
+
+def test_concurrent_requests_are_pipelined(worker):
+    async def run():
+        start = time.time()
+        results = await asyncio.gather(*(
+            worker.acall("sleep", {"seconds": 0.3, "value": i}, timeout=5) for i in range(5)
+        ))
+        return results, time.time() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == [0, 1, 2, 3, 4]
+    assert elapsed < 1.2  # served concurrently by one worker
+    assert worker.call("echo", {"a": 1}) == {"a": 1}
+
+
+def test_timeout_and_error(worker):
+    with pytest.raises(ExecutorWorkerTimeout):
+        worker.call("sleep", {"seconds": 1, "value": 1}, timeout=0.1)
+    with pytest.raises(ExecutorWorkerError, match="Unknown method"):
+        worker.call("nope")
+    # The worker survives both
+    assert worker.call("ping")["ok"]
+
+
+def test_restart_after_crash(worker, monkeypatch):
+    monkeypatch.setattr(executor_worker, "RESTART_BACKOFF_S", (0.0,))
+    pid = worker.call("ping")["pid"]
+    with pytest.raises(ExecutorWorkerError, match="connection lost"):
+        worker.call("crash", timeout=5)
+    deadline = time.time() + 2
+    while "stub worker crashing" not in worker.stderr_tail() and time.time() < deadline:
+        time.sleep(0.01)
+    assert "stub worker crashing" in worker.stderr_tail()
+    assert worker.call("ping", timeout=5)["pid"] != pid
+
+
+def test_timed_out_lifi_swap_is_not_resent(monkeypatch, tmp_path):
+    # The executor imports the worker as trading.executor_worker (src/ on sys.path)
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[2]))
+    from trading import executor_worker as worker_module
+    from src.intelligence.lowcap_portfolio_manager.pm import executor as ex
+
+    monkeypatch.setenv("STUB_LIFI_DELAY_S", "0.6")
+    w = worker_module.ExecutorWorker([sys.executable, STUB], name="stub-worker")
+    monkeypatch.setattr(worker_module, "get_executor_worker", lambda: w)
+    monkeypatch.setattr(ex, "LIFI_EXECUTOR_TIMEOUT_S", 0.1)
+    monkeypatch.setattr(ex.time, "sleep", lambda s: None)  # no retry backoff
+
+    pm = ex.PMExecutor.__new__(ex.PMExecutor)
+    pm.lifi_executor_path = Path(STUB)
+    try:
+        result = pm._call_lifi_executor("swap", "base", "USDC", "0xtoken", "1000000", from_chain="solana", to_chain="base")
+        assert not result["success"] and "not retried" in result["error"]
+        # The first request is still in flight in the worker; nothing was resent
+        assert w.call("stats", timeout=5)["lifi_requests"] == 1
+        deadline = time.time() + 2
+        while not w._timed_out == {} and time.time() < deadline:
+            time.sleep(0.01)
+        assert w._timed_out == {}  # late response arrived and was logged
+        assert w.call("stats", timeout=5)["lifi_requests"] == 1
+    finally:
+        w.close()
+
+
+def test_restart_backoff_does_not_hold_the_lock(worker, monkeypatch):
+    monkeypatch.setattr(executor_worker, "RESTART_BACKOFF_S", (1.0,))
+    pid = worker.call("ping")["pid"]
+    with pytest.raises(ExecutorWorkerError):
+        worker.call("crash", timeout=5)
+    deadline = time.time() + 2
+    while worker.is_alive() and time.time() < deadline:
+        time.sleep(0.01)
+
+    pids = []
+    caller = threading.Thread(target=lambda: pids.append(worker.call("ping", timeout=5)["pid"]))
+    caller.start()
+    time.sleep(0.2)
+    # The caller is waiting out the backoff; the lifecycle lock stays free meanwhile
+    assert caller.is_alive()
+    assert worker._lock.acquire(timeout=0.1)
+    worker._lock.release()
+    caller.join(5)
+    assert pids and pids[0] != pid
+
+
+def test_sol_transfer_runs_on_the_worker(monkeypatch, tmp_path):
+    from src.trading import js_solana_client
+    from src.trading.js_solana_client import JSSolanaClient
+
+    w = ExecutorWorker([sys.executable, STUB], name="stub-worker")
+    monkeypatch.setattr(js_solana_client, "get_executor_worker", lambda: w)
+    monkeypatch.setattr(js_solana_client.subprocess, "run", lambda *a, **k: pytest.fail("spawned node"))
+    monkeypatch.chdir(tmp_path)
+    try:
+        result = asyncio.run(JSSolanaClient("http://rpc", "key").execute_transfer("Dest1111", 12345))
+    finally:
+        w.close()
+    assert result == {"success": True, "signature": "stub-sig-12345"}
+    assert not list(tmp_path.iterdir())
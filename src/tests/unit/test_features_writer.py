@@ -0,0 +1,90 @@
+"""Key-level features patches: patch semantics, RPC batching, read-merge-write fallback."""
+
+from src.intelligence.lowcap_portfolio_manager.data import features_writer
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import FeaturesWriter, apply_patch
+
+
+def _client(fake_supabase, rows, rpc_error=None):
+    def before_execute(call):
+        if call.op == "rpc" and client.rpc_error:
+            raise client.rpc_error
+
+    client = fake_supabase(before_execute, lowcap_positions=rows)
+    client.rpc_error = rpc_error
+    return client
+
+
+def _rpc_calls(client):
+    return [(c.name, c.params) for c in client.executed(op="rpc")]
+
+
+def test_apply_patch_order_and_shallow_merge():
+    cur = {"ta": {"old": 1}, "geometry": {"levels": [1], "updated_at": "a"}, "stale": 1}
+    out = apply_patch(cur, {
+        "unset": ["stale"],
+        "set": {"ta": {"new": 2}},
+        "merge": {"geometry": {"updated_at": "b"}, "fresh": {"x": 1}},
+    })
+    assert out == {"ta": {"new": 2}, "geometry": {"levels": [1], "updated_at": "b"}, "fresh": {"x": 1}}
+    assert cur["geometry"]["updated_at"] == "a"
+
+
+def test_patch_bookkeeping():
+    w = FeaturesWriter(None, use_rpc=False)
+    w.merge("p1", "geometry", {"a": 1})
+    w.merge("p1", "geometry", {"b": 2})
+    w.set("p1", "ta", {"x": 1})
+    w.unset("p1", "ta")
+    w.set_state("p1", "S3")
+    assert w._patches["p1"] == {"id": "p1", "merge": {"geometry": {"a": 1, "b": 2}}, "set": {}, "unset": ["ta"], "state": "S3"}
+    assert "p1" in w and len(w) == 1
+
+
+def test_rpc_flush_batches_patches(monkeypatch, fake_supabase):
+    monkeypatch.setattr(features_writer, "_rpc_unavailable", False)
+    client = _client(fake_supabase, [])
+    w = FeaturesWriter(client, batch_size=2, use_rpc=True)
+    for i in range(5):
+        w.set(f"p{i}", "ta", {"i": i})
+    assert w.flush() == 5
+    assert [len(params["patches"]) for _, params in _rpc_calls(client)] == [2, 2, 1]
+    assert client.executed("lowcap_positions") == [] and len(w) == 0
+
+
+def test_fallback_keeps_concurrent_keys(monkeypatch, fake_supabase):
+    monkeypatch.setattr(features_writer, "_rpc_unavailable", False)
+    rows = [
+        {"id": "p1", "state": "S1", "features": {"ta": {"v": 0}, "geometry": {"levels": [1]}}},
+        {"id": "p2", "state": "S2", "features": {"ta": {"v": 0}}},
+    ]
+    client = _client(fake_supabase, rows, RuntimeError({"code": "PGRST202", "message": "Could not find the function"}))
+    w = FeaturesWriter(client, use_rpc=True)
+    w.set("p1", "ta", {"v": 1})
+    w.set_state("p1", "S3")
+    w.merge("p2", "geometry", {"updated_at": "t"})
+    # Another job writes geometry after the patch was queued
+    rows[0]["features"]["geometry"] = {"levels": [2]}
+
+    assert w.flush() == 2
+    assert rows[0] == {"id": "p1", "state": "S3", "features": {"ta": {"v": 1}, "geometry": {"levels": [2]}}}
+    assert rows[1]["features"] == {"ta": {"v": 0}, "geometry": {"updated_at": "t"}}
+    # One bulk read for the batch, one update per row
+    assert len(client.executed("lowcap_positions", "select")) == 1
+    assert len(client.executed("lowcap_positions", "update")) == 2
+    assert features_writer._rpc_unavailable
+
+
+def test_transient_rpc_error_falls_back_for_that_flush_only(monkeypatch, fake_supabase):
+    monkeypatch.setattr(features_writer, "_rpc_unavailable", False)
+    rows = [{"id": "p1", "state": "S1", "features": {}}]
+    client = _client(fake_supabase, rows, RuntimeError("upstream request timeout"))
+    w = FeaturesWriter(client, use_rpc=True)
+    w.set("p1", "ta", {"v": 1})
+    assert w.flush() == 1
+    assert rows[0]["features"] == {"ta": {"v": 1}}
+    assert not features_writer._rpc_unavailable
+
+    client.rpc_error = None
+    w.set("p1", "ta", {"v": 2})
+    assert w.flush() == 1
+    assert len(client.executed(op="rpc")) == 2  # the failed call, then the one that went through
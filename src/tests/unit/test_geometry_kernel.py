@@ -0,0 +1,130 @@
+"""Geometry kernel vs the original GeometryBuilder loop implementations (exact match)."""
+
+import random
+from datetime import datetime, timedelta, timezone
+from statistics import median
+
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.jobs import geometry_kernel as gk
+
+
+# --- Reference implementations (pre-kernel GeometryBuilder methods) ---
+
+def _ref_swings(closes, prominence_threshold=0.5):
+    highs, lows = [], []
+    for i in range(2, len(closes) - 2):
+        c = closes[i]
+        if c > closes[i - 1] and c > closes[i - 2] and c > closes[i + 1] and c > closes[i + 2]:
+            if c > 0 and (c - min(closes[i - 2:i + 3])) / c * 100 >= prominence_threshold:
+                highs.append(i)
+        if c < closes[i - 1] and c < closes[i - 2] and c < closes[i + 1] and c < closes[i + 2]:
+            if c > 0 and (max(closes[i - 2:i + 3]) - c) / c * 100 >= prominence_threshold:
+                lows.append(i)
+    return highs, lows
+
+
+def _ref_cluster_levels(prices, tol_percent):
+    centers, counts = [], []
+    for price in sorted(prices):
+        for k, c in enumerate(centers):
+            if abs(price - c) / c <= tol_percent:
+                centers[k] = (centers[k] * counts[k] + price) / (counts[k] + 1)
+                counts[k] += 1
+                break
+        else:
+            centers.append(price)
+            counts.append(1)
+    scored = [{"price": centers[k], "strength": counts[k], "confidence": min(1.0, counts[k] / 10.0), "type": "line"} for k in range(len(centers))]
+    scored.sort(key=lambda x: (x["strength"], -abs(x["price"])), reverse=True)
+    return scored[:9]
+
+
+def _ref_theil_sen(xs, ys):
+    if len(xs) < 3:
+        return (0.0, ys[-1] if ys else 0.0)
+    slopes = [(ys[j] - ys[i]) / (xs[j] - xs[i]) for i in range(len(xs)) for j in range(i + 1, len(xs)) if xs[j] != xs[i]]
+    m = median(slopes) if slopes else 0.0
+    return m, median([ys[i] - m * xs[i] for i in range(len(xs))])
+
+
+def _ref_cluster_swings(timestamps, closes, swing_indices, window_h=24, pct=10.0):
+    if len(swing_indices) < 2:
+        return [swing_indices] if swing_indices else []
+    s = sorted(swing_indices, key=lambda i: timestamps[i])
+    clusters, cur = [], [s[0]]
+    for a, b in zip(s, s[1:]):
+        dt = (timestamps[b] - timestamps[a]).total_seconds() / 3600
+        dp = abs(closes[b] - closes[a]) / closes[a] * 100 if closes[a] > 0 else 0
+        if dt <= window_h and dp <= pct:
+            cur.append(b)
+        else:
+            if len(cur) >= 3:
+                clusters.append(cur)
+            cur = [b]
+    if len(cur) >= 3:
+        clusters.append(cur)
+    return clusters
+
+
+def _walk(n, seed, vol=0.02):
+    rng = random.Random(seed)
+    px, out = 1.0, []
+    for _ in range(n):
+        px *= 1.0 + rng.gauss(0.0, vol)
+        out.append(round(px, 4) if seed % 2 else px)  # rounded series produce ties
+    return out
+
+
+@pytest.mark.parametrize("n,seed", [(3, 1), (5, 2), (60, 3), (500, 4), (3000, 5)])
+def test_swings_and_levels_match(n, seed):
+    closes = _walk(n, seed)
+    highs, lows = gk.swings_percentage_based(closes, 0.5)
+    assert (highs, lows) == _ref_swings(closes, 0.5)
+    prices = [closes[i] for i in highs + lows]
+    assert gk.cluster_levels(prices, 0.06) == _ref_cluster_levels(prices, 0.06)
+
+
+@pytest.mark.parametrize("seed", [21, 22, 23])
+def test_resumed_sweep_matches_full_sweep(seed):
+    rng = random.Random(seed)
+    prices = _walk(400, seed)
+    clusters = gk.sweep_clusters(sorted(prices), 0.06)
+    for _ in range(30):
+        added = _walk(rng.randint(0, 5), rng.randint(0, 10**6))
+        removed = rng.sample(prices, rng.randint(0, 3))
+        for p in removed:
+            prices.remove(p)
+        prices.extend(added)
+        changed = added + removed
+        if not changed:
+            continue
+        clusters = gk.sweep_clusters(sorted(prices), 0.06, clusters=clusters, from_price=min(changed))
+        assert clusters == gk.sweep_clusters(sorted(prices), 0.06)
+
+
+@pytest.mark.parametrize("n", [2, 3, 4, 50, 301])
+def test_theil_sen_exact_matches(n):
+    rng = random.Random(n)
+    xs = [float(i // 3) for i in range(n)]  # duplicate x values are skipped
+    ys = [0.5 * x + rng.gauss(0, 1) for x in xs]
+    assert gk.fit_theil_sen(xs, ys) == pytest.approx(_ref_theil_sen(xs, ys), rel=0, abs=1e-12)
+
+
+def test_theil_sen_sampled_is_close():
+    rng = random.Random(9)
+    xs = [float(i) for i in range(gk.THEIL_SEN_EXACT_MAX + 500)]
+    ys = [2.0 * x + 5.0 + rng.gauss(0, 3) for x in xs]
+    m, b = gk.fit_theil_sen(xs, ys)
+    assert m == pytest.approx(2.0, abs=0.01)
+    assert gk.fit_theil_sen(xs, ys) == (m, b)  # deterministic
+
+
+def test_cluster_swing_points_match():
+    closes = _walk(800, 11)
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    timestamps = [t0 + timedelta(hours=i * 0.5) for i in range(len(closes))]
+    highs, lows = _ref_swings(closes)
+    times_s = [t.timestamp() for t in timestamps]
+    for swings in (highs, lows, highs[:1], []):
+        assert gk.cluster_swing_points(times_s, closes, swings) == _ref_cluster_swings(timestamps, closes, swings)
@@ -0,0 +1,123 @@
+"""Half-life estimator: bounded grouped edge-history read and column-limited lesson updates."""
+
+import asyncio
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.jobs import half_life_estimator as hle
+from src.intelligence.lowcap_portfolio_manager.jobs.half_life_estimator import (
+    fetch_edge_histories,
+    run_half_life_estimator,
+    scope_signature_of,
+)
+
+T0 = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=5)
+_ids = itertools.count(1)
+
+MISSING = RuntimeError({"code": "PGRST202", "message": "Could not find the function"})
+
+
+@pytest.fixture(autouse=True)
+def _rpc_available(monkeypatch):
+    monkeypatch.setattr(hle, "_rpc_unavailable", False)
+
+
+def _latest_edge_history(client):
+    """latest_edge_history() over the client's learning_edge_history rows (same ordering as the SQL)."""
+    def handler(params):
+        rows = [r for r in client.tables["learning_edge_history"] if r["pattern_key"] in params["p_pattern_keys"]]
+        rows.sort(key=lambda r: (r["ts"], r["id"]), reverse=True)
+        rows.sort(key=lambda r: (r["pattern_key"], r["action_category"], r["scope_signature"]))
+        seen = {}
+        latest = []
+        for r in rows:
+            key = (r["pattern_key"], r["action_category"], r["scope_signature"])
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] <= params["p_per_key"]:
+                latest.append({k: r[k] for k in ("pattern_key", "action_category", "scope_signature", "edge_raw", "ts")})
+        return latest[params["p_offset"]:params["p_offset"] + params["p_limit"]]
+    return handler
+
+
+def _client(fake_supabase, rpc_error=None, **tables):
+    def before_execute(call):
+        if call.op == "rpc" and rpc_error:
+            raise rpc_error
+
+    client = fake_supabase(before_execute, **tables)
+    client.rpcs[hle.EDGE_HISTORY_RPC] = _latest_edge_history(client)
+    return client
+
+
+def _history(pk, cat, sig, n, edge=lambda i: 1.0, start=T0):
+    return [
+        {"id": next(_ids), "pattern_key": pk, "action_category": cat, "scope_signature": sig,
+         "edge_raw": edge(i), "ts": (start + timedelta(hours=i)).isoformat()}
+        for i in range(n)
+    ]
+
+
+def test_fetch_edge_histories_reads_newest_per_key_through_rpc(monkeypatch, fake_supabase):
+    monkeypatch.setattr(hle, "EDGE_HISTORY_PAGE_SIZE", 7)
+    monkeypatch.setattr(hle, "EDGE_HISTORY_KEY_CHUNK", 1)
+    rows = _history("p1", "entry", "a", 40) + _history("p1", "trim", "a", 3) + _history("p2", "entry", "b", 12)
+    client = _client(fake_supabase, learning_edge_history=rows)
+
+    histories = fetch_edge_histories(client, ["p2", "p1", "p1"], per_key=10)
+
+    assert {k: len(v) for k, v in histories.items()} == {("p1", "entry", "a"): 10, ("p1", "trim", "a"): 3,
+                                                         ("p2", "entry", "b"): 10}
+    newest = histories[("p1", "entry", "a")]
+    assert [ts for _, ts in newest] == [T0 + timedelta(hours=h) for h in range(39, 29, -1)]
+    # Only the newest 10 + 3 rows of p1 (pages of 7) and 10 of p2 cross the wire
+    assert len(client.executed(op="rpc")) == 2 + 2
+    assert client.executed("learning_edge_history") == []
+
+
+def test_fallback_read_is_time_bounded_with_stable_paging(monkeypatch, fake_supabase):
+    monkeypatch.setattr(hle, "EDGE_HISTORY_PAGE_SIZE", 7)
+    old = T0 - timedelta(days=hle.EDGE_HISTORY_LOOKBACK_DAYS)
+    # Two snapshots per hour with the same ts: the id tiebreak keeps paging stable
+    recent = _history("p1", "entry", "a", 12) + _history("p1", "entry", "a", 12)
+    client = _client(fake_supabase, rpc_error=MISSING,
+                     learning_edge_history=_history("p1", "entry", "a", 30, start=old) + recent)
+
+    histories = fetch_edge_histories(client, ["p1"], per_key=30)
+
+    assert len(histories[("p1", "entry", "a")]) == 24
+    reads = client.executed("learning_edge_history")
+    assert len(reads) == 4  # 24 recent rows in pages of 7; the 30 old ones are never read
+    since = datetime.fromisoformat(reads[0].arg("gte", "ts"))
+    assert old < since < T0
+    assert reads[0].orders == [("ts", True), ("id", True)]
+    assert hle._rpc_unavailable
+
+    # Latched: later reads skip the RPC
+    fetch_edge_histories(client, ["p1"])
+    assert len(client.executed(op="rpc")) == 1
+
+
+def test_half_lives_update_only_their_columns_grouped_by_value(fake_supabase):
+    sig = scope_signature_of({"chain": "solana"})
+    decaying = lambda i: 0.5 ** (i / 24.0)  # half-life ~24h
+    fitted = int(hle.estimate_half_life([(decaying(i), T0 + timedelta(hours=i)) for i in range(10)]))
+    lessons = [
+        {"id": i, "status": "active", "pattern_key": f"p{i}", "action_category": "entry",
+         "scope_values": {"chain": "solana"}, "decay_halflife_hours": current, "notes": "kept"}
+        for i, current in [(1, None), (2, 48), (3, fitted), (4, None)]
+    ]
+    history = [r for i in (1, 2, 3) for r in _history(f"p{i}", "entry", sig, 10, decaying)]
+    client = _client(fake_supabase, learning_lessons=lessons,
+                     learning_edge_history=history + _history("p4", "entry", sig, 3))
+
+    result = asyncio.run(run_half_life_estimator(client))
+
+    assert result == {"processed": 4, "half_lives_updated": 2, "unchanged": 1}
+    updates = client.executed("learning_lessons", "update")
+    assert len(updates) == 1
+    payload, ids = updates[0].payload, sorted(r["id"] for r in updates[0].matched)
+    assert set(payload) == {"decay_halflife_hours", "last_validated"}
+    assert payload["decay_halflife_hours"] == fitted and ids == [1, 2]
+    assert all(lesson["notes"] == "kept" for lesson in lessons)
@@ -0,0 +1,43 @@
+"""WS 1m bar aggregation: out-of-order trades, dedup, emission on close, late-trade correction."""
+
+from datetime import datetime, timedelta, timezone
+
+from src.intelligence.lowcap_portfolio_manager.ingest.minute_bars import MinuteBarAggregator
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def test_bar_follows_trade_time_and_dedups():
+    agg = MinuteBarAggregator(grace_s=30)
+    now = _at(50)
+    agg.add("BTC", _at(30), 101.0, 1.0, "b", now=now)
+    agg.add("BTC", _at(10), 100.0, 2.0, "a", now=now)  # earlier trade arrives late -> open
+    agg.add("BTC", _at(45), 99.0, 1.0, "c", now=now)
+    assert not agg.add("BTC", _at(45), 99.0, 1.0, "c", now=now)  # duplicate
+
+    assert agg.collect(now=now) == []  # minute still open
+    (bar,) = agg.collect(now=_at(61))
+    assert (bar.open, bar.high, bar.low, bar.close) == (100.0, 101.0, 99.0, 99.0)
+    assert bar.volume == 101.0 + 200.0 + 99.0
+    assert bar.trades == 3
+    assert bar.to_row()["timestamp"] == T0.isoformat()
+    assert agg.collect(now=_at(62)) == []  # unchanged -> not re-emitted
+
+
+def test_late_trade_within_grace_reemits_then_evicts():
+    agg = MinuteBarAggregator(grace_s=30)
+    agg.add("ETH", _at(5), 10.0, 1.0, "a", now=_at(5))
+    assert len(agg.collect(now=_at(61))) == 1
+
+    assert agg.add("ETH", _at(59), 12.0, 1.0, "b", now=_at(80))  # 20s late, within grace
+    (bar,) = agg.collect(now=_at(81))
+    assert (bar.close, bar.high) == (12.0, 12.0)
+
+    assert not agg.add("ETH", _at(58), 9.0, 1.0, "c", now=_at(95))  # past grace
+    assert agg.dropped_late == 1
+    agg.collect(now=_at(95))
+    assert len(agg) == 0
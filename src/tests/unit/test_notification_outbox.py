@@ -0,0 +1,64 @@
+"""Notification outbox: O(1) enqueue, spill/replay when full, coalescing and retry."""
+
+import time
+
+from src.communication import notification_outbox
+from src.communication.notification_outbox import NotificationOutbox, coalesce
+
+
+class _Notifier:
+    def __init__(self, fail_first=0):
+        self.sent, self.fail_first, self.closed, self.persistent = [], fail_first, 0, False
+
+    async def send_entry_notification(self, **kwargs):
+        if self.fail_first:
+            self.fail_first -= 1
+            return False
+        self.sent.append(kwargs)
+        return True
+
+    async def close(self):
+        self.closed += 1
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not cond():
+        time.sleep(0.01)
+    return cond()
+
+
+def test_spill_when_full_then_replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(notification_outbox, "POLL_INTERVAL_S", 0.01)
+    notifier = _Notifier()
+    outbox = NotificationOutbox(notifier, maxsize=2, spill_path=str(tmp_path / "spill.jsonl"))
+    # Fill before the worker runs: the overflow goes to the spill file
+    monkeypatch.setattr(outbox, "_ensure_worker", lambda: None)
+    for i in range(5):
+        assert outbox.enqueue("send_entry_notification", token_ticker=f"T{i}")
+    assert outbox.pending() == 2
+    assert len((tmp_path / "spill.jsonl").read_text().splitlines()) == 3
+
+    monkeypatch.delattr(outbox, "_ensure_worker")
+    outbox._ensure_worker()
+    assert _wait_for(lambda: len(notifier.sent) == 5)
+    assert [m["token_ticker"] for m in notifier.sent] == ["T0", "T1", "T2", "T3", "T4"]
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert notifier.persistent
+    outbox.stop()
+
+
+def test_retry_with_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(notification_outbox, "POLL_INTERVAL_S", 0.01)
+    monkeypatch.setattr(notification_outbox, "BACKOFF_BASE_S", 0.01)
+    notifier = _Notifier(fail_first=2)
+    outbox = NotificationOutbox(notifier, spill_path=str(tmp_path / "spill.jsonl"))
+    outbox.enqueue("send_entry_notification", token_ticker="T")
+    assert _wait_for(lambda: notifier.sent == [{"token_ticker": "T"}])
+    assert notifier.closed == 2  # client reset before each retry
+    outbox.stop()
+
+
+def test_coalesce_identical_entries():
+    e = lambda t: {"method": "send_entry_notification", "kwargs": {"token_ticker": t}, "attempts": 0}
+    assert [x["kwargs"]["token_ticker"] for x in coalesce([e("A"), e("B"), e("A")])] == ["A", "B"]
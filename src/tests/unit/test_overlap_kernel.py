@@ -0,0 +1,70 @@
+"""Bitset overlap clustering agrees with the original set-Jaccard implementation."""
+
+import random
+
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.jobs.overlap_kernel import MatchMatrix
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _ref_clusters(match_sets, threshold):
+    """The original first-fit clustering loop (singletons included)."""
+    keys = list(match_sets)
+    assigned, clusters = set(), []
+    for key in keys:
+        if key in assigned:
+            continue
+        cluster = [key]
+        assigned.add(key)
+        for other in keys:
+            if other in assigned or other == key:
+                continue
+            if _jaccard(match_sets[key], match_sets[other]) >= threshold:
+                cluster.append(other)
+                assigned.add(other)
+        clusters.append(cluster)
+    return clusters
+
+
+def _match_sets(n_patterns, n_trades, seed):
+    rng = random.Random(seed)
+    bases = [set(rng.sample(range(n_trades), rng.randint(1, 60))) for _ in range(max(1, n_patterns // 6))]
+    out = {}
+    for p in range(n_patterns):
+        base = rng.choice(bases)
+        # Near-copies of a few base sets so clusters actually form
+        trades = {t for t in base if rng.random() < 0.9} | set(rng.sample(range(n_trades), rng.randint(0, 5)))
+        out[f"pm.pattern.{p}"] = {f"pos-{t}" for t in trades}
+    return out
+
+
+@pytest.mark.parametrize("n_patterns,n_trades,seed,threshold", [
+    (1, 10, 1, 0.7),
+    (40, 100, 2, 0.7),
+    (300, 500, 3, 0.7),
+    (300, 500, 4, 0.5),
+    (120, 70, 5, 0.0),
+    (200, 3000, 6, 1.0),
+])
+def test_greedy_clusters_match_reference(n_patterns, n_trades, seed, threshold):
+    match_sets = _match_sets(n_patterns, n_trades, seed)
+    matrix = MatchMatrix(match_sets)
+    got = [[matrix.keys[i] for i in rows] for rows in matrix.greedy_clusters(threshold)]
+    assert got == _ref_clusters(match_sets, threshold)
+
+
+def test_pairwise_matches_set_jaccard():
+    match_sets = _match_sets(30, 200, 7)
+    match_sets["empty"] = set()
+    matrix = MatchMatrix(match_sets)
+    overlaps = matrix.pairwise(range(len(matrix)))
+    for i, a in enumerate(matrix.keys):
+        for j, b in enumerate(matrix.keys):
+            if i != j:
+                assert overlaps[i, j] == _jaccard(match_sets[a], match_sets[b])
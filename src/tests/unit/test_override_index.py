@@ -0,0 +1,57 @@
+"""pm_overrides index: bitmask subset matching agrees with jsonb containment."""
+
+import random
+
+from src.intelligence.lowcap_portfolio_manager.pm.override_index import OverrideIndex, jsonb_contains
+
+DIMS = {
+    "chain": ["solana", "base", "ethereum"],
+    "bucket": ["micro", "mid", "big"],
+    "timeframe": ["1m", "1h", "4h"],
+    "mcap_bucket": [1, 2.0, 3],
+    "is_shadow": [True, False],
+}
+
+
+def _random_subset(rng):
+    dims = rng.sample(sorted(DIMS), rng.randint(0, 3))
+    return {d: rng.choice(DIMS[d]) for d in dims}
+
+
+def test_matches_brute_force_containment():
+    rng = random.Random(7)
+    rows = [
+        {
+            "id": i,
+            "pattern_key": rng.choice(["pm.uptrend.S1.buy", "pm.uptrend.S3.dx"]),
+            "action_category": rng.choice(["entry", "add", "tuning_gate"]),
+            "scope_subset": _random_subset(rng),
+        }
+        for i in range(300)
+    ]
+    index = OverrideIndex(rows)
+    for _ in range(200):
+        scope = {d: rng.choice(v) for d, v in DIMS.items() if rng.random() < 0.9}
+        for pk in ("pm.uptrend.S1.buy", "pm.uptrend.S3.dx"):
+            cats = ["entry", "tuning_gate"]
+            expected = sorted(
+                r["id"] for r in rows
+                if r["pattern_key"] == pk and r["action_category"] in cats and jsonb_contains(scope, r["scope_subset"])
+            )
+            assert sorted(r["id"] for r in index.match(pk, cats, scope)) == expected
+
+
+def test_scalar_semantics_and_nested_values():
+    rows = [
+        {"id": 1, "pattern_key": "p", "action_category": "entry", "scope_subset": {"n": 1}},
+        {"id": 2, "pattern_key": "p", "action_category": "entry", "scope_subset": {"flag": True}},
+        {"id": 3, "pattern_key": "p", "action_category": "entry", "scope_subset": {"tags": ["a"]}},
+        {"id": 4, "pattern_key": "p", "action_category": "entry", "scope_subset": {}},
+    ]
+    index = OverrideIndex(rows)
+    ids = lambda scope: sorted(r["id"] for r in index.match("p", ["entry"], scope))
+    assert ids({"n": 1.0, "flag": True, "tags": ["b", "a"]}) == [1, 2, 3, 4]
+    # bool is not a number, a missing dimension never matches
+    assert ids({"n": True, "flag": 1}) == [4]
+    assert ids({"tags": "a"}) == [4]
+    assert index.match("p", ["add"], {"n": 1}) == []
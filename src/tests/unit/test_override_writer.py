@@ -0,0 +1,59 @@
+"""pm_overrides sync: only changed rows are upserted, stale rows deleted, other categories untouched."""
+
+from src.intelligence.lowcap_portfolio_manager.learning import override_writer
+from src.intelligence.lowcap_portfolio_manager.learning.override_writer import write_overrides
+
+
+def _lesson(pk, cat, scope, dira, n=20, tuning=None):
+    return {"pattern_key": pk, "action_category": cat, "scope_subset": scope, "dira": dira,
+            "dire": 0.0, "confidence_score": 0.5, "tuning_params": tuning, "n": n}
+
+
+def test_sync_writes_only_changes(fake_supabase):
+    stored = [
+        {"id": 1, **_lesson("p", "strength", {"bucket": 1, "chain": "solana"}, 0.1)},   # unchanged (1 == 1.0, key order)
+        {"id": 2, **_lesson("p", "strength", {}, 0.1)},                                  # dira changes
+        {"id": 3, **_lesson("p", "tuning_gate", {}, 0.0, tuning={"ts_min_delta": 0.05})},  # unchanged
+        {"id": 4, **_lesson("q", "strength", {"chain": "base"}, 0.2)},                   # stale
+        {"id": 5, **_lesson("q", "entry", {}, 0.2)},                                     # not owned
+    ]
+    client = fake_supabase(pm_overrides=[dict(r) for r in stored])
+    lessons = [
+        _lesson("p", "strength", {"chain": "solana", "bucket": 1.0}, 0.1),
+        _lesson("p", "strength", {}, 0.3),
+        _lesson("p", "tuning_gate", {}, 0.0, tuning={"ts_min_delta": 0.05}),
+        _lesson("p", "strength", {"chain": "base"}, 0.4),  # new
+    ]
+    summary = write_overrides(client, lessons, ["strength", "tuning_gate"])
+
+    assert (summary.inserted, summary.updated, summary.unchanged, summary.deleted) == (1, 1, 2, 1)
+    upserts = [q.payload for q in client.executed(op="upsert")]
+    assert len(upserts) == 1
+    assert sorted((r["scope_subset"].get("chain", ""), r["dira"]) for r in upserts[0]) == [("", 0.3), ("base", 0.4)]
+    assert all("last_updated_at" in r for r in upserts[0])
+    rows = client.tables["pm_overrides"]
+    assert len(rows) == 5 and sorted(r["id"] for r in rows if "id" in r) == [1, 2, 3, 5]
+
+
+def test_no_changes_means_no_writes(monkeypatch, fake_supabase):
+    monkeypatch.setattr(override_writer, "PAGE_SIZE", 2)
+    stored = [{"id": i, **_lesson("p", "strength", {"i": i}, 0.1)} for i in range(5)]
+    client = fake_supabase(pm_overrides=[dict(r) for r in stored])
+    summary = write_overrides(client, [_lesson("p", "strength", {"i": i}, 0.1) for i in range(5)], ["strength"])
+
+    assert (summary.written, summary.unchanged, summary.deleted) == (0, 5, 0)
+    assert not summary.changed
+    assert all(q.op == "select" for q in client.calls)
+
+
+def test_upserts_are_chunked(monkeypatch, fake_supabase):
+    monkeypatch.setattr(override_writer, "UPSERT_CHUNK", 3)
+    client = fake_supabase(pm_overrides=[])
+    # Duplicate keys collapse to the last lesson (as sequential upserts did)
+    lessons = [_lesson("p", "strength", {"i": i}, 0.1) for i in range(7)] + [_lesson("p", "strength", {"i": 0}, 0.9)]
+    summary = write_overrides(client, lessons, ["strength"])
+
+    assert summary.inserted == 7
+    upserts = [q.payload for q in client.executed(op="upsert")]
+    assert [len(p) for p in upserts] == [3, 3, 1]
+    assert [r["dira"] for p in upserts for r in p if r["scope_subset"] == {"i": 0}] == [0.9]
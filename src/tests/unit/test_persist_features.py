@@ -0,0 +1,119 @@
+"""PMCoreTick features writes are limited to the keys that changed."""
+
+from datetime import datetime, timezone
+
+from src.intelligence.lowcap_portfolio_manager.data import features_writer
+from src.intelligence.lowcap_portfolio_manager.data.features_writer import PATCH_RPC, apply_patch
+from src.intelligence.lowcap_portfolio_manager.jobs.pm_core_tick import PMCoreTick, PositionPlan
+from src.intelligence.lowcap_portfolio_manager.jobs.position_snapshot import PositionSnapshot
+
+TRIM = {"decision_type": "trim", "size_frac": 0.5, "reasons": {}}
+
+
+class _Writer:
+    def __init__(self):
+        self.patches, self.flushed = [], []
+
+    def set(self, pid, key, value):
+        self.patches.append((pid, key, value))
+
+    def unset(self, pid, key):
+        self.patches.append((pid, key, None))
+
+    def flush(self, pids=None):
+        self.flushed.append(pids)
+
+
+class _Snapshot:
+    def __init__(self, positions):
+        self.positions, self.dirty = positions, {}
+
+    def __contains__(self, pid):
+        return pid in self.positions
+
+    def get(self, pid):
+        return self.positions.get(pid)
+
+    def set_features(self, pid, features, keys=None):
+        self.positions[pid]["features"] = features
+        self.dirty.setdefault(pid, set()).update(keys or ("*",))
+
+
+def _positions_db(fake_supabase, monkeypatch, rows):
+    """Client whose patch_position_features RPC applies patches to lowcap_positions."""
+    monkeypatch.delenv("FEATURES_PATCH_RPC_ENABLED", raising=False)
+    monkeypatch.setattr(features_writer, "_rpc_unavailable", False)
+
+    def patch_features(params):
+        by_id = {r["id"]: r for r in sb.tables["lowcap_positions"]}
+        for patch in params["patches"]:
+            by_id[patch["id"]]["features"] = apply_patch(by_id[patch["id"]].get("features"), patch)
+
+    sb = fake_supabase(rpcs={PATCH_RPC: patch_features}, lowcap_positions=rows)
+    return sb
+
+
+def _tick(sb=None, snapshot=None):
+    tick = PMCoreTick.__new__(PMCoreTick)
+    tick.sb = sb
+    tick.features_writer = _Writer()
+    tick._snapshot = snapshot
+    return tick
+
+
+def test_execution_history_update_patches_only_its_key(fake_supabase, monkeypatch):
+    stored = {"pm_execution_history": {}, "uptrend_engine_v4": {"state": "S3"}, "token_bucket": "micro"}
+    sb = _positions_db(fake_supabase, monkeypatch, [{"id": 7, "features": stored}])
+    tick = _tick(sb)
+    tick._update_execution_history(7, "trim", {"status": "success", "price": 1.0, "actual_usd": 25.0}, TRIM)
+
+    patches = [p for call in sb.executed(op="rpc") for p in call.params["patches"]]
+    assert [(p["id"], set(p["set"])) for p in patches] == [(7, {"pm_execution_history"})]
+    features = sb.tables["lowcap_positions"][0]["features"]
+    assert features["pm_execution_history"]["last_trim"]["price"] == 1.0
+    assert features["pm_execution_history"]["prev_state"] == "S3"
+    assert features["uptrend_engine_v4"] == {"state": "S3"} and features["token_bucket"] == "micro"
+    assert tick.features_writer.patches == []
+
+
+def test_fused_tick_execution_history_survives_refresh(fake_supabase, monkeypatch):
+    row = {"id": 7, "status": "active", "state": "S3", "total_quantity": 10.0,
+           "features": {"uptrend_engine_v4": {"state": "S3"}, "ta": {"v": 0}}}
+    sb = _positions_db(fake_supabase, monkeypatch, [row])
+    snapshot = PositionSnapshot(sb, "1h", [dict(row, features=dict(row["features"]))])
+    tick = _tick(sb, snapshot)
+    tick.executor = type("Executor", (), {"execute": lambda self, act, p: {"status": "success", "price": 2.0}})()
+    for stage in ("_update_position_after_execution", "_send_execution_notification",
+                  "_check_position_closure", "_write_strands"):
+        setattr(tick, stage, lambda *args, **kwargs: None)
+
+    # Planning: a pending TA change, flushed because the plan executes
+    snapshot.get(7)["features"]["ta"] = {"v": 1}
+    snapshot.set_features(7, snapshot.get(7)["features"], keys=("ta",))
+    snapshot.flush([7])
+    plan = PositionPlan(position=snapshot.get(7), token="T", now=datetime.now(timezone.utc), a_final=0.5,
+                        e_final=0.5, regime_state_str="", actions=[TRIM], regime_context={},
+                        token_bucket=None, db_direct=True)
+
+    results = tick._execute_plan(plan)
+    assert results["7:trim"]["status"] == "success" and not snapshot._dirty
+    tick._finish_plan(plan, results)
+
+    stored = sb.tables["lowcap_positions"][0]["features"]
+    assert stored["pm_execution_history"]["last_trim"]["price"] == 2.0 and stored["ta"] == {"v": 1}
+    assert snapshot.get(7)["features"] == stored
+    assert snapshot.flush() == 0
+
+
+def test_fresh_read_patches_into_snapshot_copy():
+    held = {"pm_execution_history": {"old": True}, "pm_logging_meta": {"unflushed": 1}}
+    snapshot = _Snapshot({7: {"id": 7, "features": held}})
+    tick = _tick(snapshot=snapshot)
+
+    fresh = {"pm_execution_history": {"new": True}, "pm_logging_meta": {"stale": 1}}
+    tick._persist_features(7, fresh, keys=("pm_execution_history",))
+
+    assert snapshot.positions[7]["features"] is held
+    assert held == {"pm_execution_history": {"new": True}, "pm_logging_meta": {"unflushed": 1}}
+    assert snapshot.dirty == {7: {"pm_execution_history"}}
+    assert tick.features_writer.patches == []
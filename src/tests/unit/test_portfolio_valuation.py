@@ -0,0 +1,73 @@
+"""Portfolio valuation: vectorized P&L matches the per-position formulas; one batched write."""
+
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.pm import portfolio_valuation as pv
+
+
+def _position(pid, qty, bought, sold, alloc, extracted, entry, chain="solana"):
+    return {
+        "id": pid, "token_contract": f"T{pid}", "token_chain": chain,
+        "total_quantity": qty, "total_tokens_bought": bought, "total_tokens_sold": sold,
+        "total_allocation_usd": alloc, "total_extracted_usd": extracted, "avg_entry_price": entry,
+    }
+
+
+def test_revalue_positions_matches_scalar_formulas():
+    positions = [
+        _position(1, 100.0, 100.0, 0.0, 50.0, 0.0, 0.5),
+        _position(2, 10.0, 80.0, 40.0, 20.0, 30.0, 0.25),  # stale quantity -> 40
+        _position(3, 5.0, 5.0, 0.0, 0.0, 0.0, None),  # no allocation / entry price
+        _position(4, 1.0, 1.0, 0.0, 10.0, 0.0, 1.0),  # no price -> skipped
+    ]
+    prices = {("T1", "solana"): 0.75, ("T2", "solana"): 1.0, ("T3", "solana"): 2.0}
+
+    updates, summary = pv.revalue_positions(positions, prices)
+    by_id = {u["id"]: u for u in updates}
+
+    assert summary.positions == 4 and summary.priced == 3 and summary.reconciled == 1
+    assert set(by_id) == {1, 2, 3}
+
+    assert by_id[1]["current_usd_value"] == pytest.approx(75.0)
+    assert by_id[1]["total_pnl_usd"] == pytest.approx(25.0)
+    assert by_id[1]["total_pnl_pct"] == pytest.approx(50.0)
+    assert by_id[1]["rpnl_usd"] == pytest.approx(0.0)  # all unrealized
+
+    assert by_id[2]["total_quantity"] == pytest.approx(40.0)
+    assert by_id[2]["total_pnl_usd"] == pytest.approx(40.0 + 30.0 - 20.0)
+    assert by_id[2]["rpnl_usd"] == pytest.approx(50.0 - (1.0 - 0.25) * 40.0)
+
+    assert by_id[3]["total_pnl_pct"] == 0.0 and by_id[3]["rpnl_usd"] == pytest.approx(10.0)
+
+    assert summary.total_value_usd == pytest.approx(75.0 + 40.0 + 10.0)
+    assert summary.total_pnl_pct == pytest.approx(summary.total_pnl_usd / 70.0 * 100.0)
+
+
+def test_write_pnl_updates_batches_rpc(monkeypatch, fake_supabase):
+    monkeypatch.setattr(pv, "_rpc_unavailable", False)
+    sb = fake_supabase()
+    updates = [{"id": i, "total_pnl_usd": 0.0} for i in range(5)]
+    assert pv.write_pnl_updates(sb, updates, batch_size=2) == 5
+    assert [len(call.params["updates"]) for call in sb.calls] == [2, 2, 1]
+    assert {call.name for call in sb.calls} == {pv.PNL_RPC}
+
+
+def test_write_pnl_updates_latches_only_on_missing_function(monkeypatch, fake_supabase):
+    monkeypatch.setattr(pv, "_rpc_unavailable", False)
+
+    def failing_rpc(error):
+        def before_execute(call):
+            if call.op == "rpc":
+                raise error
+        return fake_supabase(before_execute, lowcap_positions=[{"id": 1}, {"id": 2}])
+
+    def updated(sb):
+        return [q.arg("eq", "id") for q in sb.executed("lowcap_positions", "update")]
+
+    sb = failing_rpc(RuntimeError("502 Bad Gateway"))
+    assert pv.write_pnl_updates(sb, [{"id": 1, "total_pnl_usd": 0.0}]) == 1
+    assert updated(sb) == [1] and not pv._rpc_unavailable
+
+    sb = failing_rpc(RuntimeError({"code": "42883", "message": "function update_position_pnl does not exist"}))
+    assert pv.write_pnl_updates(sb, [{"id": 2, "total_pnl_usd": 0.0}]) == 1
+    assert updated(sb) == [2] and pv._rpc_unavailable
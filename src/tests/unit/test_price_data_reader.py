@@ -0,0 +1,89 @@
+"""Bulk OHLC reads: each token bounded by its own watermark, same result as per-token reads."""
+
+from datetime import datetime, timedelta, timezone
+
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import BarStore
+from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+
+NOW = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+
+def _queries(sb):
+    """(tokens, (gte, lte)) of each read."""
+    return [
+        (q.arg("in", "token_contract") or [q.arg("eq", "token_contract")],
+         (q.arg("gte", "timestamp"), q.arg("lte", "timestamp")))
+        for q in sb.calls
+    ]
+
+
+def _bars(token, start, n, skip=()):
+    return [
+        {"token_contract": token, "chain": "solana", "timeframe": "1h",
+         "timestamp": (start + timedelta(hours=i)).isoformat(),
+         "open_usd": 1.0, "high_usd": 1.0, "low_usd": 1.0, "close_usd": float(i), "volume": 1.0}
+        for i in range(n) if i not in skip
+    ]
+
+
+def test_since_bulk_bounds_each_token_by_its_watermark(monkeypatch, fake_supabase):
+    monkeypatch.delenv("BAR_STORE_DIR", raising=False)
+    fresh_start, stale_start = NOW - timedelta(hours=5), NOW - timedelta(days=30)
+    rows = (
+        _bars("fresh_a", NOW - timedelta(days=40), 40 * 24)
+        + _bars("fresh_b", NOW - timedelta(days=40), 40 * 24)
+        + _bars("stale", NOW - timedelta(days=40), 40 * 24, skip={10 * 24 + 3})
+        # two bars, then a two-day gap: the capped window clips it, so it falls back to a per-token read
+        + _bars("sparse", NOW - timedelta(days=40), 40 * 24, skip=set(range(20 * 24 + 2, 22 * 24)))
+    )
+    since = {
+        ("fresh_a", "solana"): fresh_start.isoformat(),
+        ("fresh_b", "solana"): (fresh_start + timedelta(hours=2)).isoformat(),
+        ("stale", "solana"): stale_start.isoformat(),
+        ("sparse", "solana"): (NOW - timedelta(days=20)).isoformat(),
+    }
+    expected = {
+        key: PriceDataReader(fake_supabase(lowcap_price_data_ohlc=rows)).fetch_ohlc_since(key[0], key[1], "1h", iso, limit=8)
+        for key, iso in since.items()
+    }
+
+    sb = fake_supabase(lowcap_price_data_ohlc=rows)
+    got = PriceDataReader(sb).fetch_ohlc_since_bulk(since, "1h", limit=8)
+
+    assert got == expected
+    assert {key[0]: len(v) for key, v in got.items()} == {"fresh_a": 5, "fresh_b": 3, "stale": 8, "sparse": 8}
+    # The stale watermark is fetched on its own, with a capped window; the fresh pair shares one query
+    queries = _queries(sb)
+    bulk = [q for q in queries if q[0] and len(q[0]) > 1]
+    assert bulk == [(["fresh_a", "fresh_b"], (fresh_start.isoformat(), None))]
+    stale = [q for q in queries if q[0] == ["stale"]]
+    assert len(stale) == 1 and stale[0][1][0] == stale_start.isoformat() and stale[0][1][1] is not None
+    assert len([q for q in queries if q[0] == ["sparse"]]) == 2
+
+
+def test_recent_bulk_reads_past_a_gap_at_the_window_start(monkeypatch, tmp_path, fake_supabase):
+    monkeypatch.delenv("BAR_STORE_DIR", raising=False)
+    start = NOW - timedelta(hours=199)
+    rows = (
+        _bars("steady", start, 200)
+        # older bars, then no bars for the first 16 of the 30-bar window
+        + _bars("gappy", start, 200, skip=set(range(170, 186)))
+        + _bars("young", NOW - timedelta(hours=9), 10)
+    )
+    tokens = [("steady", "solana"), ("gappy", "solana"), ("young", "solana")]
+    expected = {key: PriceDataReader(fake_supabase(lowcap_price_data_ohlc=rows)).fetch_recent_ohlc(
+        key[0], key[1], "1h", limit=20) for key in tokens}
+
+    got = PriceDataReader(fake_supabase(lowcap_price_data_ohlc=rows)).fetch_recent_ohlc_bulk(tokens, "1h", limit=20)
+
+    assert got == expected
+    assert {key[0]: len(v) for key, v in got.items()} == {"steady": 20, "gappy": 20, "young": 10}
+
+    # With a bar store the young token's own read caches it as complete: no per-token read next time
+    store = BarStore(str(tmp_path))
+    sb = fake_supabase(lowcap_price_data_ohlc=rows)
+    PriceDataReader(sb, bar_store=store).fetch_recent_ohlc_bulk(tokens, "1h", limit=20)
+    sb.calls.clear()
+    again = PriceDataReader(sb, bar_store=store).fetch_recent_ohlc_bulk(tokens, "1h", limit=20)
+    assert again == expected
+    assert not [q for q in _queries(sb) if q[0] == ["young"]]
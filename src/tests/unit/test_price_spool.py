@@ -0,0 +1,100 @@
+"""1m price writes: upsert ignoring duplicates, spool flushed separately, rejected rows quarantined."""
+
+import json
+
+from src.trading import scheduled_price_collector as spc
+
+
+class _ApiError(Exception):
+    def __init__(self, code):
+        super().__init__({"code": code, "message": f"error {code}"})
+        self.code = code
+
+
+def _client(fake_supabase, fail=lambda rows: None):
+    def before_execute(q):
+        assert q.table == "lowcap_price_data_1m"
+        assert q.options == {"on_conflict": spc.PRICE_CONFLICT, "ignore_duplicates": True}
+        error = client.fail(q.payload)
+        if error:
+            raise error
+
+    client = fake_supabase(before_execute, lowcap_price_data_1m=[])
+    client.fail = fail
+    return client
+
+
+def _sent(client):
+    return [[r["token_contract"] for r in q.payload] for q in client.calls]
+
+
+def _stored(client):
+    return sorted(r["token_contract"] for r in client.tables["lowcap_price_data_1m"])
+
+
+def _collector(tmp_path, client):
+    c = spc.ScheduledPriceCollector.__new__(spc.ScheduledPriceCollector)
+    c.supabase_manager = type("M", (), {"client": client})()
+    c.spool_path = str(tmp_path / "spool.jsonl")
+    c.quarantine_path = str(tmp_path / "quarantine.jsonl")
+    c._pending_rows = []
+    return c
+
+
+def _rows(prefix, n):
+    return [{"token_contract": f"{prefix}{i}", "chain": "solana", "timestamp": "t"} for i in range(n)]
+
+
+def _read(path):
+    with open(path) as f:
+        return [json.loads(line)["token_contract"] for line in f]
+
+
+def test_spool_is_flushed_in_its_own_chunks(monkeypatch, tmp_path, fake_supabase):
+    monkeypatch.setattr(spc, "PRICE_INSERT_CHUNK", 2)
+    client = _client(fake_supabase)
+    c = _collector(tmp_path, client)
+    c._spool_rows(_rows("old", 3))
+    c._pending_rows = _rows("new", 3)
+
+    assert c._flush_price_rows() == 6
+    assert _sent(client) == [["new0", "new1"], ["new2"], ["old0", "old1"], ["old2"]]
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+def test_transient_failure_spools_and_rejected_rows_are_quarantined(monkeypatch, tmp_path, fake_supabase):
+    monkeypatch.setattr(spc, "PRICE_INSERT_CHUNK", 4)
+
+    def fail(rows):
+        names = {r["token_contract"] for r in rows}
+        if "new5" in names:
+            return _ApiError("22P02")  # invalid input: rejected row
+        if "new0" in names:
+            return TimeoutError("read timed out")
+
+    client = _client(fake_supabase, fail)
+    c = _collector(tmp_path, client)
+    c._pending_rows = _rows("new", 8)
+
+    assert c._flush_price_rows() == 3
+    assert _stored(client) == ["new4", "new6", "new7"]
+    assert _read(c.spool_path) == ["new0", "new1", "new2", "new3"]
+    assert _read(c.quarantine_path) == ["new5"]
+
+    # Next cycle retries the spool; the quarantined row is never resent
+    client.fail = lambda rows: None
+    client.calls.clear()
+    assert c._flush_price_rows() == 4
+    assert all("new5" not in sent for sent in _sent(client))
+
+
+def test_schema_rejection_quarantines_whole_chunk(monkeypatch, tmp_path, fake_supabase):
+    monkeypatch.setattr(spc, "PRICE_INSERT_CHUNK", 4)
+    client = _client(fake_supabase, lambda rows: _ApiError("PGRST204"))  # unknown column
+    c = _collector(tmp_path, client)
+    c._pending_rows = _rows("new", 4)
+
+    assert c._flush_price_rows() == 0
+    assert len(client.calls) == 1
+    assert _read(c.quarantine_path) == ["new0", "new1", "new2", "new3"]
+    assert not (tmp_path / "spool.jsonl").exists()
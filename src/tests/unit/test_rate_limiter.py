@@ -0,0 +1,41 @@
+"""Adaptive rate limiter: token bucket pacing, 429 back-off and additive recovery."""
+
+import asyncio
+import time
+
+from src.trading.rate_limiter import AdaptiveRateLimiter
+
+
+def test_burst_then_paced():
+    limiter = AdaptiveRateLimiter(rate_per_minute=600, burst=2)  # 10/s
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    # 2 from the burst, then 2 more at 10/s
+    assert 0.15 <= elapsed < 0.5
+
+
+def test_rate_limited_halves_and_pauses_then_recovers():
+    limiter = AdaptiveRateLimiter(rate_per_minute=600, min_rate_per_minute=120)
+    limiter.on_rate_limited(retry_after=0.2)
+    assert limiter.rate_per_minute == 300
+
+    async def run():
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.19
+
+    for _ in range(5):
+        limiter.on_rate_limited(retry_after=0.01)
+    assert limiter.rate_per_minute == 120  # floor
+
+    for _ in range(1000):
+        limiter.on_success()
+    assert limiter.rate_per_minute == 600  # capped at max
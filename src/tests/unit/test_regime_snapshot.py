@@ -0,0 +1,37 @@
+"""Regime snapshot: one projected query, newest row per driver/timeframe, version-based reload."""
+
+from src.intelligence.lowcap_portfolio_manager.regime import regime_snapshot
+from src.intelligence.lowcap_portfolio_manager.regime.regime_snapshot import RegimeSnapshot, get_regime_snapshot
+
+
+ROWS = [
+    {"token_ticker": "BTC", "timeframe": "1d", "book_id": "onchain_crypto", "state": "S0",
+     "updated_at": "2026-10-16T00:00:00", "u_state": "S1", "u_buy_flag": True},
+    {"token_ticker": "BTC", "timeframe": "1d", "book_id": "onchain_crypto", "state": "S2",
+     "updated_at": "2026-10-15T00:00:00", "u_state": "S2"},
+    {"token_ticker": "BTC", "timeframe": "1h", "book_id": "onchain_crypto", "state": "S3",
+     "updated_at": "2026-10-16T00:01:00", "u_state": None, "u_trim_flag": True},
+]
+
+
+def test_horizon_states_and_flags():
+    snap = RegimeSnapshot(ROWS)
+    # Newest 1d row wins; 1h falls back to the state column; 1m missing -> S4
+    assert snap.horizon_states("BTC") == {"macro": "S1", "meso": "S3", "micro": "S4"}
+    assert snap.horizon_states("ALT") == {"macro": "S4", "meso": "S4", "micro": "S4"}
+    latest = snap.latest("BTC", book_id="onchain_crypto")
+    assert latest.timeframe == "1h" and latest.flag("trim_flag") and not latest.flag("buy_flag")
+    assert snap.latest("BTC", "1d").flag("buy_flag")
+    assert snap.latest("BTC", book_id="perps") is None
+    assert [d.updated_at[:10] for d in snap.book_rows("onchain_crypto")][-1] == "2026-10-16"
+
+
+def test_reload_on_version_bump(monkeypatch, fake_supabase):
+    monkeypatch.setattr(regime_snapshot, "_snapshot", None)
+    client = fake_supabase(lowcap_positions=[dict(r, status="regime_driver") for r in ROWS])
+    first = get_regime_snapshot(client)
+    assert get_regime_snapshot(client) is first
+    assert len(client.calls) == 1 and "features->uptrend_engine_v4->state" in client.calls[0].columns
+    regime_snapshot.mark_regime_updated()
+    assert get_regime_snapshot(client) is not first
+    assert len(client.calls) == 2
@@ -0,0 +1,56 @@
+"""Replay EDX slow-field series (indexed from history) match the engine's per-window rebuild."""
+
+import importlib.util
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from src.intelligence.lowcap_portfolio_manager.jobs.uptrend_engine_v4 import UptrendEngineV4
+
+_REPLAY = Path(__file__).resolve().parents[3] / "tools" / "backtester" / "v4" / "code" / "replay_uptrend_v4.py"
+
+
+def _load_replay():
+    spec = importlib.util.spec_from_file_location("replay_uptrend_v4", _REPLAY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _rows(n: int, seed: int = 5):
+    rng = random.Random(seed)
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    px, rows = 1.0, []
+    for i in range(n):
+        o = px
+        px *= 1.0 + rng.gauss(0.0005, 0.02)
+        rows.append({
+            "timestamp": (t0 + timedelta(hours=i)).isoformat(),
+            "open_usd": o, "high_usd": max(o, px) * 1.01, "low_usd": min(o, px) * 0.99,
+            "close_usd": px, "volume": rng.random() * 1000.0,
+        })
+    return rows
+
+
+def test_indexed_series_match_window_rebuild():
+    replay = _load_replay()
+    rows = _rows(900)
+    engine = replay.ReplayEngine("tok", "solana", rows)
+    live = UptrendEngineV4.__new__(UptrendEngineV4)
+
+    for start, end in [(0, 11), (100, 140), (200, 498), (150, 549), (20, 899)]:
+        window = rows[start:end + 1]
+        closes = [r["close_usd"] for r in window]
+        want = live._slow_field_series(closes, window)
+        got = engine._slow_field_series(closes, window)
+
+        ema250, ema333, rsi_vals, adx_tail = got
+        np.testing.assert_allclose(ema250, want[0], rtol=1e-12)
+        np.testing.assert_allclose(ema333, want[1], rtol=1e-12)
+        assert rsi_vals == want[2]
+        if len(window) < replay.ADX_SEED_WASHOUT_BARS:
+            assert adx_tail == want[3]
+        else:
+            np.testing.assert_allclose(adx_tail, want[3], rtol=1e-8)
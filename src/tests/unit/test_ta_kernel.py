@@ -0,0 +1,69 @@
+"""Bit-compatibility tests: ta_kernel vs ta_utils (single source of truth)."""
+
+import random
+
+import numpy as np
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.jobs import ta_kernel
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_utils import (
+    adx_series_wilder,
+    atr_series_wilder,
+    avwap_series,
+    ema_series,
+    ema_slope_delta,
+    ema_slope_normalized,
+    lin_slope,
+    rsi,
+)
+
+
+def _bars(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    px = 1.0
+    bars = []
+    for i in range(n):
+        o = px
+        px *= 1.0 + rng.gauss(0.0, 0.02)
+        h = max(o, px) * (1.0 + rng.random() * 0.01)
+        l = min(o, px) * (1.0 - rng.random() * 0.01)
+        v = 0.0 if i % 17 == 3 else rng.random() * 1000.0
+        bars.append({"o": o, "h": h, "l": l, "c": px, "v": v})
+    return bars
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 16, 17, 40, 400])
+def test_series_match_ta_utils(n):
+    bars = _bars(n)
+    block = ta_kernel.bars_to_block(bars)
+    closes = [b["c"] for b in bars]
+    ind = ta_kernel.compute_indicator_block(block)
+
+    for span in ta_kernel.DEFAULT_EMA_SPANS:
+        assert ind.ema_list(span) == ema_series(closes, span)
+    assert ind.atr.tolist() == atr_series_wilder(bars, 14)
+    assert ind.adx.tolist() == adx_series_wilder(bars, 14)
+    assert ind.rsi.tolist() == [rsi(closes[: k + 1], 14) for k in range(n)]
+
+
+def test_prefix_slopes_match_ta_utils():
+    bars = _bars(120)
+    block = ta_kernel.bars_to_block(bars)
+    ind = ta_kernel.compute_indicator_block(block)
+    ema60 = ind.ema_list(60)
+    slope = ind.ema_slope[60].tolist()
+    delta = ind.d_ema_slope[60].tolist()
+    raw = ta_kernel.lin_slope_series(ind.ema[60], 10).tolist()
+    for i in range(len(ema60)):
+        prefix = ema60[: i + 1]
+        assert raw[i] == lin_slope(prefix, 10)
+        assert slope[i] == ema_slope_normalized(prefix, window=10)
+        assert delta[i] == ema_slope_delta(prefix, window=10, lag=10)
+
+
+def test_avwap_matches_ta_utils():
+    bars = _bars(60)
+    prices = [b["c"] for b in bars]
+    volumes = [0.0, 0.0] + [b["v"] for b in bars[2:]]
+    out = ta_kernel.avwap_block(np.array(prices), np.array(volumes))
+    assert out.tolist() == avwap_series(prices, volumes)
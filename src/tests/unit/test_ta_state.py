@@ -0,0 +1,77 @@
+"""Incremental TA state: folding new bars must match a full recompute."""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_state import MAX_INCREMENTAL_BARS, MIN_BARS, TAState, full_state, replay_ta
+
+
+def _rows(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    px = 1.0
+    rows = []
+    for i in range(n):
+        o = px
+        px *= 1.0 + rng.gauss(0.0, 0.01)
+        rows.append({
+            "timestamp": (t0 + timedelta(minutes=i)).isoformat(),
+            "open_usd": o,
+            "high_usd": max(o, px) * 1.002,
+            "low_usd": min(o, px) * 0.998,
+            "close_usd": px,
+            "volume": rng.random() * 1000.0,
+        })
+    return rows
+
+
+def test_fold_matches_full_recompute():
+    rows = _rows(450)
+    state = full_state(rows[:400])
+    assert state.fold_rows(rows[399:], "1m")
+    assert state.folded_last_run == 50
+
+    ref = full_state(rows)
+    assert state.watermark_ts == ref.watermark_ts
+    assert state.ema == ref.ema
+    assert state.atr == ref.atr
+    assert state.adx == ref.adx
+    assert state.adx_acc == ref.adx_acc
+    assert state.rsi == ref.rsi
+    assert state.closes == ref.closes
+
+
+def test_fold_roundtrips_through_dict():
+    rows = _rows(420)
+    state = TAState.from_dict(full_state(rows[:400]).to_dict())
+    assert state is not None
+    assert state.fold_rows(rows[399:], "1m")
+    assert state.to_ta("1m", datetime.now(timezone.utc))["ema"]["ema20_1m"] == state.ema["20"][-1]
+
+
+def test_gap_or_restatement_requires_full_recompute():
+    rows = _rows(420)
+    assert not full_state(rows[:400]).fold_rows([rows[399]] + rows[401:], "1m")
+
+    restated = dict(rows[399], close_usd=rows[399]["close_usd"] * 1.01)
+    assert not full_state(rows[:400]).fold_rows([restated] + rows[400:], "1m")
+
+
+def test_too_stale_matches_fold_limit():
+    rows = _rows(400)
+    state = full_state(rows)
+    watermark = datetime.fromisoformat(rows[-1]["timestamp"])
+    assert not state.too_stale(watermark + timedelta(minutes=MAX_INCREMENTAL_BARS), "1m")
+    assert state.too_stale(watermark + timedelta(minutes=MAX_INCREMENTAL_BARS + 2), "1m")
+
+
+def test_replay_matches_tracker_writes():
+    rows = _rows(700)
+    out = replay_ta(rows, "1m")
+    first = MIN_BARS["1m"] - 1
+
+    assert out[:first] == [None] * first
+    assert out[first] == full_state(rows[: first + 1]).to_ta("1m", datetime.fromisoformat(rows[first]["timestamp"]))
+    last = full_state(rows).to_ta("1m", datetime.fromisoformat(rows[-1]["timestamp"]))
+    assert out[-1]["ema"] == last["ema"]
+    assert out[-1]["atr"] == last["atr"]
@@ -0,0 +1,99 @@
+"""Bitset Apriori over the columnar trajectory frame agrees with the row-filtering miner."""
+
+import random
+from statistics import mean, variance
+
+import pytest
+
+from src.intelligence.lowcap_portfolio_manager.learning.trajectory_frame import ScopeMiner, TrajectoryFrame
+
+DIMS = {
+    "timeframe": ["1m", "1h", "4h"],
+    "mcap_bucket": ["micro", "small", "mid"],
+    "chain": ["solana", "base"],
+    "age_bucket": [1, 2, 3],
+    "curator": ["a", "b", None],
+}
+TYPES = ["immediate_failure", "trim_but_loss", "trimmed_winner", "clean_winner"]
+
+
+def _rows(n, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        scope = {d: rng.choice(v) for d, v in DIMS.items() if rng.random() < 0.9}
+        rows.append({
+            "pattern_key": rng.choice(["pm.uptrend.S1.entry", "pm.uptrend.S2.entry", "pm.uptrend.S3.dx"]),
+            "trajectory_type": rng.choice(TYPES),
+            "roi": round(rng.gauss(2.0, 15.0), 2),
+            "is_shadow": rng.random() < 0.3,
+            "scope": scope,
+        })
+    return rows
+
+
+def _ref_mine(rows, min_n):
+    """The original recursive miner, on row lists."""
+    rows = [r for r in rows if not r["is_shadow"] or r["roi"] > 0]
+    dims = sorted({d for r in rows for d, v in r["scope"].items() if v is not None})
+    out = {}
+
+    def rec(slice_, mask, start):
+        if len(slice_) < min_n:
+            return
+        for pk in {r["pattern_key"] for r in slice_}:
+            group = [r for r in slice_ if r["pattern_key"] == pk]
+            if len(group) >= min_n:
+                out[(tuple(sorted(mask.items())), pk)] = group
+        for i in range(start, len(dims)):
+            dim = dims[i]
+            for val in {r["scope"].get(dim) for r in slice_} - {None}:
+                sub = [r for r in slice_ if r["scope"].get(dim) == val]
+                if len(sub) >= min_n:
+                    rec(sub, {**mask, dim: val}, i + 1)
+
+    rec(rows, {}, 0)
+    return out
+
+
+@pytest.mark.parametrize("n,seed,min_n", [(0, 1, 12), (30, 2, 12), (600, 3, 12), (2000, 4, 40)])
+def test_mined_groups_and_stats_match(n, seed, min_n):
+    rows = _rows(n, seed)
+    miner = ScopeMiner(TrajectoryFrame.from_records(rows).strength_eligible(), min_support=min_n)
+    mined = {}
+    for scope_subset, pattern_key, bits in miner.mine():
+        key = (tuple(sorted(scope_subset.items())), pattern_key)
+        assert key not in mined
+        mined[key] = miner.stats(bits)
+
+    ref = _ref_mine(rows, min_n)
+    assert mined.keys() == ref.keys()
+    for key, group in ref.items():
+        s = mined[key]
+        rois = [r["roi"] for r in group]
+        active_clean = [r["roi"] for r in group if not r["is_shadow"] and r["trajectory_type"] == "clean_winner"]
+        assert s.n == len(group)
+        assert s.avg_roi == pytest.approx(mean(rois), abs=1e-9)
+        assert s.roi_variance == pytest.approx(variance(rois), rel=1e-9)
+        assert s.win_rate == pytest.approx(sum(r > 0 for r in rois) / len(rois))
+        assert s.n_trim_but_loss == sum(r["trajectory_type"] == "trim_but_loss" for r in group)
+        assert s.n_shadow_winners == sum(r["is_shadow"] and r["roi"] > 0 for r in group)
+        assert s.n_active_clean == len(active_clean)
+        if active_clean:
+            assert s.active_clean_avg_roi == pytest.approx(mean(active_clean), abs=1e-9)
+
+
+def test_scope_values_use_jsonb_equality():
+    rows = [{"pattern_key": "p", "trajectory_type": "clean_winner", "roi": 1.0, "is_shadow": False,
+             "scope": {"bucket": v, "flag": f}}
+            for v, f in [(1, True)] * 3 + [(1.0, True)] * 3 + [(float("nan"), 1)] * 3 + [([1], None)] * 3]
+    frame = TrajectoryFrame.from_records(rows)
+    assert frame.scope_values == {"bucket": [1], "flag": [True, 1]}
+    groups = {tuple(sorted(s.items())): bin(b).count("1") for s, _, b in ScopeMiner(frame, 3).mine()}
+    assert groups == {
+        (): 12,
+        (("bucket", 1),): 6,
+        (("bucket", 1), ("flag", True)): 6,
+        (("flag", True),): 6,
+        (("flag", 1),): 3,
+    }
@@ -0,0 +1,71 @@
+"""Wallet balance changes: atomic RPC, locked read-modify-write fallback, no double-apply on errors."""
+
+import threading
+import time
+
+from src.intelligence.lowcap_portfolio_manager.pm import executor as ex
+
+
+def _client(fake_supabase, rpc_error=None, usdc=100.0):
+    def before_execute(call):
+        if call.op == "rpc" and rpc_error:
+            raise rpc_error
+        if call.op == "select":
+            time.sleep(0.01)  # widen the read-modify-write window
+
+    return fake_supabase(before_execute, wallet_balances=[{"chain": "solana", "balance": 1.0, "usdc_balance": usdc}])
+
+
+def _usdc(sb):
+    return sb.tables["wallet_balances"][0]["usdc_balance"]
+
+
+def _executor(sb):
+    pm = ex.PMExecutor.__new__(ex.PMExecutor)
+    pm.sb, pm.home_chain = sb, "solana"
+    return pm
+
+
+def test_rpc_applies_delta(monkeypatch, fake_supabase):
+    monkeypatch.setattr(ex, "_balance_rpc_unavailable", False)
+    sb = _client(fake_supabase)
+    _executor(sb)._update_balance_after_trade("Solana", "USDC", -25.0)
+    assert [(c.name, c.params) for c in sb.calls] == [(ex.BALANCE_RPC, {"p_chain": "solana", "p_token": "USDC", "p_delta": -25.0})]
+    assert _usdc(sb) == 100.0
+
+
+def test_missing_rpc_falls_back_to_locked_read_modify_write(monkeypatch, fake_supabase):
+    monkeypatch.setattr(ex, "_balance_rpc_unavailable", False)
+    sb = _client(fake_supabase, rpc_error=RuntimeError({"code": "PGRST202", "message": "Could not find the function"}))
+    pm = _executor(sb)
+    threads = [threading.Thread(target=pm._update_balance_after_trade, args=("solana", "USDC", -10.0)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # No lost updates between concurrent trades
+    assert _usdc(sb) == 50.0
+    assert ex._balance_rpc_unavailable
+
+
+def test_transient_rpc_error_is_not_reapplied(monkeypatch, fake_supabase):
+    monkeypatch.setattr(ex, "_balance_rpc_unavailable", False)
+    sb = _client(fake_supabase, rpc_error=RuntimeError("upstream request timeout"))
+    _executor(sb)._update_balance_after_trade("solana", "USDC", -10.0)
+    assert _usdc(sb) == 100.0
+    assert not ex._balance_rpc_unavailable
+
+
+def test_wallet_lock_is_shared_and_reentrant():
+    lock = ex.wallet_lock("Solana")
+    assert lock is ex.wallet_lock("solana")
+    with lock:
+        with ex.wallet_lock("solana"):
+            pass
+
+
+def test_first_balance_row_is_clamped_like_updates(monkeypatch, fake_supabase):
+    monkeypatch.setattr(ex, "_balance_rpc_unavailable", True)
+    sb = fake_supabase(wallet_balances=[])
+    _executor(sb)._update_balance_after_trade("base", "USDC", -10.0)
+    assert sb.tables["wallet_balances"][0]["usdc_balance"] == 0.0
@@ -0,0 +1,252 @@
+"""
+Executor Worker Supervisor
+
+Python side of scripts/lifi_sandbox/src/executor_worker.mjs - one long-lived
+Node process that executes Li.Fi swaps/bridges and Solana helpers, instead of
+one `node` subprocess (startup + module loading + SDK/RPC setup) per call.
+
+Line-delimited JSON-RPC over stdio:
+- requests are pipelined: call() writes {"id", "method", "params"} and waits on
+  a future that the stdout reader thread resolves by id, so concurrent callers
+  share the worker
+- per-request timeouts (the worker keeps running the request; its late response
+  is logged and dropped - callers must not resend non-idempotent requests)
+- the worker is (re)started on demand; a crash fails the in-flight requests with
+  ExecutorWorkerError and the next call restarts it (with backoff)
+
+Any command speaking the protocol works - tests use a Python stub.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LIFI_SANDBOX_DIR = Path(__file__).resolve().parent.parent.parent / "scripts" / "lifi_sandbox"
+WORKER_SCRIPT = LIFI_SANDBOX_DIR / "src" / "executor_worker.mjs"
+DEFAULT_TIMEOUT_S = 300.0
+RESTART_BACKOFF_S = (0.0, 1.0, 2.0, 5.0, 10.0)
+STDERR_TAIL_LINES = 200
+
+
+class ExecutorWorkerError(RuntimeError):
+    """Worker could not be started, crashed, or returned a protocol error."""
+
+
+class ExecutorWorkerTimeout(ExecutorWorkerError):
+    """No response within the request timeout."""
+
+
+class ExecutorWorker:
+    """Supervised long-lived worker process speaking line-delimited JSON-RPC."""
+
+    def __init__(self, command: List[str], cwd: Optional[str] = None, name: str = "executor-worker") -> None:
+        """
+        Args:
+            command: Worker command line (e.g. ["node", ".../executor_worker.mjs"])
+            cwd: Working directory for the worker
+            name: Used in logs and thread names
+        """
+        self.command = command
+        self.cwd = cwd
+        self.name = name
+        self._proc: Optional[subprocess.Popen] = None
+        self._pending: Dict[int, Tuple[Future, subprocess.Popen]] = {}
+        self._timed_out: Dict[int, str] = {}  # rid -> method, until the late response arrives
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # process lifecycle + stdin writes
+        self._stderr_tail: Deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        self._restarts = 0
+        self._last_start = 0.0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = DEFAULT_TIMEOUT_S) -> Any:
+        """
+        Send one request and wait for its result.
+
+        Raises:
+            ExecutorWorkerTimeout: no response within timeout
+            ExecutorWorkerError: worker unavailable/crashed or returned an error
+        """
+        rid, future = self._submit(method, params)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            self._expire(rid, method)
+            raise ExecutorWorkerTimeout(f"{self.name}: {method} timed out after {timeout:.0f}s")
+
+    async def acall(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = DEFAULT_TIMEOUT_S) -> Any:
+        """Async variant of call(); concurrent awaits are pipelined on the same worker."""
+        rid, future = self._submit(method, params)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._expire(rid, method)
+            raise ExecutorWorkerTimeout(f"{self.name}: {method} timed out after {timeout:.0f}s")
+
+    def stderr_tail(self, lines: int = 50) -> str:
+        """Last worker stderr lines (diagnostics, e.g. [LiFi] logs)."""
+        return "\n".join(list(self._stderr_tail)[-lines:])
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the worker (closing stdin lets it finish in-flight requests)."""
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+            proc.wait(timeout=timeout)
+        except Exception:
+            proc.kill()
+        self._fail_pending(proc, ExecutorWorkerError(f"{self.name} stopped"))
+
+    # ------------------------------------------------------------------
+    # Process management
+    # ------------------------------------------------------------------
+
+    def _submit(self, method: str, params: Optional[Dict[str, Any]]) -> Tuple[int, Future]:
+        future: Future = Future()
+        rid = next(self._ids)
+        line = json.dumps({"id": rid, "method": method, "params": params or {}}) + "\n"
+        while True:
+            with self._lock:
+                wait = self._restart_wait()
+                if wait <= 0:
+                    proc = self._ensure_started()
+                    self._pending[rid] = (future, proc)
+                    try:
+                        proc.stdin.write(line)
+                        proc.stdin.flush()
+                    except (BrokenPipeError, OSError, ValueError) as e:
+                        self._pending.pop(rid, None)
+                        raise ExecutorWorkerError(f"{self.name} connection lost: {e}")
+                    return rid, future
+            # Restart backoff: sleep without the lock so close() and other callers aren't blocked
+            time.sleep(wait)
+
+    def _expire(self, rid: int, method: str) -> None:
+        """Forget a timed-out request; remember it to log its late response."""
+        if self._pending.pop(rid, None) is not None:
+            self._timed_out[rid] = method
+
+    def _restart_wait(self) -> float:
+        """Seconds left before a crashed worker may be restarted (caller holds self._lock)."""
+        if self._proc is None or self._proc.poll() is None:
+            return 0.0
+        # Crashed: back off before restarting a worker that keeps dying
+        backoff = RESTART_BACKOFF_S[min(self._restarts, len(RESTART_BACKOFF_S) - 1)]
+        return self._last_start + backoff - time.time()
+
+    def _ensure_started(self) -> subprocess.Popen:
+        """Start the worker if it is not running (caller holds self._lock, backoff already waited)."""
+        if self._proc is not None and self._proc.poll() is None:
+            return self._proc
+        if self._proc is not None:
+            self._restarts += 1
+            logger.warning(f"{self.name} exited (code {self._proc.returncode}), restarting (#{self._restarts})")
+        try:
+            proc = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        except OSError as e:
+            self._proc = None
+            raise ExecutorWorkerError(f"{self.name} failed to start: {e}")
+        self._proc = proc
+        self._last_start = time.time()
+        threading.Thread(target=self._read_stdout, args=(proc,), name=f"{self.name}-stdout", daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(proc,), name=f"{self.name}-stderr", daemon=True).start()
+        logger.info(f"{self.name} started (pid {proc.pid})")
+        return proc
+
+    def _read_stdout(self, proc: subprocess.Popen) -> None:
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"{self.name} non-protocol stdout: {line[:200]}")
+                continue
+            rid = message.get("id")
+            entry = self._pending.pop(rid, None)
+            if entry is None or entry[0].done():
+                method = self._timed_out.pop(rid, None)
+                if method is not None:
+                    logger.warning(f"{self.name}: {method} (id {rid}) completed after its timeout: {line[:300]}")
+                continue
+            future = entry[0]
+            if "error" in message:
+                future.set_exception(ExecutorWorkerError(str(message["error"])))
+            else:
+                future.set_result(message.get("result"))
+        # EOF: the worker exited (requests that timed out on it will never answer)
+        proc.wait()
+        self._timed_out.clear()
+        self._fail_pending(proc, ExecutorWorkerError(f"{self.name} connection lost (exit code {proc.returncode})"))
+
+    def _read_stderr(self, proc: subprocess.Popen) -> None:
+        for line in proc.stderr:
+            line = line.rstrip()
+            if line:
+                self._stderr_tail.append(line)
+                logger.debug(f"{self.name}: {line}")
+
+    def _fail_pending(self, proc: subprocess.Popen, error: Exception) -> None:
+        """Fail the in-flight requests that were sent to proc."""
+        with self._lock:
+            rids = [rid for rid, (_, p) in self._pending.items() if p is proc]
+            futures = [self._pending.pop(rid)[0] for rid in rids]
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+
+_WORKER: Optional[ExecutorWorker] = None
+_worker_lock = threading.Lock()
+
+
+def executor_worker_enabled() -> bool:
+    return os.getenv("EXECUTOR_WORKER_ENABLED", "1") == "1" and WORKER_SCRIPT.exists()
+
+
+def get_executor_worker() -> Optional[ExecutorWorker]:
+    """Process-wide Li.Fi/Solana worker, or None when disabled (callers use the one-shot scripts)."""
+    global _WORKER
+    if not executor_worker_enabled():
+        return None
+    with _worker_lock:
+        if _WORKER is None:
+            _WORKER = ExecutorWorker(
+                ["node", str(WORKER_SCRIPT)],
+                cwd=str(LIFI_SANDBOX_DIR),
+                name="lifi-executor-worker",
+            )
+        return _WORKER
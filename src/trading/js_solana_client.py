@@ -11,6 +11,8 @@ import os
 from typing import Dict, Any, Optional
 import logging
 
+from .executor_worker import get_executor_worker
+
 logger = logging.getLogger(__name__)
 
 class JSSolanaClient:
@@ -22,10 +24,25 @@ class JSSolanaClient:
     def __init__(self, rpc_url: str, private_key: str):
         self.rpc_url = rpc_url
         self.private_key = private_key
+    
+    async def _call_worker(self, method: str, params: Dict[str, Any], failure: str) -> Dict[str, Any]:
+        """Run a request on the long-lived executor worker (same result contract as the scripts)"""
+        result_data = await get_executor_worker().acall(method, params)
+        if not result_data.get('success'):
+            raise Exception(f"{failure}: {result_data.get('error')}")
+        return result_data
         
     async def execute_transfer(self, to_pubkey: str, lamports: int) -> Dict[str, Any]:
         """Execute a SOL transfer using JavaScript"""
         try:
+            if get_executor_worker() is not None:
+                return await self._call_worker('solana.transfer', {
+                    'rpcUrl': self.rpc_url,
+                    'privateKey': self.private_key,
+                    'toPubkey': to_pubkey,
+                    'lamports': str(lamports),
+                }, 'Transaction failed')
+            
             # Create JavaScript code
             js_code = f"""
 const {{ Connection, Keypair, VersionedTransaction, LAMPORTS_PER_SOL }} = require('@solana/web3.js');
@@ -134,6 +151,16 @@ executeTransfer().then(result => {{
     async def execute_jupiter_swap(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50) -> Dict[str, Any]:
         """Execute a Jupiter swap using JavaScript"""
         try:
+            if get_executor_worker() is not None:
+                return await self._call_worker('solana.jupiterSwap', {
+                    'rpcUrl': self.rpc_url,
+                    'privateKey': self.private_key,
+                    'inputMint': input_mint,
+                    'outputMint': output_mint,
+                    'amount': str(amount),
+                    'slippageBps': slippage_bps,
+                }, 'Jupiter swap failed')
+            
             # Create JavaScript code for Jupiter swap
             js_code = f"""
 const {{ Connection, Keypair, VersionedTransaction }} = require('@solana/web3.js');
@@ -261,6 +288,12 @@ executeJupiterSwap().then(result => {{
     async def get_token_decimals(self, mint_address: str) -> Dict[str, Any]:
         """Get token decimals for a given mint address (supports both SPL and Token-2022)"""
         try:
+            if get_executor_worker() is not None:
+                return await self._call_worker('solana.tokenDecimals', {
+                    'rpcUrl': self.rpc_url,
+                    'mint': mint_address,
+                }, 'Failed to get token decimals')
+            
             # Create JavaScript code to get token decimals
             js_code = f"""
 const {{ Connection, PublicKey }} = require('@solana/web3.js');
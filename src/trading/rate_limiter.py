@@ -0,0 +1,70 @@
+"""
+Adaptive token-bucket rate limiter for HTTP APIs (asyncio).
+
+- tokens refill continuously at the current rate, up to `burst`
+- HTTP 429: the rate is halved (down to min_rate) and requests pause for
+  Retry-After seconds (or one token interval when the header is missing)
+- successes raise the rate back additively towards the configured maximum
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AdaptiveRateLimiter:
+    """AIMD token bucket shared by all requests to one API host."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        min_rate_per_minute: Optional[float] = None,
+        burst: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            rate_per_minute: Maximum (and initial) request rate
+            min_rate_per_minute: Floor after repeated 429s (default 10% of max)
+            burst: Bucket capacity (default: one second's worth, at least 1)
+        """
+        self.max_rate = rate_per_minute / 60.0
+        self.min_rate = (min_rate_per_minute if min_rate_per_minute is not None else rate_per_minute * 0.1) / 60.0
+        self.rate = self.max_rate
+        self.burst = burst if burst is not None else max(1.0, self.max_rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self.rate * 60.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def on_success(self) -> None:
+        """Additive increase: recover ~1 request/minute per success."""
+        self.rate = min(self.max_rate, self.rate + 1.0 / 60.0)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease plus a pause (Retry-After when given)."""
+        self.rate = max(self.min_rate, self.rate / 2.0)
+        self._tokens = 0.0
+        pause = retry_after if retry_after is not None and retry_after > 0 else 1.0 / self.rate
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
@@ -3,18 +3,27 @@
 Scheduled Price Collection System
 
 Collects price data every minute for active position tokens and stores in database.
-Uses parallel async requests for scalability.
+Uses DexScreener's multi-address endpoint (up to 30 tokens of one chain per call)
+over one persistent keep-alive session, with an adaptive rate limiter that backs
+off on HTTP 429.
 
-Tiered Collection Strategy:
-- 0-250 tokens: Every 1 min, 60% coverage threshold
-- 250-500 tokens: Every 2 min, 45% coverage threshold
-- 500-750 tokens: Every 3 min, 33% coverage threshold
+Storage: liquidity_change_1m comes from an in-memory last-liquidity cache (warmed
+once at startup with one query), and each cycle's rows are written with one bulk
+upsert (duplicates of already-stored rows are ignored). Rows that fail to insert
+are spooled to a local JSONL file and retried with the next cycle, in their own
+chunks; rows the database rejects (4xx) are quarantined instead of retried.
+
+Tiered Collection Strategy (capacity = 250 calls/min x 30 tokens/call):
+- 0-7500 tokens: Every 1 min, 60% coverage threshold
+- 7500-15000 tokens: Every 2 min, 45% coverage threshold
+- 15000-22500 tokens: Every 3 min, 33% coverage threshold
 - etc.
 
 Active/Watchlist 1m positions always collected every 1 minute (priority).
 """
 
 import asyncio
+import json
 import logging
 import math
 import os
@@ -23,12 +32,47 @@ from datetime import datetime, timezone, timedelta
 
 import aiohttp
 
+from .rate_limiter import AdaptiveRateLimiter
+
 logger = logging.getLogger(__name__)
 
 # Rate limits
 MAX_CALLS_PER_MINUTE = 250  # DexScreener limit is 300, we use 250 for safety
 MAX_CONCURRENT_REQUESTS = 50  # Max concurrent HTTP requests
 
+# DexScreener multi-address endpoint: up to 30 token addresses of one chain per call
+DEXSCREENER_TOKENS_URL = "https://api.dexscreener.com/tokens/v1/{chain}/{addresses}"
+DEXSCREENER_BATCH_SIZE = 30
+MAX_BATCH_ATTEMPTS = 3  # per batch, retried after HTTP 429
+
+# lowcap_price_data_1m writes
+LIQUIDITY_CACHE_WARM_MINUTES = 30  # startup warm-up reads rows newer than this
+PRICE_ROWS_PAGE_SIZE = 1000
+PRICE_INSERT_CHUNK = 1000
+PRICE_CONFLICT = "token_contract,chain,timestamp"  # primary key
+PRICE_SPOOL_DIR = os.getenv("PRICE_SPOOL_DIR", "logs")
+
+# Errors PostgREST answers with 4xx: retrying the same rows cannot succeed.
+# Data/constraint errors (SQLSTATE 22, 23) reject individual rows; schema errors
+# (42, PGRST1xx/2xx, e.g. unknown column) reject the whole request.
+ROW_REJECTED_SQLSTATE_CLASSES = ("22", "23")
+REQUEST_REJECTED_PREFIXES = ("42", "PGRST1", "PGRST2")
+
+
+def _rejection_kind(error: BaseException) -> Optional[str]:
+    """'row' or 'request' if the database rejected the insert (4xx), None if it may succeed on retry."""
+    code = getattr(error, "code", None)
+    if code is None and error.args and isinstance(error.args[0], dict):
+        code = error.args[0].get("code")
+    if not code:
+        return None
+    code = str(code)
+    if code[:2] in ROW_REJECTED_SQLSTATE_CLASSES:
+        return "row"
+    if code.startswith(REQUEST_REJECTED_PREFIXES):
+        return "request"
+    return None
+
 
 class ScheduledPriceCollector:
     """
@@ -55,6 +99,18 @@ class ScheduledPriceCollector:
         self.current_cycle = 0  # Increments each minute
         self.last_collection_time: Dict[Tuple[str, str], datetime] = {}  # (token, chain) -> last collected
         
+        # Persistent keep-alive session + shared DexScreener rate limiter
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = AdaptiveRateLimiter(MAX_CALLS_PER_MINUTE)
+        
+        # lowcap_price_data_1m write path: (token, chain) -> last liquidity_usd,
+        # rows buffered for this cycle's bulk insert, failed rows spooled to disk
+        self._last_liquidity: Dict[Tuple[str, str], float] = {}
+        self._liquidity_cache_warmed = False
+        self._pending_rows: List[Dict[str, Any]] = []
+        self.spool_path = os.path.join(PRICE_SPOOL_DIR, "lowcap_price_data_1m_spool.jsonl")
+        self.quarantine_path = os.path.join(PRICE_SPOOL_DIR, "lowcap_price_data_1m_quarantine.jsonl")
+        
         logger.info("Scheduled price collector initialized (parallel mode)")
     
     async def start_collection(self, interval_minutes: int = 1):
@@ -86,11 +142,21 @@ class ScheduledPriceCollector:
             except asyncio.CancelledError:
                 pass
         
+        # Rows collected by an interrupted cycle go to the spool
+        if self._pending_rows:
+            self._spool_rows(self._pending_rows)
+            self._pending_rows = []
+        
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        
         logger.info("Price collection stopped")
     
     async def _collection_loop(self, interval_minutes: int):
         """Main collection loop"""
         last_heartbeat = datetime.now(timezone.utc)
+        await self._warm_liquidity_cache()
         while self.collecting:
             # Log tick at debug level - heartbeat is logged every 5 minutes at INFO level
             logger.debug("Price collection tick")
@@ -120,14 +186,14 @@ class ScheduledPriceCollector:
         Calculate collection interval based on total token count.
         
         Returns interval in minutes (1, 2, 3, etc.)
-        - 0-250 tokens: Every 1 min
-        - 250-500 tokens: Every 2 min
-        - 500-750 tokens: Every 3 min
+        - 0-7500 tokens: Every 1 min
+        - 7500-15000 tokens: Every 2 min
+        - 15000-22500 tokens: Every 3 min
         - etc.
         """
         if total_tokens <= 0:
             return 1
-        return max(1, math.ceil(total_tokens / MAX_CALLS_PER_MINUTE))
+        return max(1, math.ceil(total_tokens / (MAX_CALLS_PER_MINUTE * DEXSCREENER_BATCH_SIZE)))
     
     def _get_coverage_threshold(self, interval: int) -> float:
         """
@@ -242,65 +308,96 @@ class ScheduledPriceCollector:
         except Exception as e:
             logger.error(f"Error in parallel price collection: {e}")
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Persistent keep-alive session (one connection pool across cycles)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_REQUESTS, keepalive_timeout=120),
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+        return self._session
+    
     async def _collect_prices_batch_parallel(self, positions: List[Dict[str, Any]]):
-        """Collect prices for a batch of positions in parallel using aiohttp"""
+        """Collect prices in per-chain batches of up to 30 tokens (sliding window, rate limited)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Create tasks for all tokens
-                tasks = []
-                for pos in positions:
-                    token = pos['token_contract']
-                    chain = pos['token_chain']
-                    tasks.append(self._fetch_and_store_price(session, token, chain))
-                
-                # Run with concurrency limit
-                results = []
-                for i in range(0, len(tasks), MAX_CONCURRENT_REQUESTS):
-                    batch = tasks[i:i + MAX_CONCURRENT_REQUESTS]
-                    batch_results = await asyncio.gather(*batch, return_exceptions=True)
-                    results.extend(batch_results)
-                
-                # Count successes and failures
-                success_count = sum(1 for r in results if r is True)
-                error_count = sum(1 for r in results if isinstance(r, Exception) or r is False)
-                
-                if error_count > 0:
-                    logger.warning(f"Price collection: {success_count} success, {error_count} errors")
-                else:
-                    logger.debug(f"Price collection: {success_count} success")
+            session = await self._get_session()
+            window = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            
+            tasks = []
+            for chain, tokens in self._group_tokens_by_chain(positions).items():
+                for i in range(0, len(tokens), DEXSCREENER_BATCH_SIZE):
+                    tasks.append(self._fetch_and_store_batch(session, window, chain, tokens[i:i + DEXSCREENER_BATCH_SIZE]))
+            
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            
+            # Count successes and failures (per token)
+            success_count = sum(r for r in results if isinstance(r, int))
+            error_count = len(positions) - success_count
+            
+            if error_count > 0:
+                logger.warning(
+                    f"Price collection: {success_count} success, {error_count} errors "
+                    f"({len(tasks)} requests, rate={self.rate_limiter.rate_per_minute:.0f}/min)"
+                )
+            else:
+                logger.debug(f"Price collection: {success_count} success ({len(tasks)} requests)")
                     
         except Exception as e:
             logger.error(f"Error in batch parallel collection: {e}")
+        finally:
+            # One bulk insert per cycle (before P&L, which reads the latest prices)
+            self._flush_price_rows()
     
-    async def _fetch_and_store_price(self, session: aiohttp.ClientSession, token_contract: str, chain: str) -> bool:
-        """Fetch price from DexScreener and store in database"""
-        try:
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_contract}"
-            
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    pairs = data.get('pairs') or []
-                    
-                    # Process and store price data
-                    await self._process_token_price_data(token_contract, chain, pairs)
-                    
-                    # Update last collection time
-                    self.last_collection_time[(token_contract, chain)] = datetime.now(timezone.utc)
-                    return True
-                elif response.status == 429:
-                    logger.warning(f"Rate limited for {token_contract[:8]}...")
-                    return False
-                else:
-                    logger.debug(f"DexScreener API error for {token_contract[:8]}...: {response.status}")
-                    return False
-                    
-        except asyncio.TimeoutError:
-            logger.debug(f"Timeout fetching price for {token_contract[:8]}...")
-            return False
-        except Exception as e:
-            logger.debug(f"Error fetching price for {token_contract[:8]}...: {e}")
-            return False
+    async def _fetch_and_store_batch(
+        self,
+        session: aiohttp.ClientSession,
+        window: asyncio.Semaphore,
+        chain: str,
+        tokens: List[str],
+    ) -> int:
+        """Fetch up to 30 tokens of one chain from DexScreener and store their prices
+        
+        Returns:
+            Number of tokens with a stored price
+        """
+        url = DEXSCREENER_TOKENS_URL.format(chain=chain, addresses=",".join(tokens))
+        async with window:
+            for attempt in range(MAX_BATCH_ATTEMPTS):
+                await self.rate_limiter.acquire()
+                try:
+                    async with session.get(url) as response:
+                        if response.status == 429:
+                            retry_after = response.headers.get("Retry-After")
+                            self.rate_limiter.on_rate_limited(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                            logger.warning(
+                                f"Rate limited for {chain} batch of {len(tokens)} "
+                                f"(attempt {attempt + 1}/{MAX_BATCH_ATTEMPTS}, rate now {self.rate_limiter.rate_per_minute:.0f}/min)"
+                            )
+                            continue
+                        if response.status != 200:
+                            logger.debug(f"DexScreener API error for {chain} batch of {len(tokens)}: {response.status}")
+                            return 0
+                        data = await response.json()
+                except asyncio.TimeoutError:
+                    logger.debug(f"Timeout fetching {chain} batch of {len(tokens)}")
+                    return 0
+                except Exception as e:
+                    logger.debug(f"Error fetching {chain} batch of {len(tokens)}: {e}")
+                    return 0
+                
+                self.rate_limiter.on_success()
+                # tokens/v1 returns a list of pairs (latest/dex/tokens wraps them in {"pairs": [...]})
+                pairs = (data.get('pairs') if isinstance(data, dict) else data) or []
+                
+                stored = 0
+                now = datetime.now(timezone.utc)
+                for token in tokens:
+                    if await self._process_token_price_data(token, chain, pairs):
+                        # Update last collection time
+                        self.last_collection_time[(token, chain)] = now
+                        stored += 1
+                return stored
+        return 0
     
     async def _collect_prices_for_active_positions(self):
         """Legacy method - redirects to parallel collection"""
@@ -353,49 +450,8 @@ class ScheduledPriceCollector:
         
         return tokens_by_chain
     
-    async def _collect_prices_for_chain(self, chain: str, tokens: List[str]):
-        """Collect prices for tokens on a specific chain using DexScreener API"""
-        try:
-            # Batch up to 30 tokens per API call (DexScreener limit)
-            batch_size = 30
-            for i in range(0, len(tokens), batch_size):
-                batch = tokens[i:i + batch_size]
-                await self._collect_batch_prices(chain, batch)
-                
-                # Add delay between batches to respect rate limits
-                if i + batch_size < len(tokens):
-                    await asyncio.sleep(1)
-                    
-        except Exception as e:
-            logger.error(f"Error collecting prices for chain {chain}: {e}")
-    
-    async def _collect_batch_prices(self, chain: str, tokens: List[str]):
-        """Collect prices for a batch of tokens using DexScreener API"""
-        try:
-            # Process each token individually using the same logic as Price Oracle
-            for token in tokens:
-                try:
-                    # Call DexScreener API for single token (same as Price Oracle)
-                    url = f"https://api.dexscreener.com/latest/dex/tokens/{token}"
-                    response = requests.get(url, timeout=10)
-                    
-                    if response.ok:
-                        data = response.json()
-                        pairs = data.get('pairs') or []  # Handle None case
-                        
-                        # Process this token's price data
-                        await self._process_token_price_data(token, chain, pairs)
-                    else:
-                        logger.error(f"DexScreener API error for {token}: {response.status_code}")
-                        
-                except Exception as e:
-                    logger.error(f"Error collecting price for {token}: {e}")
-                
-        except Exception as e:
-            logger.error(f"Error collecting batch prices: {e}")
-    
-    async def _process_token_price_data(self, token_contract: str, chain: str, pairs: List[Dict]):
-        """Process and store price data for a single token"""
+    async def _process_token_price_data(self, token_contract: str, chain: str, pairs: List[Dict]) -> bool:
+        """Process and store price data for a single token (True when a price was stored)"""
         try:
             # Ensure pairs is a list (handle None case)
             if pairs is None:
@@ -411,7 +467,7 @@ class ScheduledPriceCollector:
             
             if not token_pairs:
                 logger.debug(f"No pairs found for token {token_contract} on {chain}")
-                return
+                return False
             
             # Get the best pair - prioritize native token pairs (WETH, SOL, BNB)
             best_pair = self._get_best_pair_with_native_preference(token_pairs, chain, token_contract)
@@ -422,9 +478,11 @@ class ScheduledPriceCollector:
             if price_data:
                 # Store in database
                 await self._store_price_data(price_data)
+                return True
                 
         except Exception as e:
             logger.error(f"Error processing price data for {token_contract}: {e}")
+        return False
     
     def _get_best_pair_with_native_preference(self, pairs: List[Dict], chain: str, token_contract: str) -> Dict:
         """Get the best pair, prioritizing native token pairs (WETH, SOL, BNB) for position tokens, USDC/USDT for native tokens"""
@@ -598,47 +656,169 @@ class ScheduledPriceCollector:
             return None
     
     async def _store_price_data(self, price_data: Dict[str, Any]):
-        """Store price data in database"""
+        """Buffer price data for this cycle's bulk insert (see _flush_price_rows)"""
         try:
             # Calculate volume and liquidity changes from previous entry
             await self._calculate_changes(price_data)
-            
-            # Insert into database
-            result = self.supabase_manager.client.table('lowcap_price_data_1m').insert(price_data).execute()
-            
-            if result.data:
-                logger.debug(f"Stored price data for {price_data['token_contract']} on {price_data['chain']}")
-            else:
-                logger.error(f"Failed to store price data for {price_data['token_contract']}")
-                
+            self._pending_rows.append(price_data)
         except Exception as e:
             logger.error(f"Error storing price data: {e}")
     
     async def _calculate_changes(self, price_data: Dict[str, Any]):
-        """Calculate volume and liquidity changes from previous entry"""
+        """Calculate volume and liquidity changes from previous entry (last-liquidity cache)"""
         try:
-            token_contract = price_data['token_contract']
-            chain = price_data['chain']
+            key = (price_data['token_contract'], price_data['chain'])
             
-            # Get previous entry
-            result = self.supabase_manager.client.table('lowcap_price_data_1m').select(
-                'liquidity_usd'
-            ).eq('token_contract', token_contract).eq('chain', chain).order(
-                'timestamp', desc=True
-            ).limit(1).execute()
+            prev_liquidity = self._last_liquidity.get(key)
+            if prev_liquidity is None and not self._liquidity_cache_warmed:
+                prev_liquidity = self._load_last_liquidity(*key)
             
-            if result.data:
-                prev_data = result.data[0]
-                prev_liquidity = float(prev_data.get('liquidity_usd', 0))
-                
+            if prev_liquidity is not None:
                 price_data['liquidity_change_1m'] = price_data['liquidity_usd'] - prev_liquidity
             else:
                 # First entry - no changes
                 price_data['liquidity_change_1m'] = 0
+            
+            self._last_liquidity[key] = float(price_data['liquidity_usd'])
                 
         except Exception as e:
             logger.error(f"Error calculating changes: {e}")
             price_data['liquidity_change_1m'] = 0
+    
+    def _load_last_liquidity(self, token_contract: str, chain: str) -> Optional[float]:
+        """Previous liquidity_usd from the database (only used when the cache could not be warmed)"""
+        result = self.supabase_manager.client.table('lowcap_price_data_1m').select(
+            'liquidity_usd'
+        ).eq('token_contract', token_contract).eq('chain', chain).order(
+            'timestamp', desc=True
+        ).limit(1).execute()
+        
+        if result.data:
+            return float(result.data[0].get('liquidity_usd') or 0)
+        return None
+    
+    async def _warm_liquidity_cache(self):
+        """
+        Load the last liquidity_usd per (token, chain) with one (paginated) query.
+        
+        Reads rows of the last LIQUIDITY_CACHE_WARM_MINUTES, newest first; tokens not
+        seen in that window start at liquidity_change_1m = 0 like a first entry.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(minutes=LIQUIDITY_CACHE_WARM_MINUTES)).isoformat()
+        try:
+            offset = 0
+            while True:
+                result = (
+                    self.supabase_manager.client.table('lowcap_price_data_1m')
+                    .select('token_contract,chain,liquidity_usd')
+                    .gte('timestamp', cutoff)
+                    .order('timestamp', desc=True)
+                    .range(offset, offset + PRICE_ROWS_PAGE_SIZE - 1)
+                    .execute()
+                )
+                rows = result.data or []
+                for row in rows:
+                    key = (row.get('token_contract'), row.get('chain'))
+                    if key not in self._last_liquidity:
+                        self._last_liquidity[key] = float(row.get('liquidity_usd') or 0)
+                if len(rows) < PRICE_ROWS_PAGE_SIZE:
+                    break
+                offset += PRICE_ROWS_PAGE_SIZE
+            self._liquidity_cache_warmed = True
+            logger.info(f"Liquidity cache warmed: {len(self._last_liquidity)} tokens")
+        except Exception as e:
+            # Cache misses fall back to per-token lookups
+            logger.warning(f"Could not warm liquidity cache: {e}")
+    
+    def _flush_price_rows(self) -> int:
+        """
+        Bulk upsert this cycle's rows, then retry spooled rows from earlier failures.
+        
+        Spooled rows are written in their own chunks so a poisoned spool never
+        holds back new rows.
+        
+        Returns:
+            Number of rows written
+        """
+        rows, self._pending_rows = self._pending_rows, []
+        spooled = self._read_spool()
+        total = len(rows) + len(spooled)
+        if not total:
+            return 0
+        
+        written = self._write_price_rows(rows) + self._write_price_rows(spooled)
+        logger.debug(f"Stored {written}/{total} price rows")
+        return written
+    
+    def _write_price_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """Upsert rows in PRICE_INSERT_CHUNK chunks; returns the number written."""
+        written = 0
+        for i in range(0, len(rows), PRICE_INSERT_CHUNK):
+            written += self._write_price_chunk(rows[i:i + PRICE_INSERT_CHUNK])
+        return written
+    
+    def _write_price_chunk(self, chunk: List[Dict[str, Any]]) -> int:
+        """
+        Upsert one chunk (ignoring rows already stored).
+        
+        Transient failures spool the chunk for the next cycle. A chunk rejected
+        for its data is split in halves until the offending rows are isolated;
+        those are quarantined and the rest written. A chunk rejected for its
+        shape (schema errors) is quarantined as a whole.
+        """
+        try:
+            (
+                self.supabase_manager.client.table('lowcap_price_data_1m')
+                .upsert(chunk, on_conflict=PRICE_CONFLICT, ignore_duplicates=True)
+                .execute()
+            )
+            return len(chunk)
+        except Exception as e:
+            kind = _rejection_kind(e)
+            if kind is None:
+                logger.error(f"Error storing {len(chunk)} price rows (spooled for retry): {e}")
+                self._spool_rows(chunk)
+                return 0
+            if kind == "request" or len(chunk) == 1:
+                logger.error(f"{len(chunk)} price rows rejected (quarantined to {self.quarantine_path}): {e}")
+                self._spool_rows(chunk, self.quarantine_path)
+                return 0
+        mid = len(chunk) // 2
+        return self._write_price_chunk(chunk[:mid]) + self._write_price_chunk(chunk[mid:])
+    
+    def _spool_rows(self, rows: List[Dict[str, Any]], path: Optional[str] = None):
+        """Append rows to the local retry spool (or to path, e.g. the quarantine file) as JSONL"""
+        path = path or self.spool_path
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+        except Exception as e:
+            logger.error(f"PRICE ROWS DROPPED: {len(rows)} rows, writing {path} failed: {e}")
+    
+    def _read_spool(self) -> List[Dict[str, Any]]:
+        """Take all spooled rows (the spool is emptied; failed rows are re-spooled)"""
+        if not os.path.exists(self.spool_path):
+            return []
+        rows = []
+        try:
+            with open(self.spool_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping corrupt spool line: {line[:100]}")
+            os.remove(self.spool_path)
+        except Exception as e:
+            logger.error(f"Error reading price spool {self.spool_path}: {e}")
+            return []
+        if rows:
+            logger.info(f"Retrying {len(rows)} spooled price rows")
+        return rows
 
     async def _log_heartbeat(self):
         """Log a lightweight heartbeat with heart glyph and HL WS status."""
@@ -682,121 +862,23 @@ class ScheduledPriceCollector:
             logger.debug(f"Heartbeat check error: {e}")
 
     async def _update_all_positions_pnl(self):
-        """Update P&L for all active positions using current database prices"""
+        """Update P&L for all active positions in one bulk pass (see pm/portfolio_valuation.py)"""
         try:
-            # Get all active positions
-            result = self.supabase_manager.client.table('lowcap_positions').select('*').eq('status', 'active').execute()
-            active_positions = result.data if result.data else []
+            from src.intelligence.lowcap_portfolio_manager.pm.portfolio_valuation import revalue_portfolio
             
-            if not active_positions:
+            summary = revalue_portfolio(self.supabase_manager.client)
+            if not summary.positions:
                 logger.info("No active positions to update P&L for")
                 return
             
-            # Update P&L for each position
-            updated_count = 0
-            for position in active_positions:
-                try:
-                    await self._update_position_pnl(position['id'])
-                    updated_count += 1
-                except Exception as e:
-                    logger.error(f"Error updating P&L for position {position.get('id', 'unknown')}: {e}")
-            
-            logger.info(f"Updated P&L for {updated_count}/{len(active_positions)} active positions")
+            logger.info(
+                f"Updated P&L for {summary.written}/{summary.positions} active positions: "
+                f"value=${summary.total_value_usd:.2f}, pnl=${summary.total_pnl_usd:.2f} ({summary.total_pnl_pct:.2f}%)"
+            )
             
         except Exception as e:
             logger.error(f"Error updating all positions P&L: {e}")
 
-    async def _update_position_pnl(self, position_id: str) -> bool:
-        """Update position P&L using current market prices"""
-        try:
-            # Get position data
-            result = self.supabase_manager.client.table('lowcap_positions').select('*').eq('id', position_id).execute()
-            if not result.data:
-                return False
-            
-            position = result.data[0]
-            
-            # Get current price from database
-            token_contract = position.get('token_contract')
-            token_chain = position.get('token_chain', '').lower()
-            if not token_contract or not token_chain:
-                return False
-                
-            current_price_usd = await self._get_current_price_usd_from_db(token_contract, token_chain)
-            if current_price_usd is None:
-                logger.warning(f"Could not get current USD price for {token_contract} on {token_chain}")
-                return False
-            
-            # Calculate P&L (USD)
-            total_quantity = float(position.get('total_quantity', 0.0) or 0.0)
-            total_investment_usd = float(position.get('total_allocation_usd', 0.0) or 0.0)
-            total_extracted_usd = float(position.get('total_extracted_usd', 0.0) or 0.0)
-            
-            # Reconcile total_quantity = total_tokens_bought - total_tokens_sold
-            total_tokens_bought = float(position.get('total_tokens_bought', 0.0) or 0.0)
-            total_tokens_sold = float(position.get('total_tokens_sold', 0.0) or 0.0)
-            expected_quantity = total_tokens_bought - total_tokens_sold
-            
-            # Update total_quantity if it's wrong
-            if abs(total_quantity - expected_quantity) > 0.0001:
-                logger.info(f"Reconciling {position_id} quantity: {total_quantity:.8f} -> {expected_quantity:.8f}")
-                total_quantity = expected_quantity
-            
-            current_position_value_usd = total_quantity * current_price_usd
-            total_pnl_usd = (total_extracted_usd + current_position_value_usd) - total_investment_usd
-            total_pnl_pct = (total_pnl_usd / total_investment_usd * 100.0) if total_investment_usd > 0 else 0.0
-            
-            # Update position
-            update_data = {
-                'total_quantity': total_quantity,
-                'current_usd_value': current_position_value_usd,
-                'total_pnl_usd': total_pnl_usd,
-                'total_pnl_pct': total_pnl_pct,
-                'pnl_last_calculated_at': datetime.now(timezone.utc).isoformat()
-            }
-            
-            result = self.supabase_manager.client.table('lowcap_positions').update(update_data).eq('id', position_id).execute()
-            if result.data:
-                logger.info(f"Updated P&L for {position_id}: {total_pnl_pct:.2f}% (${total_pnl_usd:.2f})")
-                return True
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error updating P&L for position {position_id}: {e}")
-            return False
-
-    async def _get_current_price_usd_from_db(self, token_contract: str, chain: str) -> Optional[float]:
-        """Get current USD price from database (supporting both Lowcap and Hyperliquid tables)"""
-        try:
-            if chain == 'hyperliquid':
-                # Hyperliquid data is in a separate table (ingested via WS)
-                # Note: Hyperliquid table uses 'token' instead of 'token_contract', and 'close' instead of 'price_usd'
-                # We use the most recent 1m candle as "current price"
-                result = self.supabase_manager.client.table('hyperliquid_price_data_ohlc').select(
-                    'close'
-                ).eq('token', token_contract).eq('timeframe', '1m').order(
-                    'ts', desc=True
-                ).limit(1).execute()
-                
-                if result.data and len(result.data) > 0:
-                    return float(result.data[0]['close'])
-            else:
-                # Standard lowcap tokens (DexScreener)
-                result = self.supabase_manager.client.table('lowcap_price_data_1m').select(
-                    'price_usd'
-                ).eq('token_contract', token_contract).eq('chain', chain).order(
-                    'timestamp', desc=True
-                ).limit(1).execute()
-                
-                if result.data and len(result.data) > 0:
-                    return float(result.data[0]['price_usd'])
-                    
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting current USD price from database for {token_contract} ({chain}): {e}")
-            return None
-
     async def _get_native_usd_rate_async(self, chain: str) -> float:
         """Get current native token USD rate from database"""
         try:
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Parallel batch replay of Uptrend Engine v4 over a token universe.
+
+- Loads every token's bar history once into a bar store snapshot (one directory
+  of memory-mapped partitions, see data/bar_store.py) plus a token manifest
+- Shards tokens across a process pool; workers read the snapshot offline
+  (no database access, no backfill / geometry / TA re-runs)
+- Streams per-token summaries into a resume file as they finish and rebuilds
+  the aggregate report from it, so an interrupted run continues where it stopped
+
+Aggregate report:
+- state transition counts (e.g. S1->S2)
+- signal hit rates and R/R per entry type, measured over a forward horizon
+
+Usage:
+    python3 batch_replay_v4.py                          # all active tokens
+    python3 batch_replay_v4.py DREAMS BREW --days 21
+    python3 batch_replay_v4.py --workers 32 --run nightly
+    python3 batch_replay_v4.py --run nightly --offline  # reuse the snapshot, no DB
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+code_dir = os.path.dirname(os.path.abspath(__file__))
+if code_dir not in sys.path:
+    sys.path.insert(0, code_dir)
+
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import BarStore
+from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+from replay_uptrend_v4 import _epoch, replay_token
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = os.path.join(project_root, "backtester", "v4", "backests")
+MANIFEST_FILE = "tokens.json"
+
+# Excluded from the default universe (same as run_batch_backtest.py)
+EXCLUDE_TICKERS = {"ALCH", "ASTER", "GIGGLE"}
+
+# Forward window (bars) used to score a signal
+DEFAULT_HORIZON = 24
+
+# Entry / exit types: (name, direction) - direction +1 = expects price up, -1 = down
+SIGNAL_TYPES = (
+    ("s1_buy", 1),
+    ("s2_retest_buy", 1),
+    ("s3_dx_buy", 1),
+    ("s3_first_dip_buy", 1),
+    ("trim", -1),
+    ("emergency_exit", -1),
+    ("exit_position", -1),
+)
+_DIRECTION = dict(SIGNAL_TYPES)
+
+
+def classify_signals(state: str, payload: Dict[str, Any]) -> List[str]:
+    """Signal types raised by one engine payload (same classification as the backtest chart)."""
+    out: List[str] = []
+    if payload.get("buy_signal"):
+        out.append("s1_buy")
+    elif payload.get("buy_flag") and state == "S2":
+        out.append("s2_retest_buy")
+    elif payload.get("buy_flag") and state == "S3":
+        out.append("s3_dx_buy")
+    if payload.get("first_dip_buy_flag") and state == "S3":
+        out.append("s3_first_dip_buy")
+    if payload.get("trim_flag"):
+        out.append("trim")
+    if payload.get("emergency_exit"):
+        out.append("emergency_exit")
+    if payload.get("exit_position"):
+        out.append("exit_position")
+    return out
+
+
+def summarize_replay(
+    rows: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    horizon: int = DEFAULT_HORIZON,
+) -> Dict[str, Any]:
+    """
+    Reduce one token's replay to additive counters.
+
+    Flags that stay raised for several bars count once, on the bar they are
+    first raised. A signal is scored on the `horizon` bars after that bar
+    (signals without a full forward window are counted but not scored):
+        hit  - close after `horizon` bars moved in the signal's direction
+        mfe  - best excursion in the signal's direction (fraction of entry)
+        mae  - worst excursion against it (fraction of entry)
+
+    Args:
+        rows: Bars the replay ran over (chronological)
+        results: replay_token() output (aligned with the last len(results) rows)
+        horizon: Forward window in bars
+
+    Returns:
+        {"bars", "states", "transitions", "signals": {type: {n, scored, hits, mfe, mae}}}
+    """
+    offset = len(rows) - len(results)
+    highs = [float(r.get("high_usd") or 0.0) for r in rows]
+    lows = [float(r.get("low_usd") or 0.0) for r in rows]
+    closes = [float(r.get("close_usd") or 0.0) for r in rows]
+
+    states: Dict[str, int] = {}
+    transitions: Dict[str, int] = {}
+    signals: Dict[str, Dict[str, float]] = {}
+    prev = ""
+    raised: List[str] = []
+    for k, res in enumerate(results):
+        state = res.get("state") or ""
+        if state:
+            states[state] = states.get(state, 0) + 1
+            if prev and state != prev:
+                key = f"{prev}->{state}"
+                transitions[key] = transitions.get(key, 0) + 1
+            prev = state
+
+        was_raised = raised
+        raised = classify_signals(state, res.get("payload") or {})
+        i = offset + k
+        entry = closes[i]
+        for name in raised:
+            if name in was_raised:
+                continue
+            acc = signals.setdefault(name, {"n": 0, "scored": 0, "hits": 0, "mfe": 0.0, "mae": 0.0})
+            acc["n"] += 1
+            if entry <= 0 or i + horizon >= len(rows):
+                continue
+            hi = max(highs[i + 1:i + horizon + 1])
+            lo = min(lows[i + 1:i + horizon + 1])
+            up, down = hi / entry - 1.0, 1.0 - lo / entry
+            if _DIRECTION[name] > 0:
+                mfe, mae, hit = up, down, closes[i + horizon] > entry
+            else:
+                mfe, mae, hit = down, up, closes[i + horizon] < entry
+            acc["scored"] += 1
+            acc["hits"] += int(hit)
+            acc["mfe"] += max(0.0, mfe)
+            acc["mae"] += max(0.0, mae)
+
+    return {"bars": len(results), "states": states, "transitions": transitions, "signals": signals}
+
+
+def merge_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum per-token summaries into one."""
+    total: Dict[str, Any] = {"tokens": 0, "bars": 0, "states": {}, "transitions": {}, "signals": {}}
+    for s in summaries:
+        total["tokens"] += 1
+        total["bars"] += int(s.get("bars") or 0)
+        for field in ("states", "transitions"):
+            for key, n in (s.get(field) or {}).items():
+                total[field][key] = total[field].get(key, 0) + n
+        for name, acc in (s.get("signals") or {}).items():
+            dst = total["signals"].setdefault(name, {"n": 0, "scored": 0, "hits": 0, "mfe": 0.0, "mae": 0.0})
+            for key, v in acc.items():
+                dst[key] += v
+    return total
+
+
+def signal_table(summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per entry type: count, hit rate, average MFE/MAE and R/R (avg MFE / avg MAE)."""
+    table: List[Dict[str, Any]] = []
+    for name, _ in SIGNAL_TYPES:
+        acc = (summary.get("signals") or {}).get(name)
+        if not acc:
+            continue
+        scored = acc["scored"]
+        avg_mfe = acc["mfe"] / scored if scored else None
+        avg_mae = acc["mae"] / scored if scored else None
+        table.append({
+            "type": name,
+            "signals": acc["n"],
+            "scored": scored,
+            "hit_rate": acc["hits"] / scored if scored else None,
+            "avg_mfe": avg_mfe,
+            "avg_mae": avg_mae,
+            "rr": (avg_mfe / avg_mae) if avg_mfe is not None and avg_mae else None,
+        })
+    return table
+
+
+# --------------- Snapshot ---------------
+
+def list_universe(sb: Any, tickers: Optional[List[str]] = None, limit: int = 2000) -> List[Dict[str, Any]]:
+    """Active positions to replay (ticker, contract, chain, features)."""
+    q = (
+        sb.table("lowcap_positions")
+        .select("token_ticker, token_contract, token_chain, features")
+        .eq("status", "active")
+        .eq("timeframe", "1h")
+    )
+    if tickers:
+        q = q.in_("token_ticker", tickers)
+    rows = q.limit(limit).execute().data or []
+
+    seen = set()
+    tokens: List[Dict[str, Any]] = []
+    for r in rows:
+        ticker = str(r.get("token_ticker") or "").upper()
+        key = (r.get("token_contract"), r.get("token_chain"))
+        if not ticker or key in seen or (not tickers and ticker in EXCLUDE_TICKERS):
+            continue
+        seen.add(key)
+        features = r.get("features") or {}
+        tokens.append({
+            "ticker": ticker,
+            "contract": key[0],
+            "chain": key[1],
+            # Only geometry is used by the replay - keep the manifest small
+            "features": {"geometry": features.get("geometry") or {}},
+        })
+    return tokens
+
+
+def build_snapshot(sb: Any, tokens: List[Dict[str, Any]], snapshot_dir: str, timeframe: str = "1h") -> None:
+    """
+    Load every token's bar history into the snapshot bar store (tail-only for tokens
+    already cached there) and write the token manifest.
+    """
+    reader = PriceDataReader(sb, bar_store=BarStore(snapshot_dir))
+    for n, tok in enumerate(tokens, 1):
+        rows = reader.fetch_ohlc_history(tok["contract"], tok["chain"], timeframe)
+        tok["bars"] = len(rows)
+        logger.info("Snapshot %d/%d %s: %d bars", n, len(tokens), tok["ticker"], len(rows))
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp = os.path.join(snapshot_dir, f"{MANIFEST_FILE}.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"timeframe": timeframe, "tokens": tokens}, f)
+    os.replace(tmp, os.path.join(snapshot_dir, MANIFEST_FILE))
+
+
+def load_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+# --------------- Workers ---------------
+
+_worker_reader: Optional[PriceDataReader] = None
+
+
+def _init_worker(snapshot_dir: str) -> None:
+    global _worker_reader
+    # Offline reader: every worker maps the same read-only partitions
+    _worker_reader = PriceDataReader(None, bar_store=BarStore(snapshot_dir))
+    logging.getLogger("uptrend_engine").setLevel(logging.WARNING)
+
+
+def _replay_worker(
+    tok: Dict[str, Any],
+    timeframe: str,
+    days: int,
+    horizon: int,
+    results_dir: Optional[str],
+) -> Dict[str, Any]:
+    t0 = time.time()
+    rows = _worker_reader.fetch_ohlc_history(tok["contract"], tok["chain"], timeframe) if _worker_reader else []
+    if not rows:
+        raise RuntimeError("no bars in snapshot")
+    end_ts = datetime.fromtimestamp(_epoch(rows[-1]["timestamp"]), tz=timezone.utc)
+    results = replay_token(
+        tok["contract"], tok["chain"], rows, tok.get("features"), timeframe,
+        start_ts=end_ts - timedelta(days=days),
+    )
+    if results_dir:
+        path = os.path.join(results_dir, f"replay_results_v4_{tok['ticker']}_{int(end_ts.timestamp())}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, default=str)
+    summary = summarize_replay(rows, results, horizon)
+    summary["seconds"] = round(time.time() - t0, 3)
+    return summary
+
+
+# --------------- Resume file ---------------
+
+def read_progress(path: str) -> Dict[str, Dict[str, Any]]:
+    """Finished tokens from a resume file ({contract:chain -> record}); failures are retried."""
+    done: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if rec.get("ok"):
+                done[f"{rec['contract']}:{rec['chain']}"] = rec
+    return done
+
+
+def run_batch(
+    tokens: List[Dict[str, Any]],
+    snapshot_dir: str,
+    progress_path: str,
+    timeframe: str = "1h",
+    days: int = 14,
+    horizon: int = DEFAULT_HORIZON,
+    workers: Optional[int] = None,
+    results_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Replay tokens in a process pool, appending each finished token to the resume file.
+
+    Returns:
+        Aggregate report over every finished token in the resume file
+    """
+    done = read_progress(progress_path)
+    todo = [t for t in tokens if f"{t['contract']}:{t['chain']}" not in done]
+    if done:
+        print(f"Resuming: {len(done)} token(s) already done, {len(todo)} to go")
+
+    failed: List[str] = []
+    with open(progress_path, "a") as progress, ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(snapshot_dir,)
+    ) as pool:
+        futures = {pool.submit(_replay_worker, t, timeframe, days, horizon, results_dir): t for t in todo}
+        for n, fut in enumerate(as_completed(futures), 1):
+            tok = futures[fut]
+            rec: Dict[str, Any] = {"ticker": tok["ticker"], "contract": tok["contract"], "chain": tok["chain"]}
+            try:
+                rec.update(ok=True, summary=fut.result())
+                done[f"{tok['contract']}:{tok['chain']}"] = rec
+                print(f"  [{n}/{len(todo)}] ✅ {tok['ticker']} ({rec['summary']['seconds']:.2f}s)")
+            except Exception as e:
+                rec.update(ok=False, error=str(e))
+                failed.append(tok["ticker"])
+                print(f"  [{n}/{len(todo)}] ❌ {tok['ticker']}: {e}")
+            progress.write(json.dumps(rec) + "\n")
+            progress.flush()
+
+    summary = merge_summaries(rec["summary"] for rec in done.values())
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "timeframe": timeframe,
+        "days": days,
+        "horizon_bars": horizon,
+        "tokens": sorted(rec["ticker"] for rec in done.values()),
+        "failed": failed,
+        "bars": summary["bars"],
+        "states": summary["states"],
+        "transitions": dict(sorted(summary["transitions"].items(), key=lambda kv: -kv[1])),
+        "signals": signal_table(summary),
+    }
+
+
+def _pct(v: Optional[float]) -> str:
+    return f"{v * 100:.1f}" if v is not None else "-"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'='*72}")
+    print(f"BATCH REPLAY: {len(report['tokens'])} token(s), {report['bars']} bars, horizon {report['horizon_bars']} bars")
+    print(f"{'='*72}")
+    print("Transitions: " + ", ".join(f"{k}={v}" for k, v in report["transitions"].items()))
+    print(f"\n{'type':<18}{'signals':>8}{'scored':>8}{'hit%':>8}{'MFE%':>8}{'MAE%':>8}{'R/R':>7}")
+    for row in report["signals"]:
+        rr = f"{row['rr']:.2f}" if row["rr"] is not None else "-"
+        print(f"{row['type']:<18}{row['signals']:>8}{row['scored']:>8}{_pct(row['hit_rate']):>8}"
+              f"{_pct(row['avg_mfe']):>8}{_pct(row['avg_mae']):>8}{rr:>7}")
+    if report["failed"]:
+        print(f"\n❌ Failed: {', '.join(report['failed'])}")
+    print(f"{'='*72}\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parallel batch replay of Uptrend Engine v4")
+    parser.add_argument("tickers", nargs="*", help="Tickers (default: all active tokens)")
+    parser.add_argument("--days", type=int, default=14, help="Days reported per token (default: 14)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="Forward bars used to score signals")
+    parser.add_argument("--run", default=None, help="Run name (resume file / report name); reuse it to resume")
+    parser.add_argument("--snapshot-dir", default=None, help="Bar snapshot directory (default: BAR_STORE_DIR or backests/snapshot)")
+    parser.add_argument("--offline", action="store_true", help="Replay the existing snapshot without touching the database")
+    parser.add_argument("--save-results", action="store_true", help="Also write per-token replay JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    logging.getLogger("uptrend_engine").setLevel(logging.WARNING)
+
+    timeframe = "1h"
+    run_name = args.run or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    snapshot_dir = args.snapshot_dir or os.getenv("BAR_STORE_DIR") or os.path.join(OUTPUT_DIR, "snapshot")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    tickers = [t.upper() for t in args.tickers]
+
+    if args.offline:
+        tokens = load_manifest(snapshot_dir)["tokens"]
+        if tickers:
+            tokens = [t for t in tokens if t["ticker"] in tickers]
+    else:
+        from dotenv import load_dotenv  # type: ignore
+        from supabase import create_client  # type: ignore
+
+        load_dotenv()
+        url = os.getenv("SUPABASE_URL", "")
+        key = os.getenv("SUPABASE_KEY", "")
+        if not url or not key:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY are required")
+        sb = create_client(url, key)
+        tokens = list_universe(sb, tickers or None)
+        t0 = time.time()
+        build_snapshot(sb, tokens, snapshot_dir, timeframe)
+        print(f"Snapshot: {len(tokens)} token(s) in {time.time() - t0:.1f}s -> {snapshot_dir}")
+
+    if not tokens:
+        print("No tokens to replay")
+        sys.exit(1)
+
+    results_dir = None
+    if args.save_results:
+        results_dir = os.path.join(OUTPUT_DIR, f"batch_{run_name}")
+        os.makedirs(results_dir, exist_ok=True)
+
+    print(f"\nBatch replay {run_name}: {len(tokens)} token(s), {args.days} days, workers={args.workers or os.cpu_count()}")
+    t0 = time.time()
+    report = run_batch(
+        tokens,
+        snapshot_dir,
+        os.path.join(OUTPUT_DIR, f"batch_{run_name}.progress.jsonl"),
+        timeframe=timeframe,
+        days=args.days,
+        horizon=args.horizon,
+        workers=args.workers,
+        results_dir=results_dir,
+    )
+    report["run"] = run_name
+    report["seconds"] = round(time.time() - t0, 1)
+
+    report_path = os.path.join(OUTPUT_DIR, f"batch_{run_name}_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"✅ Saved report to {os.path.basename(report_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Offline replay of UptrendEngineV4 over a token's full bar history.
+
+Unlike backtest_uptrend_v4.py (one Supabase query + full TA rebuild per
+simulated hour), the replay:
+- loads the history once (PriceDataReader, bar-store aware; works offline)
+- precomputes every per-bar TA payload in one pass (ta_state.replay_ta:
+  vectorized kernel seed + O(1) incremental folds, exactly what TATracker writes)
+- steps the production state machine (UptrendEngineV4.run) bar by bar with all
+  I/O served from memory
+
+States, flags and scores therefore match production for the same bars.
+The state machine warms up from the first bar with TA; results are reported
+from the requested start.
+
+Usage:
+    python3 replay_uptrend_v4.py DREAMS 30
+    python3 replay_uptrend_v4.py --contract <mint> --chain solana --offline 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_kernel import (
+    adx_wilder_series,
+    bars_to_block,
+    rsi_series,
+)
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_state import replay_ta
+from src.intelligence.lowcap_portfolio_manager.jobs.uptrend_engine_v4 import UptrendEngineV4
+
+logger = logging.getLogger(__name__)
+
+# Feature blocks written by TA / engine / PM - dropped before a replay (no lookahead)
+REPLAY_RESET_KEYS = ("ta", "uptrend_engine_v4", "uptrend_engine_v4_meta", "uptrend_episode_meta")
+
+# EDX slow-field windows at least this long read the history-seeded ADX series:
+# the window seed's weight has decayed below (13/14)^300 ~ 2e-10 by then
+ADX_SEED_WASHOUT_BARS = 300
+
+
+class SlowFieldSeries:
+    """
+    EDX slow-field series for any window of a bar history, without per-window rebuilds.
+
+    UptrendEngineV4 seeds EMA250/333 and ADX at each EDX window start, so every
+    tick rebuilt them over the whole window (O(window) per tick, O(N^2) per
+    replay). Here, built once per history:
+    - EMA: ema_series seeded at s is e_t = b^(t-s) x_s + a (S_t - b^(t-s) S_s)
+      with S_t = b S_(t-1) + x_t, so any window's tail costs O(tail) (equal to
+      ema_series up to float rounding)
+    - RSI: only reads the last 15 closes; indexed from rsi_series (bit-identical)
+    - ADX: history-seeded series for long windows, the exact windowed kernel
+      for windows shorter than ADX_SEED_WASHOUT_BARS
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        self.block = bars_to_block(rows)
+        self.closes = self.block[:, 3]
+        self._ema_acc = {span: self._accumulate(self.closes.tolist(), 1 - 2.0 / (span + 1)) for span in (250, 333)}
+        self.rsi = rsi_series(self.closes, 14)
+        self.adx = adx_wilder_series(self.block, 14)
+
+    @staticmethod
+    def _accumulate(vals: List[float], beta: float) -> np.ndarray:
+        out = []
+        acc = 0.0
+        for v in vals:
+            acc = beta * acc + v
+            out.append(acc)
+        return np.array(out, dtype=np.float64)
+
+    def ema_tail(self, span: int, start: int, end: int, n: int) -> List[float]:
+        """ema_series(closes[start:end + 1], span)[-n:]"""
+        alpha = 2.0 / (span + 1)
+        acc = self._ema_acc[span]
+        t = np.arange(max(start, end - n + 1), end + 1)
+        decay = (1 - alpha) ** (t - start)
+        return (decay * self.closes[start] + alpha * (acc[t] - decay * acc[start])).tolist()
+
+    def series(self, start: int, end: int) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """UptrendEngineV4._slow_field_series for the window closes[start:end + 1]."""
+        length = end - start + 1
+        slope_window = min(20, length)
+        rsi_vals = self.rsi[start + max(14, length - 10):end + 1].tolist()
+        if length < 16:  # adx_series_wilder needs period + 2 bars
+            adx_tail: List[float] = []
+        elif length >= ADX_SEED_WASHOUT_BARS:
+            adx_tail = self.adx[end - 9:end + 1].tolist()
+        else:
+            adx_tail = adx_wilder_series(self.block[start:end + 1], 14)[-10:].tolist()
+        return (
+            self.ema_tail(250, start, end, slope_window),
+            self.ema_tail(333, start, end, slope_window),
+            rsi_vals,
+            adx_tail,
+        )
+
+
+def _epoch(ts: Any) -> float:
+    dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class ReplayEngine(UptrendEngineV4):
+    """UptrendEngineV4 stepped over in-memory bars (production logic, no DB)."""
+
+    def __init__(
+        self,
+        contract: str,
+        chain: str,
+        rows: List[Dict[str, Any]],
+        features: Optional[Dict[str, Any]] = None,
+        timeframe: str = "1h",
+        status: str = "active",
+    ) -> None:
+        # UptrendEngineV4.__init__ only opens a Supabase client - not needed here
+        self.sb = None
+        self.timeframe = timeframe
+        self.ta_suffix = f"_{timeframe}"
+        self.rows = rows
+        self._epochs = [_epoch(r["timestamp"]) for r in rows]
+        self._i = -1
+        feats = dict(features or {})
+        for key in REPLAY_RESET_KEYS:
+            feats.pop(key, None)
+        self.position: Dict[str, Any] = {
+            "id": "replay",
+            "token_contract": contract,
+            "token_chain": chain,
+            "features": feats,
+            "status": status,
+            "total_quantity": 0.0,
+        }
+        self.events: List[Dict[str, Any]] = []
+        self._slow_field: Optional[SlowFieldSeries] = None
+
+    # --------------- In-memory I/O ---------------
+
+    def _active_positions(self, include_regime_drivers: bool = False) -> List[Dict[str, Any]]:
+        return [self.position]
+
+    def _prefetch_latest_closes(self, positions: List[Dict[str, Any]]) -> None:
+        pass
+
+    def _write_features(self, pid: Any, features: Dict[str, Any]) -> None:
+        self.position["features"] = features
+
+    def _emit_event(self, event: str, payload: Dict[str, Any]) -> None:
+        self.events.append({"event": event, "ts": payload.get("ts"), "state": payload.get("state"), "payload": payload})
+
+    def _append_scores_log(self, contract: str, chain: str, state: str, scores: Dict[str, Any]) -> None:
+        pass
+
+    def _latest_close_1h(self, contract: str, chain: str) -> Dict[str, Any]:
+        row = self.rows[self._i]
+        return {
+            "ts": str(row.get("timestamp")),
+            "close": float(row.get("close_usd") or 0.0),
+            "low": float(row.get("low_usd") or 0.0),
+        }
+
+    def _fetch_recent_ohlc(self, contract: str, chain: str, limit: int = 400) -> List[Dict[str, Any]]:
+        return self.rows[max(0, self._i + 1 - limit):self._i + 1]
+
+    def _fetch_ohlc_since(self, contract: str, chain: str, since_iso: str, limit: int = 500) -> List[Dict[str, Any]]:
+        lo = bisect.bisect_left(self._epochs, _epoch(since_iso), 0, self._i + 1)
+        return self.rows[lo:self._i + 1][:limit]
+
+    def _slow_field_series(
+        self, window_closes: List[float], window_bars: List[Dict[str, Any]]
+    ) -> Tuple[List[float], List[float], List[float], List[float]]:
+        # EDX windows are contiguous slices of self.rows (see _fetch_ohlc_since)
+        if len(window_bars) < 10:
+            return super()._slow_field_series(window_closes, window_bars)
+        if self._slow_field is None:
+            self._slow_field = SlowFieldSeries(self.rows)
+        end = bisect.bisect_left(self._epochs, _epoch(window_bars[-1]["timestamp"]))
+        return self._slow_field.series(end - len(window_bars) + 1, end)
+
+    def _build_payload(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        payload = super()._build_payload(*args, **kwargs)
+        # Stamp with bar time, not wall-clock time
+        ts = str(self.rows[self._i].get("timestamp"))
+        payload["ts"] = ts
+        payload["meta"] = {"updated_at": ts}
+        return payload
+
+    # --------------- Replay ---------------
+
+    def step(self, i: int, ta: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Run one engine tick at bar i.
+
+        Args:
+            i: Bar index (the tick sees bars[: i + 1])
+            ta: features.ta for this bar (None = TA not written yet)
+
+        Returns:
+            The payload written this tick, or None if the engine skipped the position
+        """
+        self._i = i
+        features = self.position["features"]
+        if ta is not None:
+            features["ta"] = ta
+        before = features.get("uptrend_engine_v4")
+        self.run()
+        after = self.position["features"].get("uptrend_engine_v4")
+        return after if after is not before else None
+
+
+def replay_token(
+    contract: str,
+    chain: str,
+    rows: List[Dict[str, Any]],
+    features: Optional[Dict[str, Any]] = None,
+    timeframe: str = "1h",
+    start_ts: Optional[datetime] = None,
+    ta: Optional[List[Optional[Dict[str, Any]]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Replay the engine over a token's bars.
+
+    Args:
+        contract: Token contract
+        chain: Token chain
+        rows: Normalized OHLC rows, chronological (whole history)
+        features: Position features (geometry is kept; TA/engine state is reset)
+        timeframe: Bar timeframe
+        start_ts: First bar to report (earlier bars only warm up TA and state)
+        ta: Precomputed replay_ta(rows, timeframe) - pass it to reuse across replays
+
+    Returns:
+        [{"ts", "state", "payload"}] per bar from start_ts (payload {} when skipped)
+    """
+    if ta is None:
+        ta = replay_ta(rows, timeframe)
+    engine = ReplayEngine(contract, chain, rows, features, timeframe)
+    start_i = bisect.bisect_left(engine._epochs, start_ts.timestamp()) if start_ts else 0
+
+    results: List[Dict[str, Any]] = []
+    state = ""
+    for i in range(len(rows)):
+        payload = engine.step(i, ta[i])
+        if payload:
+            state = str(payload.get("state") or state)
+        if i >= start_i:
+            results.append({"ts": str(rows[i].get("timestamp")), "state": state, "payload": payload or {}})
+    return results
+
+
+def _load_position(sb: Any, ticker: str) -> Optional[Dict[str, Any]]:
+    res = (
+        sb.table("lowcap_positions")
+        .select("token_contract, token_chain, token_ticker, features")
+        .eq("token_ticker", ticker)
+        .eq("status", "active")
+        .limit(1)
+        .execute()
+    )
+    return (res.data or [None])[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline replay of Uptrend Engine v4")
+    parser.add_argument("ticker", nargs="?", help="Token ticker (active position)")
+    parser.add_argument("days", nargs="?", type=int, default=14, help="Days to report (default: 14)")
+    parser.add_argument("--contract", help="Token contract (instead of ticker)")
+    parser.add_argument("--chain", default="solana", help="Token chain (with --contract)")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--features-json", help="Position features JSON (geometry) for --offline runs")
+    parser.add_argument("--offline", action="store_true", help="Read bars from BAR_STORE_DIR only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    # The engine logs every tick at INFO - keep replays quiet unless asked
+    logging.getLogger("uptrend_engine").setLevel(os.getenv("ENGINE_LOG_LEVEL", "WARNING"))
+
+    features: Dict[str, Any] = {}
+    if args.features_json:
+        with open(args.features_json) as f:
+            features = json.load(f)
+
+    sb = None
+    if not args.offline:
+        from dotenv import load_dotenv  # type: ignore
+        from supabase import create_client  # type: ignore
+
+        load_dotenv()
+        sb = create_client(os.getenv("SUPABASE_URL", ""), os.getenv("SUPABASE_KEY", ""))
+
+    contract, chain, ticker = args.contract, args.chain, args.ticker or (args.contract or "")[:8]
+    if not contract:
+        if sb is None or not args.ticker:
+            parser.error("--offline needs --contract")
+        pos = _load_position(sb, args.ticker.upper())
+        if not pos:
+            print(f"Token '{args.ticker}' not found in active positions")
+            return
+        contract, chain = pos["token_contract"], pos["token_chain"]
+        ticker = pos.get("token_ticker") or ticker
+        features = features or (pos.get("features") or {})
+
+    reader = PriceDataReader(sb)
+    t0 = time.time()
+    rows = reader.fetch_ohlc_history(contract, chain, args.timeframe)
+    if not rows:
+        print("No OHLC data found")
+        return
+    t1 = time.time()
+    ta = replay_ta(rows, args.timeframe)
+    t2 = time.time()
+    end_ts = datetime.fromtimestamp(_epoch(rows[-1]["timestamp"]), tz=timezone.utc)
+    results = replay_token(contract, chain, rows, features, args.timeframe,
+                           start_ts=end_ts - timedelta(days=args.days), ta=ta)
+    t3 = time.time()
+    print(f"{ticker}: {len(rows)} bars, {len(results)} reported | load {t1 - t0:.2f}s, TA {t2 - t1:.2f}s, engine {t3 - t2:.2f}s")
+
+    output_dir = os.path.join(project_root, "backtester", "v4", "backests")
+    os.makedirs(output_dir, exist_ok=True)
+    json_filepath = os.path.join(output_dir, f"replay_results_v4_{ticker}_{int(end_ts.timestamp())}.json")
+    with open(json_filepath, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"✅ Saved results to {os.path.basename(json_filepath)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep over UptrendEngineV4 Constants.
+
+Replays a token set (bar snapshot from batch_replay_v4.py) once per parameter
+point and writes a results matrix: one row per point, one column per swept
+Constant plus the aggregate metrics (hit rate / R/R per entry type,
+transition counts).
+
+- Grid search:    --param DX_BUY_THRESHOLD=0.55,0.60,0.65 --param TS_THRESHOLD=0.55,0.60
+- Random search:  --param DX_BUY_THRESHOLD=0.50:0.70 --param FIRST_DIP_FAST_MAX_BARS=4:10 --samples 200
+  (lo:hi ranges are sampled uniformly - ints for int Constants; value lists are sampled by choice)
+
+(point, token) replays run in a process pool. Per-bar TA does not depend on any
+Constant, so each worker computes it once per token and reuses it for every
+point it replays; bars come from the shared read-only snapshot.
+
+Usage:
+    python3 sweep_uptrend_v4.py --run nightly --param DX_BUY_THRESHOLD=0.55,0.6,0.65 --workers 32
+    python3 sweep_uptrend_v4.py --run nightly --param OX_SELL_THRESHOLD=0.55:0.75 --samples 100 DREAMS BREW
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+code_dir = os.path.dirname(os.path.abspath(__file__))
+if code_dir not in sys.path:
+    sys.path.insert(0, code_dir)
+
+from src.intelligence.lowcap_portfolio_manager.data.bar_store import BarStore
+from src.intelligence.lowcap_portfolio_manager.data.price_data_reader import PriceDataReader
+from src.intelligence.lowcap_portfolio_manager.jobs.ta_state import replay_ta
+from src.intelligence.lowcap_portfolio_manager.jobs.uptrend_engine_v4 import Constants
+from batch_replay_v4 import (
+    DEFAULT_HORIZON,
+    OUTPUT_DIR,
+    SIGNAL_TYPES,
+    load_manifest,
+    merge_summaries,
+    signal_table,
+    summarize_replay,
+)
+from replay_uptrend_v4 import _epoch, replay_token
+
+logger = logging.getLogger(__name__)
+
+Point = Dict[str, Any]
+
+
+# --------------- Parameter space ---------------
+
+def _coerce(name: str, raw: str) -> Any:
+    """Parse a value with the type of the Constants default."""
+    default = getattr(Constants, name)
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes")
+    if isinstance(default, int):
+        return int(raw)
+    return float(raw)
+
+
+def parse_param(spec: str) -> Tuple[str, Any]:
+    """
+    Parse one --param spec.
+
+    Args:
+        spec: "NAME=v1,v2,..." (value list) or "NAME=lo:hi" (range, random search only)
+
+    Returns:
+        (name, [values]) or (name, (lo, hi))
+
+    Raises:
+        ValueError: Unknown Constants field or malformed spec
+    """
+    name, sep, values = spec.partition("=")
+    name = name.strip()
+    if not sep or not values:
+        raise ValueError(f"Expected NAME=values, got {spec!r}")
+    if name.startswith("_") or not hasattr(Constants, name):
+        raise ValueError(f"Unknown Constants field: {name}")
+    if ":" in values:
+        lo, hi = values.split(":", 1)
+        return name, (_coerce(name, lo), _coerce(name, hi))
+    return name, [_coerce(name, v) for v in values.split(",") if v.strip()]
+
+
+def build_points(params: Dict[str, Any], samples: int = 0, seed: int = 0) -> List[Point]:
+    """
+    Expand the parameter space into points.
+
+    Grid (cartesian product) when every param is a value list and samples == 0;
+    otherwise `samples` random points (ranges sampled uniformly, lists by choice).
+    """
+    names = list(params)
+    has_range = any(isinstance(v, tuple) for v in params.values())
+    if not samples:
+        if has_range:
+            raise ValueError("lo:hi ranges need --samples")
+        return [dict(zip(names, combo)) for combo in itertools.product(*(params[n] for n in names))]
+
+    rng = random.Random(seed)
+    points: List[Point] = []
+    for _ in range(samples):
+        point: Point = {}
+        for name in names:
+            spec = params[name]
+            if isinstance(spec, list):
+                point[name] = rng.choice(spec)
+            elif isinstance(spec[0], int) and isinstance(spec[1], int):
+                point[name] = rng.randint(spec[0], spec[1])
+            else:
+                point[name] = round(rng.uniform(float(spec[0]), float(spec[1])), 6)
+        points.append(point)
+    return points
+
+
+@contextmanager
+def override_constants(point: Point) -> Iterator[None]:
+    """Temporarily set Constants fields (the engine reads them at call time)."""
+    saved = {name: getattr(Constants, name) for name in point}
+    try:
+        for name, value in point.items():
+            setattr(Constants, name, value)
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Constants, name, value)
+
+
+# --------------- Workers ---------------
+
+_worker_reader: Optional[PriceDataReader] = None
+# Per-worker memo: (contract, chain) -> (rows, per-bar TA); independent of Constants
+_worker_cache: Dict[Tuple[str, str], Tuple[List[Dict[str, Any]], List[Optional[Dict[str, Any]]]]] = {}
+
+
+def _init_worker(snapshot_dir: str) -> None:
+    global _worker_reader
+    _worker_reader = PriceDataReader(None, bar_store=BarStore(snapshot_dir))
+    logging.getLogger("uptrend_engine").setLevel(logging.WARNING)
+
+
+def _token_inputs(tok: Dict[str, Any], timeframe: str) -> Tuple[List[Dict[str, Any]], List[Optional[Dict[str, Any]]]]:
+    key = (tok["contract"], tok["chain"])
+    if key not in _worker_cache:
+        rows = _worker_reader.fetch_ohlc_history(tok["contract"], tok["chain"], timeframe) if _worker_reader else []
+        _worker_cache[key] = (rows, replay_ta(rows, timeframe))
+    return _worker_cache[key]
+
+
+def _sweep_worker(
+    point_id: int,
+    point: Point,
+    tok: Dict[str, Any],
+    timeframe: str,
+    days: int,
+    horizon: int,
+) -> Tuple[int, Dict[str, Any]]:
+    rows, ta = _token_inputs(tok, timeframe)
+    if not rows:
+        raise RuntimeError(f"{tok['ticker']}: no bars in snapshot")
+    end_ts = datetime.fromtimestamp(_epoch(rows[-1]["timestamp"]), tz=timezone.utc)
+    with override_constants(point):
+        results = replay_token(
+            tok["contract"], tok["chain"], rows, tok.get("features"), timeframe,
+            start_ts=end_ts - timedelta(days=days), ta=ta,
+        )
+    return point_id, summarize_replay(rows, results, horizon)
+
+
+# --------------- Results matrix ---------------
+
+def matrix_row(point_id: int, point: Point, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one point's aggregate summary into a results-matrix row."""
+    row: Dict[str, Any] = {"point": point_id, **point, "tokens": summary["tokens"], "bars": summary["bars"]}
+    row["transitions"] = sum(summary["transitions"].values())
+    by_type = {r["type"]: r for r in signal_table(summary)}
+    for name, _ in SIGNAL_TYPES:
+        r = by_type.get(name) or {}
+        row[f"{name}_n"] = r.get("signals", 0)
+        row[f"{name}_hit"] = r.get("hit_rate")
+        row[f"{name}_rr"] = r.get("rr")
+    return row
+
+
+def run_sweep(
+    points: List[Point],
+    tokens: List[Dict[str, Any]],
+    snapshot_dir: str,
+    timeframe: str = "1h",
+    days: int = 14,
+    horizon: int = DEFAULT_HORIZON,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Replay every (point, token) pair in a process pool.
+
+    Tasks are submitted token-major so consecutive tasks on a worker tend to hit
+    its TA memo.
+
+    Returns:
+        Results matrix rows, ordered by point id
+    """
+    per_point: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(points))}
+    failed = 0
+    total = len(points) * len(tokens)
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(snapshot_dir,)
+    ) as pool:
+        futures = [
+            pool.submit(_sweep_worker, i, point, tok, timeframe, days, horizon)
+            for tok in tokens
+            for i, point in enumerate(points)
+        ]
+        for n, fut in enumerate(as_completed(futures), 1):
+            try:
+                point_id, summary = fut.result()
+                per_point[point_id].append(summary)
+            except Exception as e:
+                failed += 1
+                logger.warning("Sweep task failed: %s", e)
+            if n % max(1, total // 20) == 0 or n == total:
+                print(f"  {n}/{total} replays done ({failed} failed)")
+
+    return [matrix_row(i, points[i], merge_summaries(per_point[i])) for i in range(len(points))]
+
+
+def write_matrix(rows: List[Dict[str, Any]], csv_path: str) -> None:
+    if not rows:
+        return
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parameter sweep over UptrendEngineV4 Constants")
+    parser.add_argument("tickers", nargs="*", help="Tickers (default: every token in the snapshot)")
+    parser.add_argument("--param", action="append", required=True, help="NAME=v1,v2,... or NAME=lo:hi (repeatable)")
+    parser.add_argument("--samples", type=int, default=0, help="Random search with N points (default: full grid)")
+    parser.add_argument("--seed", type=int, default=0, help="Random search seed")
+    parser.add_argument("--days", type=int, default=14, help="Days scored per token (default: 14)")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="Forward bars used to score signals")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--run", default=None, help="Sweep name (output file names)")
+    parser.add_argument("--snapshot-dir", default=None, help="Bar snapshot from batch_replay_v4.py (default: BAR_STORE_DIR or backests/snapshot)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    logging.getLogger("uptrend_engine").setLevel(logging.WARNING)
+
+    try:
+        params = dict(parse_param(spec) for spec in args.param)
+        points = build_points(params, args.samples, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    snapshot_dir = args.snapshot_dir or os.getenv("BAR_STORE_DIR") or os.path.join(OUTPUT_DIR, "snapshot")
+    tokens = load_manifest(snapshot_dir)["tokens"]
+    if args.tickers:
+        wanted = {t.upper() for t in args.tickers}
+        tokens = [t for t in tokens if t["ticker"] in wanted]
+    if not tokens:
+        print("No tokens in snapshot (run batch_replay_v4.py first)")
+        sys.exit(1)
+
+    run_name = args.run or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    print(f"Sweep {run_name}: {len(points)} point(s) x {len(tokens)} token(s), params: {', '.join(params)}")
+    t0 = time.time()
+    rows = run_sweep(points, tokens, snapshot_dir, days=args.days, horizon=args.horizon, workers=args.workers)
+    elapsed = time.time() - t0
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    csv_path = os.path.join(OUTPUT_DIR, f"sweep_{run_name}.csv")
+    write_matrix(rows, csv_path)
+    with open(os.path.join(OUTPUT_DIR, f"sweep_{run_name}.json"), "w") as f:
+        json.dump({
+            "run": run_name,
+            "params": {k: list(v) for k, v in params.items()},
+            "samples": args.samples,
+            "seed": args.seed,
+            "days": args.days,
+            "horizon_bars": args.horizon,
+            "tokens": [t["ticker"] for t in tokens],
+            "seconds": round(elapsed, 1),
+            "points": rows,
+        }, f, indent=2)
+    print(f"✅ {len(points)} point(s) in {elapsed:.1f}s -> {os.path.basename(csv_path)}")
+
+
+if __name__ == "__main__":
+    main()